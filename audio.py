@@ -9,6 +9,7 @@ import random
 import pyttsx3
 from config import GAME_CONFIG
 from utils import resource_path, VOICE_AVAILABLE
+import logger
 
 class AudioManager:
     """
@@ -168,7 +169,7 @@ class MusicPlayer:
                 
         except Exception as e:
             # En caso de error, pasar a siguiente canción
-            print(f"Error reproduciendo: {e}")
+            logger.error("MUSICA", "Error reproduciendo: %s", e)
             if self.playlist:
                 self.next(show_hud=show_hud)
 
@@ -271,21 +272,23 @@ class MusicPlayer:
         """
         self.htxt = text
         self.htyp = hud_type
-        self.ht = time.time() + duration
+        self.ht = time.monotonic() + duration
 
-    def draw_hud(self, surface):
+    def draw_hud(self, surface, ctx):
         """
         Dibuja el HUD de música en la pantalla
         
         Args:
             surface: Superficie donde dibujar
+            ctx: FrameContext del frame actual (reloj monotónico)
         """
         # Verificar si el HUD debe mostrarse
-        if time.time() > self.ht or self.peace_mode:
+        now = ctx.time
+        if now > self.ht or self.peace_mode:
             return
             
         # Calcular alpha para fade-out
-        alpha = min(255, int((self.ht - time.time()) * 255))
+        alpha = min(255, int((self.ht - now) * 255))
         
         # Dimensiones del HUD
         width, height = 350, 35
@@ -332,7 +335,7 @@ class MusicPlayer:
                 bg.blit(text_surface, (margin, 8))
             else:
                 # Scroll horizontal si es muy largo
-                offset = int(time.time() * 60) % (text_width + 50)
+                offset = int(now * 60) % (text_width + 50)
                 bg.blit(text_surface, (margin - offset, 8))
                 bg.blit(text_surface, (margin - offset + text_width + 50, 8))
         
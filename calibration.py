@@ -0,0 +1,327 @@
+# calibration.py
+# Calibración de arranque: mide esta máquina y elige un preset de calidad
+# ~300 ms antes del primer frame; el resultado se guarda por huella de máquina
+
+import os
+import sys
+import json
+import math
+import time
+import hashlib
+import platform
+import pygame
+import logger
+from utils import QUALITY_LOW, QUALITY_MEDIUM, QUALITY_HIGH, NUMPY_AVAILABLE
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+# Cambiar si cambian los kernels o los umbrales (invalida las cachés)
+CALIBRATION_VERSION = 1
+CACHE_FILE_NAME = "calibration.json"
+
+# Presupuesto total de la calibración
+CALIBRATION_BUDGET_MS = 300.0
+
+# ============================================================================
+# PRESETS DE CALIDAD
+# ============================================================================
+#
+# stars: estrellas del Starfield
+# mesh: (filas, columnas) de la malla de GeometricTransformer3D (nivel de
+#       detalle máximo; con NumPy baja solo si la forma se ve pequeña)
+# lod_edge_px: arista mínima en pantalla (px) antes de bajar de nivel de
+#              detalle; más alta = menos aristas en formas pequeñas
+# backface_cull: descartar las aristas traseras de las formas cerradas
+# particles: tope de partículas por pool (SpectrumAnalyzer, SpainText;
+#            None = la capacidad de cada pool, p. ej. 4096 en el OGG)
+# bloom: bloom del modo RAVE
+QUALITY_PRESETS = {
+    "LOW": {
+        "quality": QUALITY_LOW,
+        "stars": 120,
+        "mesh": (12, 18),
+        "lod_edge_px": 8.0,
+        "backface_cull": True,
+        "particles": 600,
+        "bloom": False,
+    },
+    "MEDIUM": {
+        "quality": QUALITY_MEDIUM,
+        "stars": 180,
+        "mesh": (16, 24),
+        "lod_edge_px": 6.0,
+        "backface_cull": True,
+        "particles": 1500,
+        "bloom": True,
+    },
+    "HIGH": {
+        "quality": QUALITY_HIGH,
+        "stars": 250,
+        "mesh": (20, 30),
+        "lod_edge_px": 4.0,
+        "backface_cull": False,
+        "particles": None,
+        "bloom": True,
+    },
+}
+
+# Coste estimado del frame (fracción del presupuesto a 60 FPS) por preset:
+# hasta 0.35 -> HIGH, hasta 0.6 -> MEDIUM, por encima -> LOW
+HIGH_MAX_LOAD = 0.35
+MEDIUM_MAX_LOAD = 0.6
+
+
+# ============================================================================
+# KERNELS DE MEDIDA
+# ============================================================================
+#
+# Cada kernel hace un lote de trabajo representativo y devuelve cuántas
+# unidades hizo; FRAME_UNITS dice cuántas de esas unidades hay en un frame
+# típico del juego, para estimar el coste total.
+
+FRAME_UNITS = {
+    "blit": 300,  # Sprites con alpha (scroller, burbujas, lluvia, estela)
+    "line": 1500,  # Aristas de la malla + estelas del Starfield
+    "transform": 1,  # Rotación y proyección de la malla (600 vértices)
+    "smoothscale": 1,  # Bloom: reducción y ampliación de pantalla completa
+    "text": 12,  # Textos renderizados por frame (HUD, avatar, monitor)
+}
+
+
+def _kernel_blit(state):
+    canvas, sprite = state["canvas"], state["sprite"]
+    w, h = canvas.get_size()
+    for i in range(100):
+        canvas.blit(sprite, ((i * 37) % (w - 64), (i * 53) % (h - 64)))
+    return 100
+
+
+def _kernel_line(state):
+    canvas = state["canvas"]
+    w, h = canvas.get_size()
+    draw_line = pygame.draw.line
+    for i in range(200):
+        draw_line(
+            canvas,
+            (i % 256, 200, 255),
+            ((i * 13) % w, (i * 7) % h),
+            ((i * 29) % w, (i * 17) % h),
+        )
+    return 200
+
+
+def _kernel_transform(state):
+    vertices = state["vertices"]
+    angle = state["angle"] = state["angle"] + 0.01
+    c, s = math.cos(angle), math.sin(angle)
+    if NUMPY_AVAILABLE:
+        rotation = np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+        rotated = vertices @ rotation.T
+        factor = 400.0 / (rotated[:, 2] + 4.0)
+        state["projected"] = rotated[:, :2] * factor[:, None]
+    else:
+        projected = []
+        for x, y, z in vertices:
+            rx, rz = x * c + z * s, -x * s + z * c
+            factor = 400.0 / (rz + 4.0)
+            projected.append((rx * factor, y * factor))
+        state["projected"] = projected
+    return 1
+
+
+def _kernel_smoothscale(state):
+    canvas = state["canvas"]
+    w, h = canvas.get_size()
+    small = pygame.transform.smoothscale(canvas, (w // 4, h // 4))
+    pygame.transform.smoothscale(small, (w, h))
+    return 1
+
+
+def _kernel_text(state):
+    font = state["font"]
+    for i in range(4):
+        font.render(f"CALIBRANDO {i} 0123456789", True, (255, 255, 255))
+    return 4
+
+
+KERNELS = {
+    "blit": _kernel_blit,
+    "line": _kernel_line,
+    "transform": _kernel_transform,
+    "smoothscale": _kernel_smoothscale,
+    "text": _kernel_text,
+}
+
+
+def _make_state(size):
+    """Superficies y datos de prueba en el formato de pantalla"""
+    canvas = pygame.Surface(size)
+    sprite = pygame.Surface((64, 64), pygame.SRCALPHA)
+    if pygame.display.get_surface() is not None:
+        canvas = canvas.convert()
+        sprite = sprite.convert_alpha()
+    canvas.fill((10, 10, 18))
+    pygame.draw.circle(sprite, (255, 120, 0, 160), (32, 32), 30)
+
+    if not pygame.font.get_init():
+        pygame.font.init()
+
+    # Malla de 20x30 vértices, como la de GeometricTransformer3D
+    points = [
+        (i / 19.0 - 0.5, j / 29.0 - 0.5, ((i * j) % 7) / 7.0)
+        for i in range(20)
+        for j in range(30)
+    ]
+    vertices = np.array(points) if NUMPY_AVAILABLE else points
+
+    return {
+        "canvas": canvas,
+        "sprite": sprite,
+        "font": pygame.font.Font(None, 24),
+        "vertices": vertices,
+        "angle": 0.0,
+    }
+
+
+def run_calibration(size, budget_ms=CALIBRATION_BUDGET_MS):
+    """
+    Mide los kernels con el presupuesto repartido a partes iguales
+
+    Returns:
+        {kernel: ms por unidad} (mejor lote de cada kernel)
+    """
+    state = _make_state(size)
+    slice_s = budget_ms / 1000.0 / len(KERNELS)
+    timings = {}
+
+    for name, kernel in KERNELS.items():
+        kernel(state)  # Calentamiento (cachés, fuentes, asignaciones)
+        best = None
+        deadline = time.perf_counter() + slice_s
+        while True:
+            start = time.perf_counter()
+            units = kernel(state)
+            elapsed = (time.perf_counter() - start) * 1000.0 / units
+            if best is None or elapsed < best:
+                best = elapsed
+            if time.perf_counter() >= deadline:
+                break
+        timings[name] = best
+    return timings
+
+
+def estimate_frame_ms(timings):
+    """Coste estimado de un frame típico a partir de los tiempos por unidad"""
+    return sum(timings[name] * units for name, units in FRAME_UNITS.items())
+
+
+def pick_preset(frame_ms, fps=60):
+    """Nombre del preset para un coste de frame estimado"""
+    load = frame_ms / (1000.0 / max(1, fps))
+    if load <= HIGH_MAX_LOAD:
+        return "HIGH"
+    if load <= MEDIUM_MAX_LOAD:
+        return "MEDIUM"
+    return "LOW"
+
+
+# ============================================================================
+# CACHÉ POR MÁQUINA
+# ============================================================================
+
+
+def machine_fingerprint(size):
+    """
+    Huella de la máquina y del entorno de render: si cambia algo que afecte
+    al rendimiento (CPU, versiones, driver de vídeo, tamaño), se recalibra
+    """
+    parts = [
+        CALIBRATION_VERSION,
+        platform.system(),
+        platform.machine(),
+        platform.processor(),
+        os.cpu_count(),
+        platform.python_implementation(),
+        sys.version_info[:2],
+        pygame.version.ver,
+        pygame.get_sdl_version(),
+        np.__version__ if NUMPY_AVAILABLE else None,
+        pygame.display.get_driver() if pygame.display.get_init() else None,
+        tuple(size),
+    ]
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+    return digest[:16]
+
+
+def _load_cache(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, data):
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    except OSError as e:
+        logger.warning("CALIBRACIÓN", "No se pudo guardar %s: %s", path, e)
+
+
+# ============================================================================
+# SELECCIÓN DEL PRESET
+# ============================================================================
+
+
+def choose_preset(size, cache_dir, override="AUTO", force=False, fps=60):
+    """
+    Preset de calidad para esta máquina
+
+    Args:
+        size: Tamaño de la ventana
+        cache_dir: Carpeta del archivo de caché
+        override: "AUTO" o un preset ("LOW", "MEDIUM", "HIGH") de la config
+        force: Ignorar la caché y volver a medir
+        fps: FPS objetivo
+    Returns:
+        (nombre del preset, preset, origen: "config", "caché" o "medido",
+         coste estimado del frame en ms o None)
+    """
+    override = str(override or "AUTO").upper()
+    if override in QUALITY_PRESETS:
+        return override, QUALITY_PRESETS[override], "config", None
+
+    path = os.path.join(cache_dir, CACHE_FILE_NAME)
+    fingerprint = machine_fingerprint(size)
+    cache = _load_cache(path)
+
+    entry = cache.get(fingerprint)
+    if not force and entry and entry.get("preset") in QUALITY_PRESETS:
+        name = entry["preset"]
+        return name, QUALITY_PRESETS[name], "caché", entry.get("frame_ms")
+
+    start = time.perf_counter()
+    timings = run_calibration(size)
+    frame_ms = estimate_frame_ms(timings)
+    name = pick_preset(frame_ms, fps)
+    logger.info(
+        "CALIBRACIÓN",
+        "%.0f ms de medida, frame estimado %.1f ms -> %s (%s)",
+        (time.perf_counter() - start) * 1000.0,
+        frame_ms,
+        name,
+        ", ".join(f"{k} {v * 1000:.1f} us" for k, v in timings.items()),
+    )
+
+    cache[fingerprint] = {
+        "preset": name,
+        "frame_ms": round(frame_ms, 3),
+        "timings_ms": {k: round(v, 6) for k, v in timings.items()},
+        "created": time.time(),
+    }
+    _save_cache(path, cache)
+    return name, QUALITY_PRESETS[name], "medido", frame_ms
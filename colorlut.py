@@ -0,0 +1,264 @@
+# colorlut.py
+# Tablas de color precalculadas: plasma, mapa de calor, espectro y tinte RAVE
+# Los degradados se calculan una vez; cada color del frame es una consulta
+
+import math
+import colorsys
+
+# Con NumPy las tablas también existen como arrays para consultas en bloque
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# RESOLUCIÓN DE LAS TABLAS
+# ============================================================================
+GRADIENT_SIZE = 1024  # Entradas de los degradados continuos (plasma, calor)
+PULSE_LEVELS = 64  # Niveles del pulso BPM en la tabla del espectro
+VALUE_LEVELS = 256  # Niveles de intensidad para el alpha del espectro
+HUE_STEPS = 256  # Tonos del tinte RAVE
+
+
+def _quantize(value, size):
+    """Índice de 0..size-1 para un valor en [0, 1] (se recorta)"""
+    if value <= 0.0:
+        return 0
+    if value >= 1.0:
+        return size - 1
+    return int(value * (size - 1) + 0.5)
+
+
+def _quantize_array(values, size):
+    return (np.clip(values, 0.0, 1.0) * (size - 1) + 0.5).astype(np.intp)
+
+
+# ============================================================================
+# DEGRADADOS DE REFERENCIA (solo para construir las tablas)
+# ============================================================================
+
+
+def _plasma_gradient(plasma_val):
+    """
+    Color del plasma para plasma_val en [0, 1], sin brillo extra
+
+    Returns:
+        (r, g, b, oscilante): en el tramo 0.5-0.75 el rojo depende del
+        tiempo y se calcula al consultar
+    """
+    if plasma_val < 0.25:
+        return (
+            int(1020 * plasma_val),
+            int(200 * plasma_val),
+            int(255 * (0.5 + plasma_val)),
+            False,
+        )
+    if plasma_val < 0.5:
+        f = (plasma_val - 0.25) * 4
+        return (
+            int(255 * (1 - f * 0.5)),
+            int(255 * f),
+            int(150 * (1 - plasma_val)),
+            False,
+        )
+    if plasma_val < 0.75:
+        return (
+            200,
+            int(100 + 155 * plasma_val),
+            int(255 * (plasma_val - 0.5) * 2),
+            True,
+        )
+    f = (plasma_val - 0.75) * 4
+    return (255, int(255 * (1 - f)), int(255 * f), False)
+
+
+def _heat_gradient(val):
+    """Mapa de calor: azul -> rojo y, por encima de 0.9, hacia blanco"""
+    hue = 0.7 - (val * 0.7)
+    saturation = 1.0
+    if val > 0.9:
+        saturation = max(0.0, 1.0 - ((val - 0.9) * 10.0))
+        hue = 0.0
+    r, g, b = colorsys.hsv_to_rgb(hue, saturation, 1.0)
+    return (int(r * 255), int(g * 255), int(b * 255))
+
+
+def _frequency_gradient(position, bpm_pulse):
+    """
+    Color del espectro por frecuencia: bajas=rojo, medias=verde, altas=azul
+
+    Args:
+        position: Barra / número de barras (0-1)
+        bpm_pulse: Pulso BPM (0-1)
+    """
+    pulse_boost = bpm_pulse * 0.3
+
+    if position < 0.3:  # Bajas frecuencias
+        r = 255 + int(pulse_boost * 100)
+        g = int(80 + position * 200 + pulse_boost * 80)
+        b = int(50 * position + pulse_boost * 50)
+    elif position < 0.7:  # Frecuencias medias
+        r = int(255 * (0.7 - position) * 2.5 + pulse_boost * 50)
+        g = 255 + int(pulse_boost * 100)
+        b = int(100 * (position - 0.3) * 2.5 + pulse_boost * 50)
+    else:  # Altas frecuencias
+        r = int(100 * (1.0 - position) * 3.3 + pulse_boost * 30)
+        g = int(200 * (1.0 - position) * 3.3 + pulse_boost * 50)
+        b = 255 + int(pulse_boost * 100)
+
+    return (max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b)))
+
+
+# ============================================================================
+# SERVICIO DE TABLAS
+# ============================================================================
+
+
+class ColorLUT:
+    """
+    Degradados precalculados con consulta por valor cuantizado
+
+    Las consultas sueltas devuelven tuplas de int nativos (listas para
+    pygame.draw); las de arrays (sufijo _array) necesitan NumPy.
+    """
+
+    def __init__(self):
+        size = GRADIENT_SIZE
+        steps = [i / (size - 1) for i in range(size)]
+
+        plasma = [_plasma_gradient(v) for v in steps]
+        self.plasma_table = [entry[:3] for entry in plasma]
+        self.plasma_oscillating = [entry[3] for entry in plasma]
+        self.heat_table = [_heat_gradient(v) for v in steps]
+
+        self.tint_table = []
+        for i in range(HUE_STEPS):
+            r, g, b = colorsys.hsv_to_rgb(i / HUE_STEPS, 0.7, 1.0)
+            self.tint_table.append((int(r * 255), int(g * 255), int(b * 255)))
+
+        # Alpha del espectro: intensidad x pulso
+        self.alpha_table = [
+            [
+                min(
+                    255,
+                    int(
+                        180
+                        + (v / (VALUE_LEVELS - 1)) * 75
+                        + p / (PULSE_LEVELS - 1) * 50
+                    ),
+                )
+                for p in range(PULSE_LEVELS)
+            ]
+            for v in range(VALUE_LEVELS)
+        ]
+        self._spectrum_tables = {}  # nº de barras -> [pulso][barra] -> (r, g, b)
+
+        if NUMPY_AVAILABLE:
+            self.plasma_array_table = np.array(self.plasma_table, dtype=np.int64)
+            self.plasma_oscillating_array = np.array(self.plasma_oscillating)
+            self.heat_array_table = np.array(self.heat_table, dtype=np.int64)
+
+    # ------------------------------------------------------------------
+    # Plasma
+    # ------------------------------------------------------------------
+
+    def plasma(self, wave, time_val, intensity):
+        """
+        Color del plasma
+
+        Args:
+            wave: Media de las ondas del plasma (-1 a 1)
+            time_val: Tiempo del plasma (oscilación del rojo)
+            intensity: Intensidad (desplaza el degradado y añade brillo)
+        """
+        index = _quantize(min(1.0, (wave + 1) * 0.5 + intensity * 0.3), GRADIENT_SIZE)
+        r, g, b = self.plasma_table[index]
+        if self.plasma_oscillating[index]:
+            r = int(200 + 55 * math.sin(time_val * 3))
+
+        boost = intensity * 0.8 * 255
+        if boost > 1:
+            r = min(255, int(r + boost * 0.23))
+            g = min(255, int(g + boost * 0.15))
+            b = min(255, int(b + boost * 0.31))
+        return (r, g, b)
+
+    def plasma_array(self, wave, time_val, intensity):
+        """plasma() para un array de ondas: array (N, 3)"""
+        index = _quantize_array((wave + 1) * 0.5 + intensity * 0.3, GRADIENT_SIZE)
+        colors = self.plasma_array_table[index]
+        oscillating = self.plasma_oscillating_array[index]
+        if oscillating.any():
+            colors[oscillating, 0] = int(200 + 55 * math.sin(time_val * 3))
+
+        boost = intensity * 0.8 * 255
+        if boost > 1:
+            colors = np.minimum(
+                255, (colors + boost * np.array([0.23, 0.15, 0.31])).astype(np.int64)
+            )
+        return colors
+
+    # ------------------------------------------------------------------
+    # Mapa de calor
+    # ------------------------------------------------------------------
+
+    def heat(self, val):
+        """Color del mapa de calor para val en [0, 1]"""
+        return self.heat_table[_quantize(val, GRADIENT_SIZE)]
+
+    def heat_array(self, values):
+        """heat() para un array de valores: array (N, 3)"""
+        return self.heat_array_table[_quantize_array(values, GRADIENT_SIZE)]
+
+    # ------------------------------------------------------------------
+    # Espectro
+    # ------------------------------------------------------------------
+
+    def _spectrum_table(self, bars):
+        table = self._spectrum_tables.get(bars)
+        if table is None:
+            table = [
+                [
+                    _frequency_gradient(index / bars, p / (PULSE_LEVELS - 1))
+                    for index in range(bars)
+                ]
+                for p in range(PULSE_LEVELS)
+            ]
+            self._spectrum_tables[bars] = table
+        return table
+
+    def spectrum(self, index, value, bpm_pulse, bars):
+        """
+        Color RGBA de una barra del espectro
+
+        Args:
+            index: Barra (se recorta a 0..bars-1)
+            value: Intensidad 0-1 (alpha)
+            bpm_pulse: Pulso BPM 0-1 (brillo y alpha)
+            bars: Número de barras
+        """
+        index = max(0, min(bars - 1, int(index)))
+        pulse = _quantize(bpm_pulse, PULSE_LEVELS)
+        r, g, b = self._spectrum_table(bars)[pulse][index]
+        return (r, g, b, self.alpha_table[_quantize(value, VALUE_LEVELS)][pulse])
+
+    # ------------------------------------------------------------------
+    # Tinte RAVE
+    # ------------------------------------------------------------------
+
+    def tint(self, hue):
+        """Color saturado al 70% para un tono (0-1, cíclico)"""
+        return self.tint_table[int(hue * HUE_STEPS) % HUE_STEPS]
+
+
+_shared_lut = None
+
+
+def color_lut():
+    """Tablas compartidas (se construyen en la primera consulta)"""
+    global _shared_lut
+    if _shared_lut is None:
+        _shared_lut = ColorLUT()
+    return _shared_lut
@@ -0,0 +1,371 @@
+# compositor.py
+# Backends de presentación: blit de superficies en CPU o Renderer/Texture de SDL2
+# El bucle principal compone el frame y le añade capas; el backend decide dónde
+
+import os
+import pygame
+import logger
+from present import DirtyRectPresenter
+from postfx import PostProcessor
+
+# Modos de mezcla de las capas
+BLEND_ALPHA = "alpha"  # Mezcla normal con alpha por píxel, opacidad global
+BLEND_ADD = "add"  # Suma de un sprite premultiplicado (o opaco), escalado por alpha
+BLEND_PREMULTIPLIED = "premultiplied"  # Sprite premultiplicado sobre el frame
+
+# Modos de mezcla de SDL (SDL_BlendMode)
+_SDL_BLENDMODE_BLEND = 1
+_SDL_BLENDMODE_ADD = 2
+# SDL_ComposeCustomBlendMode(ONE, ONE_MINUS_SRC_ALPHA, ADD) en color y alpha
+_SDL_BLENDMODE_PREMULTIPLIED = 0x06210621
+
+
+# ============================================================================
+# BACKEND CPU (por defecto)
+# ============================================================================
+
+
+class SurfaceCompositor:
+    """
+    Presentación clásica: las capas se mezclan en CPU sobre el frame y se
+    hace blit a la pantalla + flip()
+
+    Uso por frame:
+        compositor.begin(frame, offset)
+        compositor.layer("scanlines", scanline_surf, (0, y), alpha=255)
+        compositor.fill((40, 40, 40))
+        compositor.present()
+    """
+
+    name = "surface"
+
+    def __init__(self, screen, dirty_threshold=0.35, postfx=None):
+        """
+        Args:
+            screen: Superficie de pantalla (pygame.display.set_mode)
+            dirty_threshold: Umbral de flip completo en present_dirty()
+            postfx: PostProcessor para mezclar las capas (None = sin hilos)
+        """
+        self.screen = screen
+        self.postfx = postfx or PostProcessor(1)
+        self.frame = None
+        self.offset = (0, 0)
+        self.dirty_presenter = DirtyRectPresenter(screen.get_size(), dirty_threshold)
+
+    @property
+    def export_surface(self):
+        """Superficie con el frame presentado (para FrameExporter)"""
+        return self.screen
+
+    def set_caption(self, text):
+        pygame.display.set_caption(text)
+
+    def set_icon(self, image):
+        pygame.display.set_icon(image)
+
+    def begin(self, frame, offset=(0, 0)):
+        """
+        Empieza un frame
+
+        Args:
+            frame: Frame compuesto en CPU (las capas se mezclan sobre él)
+            offset: Desplazamiento del frame en pantalla (shake)
+        """
+        self.frame = frame
+        self.offset = (int(offset[0]), int(offset[1]))
+
+    def layer(
+        self,
+        key,
+        surface,
+        dest=(0, 0),
+        alpha=255,
+        blend=BLEND_ALPHA,
+        size=None,
+        dynamic=False,
+        smooth=False,
+    ):
+        """
+        Añade una capa sobre el frame
+
+        Args:
+            key: Nombre de la capa (caché de texturas en el backend SDL2)
+            surface: Sprite de la capa
+            dest: Posición (x, y) en el frame
+            alpha: Opacidad 0-255
+            blend: BLEND_ALPHA, BLEND_ADD o BLEND_PREMULTIPLIED
+            size: Tamaño final (None = el del sprite); se escala al dibujar
+            dynamic: True si el contenido cambia cada frame
+            smooth: Escalado suave (smoothscale) en lugar de vecino más próximo
+        """
+        if size is not None and tuple(size) != surface.get_size():
+            scale = pygame.transform.smoothscale if smooth else pygame.transform.scale
+            surface = scale(surface, (int(size[0]), int(size[1])))
+
+        if blend == BLEND_ADD:
+            self.postfx.add(self.frame, surface, dest, alpha)
+        elif blend == BLEND_PREMULTIPLIED:
+            self.postfx.premultiplied(self.frame, surface, dest, alpha)
+        else:
+            self.postfx.blend(self.frame, surface, dest, alpha)
+
+    def fill(self, color, blend=BLEND_ADD):
+        """Rellena todo el frame con un color (sumado o mezclado)"""
+        if blend == BLEND_ADD:
+            self.frame.fill(color, special_flags=pygame.BLEND_RGB_ADD)
+        else:
+            self.frame.fill(color)
+
+    def present(self):
+        """Lleva el frame a pantalla"""
+        self.screen.blit(self.frame, self.offset)
+        pygame.display.flip()
+
+    def present_dirty(self, surface, rects):
+        """
+        Presenta una escena dibujada directamente en pantalla que informa
+        de sus zonas cambiadas (ver present.DirtyRectPresenter)
+        """
+        return self.dirty_presenter.present(rects)
+
+    def dirty_stats(self):
+        return self.dirty_presenter.stats()
+
+
+# ============================================================================
+# BACKEND SDL2 RENDERER (opcional)
+# ============================================================================
+
+
+class RendererCompositor:
+    """
+    Presentación con pygame._sdl2: el frame se sube a una textura y las
+    capas se componen con el escalado, la mezcla y la modulación de alpha
+    del Renderer (GPU si hay aceleración, renderer software si no)
+
+    Los sprites estáticos se suben una sola vez (caché por clave); los
+    dinámicos reutilizan una textura de streaming por clave y tamaño.
+
+    La ventana visible es una Window de SDL2; la de pygame.display queda
+    oculta y solo sirve como superficie de dibujo y formato de convert().
+    """
+
+    name = "renderer"
+
+    def __init__(self, screen, title="", vsync=True):
+        """
+        Args:
+            screen: Superficie de pantalla (set_mode con pygame.HIDDEN)
+            title: Título de la ventana visible
+            vsync: Sincronizar present() con el refresco
+        Raises:
+            pygame.error (o ImportError) si SDL2 no puede crear el renderer
+        """
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        # Escalado lineal en las texturas (bloom, flare)
+        os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "1")
+
+        self._Texture = Texture
+        self.screen = screen
+        self.size = screen.get_size()
+        self.window = Window(title, size=self.size)
+
+        try:
+            self.renderer = Renderer(self.window, accelerated=1, vsync=vsync)
+            self.accelerated = True
+        except Exception:
+            # Sin aceleración (máquina sin GPU, servidor sin pantalla)
+            self.renderer = Renderer(self.window, accelerated=0)
+            self.accelerated = False
+
+        self.frame_texture = Texture(self.renderer, self.size, streaming=True)
+        self.premultiplied_mode = self._premultiplied_mode()
+        self.static_textures = {}  # clave -> (textura, id del sprite)
+        self.dynamic_textures = {}  # (clave, tamaño) -> textura
+        self.frame = None
+        self.offset = (0, 0)
+
+        logger.info(
+            "COMPOSITOR",
+            "Renderer SDL2 %s (%dx%d)",
+            "acelerado" if self.accelerated else "software",
+            self.size[0],
+            self.size[1],
+        )
+
+    def _premultiplied_mode(self):
+        """
+        Modo de mezcla para sprites premultiplicados. El renderer por software
+        no admite modos a medida: ahí se mezclan como alpha normal, que da lo
+        mismo en sprites negros (viñeta, scanlines)
+        """
+        probe = self._Texture(self.renderer, (1, 1))
+        try:
+            probe.blend_mode = _SDL_BLENDMODE_PREMULTIPLIED
+            return _SDL_BLENDMODE_PREMULTIPLIED
+        except pygame.error:
+            return _SDL_BLENDMODE_BLEND
+
+    @property
+    def export_surface(self):
+        """
+        Frame compuesto en CPU (sin las capas del Renderer): leer la textura
+        de vuelta costaría más que toda la composición
+        """
+        return self.frame if self.frame is not None else self.screen
+
+    def set_caption(self, text):
+        self.window.title = text
+
+    def set_icon(self, image):
+        self.window.set_icon(image)
+
+    def _prepare(self, surface, blend):
+        """Sprite listo para subir: opaco para BLEND_ADD, con alpha si no"""
+        if blend == BLEND_ADD and surface.get_flags() & pygame.SRCALPHA:
+            # Premultiplicado -> RGB opaco: la suma de SDL multiplica por el
+            # alpha del origen, y así el alpha pasa a ser la modulación de color
+            return surface.convert()
+        return surface
+
+    def _texture_for(self, key, surface, blend, dynamic):
+        """Textura de una capa (subida solo si es nueva o dinámica)"""
+        if dynamic:
+            cache_key = (key, surface.get_size())
+            texture = self.dynamic_textures.get(cache_key)
+            if texture is None:
+                texture = self._Texture(
+                    self.renderer, surface.get_size(), streaming=True
+                )
+                self.dynamic_textures[cache_key] = texture
+            texture.update(self._prepare(surface, blend))
+            return texture
+
+        cached = self.static_textures.get(key)
+        if cached is None or cached[1] != id(surface):
+            texture = self._Texture.from_surface(
+                self.renderer, self._prepare(surface, blend)
+            )
+            cached = (texture, id(surface))
+            self.static_textures[key] = cached
+        return cached[0]
+
+    def begin(self, frame, offset=(0, 0)):
+        """Sube el frame y lo dibuja como fondo"""
+        self.frame = frame
+        self.offset = (int(offset[0]), int(offset[1]))
+        self.frame_texture.update(frame)
+
+        self.renderer.draw_color = (0, 0, 0, 255)
+        self.renderer.clear()
+        self.frame_texture.draw(dstrect=pygame.Rect(self.offset, self.size))
+
+    def layer(
+        self,
+        key,
+        surface,
+        dest=(0, 0),
+        alpha=255,
+        blend=BLEND_ALPHA,
+        size=None,
+        dynamic=False,
+        smooth=False,
+    ):
+        """Dibuja una capa con el Renderer (mismos argumentos que SurfaceCompositor)"""
+        texture = self._texture_for(key, surface, blend, dynamic)
+        alpha = max(0, min(255, int(alpha)))
+
+        if blend == BLEND_ADD:
+            texture.blend_mode = _SDL_BLENDMODE_ADD
+            texture.alpha = 255
+            texture.color = (alpha, alpha, alpha)
+        elif self.premultiplied_mode == _SDL_BLENDMODE_PREMULTIPLIED and (
+            blend == BLEND_PREMULTIPLIED
+        ):
+            # Color y alpha escalados por igual: sigue premultiplicado
+            texture.blend_mode = _SDL_BLENDMODE_PREMULTIPLIED
+            texture.alpha = alpha
+            texture.color = (alpha, alpha, alpha)
+        else:
+            texture.blend_mode = _SDL_BLENDMODE_BLEND
+            texture.alpha = alpha
+            texture.color = (255, 255, 255)
+
+        if size is None:
+            size = surface.get_size()
+        x = int(dest[0]) + self.offset[0]
+        y = int(dest[1]) + self.offset[1]
+        texture.draw(dstrect=pygame.Rect(x, y, int(size[0]), int(size[1])))
+
+    def fill(self, color, blend=BLEND_ADD):
+        """Rellena la pantalla con un color (sumado o mezclado)"""
+        renderer = self.renderer
+        renderer.draw_color = (*color[:3], 255)
+        renderer.draw_blend_mode = (
+            _SDL_BLENDMODE_ADD if blend == BLEND_ADD else _SDL_BLENDMODE_BLEND
+        )
+        renderer.fill_rect(pygame.Rect((0, 0), self.size))
+        renderer.draw_blend_mode = 0
+
+    def present(self):
+        self.renderer.present()
+
+    def present_dirty(self, surface, rects):
+        """
+        Sube solo las zonas cambiadas de la escena a la textura del frame
+        (el Renderer redibuja la ventana entera, pero la subida es mínima)
+        """
+        if rects is None or self.frame is None:
+            self.frame_texture.update(surface)
+        else:
+            bounds = surface.get_rect()
+            for rect in DirtyRectPresenter.merge(rects):
+                rect = rect.clip(bounds)
+                if rect.w > 0 and rect.h > 0:
+                    self.frame_texture.update(surface.subsurface(rect), area=rect)
+        self.frame = surface
+
+        self.renderer.clear()
+        self.frame_texture.draw()
+        self.renderer.present()
+        return "partial"
+
+    def dirty_stats(self):
+        return None
+
+
+# ============================================================================
+# SELECCIÓN DE BACKEND
+# ============================================================================
+
+
+def create_compositor(
+    backend, size, title="", vsync=True, dirty_threshold=0.35, postfx=None
+):
+    """
+    Crea la ventana y el backend de presentación
+
+    Args:
+        backend: "surface" o "renderer"
+        size: (ancho, alto) de la ventana
+        title: Título de la ventana
+        vsync: Sincronización vertical (solo renderer)
+        dirty_threshold: Umbral de flip completo en present_dirty()
+        postfx: PostProcessor para las capas del backend de superficies
+    Returns:
+        SurfaceCompositor o RendererCompositor; si SDL2 falla, vuelve al
+        backend de superficies con una ventana normal
+    """
+    if backend == "renderer":
+        screen = pygame.display.set_mode(size, pygame.HIDDEN)
+        try:
+            return RendererCompositor(screen, title, vsync)
+        except Exception as e:
+            logger.warning(
+                "COMPOSITOR", "Renderer SDL2 no disponible (%s); usando CPU", e
+            )
+
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption(title)
+    return SurfaceCompositor(screen, dirty_threshold, postfx)
@@ -0,0 +1,629 @@
+# drawcmd.py
+# Buffer de comandos de dibujo: los efectos graban primitivas en vez de pintar
+# El buffer las ordena, descarta las que caen fuera, fusiona y ejecuta de golpe
+
+from collections import Counter
+import pygame
+from sprites import byte_order, pixel_rows
+
+# Sin NumPy los comandos masivos (points, segments) se dibujan uno a uno
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Blits cuyo orden no altera el resultado (la suma saturada es conmutativa)
+COMMUTATIVE_FLAGS = frozenset(
+    (
+        pygame.BLEND_ADD,
+        pygame.BLEND_RGB_ADD,
+        pygame.BLEND_RGBA_ADD,
+        pygame.BLEND_RGB_MAX,
+        pygame.BLEND_RGBA_MAX,
+    )
+)
+
+
+class DrawCommand:
+    """
+    Una primitiva grabada (ver CommandBuffer)
+
+    kind: "line", "lines", "polygon", "circle", "rect", "point", "blit", "fill",
+          "points" o "segments" (estos dos, masivos: arrays de muchas primitivas)
+    """
+
+    __slots__ = ("target", "kind", "args", "bounds", "tag", "sort_key")
+
+    def __init__(self, target, kind, args, bounds, tag, sort_key):
+        self.target = target
+        self.kind = kind
+        self.args = args
+        self.bounds = bounds  # pygame.Rect afectado (None = toda la superficie)
+        self.tag = tag  # Efecto que lo grabó
+        self.sort_key = sort_key
+
+
+def _array_bounds(xs, ys, pad=0):
+    """Rect que cubre las coordenadas de dos arrays (None si están vacíos)"""
+    if len(xs) == 0:
+        return None
+    x0, y0 = int(xs.min()) - pad, int(ys.min()) - pad
+    return pygame.Rect(
+        x0, y0, int(xs.max()) - x0 + pad + 1, int(ys.max()) - y0 + pad + 1
+    )
+
+
+def _points_bounds(points, width):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    x0, y0 = int(min(xs)), int(min(ys))
+    pad = max(1, int(width))
+    return pygame.Rect(
+        x0 - pad,
+        y0 - pad,
+        int(max(xs)) - x0 + 2 * pad + 1,
+        int(max(ys)) - y0 + 2 * pad + 1,
+    )
+
+
+# ============================================================================
+# BUFFER DE COMANDOS
+# ============================================================================
+
+
+class CommandBuffer:
+    """
+    Lista de comandos de dibujo de un frame
+
+    Uso:
+        with commands.scope("Starfield"):
+            commands.line(canvas, color, p1, p2)
+            commands.blit(canvas, sprite, pos, special_flags=pygame.BLEND_RGB_ADD)
+        commands.execute()
+
+    Al ejecutar, los comandos se ordenan por pasada, superficie destino,
+    capa y estado; las primitivas que caen fuera del clip del destino se
+    descartan; los blits seguidos sobre el mismo destino van en una sola
+    llamada a Surface.blits() y las líneas encadenadas en draw.lines().
+
+    El orden de grabación solo se altera donde no cambia la imagen:
+    - Cada superficie conserva su propio orden, salvo en tramos de blits
+      aditivos (conmutativos), que se agrupan por sprite.
+    - Si un comando lee una superficie que ya tiene comandos (o dibuja en
+      una que otro ya leyó), empieza una pasada nueva que se ejecuta después.
+    """
+
+    def __init__(self):
+        self.commands = []
+        self.tag = None
+        self.layer = 0
+
+        # Estado de grabación del frame
+        self._pass = 0
+        self._written = set()  # id() de destinos escritos en la pasada
+        self._read = set()  # id() de superficies leídas en la pasada
+        self._ranks = {}  # id(destino) -> orden de primera aparición
+        self._run = 0  # Tramo conmutativo actual
+        self._seq = 0
+
+        # Estadísticas
+        self.frames = 0
+        self.recorded = 0
+        self.culled = 0
+        self.merged = 0
+        self.calls = 0
+        self.last_frame = Counter()  # (efecto, tipo) -> comandos del último frame
+        self._frame_open = False  # Ya hubo un execute() en este frame
+        self.per_tag = Counter()  # efecto -> comandos acumulados
+
+    # ------------------------------------------------------------------
+    # Grabación
+    # ------------------------------------------------------------------
+
+    def scope(self, tag, layer=0):
+        """Contexto que etiqueta los comandos con el efecto y la capa"""
+        return _Scope(self, tag, layer)
+
+    def _record(self, target, kind, args, bounds, state=None, source=None):
+        target_id = id(target)
+
+        # Dependencias entre superficies: nueva pasada si hace falta
+        if (source is not None and id(source) in self._written) or (
+            target_id in self._read
+        ):
+            self._pass += 1
+            self._written.clear()
+            self._read.clear()
+        self._written.add(target_id)
+        if source is not None:
+            self._read.add(id(source))
+
+        rank = self._ranks.setdefault(target_id, len(self._ranks))
+        if state is None:
+            # No conmutativo: tramo propio
+            self._run += 1
+            group, state = self._run, 0
+            self._run += 1
+        else:
+            group = self._run
+
+        self._seq += 1
+        self.commands.append(
+            DrawCommand(
+                target,
+                kind,
+                args,
+                bounds,
+                self.tag,
+                (self._pass, rank, self.layer, group, state, self._seq),
+            )
+        )
+
+    def line(self, target, color, start, end, width=1):
+        self._record(
+            target,
+            "line",
+            (color, start, end, width),
+            _points_bounds((start, end), width),
+        )
+
+    def lines(self, target, color, closed, points, width=1):
+        self._record(
+            target,
+            "lines",
+            (color, closed, points, width),
+            _points_bounds(points, width),
+        )
+
+    def polygon(self, target, color, points, width=0):
+        self._record(
+            target, "polygon", (color, points, width), _points_bounds(points, width)
+        )
+
+    def circle(self, target, color, center, radius, width=0):
+        r = int(radius) + 1
+        bounds = pygame.Rect(int(center[0]) - r, int(center[1]) - r, 2 * r, 2 * r)
+        self._record(target, "circle", (color, center, radius, width), bounds)
+
+    def rect(self, target, color, rect, width=0):
+        rect = pygame.Rect(rect)
+        self._record(target, "rect", (color, rect, width), rect)
+
+    def point(self, target, color, pos):
+        self._record(
+            target, "point", (color, pos), pygame.Rect(int(pos[0]), int(pos[1]), 1, 1)
+        )
+
+    def points(self, target, positions, colors):
+        """
+        Muchos píxeles sueltos de una vez
+
+        Args:
+            positions: Array (N, 2) de enteros x, y (o secuencia de tuplas)
+            colors: Array (N, 3) RGB o (N, 4) RGBA (o secuencia de colores)
+        """
+        if len(positions) == 0:
+            return
+        if NUMPY_AVAILABLE and isinstance(positions, np.ndarray):
+            bounds = _array_bounds(positions[:, 0], positions[:, 1])
+        else:
+            bounds = _points_bounds(positions, 0)
+        self._record(target, "points", (positions, colors), bounds)
+
+    def segments(self, target, starts, ends, colors, widths=None):
+        """
+        Muchas líneas rectas de una vez (estelas, rayos)
+
+        Args:
+            starts, ends: Arrays (N, 2) con los extremos (o secuencias de tuplas)
+            colors: Array (N, 3) RGB o (N, 4) RGBA (o secuencia de colores)
+            widths: Array (N,) de grosores 1-3 (None = 1 px)
+        """
+        if len(starts) == 0:
+            return
+        # Los extremos pueden caer muy lejos: se recortan al dibujar, así que
+        # el rect solo sirve para descartar el comando entero
+        if NUMPY_AVAILABLE and isinstance(starts, np.ndarray):
+            xs = np.concatenate((starts[:, 0], ends[:, 0]))
+            ys = np.concatenate((starts[:, 1], ends[:, 1]))
+            bounds = _array_bounds(xs, ys, 2)
+        else:
+            bounds = _points_bounds(list(starts) + list(ends), 3)
+        self._record(target, "segments", (starts, ends, colors, widths), bounds)
+
+    def blit(self, target, source, dest, area=None, special_flags=0):
+        size = pygame.Rect(area).size if area is not None else source.get_size()
+        bounds = pygame.Rect(dest if len(dest) == 2 else dest[:2], size)
+        state = id(source) if special_flags in COMMUTATIVE_FLAGS else None
+        self._record(
+            target,
+            "blit",
+            (source, dest, area, special_flags),
+            bounds,
+            state,
+            source,
+        )
+
+    def fill(self, target, color, rect=None, special_flags=0):
+        bounds = pygame.Rect(rect) if rect is not None else None
+        self._record(target, "fill", (color, rect, special_flags), bounds)
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def execute(self, end_frame=True):
+        """
+        Ordena, descarta, fusiona y dibuja los comandos grabados
+
+        Args:
+            end_frame: False si el frame vuelve a ejecutar el buffer más
+                       tarde (lo dibujado entre medias debe ir debajo); las
+                       estadísticas cuentan un solo frame
+
+        Returns:
+            Llamadas de dibujo realizadas
+        """
+        commands = self.commands
+        self.commands = []
+        self._pass = 0
+        self._written.clear()
+        self._read.clear()
+        self._ranks.clear()
+
+        counts = Counter((c.tag, c.kind) for c in commands)
+        if self._frame_open:
+            self.last_frame.update(counts)
+        else:
+            self.last_frame = counts
+        self._frame_open = not end_frame
+        if end_frame:
+            self.frames += 1
+        self.per_tag.update(c.tag for c in commands)
+        self.recorded += len(commands)
+        if not commands:
+            return 0
+
+        commands.sort(key=lambda c: c.sort_key)
+
+        calls = 0
+        clips = {}
+        pending_blits = []  # Blits seguidos sobre el mismo destino
+        pending_line = None  # [destino, color, puntos] de líneas encadenadas
+        blit_target = None
+
+        for command in commands:
+            target = command.target
+            clip = clips.get(id(target))
+            if clip is None:
+                clip = clips[id(target)] = target.get_clip()
+
+            if command.bounds is not None and not clip.colliderect(command.bounds):
+                self.culled += 1
+                continue
+
+            kind = command.kind
+            args = command.args
+
+            # Fusión de blits
+            if kind == "blit":
+                if pending_line is not None:
+                    calls += self._draw_polyline(pending_line)
+                    pending_line = None
+                if blit_target is not target and pending_blits:
+                    calls += self._flush_blits(blit_target, pending_blits)
+                    pending_blits = []
+                blit_target = target
+                pending_blits.append(args)
+                continue
+
+            if pending_blits:
+                calls += self._flush_blits(blit_target, pending_blits)
+                pending_blits = []
+
+            # Fusión de líneas de 1 px encadenadas del mismo color
+            if kind == "line" and args[3] == 1:
+                color, start, end, _ = args
+                if (
+                    pending_line is not None
+                    and pending_line[0] is target
+                    and pending_line[1] == color
+                    and pending_line[2][-1] == start
+                ):
+                    pending_line[2].append(end)
+                    self.merged += 1
+                    continue
+                if pending_line is not None:
+                    calls += self._draw_polyline(pending_line)
+                pending_line = [target, color, [start, end]]
+                continue
+
+            if pending_line is not None:
+                calls += self._draw_polyline(pending_line)
+                pending_line = None
+
+            self._draw(target, kind, args)
+            calls += 1
+
+        if pending_blits:
+            calls += self._flush_blits(blit_target, pending_blits)
+        if pending_line is not None:
+            calls += self._draw_polyline(pending_line)
+
+        self.calls += calls
+        return calls
+
+    def _flush_blits(self, target, blits):
+        if len(blits) == 1:
+            source, dest, area, flags = blits[0]
+            target.blit(source, dest, area, flags)
+        else:
+            self.merged += len(blits) - 1
+            target.blits(blits, doreturn=False)
+        return 1
+
+    @staticmethod
+    def _draw_polyline(pending):
+        target, color, points = pending
+        if len(points) == 2:
+            pygame.draw.line(target, color, points[0], points[1], 1)
+        else:
+            pygame.draw.lines(target, color, False, points, 1)
+        return 1
+
+    @staticmethod
+    def _draw(target, kind, args):
+        if kind == "point":
+            target.set_at(args[1], args[0])
+        elif kind == "line":
+            pygame.draw.line(target, *args)
+        elif kind == "lines":
+            pygame.draw.lines(target, *args)
+        elif kind == "polygon":
+            pygame.draw.polygon(target, *args)
+        elif kind == "circle":
+            pygame.draw.circle(target, *args)
+        elif kind == "rect":
+            pygame.draw.rect(target, *args)
+        elif kind == "fill":
+            color, rect, flags = args
+            target.fill(color, rect, flags)
+        elif kind == "points":
+            _draw_points(target, *args)
+        elif kind == "segments":
+            _draw_segments(target, *args)
+
+    # ------------------------------------------------------------------
+    # Estadísticas
+    # ------------------------------------------------------------------
+
+    def stats(self):
+        """Comandos grabados, descartados y fusionados, y llamadas por frame"""
+        frames = max(1, self.frames)
+        return {
+            "frames": self.frames,
+            "recorded": self.recorded / frames,
+            "culled": self.culled / frames,
+            "merged": self.merged / frames,
+            "calls": self.calls / frames,
+            "per_tag": {tag: count / frames for tag, count in self.per_tag.items()},
+        }
+
+    def summary(self):
+        """Líneas de texto para el informe de salida"""
+        stats = self.stats()
+        lines = [
+            f"Comandos/frame: {stats['recorded']:.0f} | "
+            f"descartados {stats['culled']:.1f} | fusionados {stats['merged']:.1f} | "
+            f"llamadas {stats['calls']:.0f}"
+        ]
+        for tag, count in sorted(stats["per_tag"].items(), key=lambda i: -i[1]):
+            lines.append(f"  {tag or '-'}: {count:.0f} comandos/frame")
+        return lines
+
+
+# ============================================================================
+# COMANDOS MASIVOS
+# ============================================================================
+#
+# Con NumPy, los píxeles de points/segments se calculan en arrays y se
+# escriben de golpe en el buffer de la superficie; si no (o si el formato
+# no lo permite), se dibujan con set_at()/draw.line() uno a uno.
+
+
+def _writable(target):
+    """Superficie de 24/32 bits con los canales RGB en bytes enteros"""
+    if target.get_bytesize() not in (3, 4) or target.get_parent() is not None:
+        return False
+    order = byte_order(target)
+    return all(order.get(c) is not None for c in "RGB")
+
+
+def _pixel_values(target, colors):
+    """
+    Colores RGB (N, 3) o RGBA (N, 4) en el formato de píxel de la superficie
+    (sin alpha, opacos; como set_at(), el alpha se escribe, no se mezcla)
+    """
+    colors = np.asarray(colors)
+    if target.get_bytesize() != 4:
+        return colors[:, :3].astype(np.uint8)
+    red, green, blue, alpha = target.get_shifts()
+    alpha_mask = target.get_masks()[3]
+    colors = colors.astype(np.uint32)
+    values = (colors[:, 0] << red) | (colors[:, 1] << green) | (colors[:, 2] << blue)
+    if alpha_mask and colors.shape[1] == 4:
+        return values | (colors[:, 3] << alpha)
+    return values | np.uint32(alpha_mask)
+
+
+def _write_pixels(target, xs, ys, values):
+    """Escribe valores de _pixel_values() en (xs, ys), ya dentro del clip"""
+    if target.get_bytesize() == 4:
+        # Un entero por píxel: una sola escritura dispersa
+        height = target.get_height()
+        pixels = np.frombuffer(target.get_buffer(), dtype=np.uint32)
+        pixels.reshape(height, target.get_pitch() // 4)[ys, xs] = values
+        return
+
+    rows = pixel_rows(target)
+    order = byte_order(target)
+    for channel, name in enumerate("RGB"):
+        rows[ys, xs, order[name]] = values[:, channel]
+
+
+def _inside(clip, xs, ys):
+    return (xs >= clip.left) & (xs < clip.right) & (ys >= clip.top) & (ys < clip.bottom)
+
+
+def _draw_points(target, positions, colors):
+    if not (
+        NUMPY_AVAILABLE and isinstance(positions, np.ndarray) and _writable(target)
+    ):
+        for pos, color in zip(positions, colors):
+            target.set_at((int(pos[0]), int(pos[1])), tuple(color))
+        return
+
+    xs, ys = positions[:, 0], positions[:, 1]
+    mask = _inside(target.get_clip(), xs, ys)
+    values = _pixel_values(target, colors)
+    _write_pixels(target, xs[mask], ys[mask], values[mask])
+
+
+def clip_segments(starts, ends, rect):
+    """
+    Recorta segmentos a un rect (Liang-Barsky vectorizado)
+
+    Args:
+        starts, ends: Arrays (N, 2) de extremos
+        rect: pygame.Rect (píxeles incluidos: left..right-1, top..bottom-1)
+    Returns:
+        (máscara de segmentos que tocan el rect, inicios, finales recortados)
+    """
+    x0, y0 = starts[:, 0].astype(np.float64), starts[:, 1].astype(np.float64)
+    dx = ends[:, 0] - x0
+    dy = ends[:, 1] - y0
+    t0 = np.zeros(len(x0))
+    t1 = np.ones(len(x0))
+    keep = np.ones(len(x0), dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in (
+            (-dx, x0 - rect.left),
+            (dx, rect.right - 1 - x0),
+            (-dy, y0 - rect.top),
+            (dy, rect.bottom - 1 - y0),
+        ):
+            keep &= ~((p == 0) & (q < 0))
+            r = q / p
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    keep &= t0 <= t1
+
+    clipped_starts = np.stack((x0 + t0 * dx, y0 + t0 * dy), axis=1)
+    clipped_ends = np.stack((x0 + t1 * dx, y0 + t1 * dy), axis=1)
+    return keep, clipped_starts, clipped_ends
+
+
+def raster_segments(starts, ends):
+    """
+    Píxeles de segmentos de 1 px (DDA con un paso por píxel del eje mayor)
+
+    No reproduce bit a bit el Bresenham de draw.line(): algún píxel del
+    eje puede caer uno más allá, dentro de las tolerancias de golden_frames
+
+    Returns:
+        (xs, ys, índice del segmento de cada píxel, máscara de segmentos
+        empinados: los que reparten el grosor en x)
+    """
+    x0, y0 = np.rint(starts[:, 0]), np.rint(starts[:, 1])
+    dx = np.rint(ends[:, 0]) - x0
+    dy = np.rint(ends[:, 1]) - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy)).astype(np.intp)
+    counts = steps + 1
+
+    segment = np.repeat(np.arange(len(steps)), counts)
+    first = np.cumsum(counts) - counts
+    t = (np.arange(int(counts.sum())) - first[segment]) / np.maximum(steps, 1)[segment]
+    xs = np.floor(x0[segment] + dx[segment] * t + 0.5).astype(np.intp)
+    ys = np.floor(y0[segment] + dy[segment] * t + 0.5).astype(np.intp)
+    # Empate (diagonal) como en draw.line(): eje mayor y, grosor en x
+    steep = np.abs(dy) >= np.abs(dx)
+    return xs, ys, segment, steep
+
+
+def _draw_segments(target, starts, ends, colors, widths):
+    if not (NUMPY_AVAILABLE and isinstance(starts, np.ndarray) and _writable(target)):
+        if widths is None:
+            widths = [1] * len(starts)
+        for start, end, color, width in zip(starts, ends, colors, widths):
+            pygame.draw.line(target, tuple(color), tuple(start), tuple(end), int(width))
+        return
+
+    clip = target.get_clip()
+    if widths is not None:
+        widths = np.asarray(widths)
+    widest = int(widths.max()) if widths is not None and len(widths) else 1
+
+    # Margen para que el grosor no se corte en el borde del clip
+    margin = widest // 2 + 1
+    keep, starts, ends = clip_segments(
+        starts, ends, clip.inflate(2 * margin, 2 * margin)
+    )
+    starts, ends = starts[keep], ends[keep]
+    values = _pixel_values(target, np.asarray(colors)[keep])
+    xs, ys, segment, steep = raster_segments(starts, ends)
+
+    if widest > 1:
+        # El grosor se reparte en el eje menor, como en draw.line(): cada
+        # píxel del eje se repite una vez por columna (o fila) del tramo.
+        # Las copias quedan en orden de segmento, así que donde se pisan
+        # gana el último, como al pintarlos uno a uno
+        repeat = widths[keep][segment]
+        first = np.cumsum(repeat) - repeat
+        segment = np.repeat(segment, repeat)
+        offset = np.arange(len(segment)) - np.repeat(first + (repeat - 1) // 2, repeat)
+        shift = offset * steep[segment]
+        xs = np.repeat(xs, repeat) + shift
+        ys = np.repeat(ys, repeat) + offset - shift
+
+    mask = _inside(clip, xs, ys)
+    _write_pixels(target, xs[mask], ys[mask], values[segment[mask]])
+
+
+def diff_frames(before, after):
+    """
+    Diferencia entre dos CommandBuffer.last_frame
+
+    Returns:
+        {(efecto, tipo): cambio en nº de comandos} (solo los que cambian)
+    """
+    keys = set(before) | set(after)
+    return {
+        key: after.get(key, 0) - before.get(key, 0)
+        for key in keys
+        if after.get(key, 0) != before.get(key, 0)
+    }
+
+
+class _Scope:
+    """Contexto de CommandBuffer.scope()"""
+
+    __slots__ = ("buffer", "tag", "layer", "previous")
+
+    def __init__(self, buffer, tag, layer):
+        self.buffer = buffer
+        self.tag = tag
+        self.layer = layer
+        self.previous = None
+
+    def __enter__(self):
+        buffer = self.buffer
+        self.previous = (buffer.tag, buffer.layer)
+        buffer.tag, buffer.layer = self.tag, self.layer
+        return buffer
+
+    def __exit__(self, *exc):
+        self.buffer.tag, self.buffer.layer = self.previous
+        return False
@@ -7,16 +7,28 @@ import random
 import math
 import time
 import os
-import colorsys
 from config import GAME_CONFIG
 from utils import (
     Point3D,
-    clamp_val,
+    EffectRandom,
     safe_color,
-    draw_circle_alpha,
     resource_path,
     NUMPY_AVAILABLE,
 )
+from sprites import (
+    prepare_surface,
+    prepare_sprite,
+    audit_blit,
+    SpriteAtlas,
+    SpriteBatch,
+    bake_alpha,
+    quantize,
+)
+from drawcmd import CommandBuffer
+from particles import ParticlePool, ParticleSprites, draw_circles
+from colorlut import color_lut
+from visualizers import VISUALIZERS, IDLE_RELEASE_TIME
+import logger
 
 # Import condicional de numpy (mejora rendimiento si disponible)
 if NUMPY_AVAILABLE:
@@ -30,6 +42,13 @@ COS = math.cos
 PI = math.pi
 SQRT = math.sqrt
 
+# Pasos de cuantización de las variantes de sprites guardadas en atlas
+RAIN_ALPHA_STEP = 8  # Opacidad de los caracteres de PeaceCodeRain
+
+# Capacidad (tope duro) de los pools de partículas de cada emisor
+TRAIL_PARTICLES = 64  # Chispas de vértices de GeometricTransformer3D
+BLAST_PARTICLES = 100  # Explosión del evento Praxis
+
 # ============================================================================
 # CLASE STARFIELD: Fondo estelar con efecto de movimiento 3D
 # ============================================================================
@@ -45,9 +64,11 @@ class Starfield:
     - Estelas de luz (Light Trails).
     """
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, num_stars=250, rng=None):
+        """rng: EffectRandom de las estrellas (None = uno nuevo)"""
         self.w, self.h = width, height
-        self.num_stars = 250  # Densidad media-alta
+        self.num_stars = num_stars  # Densidad (preset de calidad; 250 = alta)
+        self.rng = rng or EffectRandom()
 
         # Paletas de colores para alternar (Cyberpunk, Matrix, Inferno, Ice)
         self.palettes = [
@@ -58,6 +79,10 @@ class Starfield:
         ]
         self.current_palette_idx = 0
 
+        # Con NumPy las estrellas viven en arrays paralelos (uno por campo)
+        # y cada frame se procesan todas a la vez: miles de estrellas cuestan
+        # lo mismo que cientos en el bucle escalar
+        self.vectorized = NUMPY_AVAILABLE
         self.stars = []
         self._init_stars()
 
@@ -72,26 +97,68 @@ class Starfield:
 
     def _init_stars(self):
         """Inicializa estrellas con propiedades extendidas"""
+        if self.vectorized:
+            self._init_star_arrays()
+            return
+
         self.stars = []
         palette = self.palettes[self.current_palette_idx]
+        rng = self.rng
 
         for _ in range(self.num_stars):
             self.stars.append(
                 {
-                    "x": random.uniform(-self.w, self.w),
-                    "y": random.uniform(-self.h, self.h),
-                    "z": random.uniform(10, self.w * 2),
-                    "base_color": random.choice(palette),  # Color asignado
+                    "x": rng.uniform(-self.w, self.w),
+                    "y": rng.uniform(-self.h, self.h),
+                    "z": rng.uniform(10, self.w * 2),
+                    "base_color": palette[rng.index(len(palette))],  # Color asignado
                     "prev_sx": None,
                     "prev_sy": None,
                 }
             )
 
-    def draw(self, surface, intensity, bpm_data=None):
+    def _init_star_arrays(self):
+        """
+        Buffer de estrellas en arrays contiguos:
+        x, y, z (posición), prev_sx, prev_sy (último punto en pantalla),
+        has_prev (hay estela) y color (índice en palette_table)
+        """
+        n = self.num_stars
+        # Un random() por campo y estrella, en el orden del bucle escalar
+        draws = self.rng.random_array(n * 4).reshape(n, 4)
+        self.x = self._uniform(-self.w, self.w, draws[:, 0])
+        self.y = self._uniform(-self.h, self.h, draws[:, 1])
+        self.z = self._uniform(10, self.w * 2, draws[:, 2])
+        self.prev_sx = np.zeros(n, dtype=np.int64)
+        self.prev_sy = np.zeros(n, dtype=np.int64)
+        self.has_prev = np.zeros(n, dtype=bool)
+
+        # Todas las paletas en una tabla: color = paleta * 3 + tono
+        self.palette_table = np.array(self.palettes, dtype=np.float64).reshape(-1, 3)
+        self.color = self._palette_colors(draws[:, 3])
+
+    @staticmethod
+    def _uniform(low, high, draws):
+        """uniform(low, high) a partir de valores de random() ya sacados"""
+        return low + (high - low) * draws
+
+    def _palette_colors(self, draws):
+        """Índices de color de la paleta actual para valores de random()"""
+        palette_size = len(self.palettes[self.current_palette_idx])
+        return self.current_palette_idx * palette_size + (draws * palette_size).astype(
+            np.int64
+        )
+
+    def draw(self, surface, intensity, bpm_data=None, commands=None):
         """
         Dibuja el Starfield reactivo.
+
+        Args:
+            commands: CommandBuffer donde grabar las primitivas (None = dibujar ya)
         """
-        cx, cy = self.w // 2, self.h // 2
+        immediate = commands is None
+        if immediate:
+            commands = CommandBuffer()
 
         # ====================================================================
         # 1. PROCESAMIENTO BPM (REACCIÓN MUSICAL)
@@ -104,14 +171,22 @@ class Starfield:
             is_strong_beat = bpm_data.get("strong_beat", False)
 
             # Cambio de paleta cada 16 o 32 beats (cambio de sección musical)
-            if is_strong_beat and random.random() < 0.05:
+            if is_strong_beat and self.rng.random() < 0.05:
                 self.current_palette_idx = (self.current_palette_idx + 1) % len(
                     self.palettes
                 )
-                palette = self.palettes[self.current_palette_idx]
-                for s in self.stars:
-                    if random.random() < 0.1:
-                        s["base_color"] = random.choice(palette)
+                # Primero la tirada de cada estrella y luego los colores nuevos
+                if self.vectorized:
+                    recolor = self.rng.random_array(self.num_stars) < 0.1
+                    self.color[recolor] = self._palette_colors(
+                        self.rng.random_array(int(recolor.sum()))
+                    )
+                else:
+                    palette = self.palettes[self.current_palette_idx]
+                    rolls = [self.rng.random() for _ in self.stars]
+                    for s, roll in zip(self.stars, rolls):
+                        if roll < 0.1:
+                            s["base_color"] = palette[self.rng.index(len(palette))]
 
         # ====================================================================
         # 2. FÍSICA AGRESIVA
@@ -125,18 +200,28 @@ class Starfield:
         speed = 8.0 * self.warp_factor
 
         # Rotación de Cámara:
-        rotation_kick = beat_pulse * 0.05 * (1 if random.random() > 0.5 else -1)
+        rotation_kick = beat_pulse * 0.05 * (1 if self.rng.random() > 0.5 else -1)
         self.angle += self.angle_vel + rotation_kick
 
-        sin_a = math.sin(self.angle)
-        cos_a = math.cos(self.angle)
-
         # FOV (Zoom) dinámico
         fov = 350 + (beat_pulse * 150) + (intensity * 50)
 
         # ====================================================================
         # 3. RENDERIZADO Y LÓGICA DE ESTRELLAS
         # ====================================================================
+        if self.vectorized:
+            self._draw_arrays(surface, commands, speed, fov, beat_pulse, is_strong_beat)
+        else:
+            self._draw_loop(surface, commands, speed, fov, beat_pulse, is_strong_beat)
+
+        if immediate:
+            commands.execute()
+
+    def _draw_loop(self, surface, commands, speed, fov, beat_pulse, is_strong_beat):
+        """Estrellas una a una (sin NumPy)"""
+        cx, cy = self.w // 2, self.h // 2
+        sin_a = math.sin(self.angle)
+        cos_a = math.cos(self.angle)
 
         for star in self.stars:
             # MOVER Z
@@ -145,12 +230,12 @@ class Starfield:
             # Respawn
             if star["z"] <= 1:
                 star["z"] = self.w * 2
-                star["x"] = random.uniform(-self.w, self.w)
-                star["y"] = random.uniform(-self.h, self.h)
+                star["x"] = self.rng.uniform(-self.w, self.w)
+                star["y"] = self.rng.uniform(-self.h, self.h)
                 star["prev_sx"] = None
                 star["prev_sy"] = None
                 palette = self.palettes[self.current_palette_idx]
-                star["base_color"] = random.choice(palette)
+                star["base_color"] = palette[self.rng.index(len(palette))]
                 continue
 
             # ROTACIÓN 2D
@@ -194,7 +279,7 @@ class Starfield:
                         if is_strong_beat and star["z"] < 500:
                             width = 3
 
-                        pygame.draw.line(
+                        commands.line(
                             surface,
                             final_color,
                             (star["prev_sx"], star["prev_sy"]),
@@ -203,12 +288,76 @@ class Starfield:
                         )
 
                 if not draw_line:
-                    surface.set_at((sx, sy), final_color)
+                    commands.point(surface, final_color, (sx, sy))
 
             # Guardar histórico
             star["prev_sx"] = sx
             star["prev_sy"] = sy
 
+    def _draw_arrays(self, surface, commands, speed, fov, beat_pulse, is_strong_beat):
+        """
+        Todas las estrellas a la vez: mismo algoritmo que _draw_loop() con
+        máscaras en lugar de ramas, y un solo comando de puntos y otro de
+        estelas
+        """
+        # MOVER Z y respawn de las que pasan la cámara
+        self.z -= speed
+        respawn = self.z <= 1
+        count = int(respawn.sum())
+        if count:
+            # x, y y color de cada estrella en orden, como en _draw_loop()
+            draws = self.rng.random_array(count * 3).reshape(count, 3)
+            self.z[respawn] = self.w * 2
+            self.x[respawn] = self._uniform(-self.w, self.w, draws[:, 0])
+            self.y[respawn] = self._uniform(-self.h, self.h, draws[:, 1])
+            self.has_prev[respawn] = False
+            self.color[respawn] = self._palette_colors(draws[:, 2])
+        alive = ~respawn
+
+        # ROTACIÓN 2D y PROYECCIÓN
+        sin_a = math.sin(self.angle)
+        cos_a = math.cos(self.angle)
+        factor = fov / np.maximum(0.1, self.z)
+        sx = ((self.x * cos_a - self.y * sin_a) * factor + self.w // 2).astype(np.int64)
+        sy = ((self.x * sin_a + self.y * cos_a) * factor + self.h // 2).astype(np.int64)
+
+        visible = alive & (sx >= 0) & (sx < self.w) & (sy >= 0) & (sy < self.h)
+
+        # Brillo por profundidad, potenciado con el beat
+        z = self.z[visible]
+        brightness = np.clip(1.0 - z / (self.w * 2), 0.0, 1.0) + beat_pulse * 0.5
+        np.minimum(brightness, 1.0, out=brightness)
+        colors = (self.palette_table[self.color[visible]] * brightness[:, None]).astype(
+            np.int64
+        )
+
+        # WARP LINES: estela desde el punto del frame anterior
+        vx, vy = sx[visible], sy[visible]
+        px, py = self.prev_sx[visible], self.prev_sy[visible]
+        trail = self.has_prev[visible]
+        if self.warp_factor <= 2.0:
+            trail &= (vx - px) ** 2 + (vy - py) ** 2 > 25
+
+        if trail.any():
+            widths = np.where(z[trail] < 300, 2, 1)
+            if is_strong_beat:
+                widths[z[trail] < 500] = 3
+            commands.segments(
+                surface,
+                np.stack((px[trail], py[trail]), axis=1),
+                np.stack((vx[trail], vy[trail]), axis=1),
+                colors[trail],
+                widths,
+            )
+
+        dots = ~trail
+        commands.points(surface, np.stack((vx[dots], vy[dots]), axis=1), colors[dots])
+
+        # Guardar histórico
+        self.prev_sx[alive] = sx[alive]
+        self.prev_sy[alive] = sy[alive]
+        self.has_prev[alive] = True
+
     def toggle_palette(self):
         """Fuerza cambio manual de paleta"""
         self.current_palette_idx = (self.current_palette_idx + 1) % len(self.palettes)
@@ -224,14 +373,29 @@ class GeometricTransformer3D:
     Sistema de transformación 3D con múltiples formas geométricas
     """
 
-    def __init__(self, width, height):
+    # Niveles de detalle (camino NumPy): la malla del preset es el máximo y
+    # cada nivel divide filas y columnas entre 2 hasta LOD_MIN_MESH. Se baja
+    # de nivel cuando las aristas medirían menos de lod_min_edge_px en
+    # pantalla (LOD_MIN_EDGE_PX salvo que el preset de calidad diga otra cosa)
+    LOD_MIN_EDGE_PX = 4.0
+    LOD_MIN_MESH = (6, 8)
+
+    # Margen del descarte de aristas fuera de pantalla (cubre el grosor)
+    CULL_MARGIN = 4
+
+    # Formas cerradas: solo en ellas las caras traseras quedan ocultas
+    CLOSED_SHAPES = ("SPHERE", "TORUS")
+
+    def __init__(self, width, height, mesh=(20, 30), rng=None):
+        """rng: EffectRandom del jitter, chispas y fantasmas (None = uno nuevo)"""
         self.w, self.h = width, height
+        self.rng = rng or EffectRandom()
 
         # Formas geométricas disponibles
         self.shapes = ["SPHERE", "TORUS", "KNOT", "CYLINDER"]
         self.curr = 0
         self.tp = 0.0
-        self.lt = time.time()
+        self.lt = time.monotonic()
         self.it = False
         self.rot = Point3D(0, 0, 0)
         self.dragging = False
@@ -239,12 +403,35 @@ class GeometricTransformer3D:
 
         # Efectos especiales
         self.electric_pulses = []
-        self.particle_trails = []
+        self.particle_trails = ParticlePool(
+            TRAIL_PARTICLES, ("x", "y", "life", "r", "g", "b")
+        )
+        self.trail_sprites = ParticleSprites()
         self.plasma_time = 0.0
 
-        # Resolución de malla
-        self.rows = 20
-        self.cols = 30
+        # Resolución de malla (filas, columnas; según preset de calidad)
+        self.rows, self.cols = mesh
+
+        # Con NumPy las formas son arrays (N, 3) y las aristas (E, 2): la
+        # transformación y los colores se calculan de una vez por frame
+        self.vectorized = NUMPY_AVAILABLE
+
+        # Degradados de plasma y mapa de calor precalculados
+        self.colors = color_lut()
+
+        # Descartar aristas de caras traseras y arista mínima del nivel de
+        # detalle (preset de calidad)
+        self.cull_backfaces = False
+        self.lod_min_edge_px = self.LOD_MIN_EDGE_PX
+
+        # Lado mayor de la caja que ocupó la forma en pantalla en el último
+        # frame (None = aún sin dibujar)
+        self.screen_extent = None
+
+        # Aristas del último frame, para el monitor: enviadas (las de la
+        # malla del nivel de detalle) y dibujadas (tras el descarte)
+        self.edges_submitted = 0
+        self.edges_drawn = 0
 
         # Optimización: Superficie persistente para efectos fantasma
         self.ghost_surf = pygame.Surface((width, height), pygame.SRCALPHA)
@@ -254,6 +441,10 @@ class GeometricTransformer3D:
 
     def gen(self):
         """Genera la geometría base para todas las formas"""
+        if self.vectorized:
+            self._gen_arrays()
+            return
+
         self.sd = {}
         self.ed = []
 
@@ -318,6 +509,117 @@ class GeometricTransformer3D:
 
             self.sd[shape_name] = vertices
 
+    def _gen_arrays(self):
+        """
+        gen() con NumPy: vértices (N, 3) por forma y aristas (E, 2) para
+        cada nivel de detalle (self.lods[0] es la malla del preset)
+        """
+        self.lods = []
+        rows, cols = self.rows, self.cols
+        min_rows, min_cols = self.LOD_MIN_MESH
+        while True:
+            self.lods.append(self._mesh_arrays(rows, cols))
+            rows, cols = rows // 2, cols // 2
+            if rows < min_rows or cols < min_cols:
+                break
+
+        self.lod = 0
+        self.sd = self.lods[0]["sd"]
+        self.ed = self.lods[0]["ed"]
+
+    def _mesh_arrays(self, rows, cols):
+        """Un nivel de detalle: {"mesh", "sd", "ed", "orientation"}"""
+        # ARISTAS: para cada vértice, la del vecino de columna y la de la
+        # fila siguiente (mismo orden que gen())
+        index = np.arange(rows * cols).reshape(rows, cols)
+        right = np.stack((index, np.roll(index, -1, axis=1)), axis=2)
+        down = np.stack((index, index + cols), axis=2)
+        pairs = np.stack((right, down), axis=2)
+        edges = np.concatenate(
+            (pairs[:-1].reshape(-1, 2), pairs[-1, :, 0].reshape(-1, 2))
+        )
+
+        # VÉRTICES
+        u = np.repeat(np.arange(rows) / (rows - 1) if rows > 1 else 0.0, cols)
+        u = np.broadcast_to(u, (rows * cols,))
+        theta = np.tile(np.arange(cols) / cols, rows) * 2 * PI
+        phi = u * PI
+
+        sin_phi = np.sin(phi)
+        torus = 1.0 + 0.4 * np.cos(u * 2 * PI)
+        knot_r = 0.5 + 0.2 * np.cos(phi)
+        knot_common = (2 + np.cos(2 * theta)) * 0.5
+
+        shapes = {
+            "SPHERE": (
+                sin_phi * np.cos(theta),
+                np.cos(phi),
+                sin_phi * np.sin(theta),
+            ),
+            "TORUS": (
+                torus * np.cos(theta),
+                torus * np.sin(theta),
+                0.4 * np.sin(u * 2 * PI),
+            ),
+            "CYLINDER": (np.cos(theta), (u - 0.5) * 2.5, np.sin(theta)),
+            "KNOT": (
+                knot_r * np.cos(3 * theta) * knot_common,
+                knot_r * np.sin(3 * theta) * knot_common,
+                knot_r * np.sin(2 * theta),
+            ),
+        }
+        orientation = {}
+        for name, (x, y, z) in shapes.items():
+            vertices = np.stack((x, y, z), axis=1)
+            shapes[name] = vertices
+
+            # Sentido de las normales de la parametrización (+1 = hacia fuera)
+            normals = self._vertex_normals(vertices, rows, cols)
+            outward = np.einsum("ij,ij->i", normals, vertices - vertices.mean(axis=0))
+            orientation[name] = 1.0 if outward.sum() >= 0 else -1.0
+
+        return {
+            "mesh": (rows, cols),
+            "sd": shapes,
+            "ed": edges,
+            "orientation": orientation,
+        }
+
+    @staticmethod
+    def _vertex_normals(vertices, rows, cols):
+        """Normal (sin normalizar) de cada vértice de la malla (N, 3)"""
+        grid = vertices.reshape(rows, cols, 3)
+        along_cols = np.roll(grid, -1, axis=1) - np.roll(grid, 1, axis=1)
+        along_rows = np.empty_like(grid)
+        along_rows[1:-1] = grid[2:] - grid[:-2]
+        along_rows[0] = grid[min(1, rows - 1)] - grid[0]
+        along_rows[-1] = grid[-1] - grid[max(0, rows - 2)]
+        return np.cross(along_cols, along_rows).reshape(-1, 3)
+
+    def _pick_lod(self, pulse):
+        """
+        Nivel de detalle para el tamaño en pantalla de la forma: separación
+        entre columnas a lo largo del contorno de la caja que ocupó en el
+        frame anterior, con margen para no alternar niveles con cada pulso
+        """
+        extent = self.screen_extent
+        if extent is None:
+            # Primer frame: diámetro de la esfera unidad a la distancia de
+            # la cámara (fov / distancia píxeles por unidad)
+            extent = 2 * 500 / 4.0 * pulse
+        min_px = self.lod_min_edge_px
+
+        def spacing(level):
+            return PI * extent / self.lods[level]["mesh"][1]
+
+        level = self.lod
+        while level + 1 < len(self.lods) and spacing(level) < min_px:
+            level += 1
+        while level > 0 and spacing(level - 1) >= min_px * 1.25:
+            level -= 1
+        self.lod = level
+        return self.lods[level]
+
     def handle_input(self, event):
         """Maneja eventos de entrada para rotación manual"""
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -345,72 +647,118 @@ class GeometricTransformer3D:
             + SIN((x + y + z) * 0.7 + time_val * 2.0)
         ) * 0.25
 
-        plasma_val = (v + 1) * 0.5
-        plasma_val = min(1.0, plasma_val + intensity * 0.3)
+        return self.colors.plasma(v, time_val, intensity)
 
-        if plasma_val < 0.5:
-            if plasma_val < 0.25:
-                r, g, b = (
-                    int(1020 * plasma_val),
-                    int(200 * plasma_val),
-                    int(255 * (0.5 + plasma_val)),
-                )
-            else:
-                f = (plasma_val - 0.25) * 4
-                r, g, b = (
-                    int(255 * (1 - f * 0.5)),
-                    int(255 * f),
-                    int(150 * (1 - plasma_val)),
-                )
-        else:
-            if plasma_val < 0.75:
-                r, g, b = (
-                    int(200 + 55 * SIN(time_val * 3)),
-                    int(100 + 155 * plasma_val),
-                    int(255 * (plasma_val - 0.5) * 2),
-                )
-            else:
-                f = (plasma_val - 0.75) * 4
-                r, g, b = 255, int(255 * (1 - f)), int(255 * f)
+    def get_heatmap_color(self, val):
+        """Color basado en mapa de calor (valor 0.0-1.0)"""
+        return self.colors.heat(val)
 
-        boost = intensity * 0.8 * 255
-        if boost > 1:
-            r = min(255, int(r + boost * 0.23))
-            g = min(255, int(g + boost * 0.15))
-            b = min(255, int(b + boost * 0.31))
+    def plasma_colors(self, x, y, z, time_val, intensity):
+        """get_plasma_color() para arrays de coordenadas: array (N, 3)"""
+        v = (
+            np.sin(x * 1.5 + time_val * 0.8)
+            + np.sin(y * 2.3 + time_val * 1.2)
+            + np.sin(z * 3.1 + time_val * 0.5)
+            + np.sin((x + y + z) * 0.7 + time_val * 2.0)
+        ) * 0.25
+        return self.colors.plasma_array(v, time_val, intensity)
+
+    def heatmap_colors(self, val):
+        """get_heatmap_color() para un array de valores: array (N, 3)"""
+        return self.colors.heat_array(val)
+
+    def _update_trails(
+        self,
+        surface,
+        projected_points,
+        vertex_3d,
+        adjusted_intensity,
+        heat_boost,
+        use_plasma,
+        strong,
+    ):
+        """Chispas que saltan de vértices al azar y se apagan"""
+        # GENERACIÓN DE PARTÍCULAS
+        if adjusted_intensity > 0.5:
+            spawn_chance = 0.2 if strong else 0.05
 
-        return (r, g, b)
+            if self.rng.random() < spawn_chance:
+                idx = self.rng.index(len(projected_points))
+                pos = tuple(int(c) for c in projected_points[idx])
 
-    def get_heatmap_color(self, val):
-        """Color basado en mapa de calor (valor 0.0-1.0)"""
-        val = max(0.0, min(1.0, val))
-        hue = 0.7 - (val * 0.7)
-        saturation = 1.0
-        value = 1.0
+                if 0 <= pos[0] < self.w and 0 <= pos[1] < self.h:
+                    v3d = vertex_3d[idx]
 
-        if val > 0.9:
-            saturation = max(0.0, 1.0 - ((val - 0.9) * 10.0))
-            hue = 0.0
+                    if use_plasma:
+                        color = self.get_plasma_color(
+                            v3d[0],
+                            v3d[1],
+                            v3d[2],
+                            self.plasma_time,
+                            adjusted_intensity + heat_boost,
+                        )
+                    else:
+                        color = self.get_heatmap_color(adjusted_intensity + heat_boost)
+
+                    self.particle_trails.spawn(
+                        x=pos[0],
+                        y=pos[1],
+                        life=1.0,
+                        r=color[0],
+                        g=color[1],
+                        b=color[2],
+                    )
 
-        r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
-        return (int(r * 255), int(g * 255), int(b * 255))
+        # DIBUJADO DE PARTÍCULAS
+        trails = self.particle_trails
+        trails.update(0.05)
+
+        life = trails.column("life")
+        if trails.vectorized:
+            alphas = (255 * life).astype(int)
+            alphas[alphas <= 10] = 0
+            radii = (3 * life).astype(int)
+        else:
+            alphas = [int(255 * v) for v in life]
+            alphas = [a if a > 10 else 0 for a in alphas]
+            radii = [int(3 * v) for v in life]
 
-    def draw(self, surface, intensity, main_time, current_fmt=None, bpm_state=None):
-        """Dibuja la geometría 3D con efectos"""
+        self.trail_sprites.draw(
+            surface,
+            trails.column("x"),
+            trails.column("y"),
+            radii,
+            (trails.column("r"), trails.column("g"), trails.column("b")),
+            alphas,
+            pygame.BLEND_ALPHA_SDL2,
+        )
+
+    def draw(self, surface, ctx, commands=None):
+        """
+        Dibuja la geometría 3D con efectos
+
+        Args:
+            surface: Superficie donde dibujar
+            ctx: FrameContext del frame actual
+            commands: CommandBuffer donde grabar el wireframe (None = dibujar ya)
+        """
         self.plasma_time += 0.03
+        intensity = ctx.intensity
+        current_fmt = ctx.fmt
 
         # EXTRACCIÓN DE PARÁMETROS BPM
-        bpm_enabled = bpm_state.get("enabled", True) if bpm_state else True
-        bpm_strong = bpm_state.get("strong_beat", False) if bpm_state else False
+        bpm_enabled = ctx.bpm_enabled
+        bpm_strong = ctx.strong_beat
+        bpm_medium = ctx.medium_beat
 
         adjusted_intensity = (
             min(1.0, intensity + 0.3) if (bpm_enabled and bpm_strong) else intensity
         )
-        if bpm_enabled and bpm_state:
-            adjusted_intensity += bpm_state.get("beat_pulse", 0.0) * 0.2
+        if bpm_enabled:
+            adjusted_intensity += ctx.pulse * 0.2
 
         # LÓGICA DE TRANSICIÓN
-        current_time = time.time()
+        current_time = ctx.time
         dt = current_time - self.lt
 
         if not self.it:
@@ -444,6 +792,39 @@ class GeometricTransformer3D:
         if bpm_enabled and bpm_strong:
             pulse += 0.2
 
+        jitter_active = adjusted_intensity > 0.8 or (bpm_enabled and bpm_strong)
+        jitter_range = 0.08 if (bpm_enabled and bpm_strong) else 0.05
+
+        use_plasma = (
+            current_fmt in ["mod", "s3m", "xm", "it"] or adjusted_intensity > 0.7
+        )
+
+        bpm_heat_boost = (
+            0.3
+            if (bpm_enabled and bpm_strong)
+            else (0.15 if (bpm_enabled and bpm_medium) else 0.0)
+        )
+
+        if self.vectorized:
+            immediate = commands is None
+            if immediate:
+                commands = CommandBuffer()
+            self._draw_arrays(
+                surface,
+                commands,
+                et,
+                pulse,
+                jitter_range if jitter_active else 0.0,
+                adjusted_intensity,
+                bpm_heat_boost,
+                use_plasma,
+                bpm_enabled and bpm_strong,
+                bpm_strong,
+            )
+            if immediate:
+                commands.execute()
+            return
+
         # PARÁMETROS DE PROYECCIÓN 3D
         fov = 500
         center_x, center_y = self.w // 2, self.h // 2
@@ -456,9 +837,6 @@ class GeometricTransformer3D:
         vertex_3d = [None] * len(vertices_current)
         depths = [0.0] * len(vertices_current)
 
-        jitter_active = adjusted_intensity > 0.8 or (bpm_enabled and bpm_strong)
-        jitter_range = 0.08 if (bpm_enabled and bpm_strong) else 0.05
-
         # TRANSFORMACIÓN DE VÉRTICES
         for i in range(len(vertices_current)):
             p1 = vertices_current[i]
@@ -469,7 +847,7 @@ class GeometricTransformer3D:
             z = p1.z + (p2.z - p1.z) * et
 
             if jitter_active:
-                pulse_factor = pulse + random.uniform(-jitter_range, jitter_range)
+                pulse_factor = pulse + self.rng.uniform(-jitter_range, jitter_range)
             else:
                 pulse_factor = pulse
 
@@ -507,67 +885,39 @@ class GeometricTransformer3D:
         min_z, max_z = min(depths), max(depths)
         z_range = max_z - min_z if max_z != min_z else 1.0
 
-        use_plasma = (
-            current_fmt in ["mod", "s3m", "xm", "it"] or adjusted_intensity > 0.7
-        )
-
-        bpm_heat_boost = (
-            0.3
-            if (bpm_enabled and bpm_strong)
-            else (0.15 if (bpm_enabled and bpm_state.get("medium_beat")) else 0.0)
+        self._update_trails(
+            surface,
+            projected_points,
+            vertex_3d,
+            adjusted_intensity,
+            bpm_heat_boost,
+            use_plasma,
+            bpm_enabled and bpm_strong,
         )
 
-        # GENERACIÓN DE PARTÍCULAS
-        if adjusted_intensity > 0.5:
-            spawn_chance = 0.2 if (bpm_enabled and bpm_strong) else 0.05
-
-            if random.random() < spawn_chance:
-                idx = random.randint(0, len(projected_points) - 1)
-                pos = projected_points[idx]
-
-                if 0 <= pos[0] < self.w and 0 <= pos[1] < self.h:
-                    v3d = vertex_3d[idx]
-
-                    if use_plasma:
-                        color = self.get_plasma_color(
-                            v3d[0],
-                            v3d[1],
-                            v3d[2],
-                            self.plasma_time,
-                            adjusted_intensity + bpm_heat_boost,
-                        )
-                    else:
-                        color = self.get_heatmap_color(
-                            adjusted_intensity + bpm_heat_boost
-                        )
-
-                    self.particle_trails.append(
-                        {"pos": pos, "life": 1.0, "color": color}
-                    )
-
-        # DIBUJADO DE PARTÍCULAS
-        self.particle_trails = [p for p in self.particle_trails if p["life"] > 0]
-
-        for particle in self.particle_trails:
-            particle["life"] -= 0.05
-            alpha = int(255 * particle["life"])
-
-            if alpha > 10:
-                radius = int(3 * particle["life"])
-                draw_circle_alpha(
-                    surface, (*particle["color"], alpha), particle["pos"], radius
-                )
-
         # DIBUJADO DEL WIREFRAME
         draw_line = pygame.draw.line
-        width_limit, height_limit = self.w + 100, self.h + 100
+        margin = self.CULL_MARGIN
+        right, bottom = self.w + margin, self.h + margin
+        self.edges_submitted = len(self.ed)
+        self.edges_drawn = 0
 
         for start_idx, end_idx in self.ed:
             point1 = projected_points[start_idx]
             point2 = projected_points[end_idx]
-
-            if not (-100 < point1[0] < width_limit and -100 < point1[1] < height_limit):
+            (x1, y1), (x2, y2) = point1, point2
+
+            # Mismo descarte que el camino NumPy: los dos extremos al mismo
+            # lado del borde, o los dos en el mismo píxel
+            if (
+                (x1 < -margin and x2 < -margin)
+                or (x1 >= right and x2 >= right)
+                or (y1 < -margin and y2 < -margin)
+                or (y1 >= bottom and y2 >= bottom)
+                or point1 == point2
+            ):
                 continue
+            self.edges_drawn += 1
 
             avg_z = (depths[start_idx] + depths[end_idx]) * 0.5
             norm_z = 1.0 - ((avg_z - min_z) / z_range)
@@ -617,8 +967,8 @@ class GeometricTransformer3D:
                 p1 = projected_points[start_idx]
                 p2 = projected_points[end_idx]
 
-                offset_x = random.uniform(-offset, offset)
-                offset_y = random.uniform(-offset, offset)
+                offset_x = self.rng.uniform(-offset, offset)
+                offset_y = self.rng.uniform(-offset, offset)
 
                 ghost_p1 = (p1[0] + offset_x, p1[1] + offset_y)
                 ghost_p2 = (p2[0] + offset_x, p2[1] + offset_y)
@@ -627,6 +977,169 @@ class GeometricTransformer3D:
 
             surface.blit(self.ghost_surf, (0, 0))
 
+    def _draw_arrays(
+        self,
+        surface,
+        commands,
+        et,
+        pulse,
+        jitter_range,
+        adjusted_intensity,
+        heat_boost,
+        use_plasma,
+        strong,
+        bpm_strong,
+    ):
+        """
+        Resto de draw() con NumPy: los vértices del nivel de detalle se
+        mezclan entre formas, transforman, proyectan y colorean como arrays;
+        las aristas que no se verían se descartan y el resto se graba en
+        commands como un solo comando de segmentos
+        """
+        lod = self._pick_lod(pulse)
+        shape = self.shapes[self.curr]
+        vertices_current = lod["sd"][shape]
+        vertices_next = lod["sd"][self.shapes[(self.curr + 1) % len(self.shapes)]]
+        vertices = vertices_current + (vertices_next - vertices_current) * et
+
+        # PULSO (con jitter por vértice)
+        if jitter_range:
+            pulse_factor = pulse + self.rng.uniform_array(
+                -jitter_range, jitter_range, len(vertices)
+            )
+            x, y, z = (vertices * pulse_factor[:, None]).T
+        else:
+            x, y, z = (vertices * pulse).T
+
+        # ROTACIÓN 3D: Y, luego X, luego Z, con las mismas operaciones que
+        # el camino escalar (una matriz combinada redondea distinto)
+        cos_rx, sin_rx = COS(self.rot.x), SIN(self.rot.x)
+        cos_ry, sin_ry = COS(self.rot.y), SIN(self.rot.y)
+        cos_rz, sin_rz = COS(self.rot.z), SIN(self.rot.z)
+        rx = x * cos_ry - z * sin_ry
+        rz = x * sin_ry + z * cos_ry
+        ry, rz = y * cos_rx - rz * sin_rx, y * sin_rx + rz * cos_rx
+        rx, ry = rx * cos_rz - ry * sin_rz, rx * sin_rz + ry * cos_rz
+        vertex_3d = np.stack((rx, ry, rz), axis=1)
+        depths = rz
+
+        # PROYECCIÓN
+        fov = 500
+        divisor = 4.0 + depths
+        divisor[divisor == 0] = 0.001
+        factor = fov / divisor
+        projected = np.empty((len(vertex_3d), 2), dtype=np.int64)
+        projected[:, 0] = vertex_3d[:, 0] * factor + self.w // 2
+        projected[:, 1] = vertex_3d[:, 1] * factor + self.h // 2
+
+        # Tamaño en pantalla para el nivel de detalle del frame siguiente
+        self.screen_extent = int(np.ptp(projected, axis=0).max())
+
+        self._update_trails(
+            surface,
+            projected,
+            vertex_3d,
+            adjusted_intensity,
+            heat_boost,
+            use_plasma,
+            strong,
+        )
+
+        # DESCARTE DE ARISTAS
+        edges = lod["ed"]
+        point1, point2 = projected[edges[:, 0]], projected[edges[:, 1]]
+
+        # Fuera de pantalla: los dos extremos al mismo lado del borde
+        # (con margen para el grosor)
+        margin = self.CULL_MARGIN
+        visible = ~(
+            ((point1[:, 0] < -margin) & (point2[:, 0] < -margin))
+            | ((point1[:, 0] >= self.w + margin) & (point2[:, 0] >= self.w + margin))
+            | ((point1[:, 1] < -margin) & (point2[:, 1] < -margin))
+            | ((point1[:, 1] >= self.h + margin) & (point2[:, 1] >= self.h + margin))
+        )
+
+        # Sub-píxel: los dos extremos en el mismo píxel (polos, aristas de
+        # perfil); los vecinos ya pintan ese punto
+        visible &= (point1 != point2).any(axis=1)
+
+        # Caras traseras: en formas cerradas y fuera de la transición, las
+        # aristas cuyos dos vértices miran en contra de la cámara (0, 0, -4)
+        if self.cull_backfaces and et == 0 and shape in self.CLOSED_SHAPES:
+            normals = self._vertex_normals(vertex_3d, *lod["mesh"])
+            to_vertex = vertex_3d - np.array([0.0, 0.0, -4.0])
+            facing = lod["orientation"][shape] * np.einsum(
+                "ij,ij->i", normals, to_vertex
+            )
+            front = facing <= 0
+            visible &= front[edges[:, 0]] | front[edges[:, 1]]
+
+        edges = edges[visible]
+        self.edges_submitted = len(visible)
+        self.edges_drawn = len(edges)
+
+        # DIBUJADO DEL WIREFRAME
+        starts, ends = edges[:, 0], edges[:, 1]
+
+        # Profundidad normalizada de cada arista
+        min_z, max_z = depths.min(), depths.max()
+        z_range = max_z - min_z if max_z != min_z else 1.0
+        avg_z = (depths[starts] + depths[ends]) * 0.5
+        norm_z = 1.0 - (avg_z - min_z) / z_range
+        heat_val = np.minimum(1.0, norm_z * 0.4 + adjusted_intensity * 0.8 + heat_boost)
+
+        if use_plasma:
+            middle = (vertex_3d[starts] + vertex_3d[ends]) * 0.5
+            colors = self.plasma_colors(
+                middle[:, 0],
+                middle[:, 1],
+                middle[:, 2],
+                self.plasma_time,
+                adjusted_intensity + heat_boost,
+            )
+        else:
+            colors = self.heatmap_colors(heat_val)
+
+        if adjusted_intensity > 0.9:
+            thickness = np.full(len(heat_val), 4)
+        else:
+            thickness = np.where(heat_val > 0.8, 3, np.where(heat_val > 0.6, 2, 1))
+
+        # Núcleo blanco en las aristas más calientes, justo detrás de su
+        # arista (la siguiente la pisa, como en el camino escalar)
+        core = (heat_val > 0.85) | strong
+        repeat = 1 + core
+        white = (np.cumsum(repeat) - 1)[core]
+        colors = np.repeat(colors, repeat, axis=0)
+        colors[white] = 255
+        thickness = np.repeat(thickness, repeat)
+        thickness[white] = 1
+        commands.segments(
+            surface,
+            np.repeat(point1[visible], repeat, axis=0),
+            np.repeat(point2[visible], repeat, axis=0),
+            colors,
+            thickness,
+        )
+
+        # EFECTO ESPECIAL: GHOSTING
+        if adjusted_intensity > 0.9 or strong:
+            self.ghost_surf.fill((0, 0, 0, 0))
+            offset = adjusted_intensity * 8 + (4 if bpm_strong else 0)
+            ghost_color = (100, 255, 100, 120) if bpm_strong else (255, 100, 100, 80)
+
+            # Todas las aristas de la malla, como el camino escalar
+            ghost_edges = lod["ed"][::3]
+            shift = self.rng.uniform_array(-offset, offset, 2 * len(ghost_edges))
+            shift = shift.reshape(-1, 2)
+            commands.segments(
+                self.ghost_surf,
+                projected[ghost_edges[:, 0]] + shift,
+                projected[ghost_edges[:, 1]] + shift,
+                np.tile(ghost_color, (len(ghost_edges), 1)),
+            )
+            commands.blit(surface, self.ghost_surf, (0, 0))
+
 
 # ============================================================================
 # CLASE SPECTRUMANALYZER: Analizador de espectro visual sincronizado con audio
@@ -641,10 +1154,16 @@ class SpectrumAnalyzer:
     CON SINCRONIZACIÓN BPM COMPLETA PARA TODOS LOS FORMATOS
     """
 
-    def __init__(self, width, height):
+    def __init__(self, width, height, rng=None):
+        """
+        Args:
+            rng: EffectRandom del analizador y sus visualizadores (None = nuevo)
+        """
         self.w, self.h = width, height
+        self.rng = rng or EffectRandom()
         self.bars = 64  # Número de barras del espectro
         self.bar_width = max(1, width // self.bars)
+        self.colors = color_lut()  # Colores por barra y pulso precalculados
 
         # Calcular margen horizontal para centrado
         self.horizontal_margin = (self.w - (self.bars * self.bar_width)) // 2
@@ -653,24 +1172,29 @@ class SpectrumAnalyzer:
         if NUMPY_AVAILABLE:
             self.values = np.zeros(self.bars)
             self.peaks = np.zeros(self.bars)
-            self.peak_hold = np.zeros(self.bars)
             self.x_axis = np.linspace(0, 10, self.bars)
         else:
             self.values = [0.0] * self.bars
             self.peaks = [0.0] * self.bars
-            self.peak_hold = [0.0] * self.bars
-            self.x_axis = []
+            step = 10 / (self.bars - 1)
+            self.x_axis = [i * step for i in range(self.bars - 1)] + [10.0]
 
         self.offset = 0.0
 
-        # Sistemas de partículas MEJORADOS
-        self.sparks = []  # Chispas para efecto MP3
-        self.particles_ogg = []  # Partículas para efecto OGG
-        self.particles_3d = []  # Partículas 3D para efecto IT
-        self.particles_xm = []  # Partículas para efecto XM (NUEVO)
+        # Visualizadores por formato: se crean en el primer frame de su
+        # formato y se liberan tras IDLE_RELEASE_TIME segundos sin usarse
+        self.visualizers = {}  # Clase -> instancia
+        self.particle_limit = None  # Tope de partículas (preset de calidad)
+
+        # FrameScheduler que prepara los visualizadores nuevos repartidos
+        # entre frames (None = prepararlos de golpe en su primer frame)
+        self.scheduler = None
+
+        # Tira de trabajo de los efectos 2D (con el primer visualizador)
+        self.work_surf = None
 
         # Variables de tiempo y BPM
-        self.last_update = time.time()
+        self.last_update = time.monotonic()
         self.rotation_angle = 0.0
         self.bpm_pulse = 0.0  # Pulso de beat (0.0-1.0)
         self.bpm_phase = 0.0  # Fase dentro del beat (0.0-1.0)
@@ -678,234 +1202,179 @@ class SpectrumAnalyzer:
         self.beat_counter = 0  # Contador de beats
         self.measure_counter = 0  # Contador de compases (cada 4 beats)
 
-        # EFECTO MAGMA (para MP3)
-        self.magma_height = 400
-        self.magma_texture = self._generate_magma_texture(width, self.magma_height)
-
-        # Textura duplicada para scrolling infinito
-        self.magma_long = pygame.Surface((width, self.magma_height * 2))
-        self.magma_long.blit(self.magma_texture, (0, 0))
-        self.magma_long.blit(self.magma_texture, (0, self.magma_height))
-
-        self.magma_y_scroll = 0
-
-        # Superficies de trabajo reutilizables
-        self.work_surf = pygame.Surface((self.w, 350), pygame.SRCALPHA)
-        self.mask_surf = pygame.Surface((self.w, 350), pygame.SRCALPHA)
-
-        # Sprite de burbuja para efecto MP3
-        self.bubble_size = 64
-        self.bubble_surf = pygame.Surface(
-            (self.bubble_size, self.bubble_size), pygame.SRCALPHA
-        )
-        self._generate_bubble_sprite()
-
         # Variables de efectos BPM
-        self.last_beat_time = time.time()
+        self.last_beat_time = time.monotonic()
         self.beat_history = []  # Historial de beats para cálculo de BPM
         self.auto_bpm_detected = 120.0
 
-    def _get_safe_color(self, index, value, bpm_pulse=0.0):
-        """Versión segura de _get_frequency_color que nunca falla y devuelve tuple(int,int,int,int)"""
-        try:
-            col = self._get_frequency_color(index, value, bpm_pulse)
-
-            # Si devuelve None o algo inválido, fallback
-            if col is None or not (isinstance(col, (tuple, list))):
-                return (255, 255, 255, 200)
-
-            # Asegurar longitud mínima
-            if len(col) < 3:
-                return (255, 255, 255, 200)
-
-            # Forzar conversión a int nativo de Python y clamping estricto 0-255
-            # Esto elimina numpy.int64 o floats que rompen pygame.draw
-            r = int(col[0])
-            g = int(col[1])
-            b = int(col[2])
-            a = int(col[3]) if len(col) > 3 else 255
-
-            return (
-                max(0, min(255, r)),
-                max(0, min(255, g)),
-                max(0, min(255, b)),
-                max(0, min(255, a)),
-            )
-        except:
-            return (255, 255, 255, 200)
-
-    def _generate_magma_texture(self, width, height):
-        """Genera textura de efecto magma (gradiente de calor)"""
-        surface = pygame.Surface((width, height))
-
-        for y in range(0, height, 2):
-            for x in range(0, width, 4):
-                v1 = SIN(x * 0.02)
-                v2 = SIN(y * 0.03)
-                v3 = SIN((x + y) * 0.015)
-                value = (v1 + v2 + v3 + 3) / 6
-
-                if value < 0.2:
-                    color = (int(120 + value * 100), 0, 0)
-                elif value < 0.5:
-                    color = (255, int(100 * (value - 0.2) * 3.3), 0)
-                elif value < 0.8:
-                    color = (
-                        255,
-                        int(100 + 155 * (value - 0.5) * 3.3),
-                        0,
-                    )
-                else:
-                    color = (
-                        255,
-                        255,
-                        int(255 * (value - 0.8) * 5.0),
-                    )
-
-                pygame.draw.rect(surface, color, (x, y, 4, 2))
-
-        return pygame.transform.smoothscale(surface, (width, height))
-
-    def _generate_bubble_sprite(self):
-        """Genera sprite de burbuja con gradiente radial"""
-        center = self.bubble_size // 2
-
-        for radius in range(center, 0, -2):
-            alpha = int(255 * (1 - (radius / center)))
-            color = (255, 220 - int(radius * 2), 100, clamp_val(alpha * 0.6))
-            pygame.draw.circle(self.bubble_surf, color, (center, center), radius)
+    def set_particle_limit(self, limit):
+        """Tope de partículas por pool (preset de calidad; None = capacidad)"""
+        self.particle_limit = limit
+        for visualizer in self.visualizers.values():
+            for pool in visualizer.pools:
+                pool.set_limit(limit)
+
+    def particle_usage(self):
+        """(partículas vivas, tope) sumando los pools de los visualizadores"""
+        pools = [p for v in self.visualizers.values() for p in v.pools]
+        return (sum(len(pool) for pool in pools), sum(pool.limit for pool in pools))
+
+    @property
+    def is_beat(self):
+        """El pulso BPM está en el golpe"""
+        return self.bpm_pulse > 0.8
+
+    @property
+    def is_measure_start(self):
+        """Golpe del primer beat de un compás"""
+        return self.beat_counter % 4 == 0 and self.is_beat
+
+    def _visualizer(self, fmt, now):
+        """
+        Visualizador del formato (lo crea si aún no existe); None si no hay
+        o si sus recursos aún se están preparando
+        """
+        visualizer_class = VISUALIZERS.get(fmt)
+        if visualizer_class is None:
+            return None
+
+        visualizer = self.visualizers.get(visualizer_class)
+        if visualizer is None:
+            if self.work_surf is None:
+                self.work_surf = prepare_sprite(
+                    pygame.Surface((self.w, 350), pygame.SRCALPHA)
+                )
+            visualizer = visualizer_class(self)
+            for pool in visualizer.pools:
+                pool.set_limit(self.particle_limit)
+            self.visualizers[visualizer_class] = visualizer
+
+            steps = self._prepare(visualizer)
+            if self.scheduler is None:
+                for _ in steps:
+                    pass
+            else:
+                self.scheduler.submit(steps, f"spectrum_{fmt}")
+        visualizer.last_used = now
+        return visualizer if visualizer.ready else None
 
-    def _get_frequency_color(self, index, value, bpm_pulse=0.0):
+    def _prepare(self, visualizer):
         """
-        Obtiene color basado en frecuencia (posición) e intensidad
+        Recorre prepare_steps() del visualizador (trabajo de FrameScheduler)
+        y lo marca listo; cuenta solo el tiempo de sus pasos
         """
-        try:
-            # Validar entradas para evitar errores
-            index = max(0, min(self.bars - 1, int(index)))
-            value = max(0.0, min(1.0, float(value)))
-            bpm_pulse = max(0.0, min(1.0, float(bpm_pulse)))
-
-            position = index / self.bars
-
-            # Añadir pulso BPM al valor de color
-            pulse_boost = bpm_pulse * 0.3
-
-            # Gradiente de frecuencia: bajas=rojo, medias=verde, altas=azul
-            if position < 0.3:  # Bajas frecuencias
-                r = 255 + int(pulse_boost * 100)
-                g = int(80 + position * 200 + pulse_boost * 80)
-                b = int(50 * position + pulse_boost * 50)
-            elif position < 0.7:  # Frecuencias medias
-                r = int(255 * (0.7 - position) * 2.5 + pulse_boost * 50)
-                g = 255 + int(pulse_boost * 100)
-                b = int(100 * (position - 0.3) * 2.5 + pulse_boost * 50)
-            else:  # Altas frecuencias
-                r = int(100 * (1.0 - position) * 3.3 + pulse_boost * 30)
-                g = int(200 * (1.0 - position) * 3.3 + pulse_boost * 50)
-                b = 255 + int(pulse_boost * 100)
-
-            # Alpha basado en intensidad y pulso BPM
-            alpha = 180 + value * 75 + bpm_pulse * 50
-
-            return (r, g, b, alpha)
+        steps = visualizer.prepare_steps()
+        busy = 0.0
+        while True:
+            start = time.perf_counter()
+            finished = next(steps, StopIteration) is StopIteration
+            busy += time.perf_counter() - start
+            if finished:
+                break
+            yield
+
+        visualizer.ready = True
+        logger.info(
+            "SPECTRUM",
+            "Visualizador %s preparado en %.1f ms",
+            type(visualizer).__name__,
+            busy * 1000.0,
+        )
 
-        except Exception as e:
-            return (255, 255, 255, 200)
+    def _release_idle(self, now):
+        """Libera los visualizadores que llevan IDLE_RELEASE_TIME sin dibujarse"""
+        for visualizer_class, visualizer in list(self.visualizers.items()):
+            if now - visualizer.last_used > IDLE_RELEASE_TIME:
+                del self.visualizers[visualizer_class]
+                logger.info(
+                    "SPECTRUM", "Visualizador %s liberado", visualizer_class.__name__
+                )
+        if not self.visualizers:
+            self.work_surf = None
 
-    def _apply_bpm_sync(self, bpm_data=None, kick=0.0):
+    def _get_safe_color(self, index, value, bpm_pulse=0.0):
         """
-        Aplica sincronización BPM a los parámetros de animación
+        Color RGBA de la barra 'index' (tabla precalculada): tupla de int
+        nativos ya recortados a 0-255, lista para pygame.draw
         """
-        current_time = time.time()
+        return self.colors.spectrum(index, value, bpm_pulse, self.bars)
 
-        if bpm_data:
-            # Usar datos BPM proporcionados
-            self.bpm_pulse = bpm_data.get("beat_pulse", 0.0)
-            self.current_bpm = bpm_data.get("bpm", self.auto_bpm_detected)
-            self.bpm_phase = bpm_data.get("beat_phase", 0.0)
-            is_strong_beat = bpm_data.get("strong_beat", False)
-
-            if is_strong_beat:
-                self.beat_counter += 1
-                if self.beat_counter % 4 == 0:
-                    self.measure_counter += 1
+    def _apply_bpm_sync(self, ctx):
+        """
+        Aplica sincronización BPM a los parámetros de animación
+        Actualiza bpm_pulse, bpm_phase, current_bpm y beat_counter in-place
 
-        else:
-            # Detección automática de BPM basada en kicks
-            if kick > 0.7:
-                now = time.time()
-                self.beat_history.append(now)
-
-                # Mantener solo los últimos 10 beats
-                if len(self.beat_history) > 10:
-                    self.beat_history.pop(0)
-
-                # Calcular BPM si tenemos suficientes beats
-                if len(self.beat_history) >= 4:
-                    intervals = []
-                    for i in range(1, len(self.beat_history)):
-                        intervals.append(
-                            self.beat_history[i] - self.beat_history[i - 1]
-                        )
+        Args:
+            ctx: FrameContext del frame actual (reloj y kick)
+        """
+        current_time = ctx.time
+        kick = ctx.kick
+
+        # Detección automática de BPM basada en kicks
+        if kick > 0.7:
+            self.beat_history.append(current_time)
+
+            # Mantener solo los últimos 10 beats
+            if len(self.beat_history) > 10:
+                self.beat_history.pop(0)
+
+            # Calcular BPM si tenemos suficientes beats
+            if len(self.beat_history) >= 4:
+                intervals = []
+                for i in range(1, len(self.beat_history)):
+                    intervals.append(
+                        self.beat_history[i] - self.beat_history[i - 1]
+                    )
 
-                    avg_interval = sum(intervals) / len(intervals)
-                    if avg_interval > 0:
-                        self.auto_bpm_detected = 60.0 / avg_interval
+                avg_interval = sum(intervals) / len(intervals)
+                if avg_interval > 0:
+                    self.auto_bpm_detected = 60.0 / avg_interval
 
-                self.current_bpm = self.auto_bpm_detected
+            self.current_bpm = self.auto_bpm_detected
 
-            # Simular pulso BPM
-            beat_duration = 60.0 / self.current_bpm
-            time_since_last_beat = current_time - self.last_beat_time
+        # Simular pulso BPM
+        beat_duration = 60.0 / self.current_bpm
+        time_since_last_beat = current_time - self.last_beat_time
 
-            if time_since_last_beat > beat_duration:
-                self.last_beat_time = current_time
-                self.bpm_pulse = 1.0
-                self.beat_counter += 1
-            else:
-                # Decaimiento exponencial del pulso
-                decay_time = beat_duration * 0.3  # 30% del beat
-                self.bpm_pulse = max(0.0, self.bpm_pulse - (1.0 / decay_time) * 0.016)
+        if time_since_last_beat > beat_duration:
+            self.last_beat_time = current_time
+            self.bpm_pulse = 1.0
+            self.beat_counter += 1
+        else:
+            # Decaimiento exponencial del pulso
+            decay_time = beat_duration * 0.3  # 30% del beat
+            self.bpm_pulse = max(0.0, self.bpm_pulse - (1.0 / decay_time) * 0.016)
 
-            # Calcular fase dentro del beat
-            self.bpm_phase = (time_since_last_beat % beat_duration) / beat_duration
+        # Calcular fase dentro del beat
+        self.bpm_phase = (time_since_last_beat % beat_duration) / beat_duration
 
         # Actualizar rotación basada en BPM
         beats_per_rotation = 8  # Rotación completa cada 8 beats
         rotation_speed = (2 * PI) / (beats_per_rotation * (60.0 / self.current_bpm))
         self.rotation_angle += rotation_speed
 
-        return {
-            "bpm_pulse": self.bpm_pulse,
-            "bpm": self.current_bpm,
-            "phase": self.bpm_phase,
-            "beat_counter": self.beat_counter,
-            "measure_counter": self.measure_counter,
-        }
-
-    def draw(self, surface, intensity, kick, fmt, bpm_data=None):
+    def draw(self, surface, ctx):
         """
         Dibuja el analizador de espectro con efectos según formato
         TODOS LOS EFECTOS CON SINCRONIZACIÓN BPM MEJORADA
+
+        Args:
+            surface: Superficie donde dibujar
+            ctx: FrameContext del frame actual (intensidad, kick, formato, reloj)
         """
-        # Limpiar superficie de trabajo
-        work_surface = self.work_surf
-        work_surface.fill((0, 0, 0, 0))
+        intensity, kick, fmt = ctx.intensity, ctx.kick, ctx.fmt
 
         # ====================================================================
         # ACTUALIZACIÓN DE PARÁMETROS CON SINCRONIZACIÓN BPM
         # ====================================================================
         self.offset += 0.1
-        current_time = time.time()
-        delta_time = current_time - self.last_update
+        current_time = ctx.time
         self.last_update = current_time
 
         # Aplicar sincronización BPM
-        bpm_info = self._apply_bpm_sync(bpm_data, kick)
-        bpm_pulse = bpm_info["bpm_pulse"]
-        bpm_phase = bpm_info["phase"]
-        is_beat = bpm_pulse > 0.8
-        is_measure_start = bpm_info["beat_counter"] % 4 == 0 and is_beat
+        self._apply_bpm_sync(ctx)
+        bpm_pulse = self.bpm_pulse
+        is_beat = self.is_beat
 
         # Determinar física según formato
         is_tracker_physics = fmt in ["mod", "s3m", "xm", "it"]
@@ -913,6 +1382,12 @@ class SpectrumAnalyzer:
         # ====================================================================
         # CÁLCULO DE DATOS DEL ESPECTRO (MEJORADO CON BPM)
         # ====================================================================
+        # Física de barras y picos: mismo cálculo en los dos caminos (y mismo
+        # consumo de self.rng), solo cambia si es con arrays o en un bucle
+        BAR_GRAVITY = 0.040  # Si el target es mayor, sube de golpe; si no, cae
+        PEAK_GRAVITY = 0.015  # Caída lenta y elegante de los picos
+        rng = self.rng
+
         if NUMPY_AVAILABLE:
             # 1. GENERAR OBJETIVOS (TARGETS) - A dónde quieren ir las barras
             target_values = np.zeros(self.bars)
@@ -921,15 +1396,13 @@ class SpectrumAnalyzer:
                 # Física Tracker: Saltos aleatorios
                 n = int(intensity * self.bars * 0.7)
                 if n > 0:
-                    indices = np.random.choice(self.bars, n, replace=False)
+                    indices = rng.sample(range(self.bars), n)
                     base_value = 0.4 + kick * 0.6 + bpm_pulse * 0.3
-                    target_values[indices] = np.random.rand(n) * base_value
+                    target_values[indices] = rng.random_array(n) * base_value
 
                     if is_beat:
-                        extra_indices = np.random.choice(
-                            self.bars, int(n * 0.3), replace=False
-                        )
-                        target_values[extra_indices] = np.random.rand(
+                        extra_indices = rng.sample(range(self.bars), int(n * 0.3))
+                        target_values[extra_indices] = rng.random_array(
                             len(extra_indices)
                         ) * (0.5 + bpm_pulse * 0.5)
             else:
@@ -947,768 +1420,90 @@ class SpectrumAnalyzer:
                     + beat_peak
                 )
                 target_values += (
-                    np.random.rand(self.bars)
+                    rng.random_array(self.bars)
                     * 0.12
                     * intensity
                     * (1 - np.exp(-self.x_axis * 0.15))
                 )
 
             # 2. APLICAR GRAVEDAD A LAS BARRAS (values)
-            # Si el target es mayor, sube de golpe. Si es menor, cae suave.
-            BAR_GRAVITY = 0.040
             self.values = np.where(
                 target_values > self.values, target_values, self.values - BAR_GRAVITY
             )
             self.values = np.clip(self.values, 0, 1)
 
             # 3. APLICAR GRAVEDAD A LOS PICOS (peaks) - ESTO ES LA CLAVE DE LA SUAVIDAD
-            PEAK_GRAVITY = 0.015  # Caída lenta y elegante
-
-            # Si la barra empuja al pico, el pico sube
+            # Si la barra empuja al pico, el pico sube; si no, cae por gravedad
             self.peaks = np.where(self.values > self.peaks, self.values, self.peaks)
-
-            # Si no, el pico cae por gravedad constante
             self.peaks -= PEAK_GRAVITY
-
-            # Limpiar negativos
             self.peaks = np.maximum(self.peaks, 0)
 
-            # Referencias locales para el dibujado
-            values = self.values
-            peaks = self.peaks
-
         else:
-            # Versión sin numpy con efectos BPM
-            values = []
-            peaks = []
-
-            for i in range(self.bars):
-                # Simular onda de audio con sincronización BPM
-                bpm_factor = self.current_bpm / 120.0
-                val = SIN(self.offset * 0.5 * bpm_factor + i * 0.05) * 0.5 + 0.5
-                val += random.uniform(0, 0.15) * intensity
-
-                # Añadir pulso BPM
-                if bpm_phase < 0.2:  # En el golpe
-                    val += bpm_pulse * 0.4 * np.exp(-i * 0.05)
-
-                # Efecto tracker: silenciar aleatoriamente, menos en beats
-                if is_tracker_physics and random.random() > (0.85 - bpm_pulse * 0.2):
-                    val = 0
-
-                values.append(min(1.0, val))
-
-                # Actualizar picos
-                if val > self.peaks[i]:
-                    self.peaks[i] = val
-                else:
-                    decay_rate = 0.002 * (1.0 - bpm_pulse * 0.5)
-                    self.peaks[i] = max(0, self.peaks[i] - decay_rate * delta_time * 60)
-
-                peaks.append(self.peaks[i])
-
-            self.peak_hold = values
-
-        # ====================================================================
-        # LIMPIEZA DE PARTÍCULAS
-        # ====================================================================
-        if fmt != "ogg":
-            self.particles_ogg = [p for p in self.particles_ogg if p["life"] > 0]
-        if fmt != "mp3":
-            self.sparks = [spark for spark in self.sparks if spark["life"] > 0]
-        if fmt != "it":
-            self.particles_3d = [p for p in self.particles_3d if p["life"] > 0]
-        if fmt != "xm":
-            self.particles_xm = [p for p in self.particles_xm if p["life"] > 0]
-
-        # ====================================================================
-        # EFECTO 1: MAGMA (MP3) - LIMPIO Y LIQUIDO
-        # ====================================================================
-        if fmt == "mp3":
-            points = []
-            ghost_points = []
-            prev_height = 0
-
-            # Generar puntos (SIN RUIDO ALEATORIO SUCIO)
-            for i in range(len(values)):
-                raw_height = values[i]
-
-                # Altura aumentada en beats (Reactividad)
-                bpm_height_boost = 1.0 + bpm_pulse * 0.5
-                base_height = int(raw_height * 200 * (1 + kick) * bpm_height_boost)
-
-                # Suavizado entre puntos vecinos (filtro paso bajo espacial)
-                height = (base_height + prev_height) / 2
-                prev_height = height
-
-                x_pos = self.horizontal_margin + i * self.bar_width
-
-                # CORRECCIÓN 1: Quitamos 'noise_y'. Ahora la linea es pura.
-                # Si quieres variación, usa una onda seno suave, no random.randint
-                points.append((x_pos, 350 - height))
-
-                # Línea fantasma (sombra flotante)
-                ghost_points.append((x_pos + 5, 350 - height - 5))
-
-            # CORRECCIÓN 2: Cierre del polígono exacto para evitar diagonales en los márgenes
-            if points:
-                first_x = points[0][0]
-                last_x = points[-1][0]
-                # Cerramos bajando recto desde el último punto y volviendo recto al primero
-                poly_points = points + [(last_x, 350), (first_x, 350)]
-            else:
-                poly_points = []
-
-            # Dibujar línea fantasma
-            if len(ghost_points) > 1:
-                ghost_alpha = 100 + int(bpm_pulse * 155)
-                # Usamos blend para que se vea más integrada
-                pygame.draw.lines(
-                    work_surface, (150, 80, 0, ghost_alpha), False, ghost_points, 2
-                )
-
-            # Crear máscara para efecto de magma
-            self.mask_surf.fill((0, 0, 0, 0))
-            if len(poly_points) > 2:
-                pygame.draw.polygon(self.mask_surf, (255, 255, 255), poly_points)
-
-            # Scrolling de textura
-            scroll_speed = 1 + int(kick * 5) + int(bpm_pulse * 3)
-            self.magma_y_scroll = (self.magma_y_scroll + scroll_speed) % 400
-
-            src_rect = pygame.Rect(0, 400 - self.magma_y_scroll, self.w, 350)
-            magma_slice = self.magma_long.subsurface(src_rect)
-
-            self.mask_surf.blit(
-                magma_slice, (0, 0), special_flags=pygame.BLEND_RGBA_MULT
-            )
-            work_surface.blit(self.mask_surf, (0, 0))
-
-            # CORRECCIÓN 3: HE ELIMINADO EL BLOQUE DE "RECTÁNGULOS GLITCH"
-            # Ese era el causante principal de los "artefactos extraños".
-            # Si quieres mantenerlo pero más suave, descomenta esto y baja la probabilidad:
-            """
-            if bpm_pulse > 0.9 and random.random() < 0.2: # Solo muy raramente en beats fuertes
-                 # ... código de glitch ...
-            """
-
-            # Línea principal (Borde superior del magma)
-            if len(points) > 1:
-                line_color = (255, 220, 150)  # Color lava caliente
-                if is_beat:
-                    line_color = (255, 255, 255)  # Blanco en el golpe
-
-                # Grosor variable: más grueso en el beat
-                line_width = 2 if not is_beat else 3
-                pygame.draw.lines(work_surface, line_color, False, points, line_width)
-
-            # Generar partículas/burbujas (Esto sí mola, lo dejamos)
-            spark_chance = 0.05 + (intensity * 0.1) + (bpm_pulse * 0.15)
-            if random.random() < spark_chance:
-                num_sparks = 1 + int(bpm_pulse * 3)
-                for _ in range(num_sparks):
-                    # Nacer desde la altura del magma, no desde abajo del todo siempre
-                    spawn_x_idx = random.randint(0, len(values) - 1)
-                    spawn_x = self.horizontal_margin + spawn_x_idx * self.bar_width
-                    # Altura aproximada en ese punto
-                    spawn_y = 350 - (values[spawn_x_idx] * 200 * (1 + kick))
-
-                    self.sparks.append(
-                        {
-                            "x": spawn_x + random.randint(-10, 10),
-                            "y": min(
-                                340, spawn_y + random.randint(0, 50)
-                            ),  # Un poco por debajo de la superficie
-                            "vx": random.uniform(-0.5 - bpm_pulse, 0.5 + bpm_pulse),
-                            "vy": random.uniform(-1.0, -3.0 - bpm_pulse * 2),
-                            "size": random.uniform(0.5, 1.0) * (1 + bpm_pulse),
-                            "life": 1.0 + bpm_pulse * 0.5,
-                        }
-                    )
-
-            # Actualizar y dibujar partículas (Burbujas de calor)
-            for spark in self.sparks:
-                spark["x"] += spark["vx"]
-                spark["y"] += spark["vy"]
-                spark["life"] -= 0.015
-
-                if spark["life"] > 0:
-                    pulse_factor = 0.8 + 0.2 * SIN(current_time * 10)
-                    size = int(
-                        self.bubble_size
-                        * spark["size"]
-                        * pulse_factor
-                        * (spark["life"] ** 0.5)
-                    )
-
-                    if size > 0:
-                        bubble = pygame.transform.scale(self.bubble_surf, (size, size))
-                        alpha = int(255 * spark["life"])
-                        bubble.set_alpha(alpha)
-                        work_surface.blit(
-                            bubble,
-                            (int(spark["x"]) - size // 2, int(spark["y"]) - size // 2),
-                            special_flags=pygame.BLEND_RGBA_ADD,
-                        )
-
-        # ====================================================================
-        # EFECTO 2: TRACKER (MOD, S3M) - CON BPM (CORREGIDO)
-        # ====================================================================
-        # ====================================================================
-        # BLOQUE 2: DIBUJADO TRACKER (SUSTITUIR TODO EL BLOQUE 'elif fmt in ["mod", "s3m"]:')
-        # ====================================================================
-        elif fmt in ["mod", "s3m"]:
-            if NUMPY_AVAILABLE:
-                heights = (values * 140).astype(int)
-                peak_heights = (peaks * 140).astype(int)
-            else:
-                heights = [int(v * 140) for v in values]
-                peak_heights = [int(p * 140) for p in peaks]
-
-            for i in range(self.bars):
-                # --- BARRA PRINCIPAL ---
-                base_height = min(heights[i], 250)
-                # La barra SÍ puede latir con el BPM (queda bien)
-                height = int(base_height * (1.0 + bpm_pulse * 0.3))
-                x_pos = self.horizontal_margin + i * self.bar_width
-
-                if height > 0:
-                    color = self._get_safe_color(i, values[i], bpm_pulse)
-
-                    # Barra base
-                    pygame.draw.rect(
-                        work_surface,
-                        color,
-                        (x_pos + 1, 250 - height, self.bar_width - 2, height),
-                    )
-
-                    # Highlight (Brillo superior barra)
-                    highlight_boost = 40 + int(bpm_pulse * 60)
-                    highlight_color = (
-                        min(255, color[0] + highlight_boost),
-                        min(255, color[1] + highlight_boost),
-                        min(255, color[2] + highlight_boost),
-                        color[3],
-                    )
-                    highlight_height = 3 + int(bpm_pulse * 2)
-                    pygame.draw.rect(
-                        work_surface,
-                        highlight_color,
-                        (x_pos + 1, 250 - height, self.bar_width - 2, highlight_height),
-                    )
-
-                    # Efecto Scanline
-                    if bpm_phase < 0.3:
-                        scan_y = 250 - height + int(bpm_phase * 333 * height / 100)
-                        pygame.draw.rect(
-                            work_surface,
-                            (255, 255, 255, 150),
-                            (x_pos + 1, scan_y, self.bar_width - 2, 2),
-                        )
-
-                # --- PICO (RAYA BLANCA) ---
-                if peak_heights[i] > 0:
-                    # 1. POSICIÓN: Sólida como una roca (sin efectos de BPM)
-                    peak_pixel_y = min(peak_heights[i], 250)
-
-                    # 2. COLOR: Aquí es donde aplicamos el ritmo (Alpha)
-                    # La raya no se mueve, pero brilla con el beat
-                    peak_alpha = 180 + int(bpm_pulse * 75)
-
-                    # Dibujamos justo encima
-                    draw_y = 250 - peak_pixel_y - 2
-
-                    pygame.draw.rect(
-                        work_surface,
-                        (255, 255, 255, peak_alpha),
-                        (x_pos + 2, draw_y, self.bar_width - 4, 2),
-                    )
-
-            # Efecto especial en inicio de compás (Flash de fondo)
-            if is_measure_start:
-                flash_surf = pygame.Surface((self.bar_width * 4, 50), pygame.SRCALPHA)
-                flash_surf.fill((255, 255, 255, 80))
-                work_surface.blit(
-                    flash_surf,
-                    (self.horizontal_margin + self.bar_width * 15, 200),
-                    special_flags=pygame.BLEND_RGBA_ADD,
-                )
-
-            # Efecto especial en inicio de compás (Flash de fondo)
-            if is_measure_start:
-                flash_surf = pygame.Surface((self.bar_width * 4, 50), pygame.SRCALPHA)
-                flash_surf.fill((255, 255, 255, 80))
-                work_surface.blit(
-                    flash_surf,
-                    (self.horizontal_margin + self.bar_width * 15, 200),
-                    special_flags=pygame.BLEND_RGBA_ADD,
-                )
-
-            # Efecto especial en inicio de compás (Se mantiene igual)
-            if is_measure_start:
-                flash_surf = pygame.Surface((self.bar_width * 4, 50), pygame.SRCALPHA)
-                flash_surf.fill((255, 255, 255, 80))
-                work_surface.blit(
-                    flash_surf,
-                    (self.horizontal_margin + self.bar_width * 15, 200),
-                    special_flags=pygame.BLEND_RGBA_ADD,
-                )
-
-        # ====================================================================
-        # EFECTO 3: OGG (formato OGG Vorbis - estilo simétrico) CON BPM
-        # ====================================================================
-        elif fmt == "ogg":
-            center_x = self.w // 2
-            limit = self.bars // 2
-            width_step = (self.w // 2) / limit
-            bar_width = max(1, int(self.bar_width * 0.4))
-
-            for i in range(limit):
-                # Altura con efecto BPM
-                val_base = values[i] * (1.3 + kick * 1.5)
-                bpm_boost = bpm_pulse * 0.3  # Boost en el beat
-                val = val_base * (1.0 + bpm_boost)
-                height = min(int(val * 180), 180)
-                x_offset = i * width_step
-
-                # Color basado en frecuencia con BPM - USANDO safe_color
-                energy_color = self._get_safe_color(i, val, bpm_pulse)
-
-                # Dibujar barra con gradiente vertical
-                step = 4
-                for y_offset in range(0, height, step):
-                    y_pos = 250 - y_offset
-                    if y_pos < 0:
-                        break
-
-                    progress = y_offset / max(1, height)
-                    factor = 0.3 + 0.7 * progress
-
-                    # Efecto de pulsación en beat
-                    if is_beat:
-                        pulse_factor = 1.0 + bpm_pulse * 0.2
-                        factor *= pulse_factor
-
-                    # Calcular color seguro
-                    r = int(energy_color[0] * factor)
-                    g = int(energy_color[1] * factor)
-                    b = int(energy_color[2] * factor)
-
-                    # Asegurar límites
-                    r = max(0, min(255, r))
-                    g = max(0, min(255, g))
-                    b = max(0, min(255, b))
-
-                    color = (
-                        r,
-                        g,
-                        b,
-                        200 + int(bpm_pulse * 55),  # Alpha pulsante
-                    )
-
-                    # Separación sutil en beat
-                    bar_spacing = 0
-                    if is_beat:
-                        bar_spacing = random.uniform(-1, 1) * bpm_pulse * 2
-
-                    pygame.draw.rect(
-                        work_surface,
-                        color,
-                        (
-                            center_x - x_offset - bar_width // 2 + bar_spacing,
-                            y_pos,
-                            bar_width,
-                            step,
-                        ),
-                    )
-                    pygame.draw.rect(
-                        work_surface,
-                        color,
-                        (
-                            center_x + x_offset - bar_width // 2 - bar_spacing,
-                            y_pos,
-                            bar_width,
-                            step,
-                        ),
-                    )
-
-                # Generar partículas en picos altos (más en beats)
-                particle_chance = val * 0.8 + bpm_pulse * 0.2
-                if val > 0.3 and random.random() < particle_chance:
-                    spark_y = 250 - height
-                    if spark_y >= 0:
-                        speed = random.uniform(1.5, 5.0) * (0.5 + val + bpm_pulse * 0.5)
-                        particle_color = (
-                            random.randint(150, 255),
-                            random.randint(50, 200),
-                            int(bpm_pulse * 100),  # Azul en beat
-                        )
-
-                        self.particles_ogg.append(
-                            {
-                                "x": center_x - x_offset,
-                                "y": spark_y,
-                                "vx": COS(2.5) * speed,
-                                "vy": SIN(2.5) * speed,
-                                "life": 1.5 + bpm_pulse * 0.5,  # Más vida en beat
-                                "max_life": 1.5 + bpm_pulse * 0.5,
-                                "color": particle_color,
-                                "size": random.uniform(2, 6),
-                            }
-                        )
-
-                        self.particles_ogg.append(
-                            {
-                                "x": center_x + x_offset,
-                                "y": spark_y,
-                                "vx": COS(0.6) * speed,
-                                "vy": SIN(0.6) * speed,
-                                "life": 1.5 + bpm_pulse * 0.5,
-                                "max_life": 1.5 + bpm_pulse * 0.5,
-                                "color": particle_color,
-                                "size": random.uniform(2, 6),
-                            }
-                        )
-
-            # Actualizar y dibujar partículas OGG
-            self.particles_ogg = [p for p in self.particles_ogg if p["life"] > 0]
-
-            for particle in self.particles_ogg:
-                particle["x"] += particle["vx"]
-                particle["y"] += particle["vy"]
-                particle["life"] -= 0.02
+            # Versión sin numpy: el mismo cálculo barra a barra
+            target_values = [0.0] * self.bars
 
-                if 0 <= particle["y"] <= 350:
-                    alpha = int(255 * (particle["life"] / particle["max_life"]))
+            if is_tracker_physics:
+                n = int(intensity * self.bars * 0.7)
+                if n > 0:
+                    base_value = 0.4 + kick * 0.6 + bpm_pulse * 0.3
+                    for index in rng.sample(range(self.bars), n):
+                        target_values[index] = rng.random() * base_value
 
-                    # Partículas más brillantes en beat
                     if is_beat:
-                        alpha = min(255, alpha + 50)
-
-                    # Asegurar que el color de la partícula sea válido
-                    p_color = particle["color"]
-                    safe_p_color = (
-                        max(0, min(255, p_color[0])),
-                        max(0, min(255, p_color[1])),
-                        max(0, min(255, p_color[2])),
-                        max(0, min(255, alpha)),
-                    )
-
-                    radius = int(
-                        particle["size"] * (particle["life"] / particle["max_life"])
-                    )
-                    pygame.draw.circle(
-                        work_surface,
-                        safe_p_color,
-                        (int(particle["x"]), int(particle["y"])),
-                        radius,
-                    )
-
-        # ====================================================================
-        # EFECTO 4: XM - CON BPM (MEJORADO)
-        # ====================================================================
-        elif fmt == "xm":
-            if NUMPY_AVAILABLE:
-                heights = (values * 140).astype(int)
-                peak_heights = (peaks * 140).astype(int)
+                        boost = 0.5 + bpm_pulse * 0.5
+                        for index in rng.sample(range(self.bars), int(n * 0.3)):
+                            target_values[index] = rng.random() * boost
             else:
-                heights = [int(v * 140) for v in values]
-                peak_heights = [int(p * 140) for p in peaks]
-
-            for i in range(self.bars):
-                base_height = min(heights[i], 250)
-                # Altura con variación rítmica
-                rhythm_variation = SIN(bpm_phase * 2 * PI + i * 0.2) * 0.1
-                height = int(base_height * (1.0 + bpm_pulse * 0.4 + rhythm_variation))
-                x_pos = self.horizontal_margin + i * self.bar_width
-
-                if height > 0:
-                    base_color = self._get_safe_color(i, values[i], bpm_pulse)
-
-                    # Color que cambia con el compás
-                    if self.measure_counter % 2 == 0:
-                        # Compás par: tonos fríos
-                        color = (
-                            clamp_val(int(base_color[0] // 2)),
-                            clamp_val(int(base_color[1])),
-                            clamp_val(
-                                int(min(255, base_color[2] + 50 + int(bpm_pulse * 50)))
-                            ),
-                            clamp_val(int(base_color[3])),
-                        )
-                    else:
-                        # Compás impar: tonos cálidos
-                        color = (
-                            clamp_val(
-                                int(min(255, base_color[0] + 30 + int(bpm_pulse * 30)))
-                            ),
-                            clamp_val(int(base_color[1] // 2)),
-                            clamp_val(int(base_color[2])),
-                            clamp_val(int(base_color[3])),
-                        )
-
-                    pygame.draw.rect(
-                        work_surface,
-                        color,
-                        (x_pos + 1, 250 - height, self.bar_width - 2, height),
+                bpm_factor = self.current_bpm / 120.0
+                for i, x in enumerate(self.x_axis):
+                    wave_sine = (
+                        SIN(x + self.offset * bpm_factor) * 0.5
+                        + 0.5
+                        + SIN(x * 0.5 - self.offset * 2 * bpm_factor) * 0.3
                     )
-
-                    # Highlight que parpadea en el beat
-                    highlight_alpha = 180 if not is_beat else 255
-                    pygame.draw.rect(
-                        work_surface,
-                        (255, 255, 255, highlight_alpha),
-                        (
-                            x_pos + 1,
-                            250 - height,
-                            self.bar_width - 2,
-                            max(1, int(3 * (0.5 + bpm_pulse * 0.5))),
-                        ),
+                    decay = math.exp(-x * 0.4)
+                    target_values[i] = (
+                        wave_sine * (0.3 + intensity * 0.6)
+                        + kick * 0.9 * decay
+                        + bpm_pulse * 0.9 * decay
                     )
-
-                    # Línea de pico con efecto de caída en beat
-                    if peak_heights[i] > 0:
-                        peak_height = min(peak_heights[i], 250)
-                        peak_drop = int(bpm_pulse * 20)  # "Cae" en el beat
-                        pygame.draw.rect(
-                            work_surface,
-                            (
-                                200 - int(bpm_pulse * 50),
-                                200 - int(bpm_pulse * 50),
-                                255,
-                                220,
-                            ),
-                            (
-                                x_pos + 2,
-                                250 - min(peak_height, 250) - peak_drop,
-                                self.bar_width - 4,
-                                1,
-                            ),
-                        )
-
-                    # Reflejo/eco que se mueve con el BPM
-                    reflection_height = int(height * 0.4)
-                    reflection_offset = int(bpm_phase * 10)
-                    pygame.draw.rect(
-                        work_surface,
-                        (*color[:3], 30),
-                        (
-                            x_pos + 1,
-                            252 + reflection_offset,
-                            self.bar_width - 2,
-                            reflection_height,
-                        ),
+                for i, x in enumerate(self.x_axis):
+                    target_values[i] += (
+                        rng.random() * 0.12 * intensity * (1 - math.exp(-x * 0.15))
                     )
 
-            # Partículas XM especiales
-            if random.random() < 0.03 + (bpm_pulse * 0.1):
-                for _ in range(int(1 + bpm_pulse * 3)):
-                    self.particles_xm.append(
-                        {
-                            "x": random.randint(0, self.w),
-                            "y": random.randint(100, 250),
-                            "vx": random.uniform(-1, 1) * (1 + bpm_pulse),
-                            "vy": random.uniform(-2, -0.5) * (1 + bpm_pulse),
-                            "life": random.uniform(1, 2),
-                            "color": (
-                                random.randint(100, 200),
-                                random.randint(100, 255),
-                                random.randint(200, 255),
-                            ),
-                            "size": random.uniform(1, 3) * (1 + bpm_pulse),
-                        }
-                    )
+            for i, target in enumerate(target_values):
+                value = (
+                    target if target > self.values[i] else self.values[i] - BAR_GRAVITY
+                )
+                value = min(1.0, max(0.0, value))
+                peak = value if value > self.peaks[i] else self.peaks[i]
+                self.values[i] = value
+                self.peaks[i] = max(peak - PEAK_GRAVITY, 0.0)
 
-            # Actualizar partículas XM
-            for particle in self.particles_xm:
-                particle["x"] += particle["vx"]
-                particle["y"] += particle["vy"]
-                particle["life"] -= 0.03
-
-                if (
-                    0 <= particle["x"] < self.w
-                    and 0 <= particle["y"] < 350
-                    and particle["life"] > 0
-                ):
-                    alpha = int(255 * particle["life"])
-                    size = int(particle["size"] * particle["life"])
-                    draw_circle_alpha(
-                        work_surface,
-                        (*particle["color"], alpha),
-                        (int(particle["x"]), int(particle["y"])),
-                        size,
-                    )
+        # Referencias locales para el dibujado
+        values = self.values
+        peaks = self.peaks
 
         # ====================================================================
-        # EFECTO 5: IT - NEON 3D (DESPLAZADO ABAJO PARA EVITAR UI)
+        # DIBUJADO: visualizador del formato (se crea en su primer frame y
+        # dibuja en cuanto sus recursos están preparados)
         # ====================================================================
-        elif fmt == "it":
-            # POSICIÓN: BAJAMOS A LA ZONA INFERIOR
-            center_x = self.w // 2
-
-            # Antes era self.h * 0.45 (arriba). Ahora lo bajamos al 75%
-            # Esto lo pone en el cuarto inferior de la pantalla.
-            center_y = int(self.h * 0.75)
-
-            # CONFIGURACIÓN
-            FOV = 400.0
-            CAMERA_Z = 500.0
-            RADIUS = 300.0  # Tamaño generoso
-
-            rotation = current_time * 0.4 + (kick * 0.1)
-
-            draw_list = []
-
-            for i in range(self.bars):
-                val = values[i]
-                if val < 0.01:
-                    continue
-
-                angle_step = (2 * PI) / self.bars
-                bar_angle = i * angle_step + rotation
-
-                x_world = RADIUS * math.cos(bar_angle)
-                z_world = RADIUS * math.sin(bar_angle)
-                z_depth = z_world + CAMERA_Z
-
-                if z_depth < 50:
-                    continue
-
-                scale = FOV / z_depth
-                screen_x = center_x + (x_world * scale)
-
-                rot_visual_width = abs(math.cos(bar_angle + PI / 2))
-                bar_w = max(3, int(32 * scale * rot_visual_width))
-
-                height_pixels = val * 280.0 * scale * (1.0 + kick * 0.5)
-
-                raw_color = self._get_safe_color(i, val, bpm_pulse)
-                depth_alpha = max(0.3, min(1.0, 1.0 - (z_depth / 2000.0)))
-
-                draw_list.append(
-                    {
-                        "z": z_depth,
-                        "x": screen_x,
-                        "y": center_y,
-                        "w": bar_w,
-                        "h": height_pixels,
-                        "color": raw_color,
-                        "alpha": depth_alpha,
-                    }
-                )
-
-            draw_list.sort(key=lambda p: p["z"], reverse=True)
-
-            # Capa de brillo aditivo
-            glow_surface = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
-            glow_surface.fill((0, 0, 0, 0))
-
-            for item in draw_list:
-                rx = item["x"] - item["w"] / 2
-                ry_horizon = item["y"]
-                rw = item["w"]
-                rh = item["h"]
-                r, g, b = item["color"][:3]
-                alpha_factor = item["alpha"]
-
-                if rw > 1 and rh > 1:
-                    # 1. REFLEJO (ESPEJO - HACIA ARRIBA)
-                    # OJO: Si hay algo negro arriba, el reflejo se verá tapado.
-                    # Pero la barra principal (hacia abajo) se verá perfecta.
-                    mirror_alpha = int(80 * alpha_factor)
-                    if mirror_alpha > 0:
-                        pygame.draw.rect(
-                            work_surface,
-                            (r, g, b, mirror_alpha),
-                            (rx, ry_horizon - rh, rw, rh),
-                        )
-
-                    # 2. BARRA PRINCIPAL (HACIA ABAJO)
-                    body_alpha = int(255 * alpha_factor)
-                    pygame.draw.rect(
-                        work_surface, (r, g, b, body_alpha), (rx, ry_horizon, rw, rh)
-                    )
-
-                    # 3. LUCES GLOW (ADITIVO)
-                    halo_alpha = int(80 * alpha_factor)
-                    # Glow abajo
-                    pygame.draw.rect(
-                        glow_surface,
-                        (r, g, b, halo_alpha),
-                        (rx - 5, ry_horizon, rw + 10, rh),
-                    )
-
-                    # Núcleo brillante
-                    core_w = max(1, rw // 2)
-                    core_x = rx + (rw - core_w) // 2
-                    core_alpha = int(150 * alpha_factor)
-                    core_color = (
-                        min(255, r + 100),
-                        min(255, g + 100),
-                        min(255, b + 100),
-                        core_alpha,
-                    )
-
-                    pygame.draw.rect(
-                        glow_surface, core_color, (core_x, ry_horizon, core_w, rh)
-                    )
-
-            # Fusión
-            work_surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
-
-            # --- FUSIÓN FINAL ---
-            # Sumamos la luz de glow_surface a la pantalla principal
-            surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_ADD)
-
-            # --- Partículas 3D (CORREGIDO) ---
-            # Flotando alrededor con movimiento y VIDA
-            if bpm_pulse > 0.5 and random.random() < 0.2:
-                self.particles_3d.append(
-                    {
-                        "x": center_x + random.uniform(-300, 300),
-                        "y": center_y + random.uniform(-100, 100),
-                        "z": random.uniform(200, 600),
-                        "vx": random.uniform(-1, 1),  # Velocidad X
-                        "vy": random.uniform(-1, 1),  # Velocidad Y
-                        "vz": random.uniform(-5, -15),  # Velocidad Z (hacia la cámara)
-                        "life": 1.0,  # <--- ESTO EVITA EL CRASH
-                        "color": self._get_safe_color(random.randint(0, 63), 1.0, 1.0),
-                    }
-                )
+        visualizer = self._visualizer(fmt, current_time)
+        self._release_idle(current_time)
+        if visualizer is None:
+            return
 
-            # --- Actualizar y dibujar las partículas 3D ---
-            # (IMPORTANTE: Esto mueve las partículas y reduce su vida)
-            for p in self.particles_3d:
-                p["x"] += p.get("vx", 0)
-                p["y"] += p.get("vy", 0)
-                p["z"] += p.get("vz", -5)
-                p["life"] -= 0.02  # Reducir vida para que desaparezcan
-
-                if p["life"] > 0 and p["z"] > 10:
-                    scale_p = FOV / p["z"]
-                    sx = int(center_x + (p["x"] - center_x) * scale_p)
-                    sy = int(center_y + (p["y"] - center_y) * scale_p)
-
-                    if 0 <= sx < self.w and 0 <= sy < self.h:
-                        alpha = int(255 * p["life"])
-                        r, g, b = p["color"][:3]
-                        # Dibujamos un círculo brillante
-                        pygame.draw.circle(
-                            surface,
-                            (r, g, b, alpha),
-                            (sx, sy),
-                            max(1, int(2 * scale_p)),
-                        )
+        # Limpiar superficie de trabajo
+        work_surface = self.work_surf
+        work_surface.fill((0, 0, 0, 0))
 
-            # Limpieza de partículas muertas
-            self.particles_3d = [p for p in self.particles_3d if p.get("life", 0) > 0]
+        visualizer.draw(surface, work_surface, ctx, values, peaks)
 
-        # --- BLOQUE FINAL FUERA DE LOS IF/ELIF ---
-        # Si NO es modo IT, necesitamos pegar la work_surface (la tira de 350px)
-        # a la pantalla principal.
-        if fmt != "it":
-            # Pegamos la tira en la parte inferior de la pantalla
-            surface.blit(self.work_surf, (0, self.h - 350))
+        # La tira de 350px de los efectos 2D va en la parte inferior
+        if visualizer.uses_work_surface:
+            audit_blit(surface, work_surface, "spectrum_work_surf")
+            surface.blit(work_surface, (0, self.h - 350))
 
 
 # ============================================================================
@@ -1732,7 +1527,6 @@ class CRTBoot:
         self.preload_completed = False
         self.preload_callback = None
 
-        self.last_time = time.time()
         self.char_interval = 0.05
         self.timer = 0.0
         self.pause_duration = 1.5
@@ -1769,6 +1563,16 @@ class CRTBoot:
         self.start_y = self.h // 2 - (len(self.lines) * 25) // 2
         self.line_height = 25
 
+        # Presentación por rectángulos sucios: fondo compuesto (color + líneas
+        # terminadas + scanlines) del que se restauran solo las zonas tocadas
+        self.background = prepare_surface(pygame.Surface((width, height)))
+        self._compose_background()
+        self.dirty_rects = []  # Zonas cambiadas en el último draw()
+        self.full_redraw = True  # Próximo draw() pinta toda la pantalla
+        self._last_text_rect = None
+        self._last_sweep_rect = None
+        self._stale_rects = []  # Zonas del fondo que cambiaron
+
     def set_preload_callback(self, callback):
         """
         Establece una función callback para ejecutar cuando el texto termine.
@@ -1802,19 +1606,44 @@ class CRTBoot:
             text = self.lines[line_index]
             y_pos = self.start_y + (line_index * self.line_height)
             glow = self.font.render(text, True, self.color_glow)
-            self.static_text_surface.blit(glow, (51, y_pos + 1))
+            glow_rect = self.static_text_surface.blit(glow, (51, y_pos + 1))
             txt = self.font.render(text, True, self.color_text)
-            self.static_text_surface.blit(txt, (50, y_pos))
+            txt_rect = self.static_text_surface.blit(txt, (50, y_pos))
+
+            # La línea pasa al fondo compuesto (se repinta en el próximo draw)
+            line_rect = glow_rect.union(txt_rect)
+            self._compose_background(line_rect)
+            self._stale_rects.append(line_rect)
+
+    def _compose_background(self, rect=None):
+        """Recompone el fondo (o solo 'rect'): color, texto fijo y scanlines"""
+        if rect is None:
+            rect = self.background.get_rect()
+        self.background.fill((5, 10, 15), rect)
+        self.background.blit(self.static_text_surface, rect, rect)
+        self.background.blit(self.scanlines_surf, rect, rect)
+
+    def _restore(self, surface, rect):
+        """Repinta una zona con el fondo y la marca como sucia"""
+        if rect is not None:
+            surface.blit(self.background, rect, rect)
+            self.dirty_rects.append(rect)
+
+    def draw(self, surface, ctx):
+        """
+        Dibuja un frame de la secuencia de arranque
 
-    def draw(self, surface):
+        Args:
+            surface: Superficie donde dibujar
+            ctx: FrameContext del frame actual (reloj y dt)
+        """
         if self.pause_completed:
+            self.dirty_rects = []
             return
 
-        now = time.time()
-        dt = now - self.last_time
-        self.last_time = now
-        if dt > 0.1:
-            dt = 0.1
+        now = ctx.time
+        dt = min(ctx.dt, 0.1)
+        self.dirty_rects = []
 
         # 1. LÓGICA DE ESCRITURA DE TEXTO (ACELERADA)
         if self.current_line_idx < len(self.lines):
@@ -1838,15 +1667,15 @@ class CRTBoot:
         elif not self.text_finished:
             self.text_finished = True
             self.preload_start_time = now
-            print("[CRTBoot] Texto terminado. Iniciando precarga...")
+            logger.info("CRTBoot", "Texto terminado. Iniciando precarga...")
 
         # 3. EJECUTAR PRECARGA SI HAY CALLBACK
         elif self.text_finished and not self.preload_completed:
             if self.preload_callback and not self.preload_completed:
-                print("[CRTBoot] Ejecutando callback de precarga...")
+                logger.info("CRTBoot", "Ejecutando callback de precarga...")
                 self.preload_completed = self.preload_callback()
             elif self.preload_callback is None:
-                print("[CRTBoot] No hay callback de precarga. Saltando...")
+                logger.info("CRTBoot", "No hay callback de precarga. Saltando...")
                 self.preload_completed = True
 
         # 4. ESPERAR PAUSA DESPUÉS DE PRECARGA
@@ -1854,7 +1683,7 @@ class CRTBoot:
             self.finish_timer += dt
             if self.finish_timer >= 0.3:
                 self.pause_completed = True
-                print("[CRTBoot] Secuencia de arranque completada.")
+                logger.info("CRTBoot", "Secuencia de arranque completada.")
 
         # 5. CURSOR Y ANIMACIÓN
         self.cursor_blink_timer += dt
@@ -1862,23 +1691,42 @@ class CRTBoot:
             self.cursor_blink_timer = 0
             self.show_cursor = not self.show_cursor
 
-        # 6. DIBUJO
-        surface.fill((5, 10, 15))
-        surface.blit(self.static_text_surface, (0, 0))
-
+        # 6. DIBUJO (solo se repintan las zonas que cambian)
+        if self.full_redraw:
+            surface.blit(self.background, (0, 0))
+            self.dirty_rects = [surface.get_rect()]
+            self.full_redraw = False
+        else:
+            # Borrar la línea en escritura y el barrido del frame anterior
+            self._restore(surface, self._last_text_rect)
+            self._restore(surface, self._last_sweep_rect)
+            for rect in self._stale_rects:
+                self._restore(surface, rect)
+        self._stale_rects.clear()
+
+        self._last_text_rect = None
         if self.current_line_idx < len(self.lines):
             current_text = self.lines[self.current_line_idx][: self.current_char_idx]
             if self.show_cursor:
                 current_text += "█"
             y_pos = self.start_y + (self.current_line_idx * self.line_height)
             glow = self.font.render(current_text, True, self.color_glow)
-            surface.blit(glow, (51, y_pos + 1))
+            glow_rect = surface.blit(glow, (51, y_pos + 1))
             txt = self.font.render(current_text, True, self.color_text)
-            surface.blit(txt, (50, y_pos))
+            txt_rect = surface.blit(txt, (50, y_pos))
+
+            # Scanlines por encima del texto, solo en su zona
+            text_rect = glow_rect.union(txt_rect)
+            surface.blit(self.scanlines_surf, text_rect, text_rect)
+            self.dirty_rects.append(text_rect)
+            self._last_text_rect = text_rect
 
-        surface.blit(self.scanlines_surf, (0, 0))
-        scan_h = int(time.time() * 200) % self.h
-        pygame.draw.line(surface, (100, 255, 255, 40), (0, scan_h), (self.w, scan_h), 2)
+        scan_h = int(now * 200) % self.h
+        sweep_rect = pygame.draw.line(
+            surface, (100, 255, 255, 40), (0, scan_h), (self.w, scan_h), 2
+        )
+        self.dirty_rects.append(sweep_rect)
+        self._last_sweep_rect = sweep_rect
 
     def reset(self):
         """Reinicia la secuencia de arranque"""
@@ -1889,8 +1737,9 @@ class CRTBoot:
         self.current_char_idx = 0
         self.timer = 0.0
         self.finish_timer = 0.0
-        self.last_time = time.time()
         self.static_text_surface.fill((0, 0, 0, 0))
+        self._compose_background()
+        self.full_redraw = True
 
 
 # ============================================================================
@@ -1952,10 +1801,17 @@ class RetroGrid:
 
         return (x_screen, y_screen)
 
-    def draw(self, surface, time_val, kick=0.0):
+    def draw(self, surface, time_val, kick=0.0, commands=None):
         """
         Dibuja el grid con perspectiva 3D
+
+        Args:
+            commands: CommandBuffer donde grabar las primitivas (None = dibujar ya)
         """
+        immediate = commands is None
+        if immediate:
+            commands = CommandBuffer()
+        grid_surf = self.grid_surf
         surface_height = self.h // 2
         offset_y = (time_val * 100) % 40  # Desplazamiento animado
 
@@ -1978,7 +1834,7 @@ class RetroGrid:
         self.lit_cells = [cell for cell in self.lit_cells if cell[3] > 0.05]
 
         # Limpiar superficie (reutilizable)
-        self.grid_surf.fill((0, 0, 0, 0))
+        commands.fill(grid_surf, (0, 0, 0, 0))
         center_x = self.w // 2
 
         # ====================================================================
@@ -2008,14 +1864,12 @@ class RetroGrid:
             rgba_color = (*color, int(160 * life))
 
             # Dibujar celda rellena
-            pygame.draw.polygon(
-                self.grid_surf, rgba_color, [point1, point2, point3, point4]
-            )
+            commands.polygon(grid_surf, rgba_color, [point1, point2, point3, point4])
 
             # Borde blanco para celdas con mucha vida
             if life > 0.7:
-                pygame.draw.polygon(
-                    self.grid_surf,
+                commands.polygon(
+                    grid_surf,
                     (255, 255, 255, 120),
                     [point1, point2, point3, point4],
                     1,
@@ -2028,8 +1882,8 @@ class RetroGrid:
 
         # Líneas verticales (convergen en el centro)
         for i in range(-14, 15):
-            pygame.draw.line(
-                self.grid_surf,
+            commands.line(
+                grid_surf,
                 (*grid_color, 80),
                 (center_x + i * 20, 0),
                 (center_x + i * 150, surface_height),
@@ -2045,8 +1899,8 @@ class RetroGrid:
                 line_alpha = int((y_3d / surface_height) * 200)
 
                 if line_alpha > 10:
-                    pygame.draw.line(
-                        self.grid_surf,
+                    commands.line(
+                        grid_surf,
                         (*grid_color, line_alpha),
                         (0, y_3d),
                         (self.w, y_3d),
@@ -2054,10 +1908,13 @@ class RetroGrid:
                     )
 
         # Cabecera superior (ocultar líneas que sobresalen)
-        pygame.draw.rect(self.grid_surf, (10, 10, 18), (0, 0, self.w, 20))
+        commands.rect(grid_surf, (10, 10, 18), (0, 0, self.w, 20))
 
         # Dibujar grid en posición final
-        surface.blit(self.grid_surf, (0, self.horizon))
+        commands.blit(surface, grid_surf, (0, self.horizon))
+
+        if immediate:
+            commands.execute()
 
 
 # ============================================================================
@@ -2096,6 +1953,11 @@ class PeaceCodeRain:
                 char, True, (200, 255, 200)
             )
 
+        # Variantes (carácter, opacidad) empaquetadas en un atlas y dibujadas
+        # en lote: un blits() por tramo de página en vez de un blit por carácter
+        self.atlas = SpriteAtlas((256, 256))
+        self.batch = SpriteBatch()
+
         # ====================================================================
         # INICIALIZAR GOTAS
         # ====================================================================
@@ -2146,19 +2008,28 @@ class PeaceCodeRain:
                     is_head = i == 0
                     cache_key = char + "_head" if is_head else char
 
-                    # Obtener superficie pre-renderizada
-                    char_surface = self.char_cache.get(cache_key)
+                    # Alpha decreciente hacia atrás en la cadena (en pasos de 8)
+                    if i > 5:
+                        char_alpha = max(0, drop["alpha"] - i * 10)
+                    else:
+                        char_alpha = drop["alpha"]
+                    char_alpha = quantize(char_alpha, RAIN_ALPHA_STEP)
+
+                    # Variante pre-renderizada en el atlas
+                    region = self.atlas.get((cache_key, char_alpha))
+                    if region is None:
+                        char_surface = self.char_cache.get(cache_key)
+                        if char_surface is None:
+                            continue
+                        region = self.atlas.add(
+                            (cache_key, char_alpha),
+                            bake_alpha(char_surface, char_alpha),
+                        )
 
-                    if char_surface:
-                        # Aplicar alpha decreciente hacia atrás en la cadena
-                        if i > 5:
-                            char_alpha = max(0, drop["alpha"] - i * 10)
-                            char_surface.set_alpha(char_alpha)
-                        else:
-                            char_surface.set_alpha(drop["alpha"])
+                    self.batch.draw_region(region, (drop["x"], y_pos))
 
-                        # Dibujar carácter
-                        surface.blit(char_surface, (drop["x"], y_pos))
+        # Todos los caracteres de una vez
+        self.batch.flush(surface)
 
 
 # ============================================================================
@@ -2204,7 +2075,9 @@ class PraxisEvent:
         # ====================================================================
         # SISTEMAS DE EFECTOS
         # ====================================================================
-        self.blobs = []  # Partículas de explosión
+        self.blobs = ParticlePool(  # Partículas de explosión
+            BLAST_PARTICLES, ("x", "y", "vx", "vy", "size", "max_size", "life")
+        )
         self.squadron = []  # X-Wings (primer plano)
         self.lit_cells = []  # Celdas iluminadas en grid 3D
 
@@ -3182,12 +3055,11 @@ class PraxisEvent:
             scaled_fire = pygame.transform.scale(self.low_surf, (self.w, self.h))
             surface.blit(scaled_fire, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
 
-            # Flash blanco progresivo (cúbico para efecto dramático)
-            if int(progress**3 * 255) > 0:
-                flash_surf = pygame.Surface((self.w, self.h))
-                flash_surf.fill((255, 255, 255))
-                flash_surf.set_alpha(int(progress**3 * 255))
-                surface.blit(flash_surf, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            # Flash blanco progresivo (cúbico para efecto dramático): sumar el
+            # gris directamente (set_alpha no afecta a los blits aditivos)
+            flash = int(progress**3 * 255)
+            if flash > 0:
+                surface.fill((flash, flash, flash), special_flags=pygame.BLEND_RGB_ADD)
 
         # ====================================================================
         # FASE 2: EXPLOSIÓN (2+ segundos)
@@ -3199,22 +3071,18 @@ class PraxisEvent:
                 self.wiped = True
 
                 # Generar partículas de explosión
-                for _ in range(100):
+                for _ in range(BLAST_PARTICLES):
                     angle = random.uniform(0, 6.28)
                     speed = random.uniform(0.1, 4.0)
 
-                    self.blobs.append(
-                        [
-                            self.low_w // 2,  # X inicial (centro)
-                            self.low_h // 2,  # Y inicial (centro)
-                            math.cos(angle) * speed,  # Velocidad X
-                            math.sin(angle)
-                            * speed
-                            * 0.8,  # Velocidad Y (más lento vertical)
-                            random.uniform(2, 6),  # Tamaño inicial
-                            random.uniform(2, 5),  # Tamaño máximo
-                            random.uniform(2, 5),  # Vida inicial
-                        ]
+                    self.blobs.spawn(
+                        x=self.low_w // 2,  # X inicial (centro)
+                        y=self.low_h // 2,  # Y inicial (centro)
+                        vx=math.cos(angle) * speed,
+                        vy=math.sin(angle) * speed * 0.8,  # Más lento en vertical
+                        size=random.uniform(2, 6),  # Tamaño inicial
+                        max_size=random.uniform(2, 5),  # Tamaño máximo
+                        life=random.uniform(2, 5),  # Vida inicial
                     )
 
             # Reproducir sonido de explosión (una sola vez)
@@ -3229,28 +3097,26 @@ class PraxisEvent:
             blast_elapsed = elapsed - 2.0
             self.low_surf.fill((0, 0, 0))
 
-            # Actualizar y dibujar partículas de explosión
-            for blob in self.blobs:
-                # Movimiento
-                blob[0] += blob[2]  # X
-                blob[1] += blob[3]  # Y
+            # Actualizar (movimiento con deceleración) y dibujar la explosión
+            blobs = self.blobs
+            blobs.update(0.016, drag=0.92)
 
-                # Deceleración
-                blob[2] *= 0.92
-                blob[3] *= 0.92
-
-                # Decaimiento de vida
-                blob[6] -= 0.016
-
-                # Dibujar si aún tiene vida
-                if blob[6] > 0:
-                    # Color: blanco -> amarillo -> rojo -> apagar
-                    intensity = max(0, min(255, int(255 * (blob[6] / blob[5]))))
-                    color = (255, intensity, 0)
+            # Color: blanco -> amarillo -> rojo -> apagar
+            life, max_size = blobs.column("life"), blobs.column("max_size")
+            if blobs.vectorized:
+                greens = (255 * (life / max_size)).astype(int)
+                radii = blobs.column("size").astype(int)
+            else:
+                greens = [int(255 * (v / m)) for v, m in zip(life, max_size)]
+                radii = [int(size) for size in blobs.column("size")]
 
-                    pygame.draw.circle(
-                        self.low_surf, color, (int(blob[0]), int(blob[1])), int(blob[4])
-                    )
+            draw_circles(
+                self.low_surf,
+                blobs.column("x"),
+                blobs.column("y"),
+                radii,
+                (255, greens, 0),
+            )
 
             # Escalar explosión a pantalla completa
             big_fire = pygame.transform.scale(self.low_surf, (self.w, self.h))
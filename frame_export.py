@@ -0,0 +1,296 @@
+# frame_export.py
+# Exportación de frames a memoria compartida para herramientas de captura
+# El render copia cada frame presentado a un anillo; un lector externo lo consume
+
+import sys
+import time
+import struct
+from multiprocessing import shared_memory
+
+# ============================================================================
+# FORMATO DEL ANILLO
+# ============================================================================
+#
+# [cabecera global][slot 0][slot 1]...[slot N-1]
+#
+# Cabecera global (little-endian):
+#   magic "MWFR", versión, nº de slots, ancho, alto, pitch (bytes por fila),
+#   tamaño de slot, formato de píxel ("BGRX", "RGBA"...), último frame completo
+#
+# Cada slot: cabecera (secuencia, nº de frame, hora, ancho, alto) + píxeles.
+# La secuencia es impar mientras el escritor copia y par al terminar
+# (seqlock): el lector descarta la copia si la secuencia cambió entretanto.
+# El escritor nunca espera; si el lector va lento, pierde frames.
+
+MAGIC = b"MWFR"
+VERSION = 1
+DEFAULT_NAME = "metalwar_frames"
+DEFAULT_SLOTS = 4
+
+HEADER_FORMAT = "<4sHHIIII4sQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+LATEST_OFFSET = HEADER_SIZE - 8  # Último campo: nº del último frame completo
+
+SLOT_HEADER_FORMAT = "<QQdII"  # secuencia, frame, hora, ancho, alto
+SLOT_HEADER_SIZE = struct.calcsize(SLOT_HEADER_FORMAT)
+
+DATA_ALIGN = 64  # Alineación de los píxeles de cada slot
+
+
+def _align(value, alignment=DATA_ALIGN):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def pixel_format(surface):
+    """
+    Describe el orden de bytes de una superficie ("BGRX", "RGBA", "RGB"...)
+
+    Args:
+        surface: Superficie de 24 o 32 bits
+    Returns:
+        Cadena de 3 o 4 letras (X = byte sin usar)
+    """
+    size = surface.get_bytesize()
+    masks = surface.get_masks()
+    names = "RGBA"
+    little = sys.byteorder == "little"
+
+    letters = []
+    for byte in range(size):
+        shift = 8 * byte if little else 8 * (size - 1 - byte)
+        letter = "X"
+        for name, mask in zip(names, masks):
+            if mask == 0xFF << shift:
+                letter = name
+                break
+        letters.append(letter)
+    return "".join(letters)
+
+
+def _unregister_tracker(shm):
+    """
+    En POSIX, el resource_tracker de Python borra los segmentos al salir
+    cualquier proceso que los abra; el lector no debe borrar el del juego
+    """
+    if sys.platform == "win32":
+        return
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+
+# ============================================================================
+# ESCRITOR (proceso del juego)
+# ============================================================================
+
+
+class FrameExporter:
+    """
+    Copia cada frame presentado a un anillo en memoria compartida
+
+    El coste en el hilo de render es una sola copia de memoria: los píxeles
+    se leen de la superficie de pantalla sin convertir (formato nativo) y se
+    escriben directamente en el slot.
+    """
+
+    def __init__(self, surface, name=DEFAULT_NAME, slots=DEFAULT_SLOTS):
+        """
+        Args:
+            surface: Superficie de pantalla (define tamaño y formato)
+            name: Nombre del segmento de memoria compartida
+            slots: Frames que caben en el anillo
+        """
+        self.width, self.height = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.format = pixel_format(surface)
+        self.slots = max(2, int(slots))
+        self.frame_bytes = self.pitch * self.height
+        self.slot_size = _align(SLOT_HEADER_SIZE) + _align(self.frame_bytes)
+
+        total = _align(HEADER_SIZE) + self.slot_size * self.slots
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=total)
+        self.name = self.shm.name
+        self.buf = self.shm.buf
+
+        struct.pack_into(
+            HEADER_FORMAT,
+            self.buf,
+            0,
+            MAGIC,
+            VERSION,
+            self.slots,
+            self.width,
+            self.height,
+            self.pitch,
+            self.slot_size,
+            self.format.ljust(4).encode("ascii"),
+            0,
+        )
+
+        self.slot_offsets = [
+            _align(HEADER_SIZE) + i * self.slot_size for i in range(self.slots)
+        ]
+        self.sequences = [0] * self.slots
+        self.frame = 0
+        self.skipped = 0  # Frames no exportados (cambio de tamaño de ventana)
+
+    def publish(self, surface):
+        """
+        Copia el frame presentado al siguiente slot del anillo
+
+        Args:
+            surface: Superficie de pantalla (llamar justo después del flip)
+        Returns:
+            True si el frame se exportó
+        """
+        if (
+            self.buf is None
+            or surface.get_size() != (self.width, self.height)
+            or surface.get_pitch() != self.pitch
+        ):
+            self.skipped += 1
+            return False
+
+        index = self.frame + 1
+        slot = index % self.slots
+        base = self.slot_offsets[slot]
+        data = base + _align(SLOT_HEADER_SIZE)
+        buf = self.buf
+
+        # Secuencia impar: slot en escritura
+        sequence = self.sequences[slot] + 1
+        struct.pack_into("<Q", buf, base, sequence)
+
+        view = surface.get_view("0")
+        try:
+            buf[data : data + self.frame_bytes] = view
+        finally:
+            del view  # Libera el bloqueo de la superficie
+
+        # Hora de pared: sirve para sincronizar con grabaciones externas
+        struct.pack_into(
+            SLOT_HEADER_FORMAT,
+            buf,
+            base,
+            sequence + 1,
+            index,
+            time.time(),
+            self.width,
+            self.height,
+        )
+        self.sequences[slot] = sequence + 1
+
+        struct.pack_into("<Q", buf, LATEST_OFFSET, index)
+        self.frame = index
+        return True
+
+    def close(self):
+        """Libera y borra el segmento de memoria compartida"""
+        if self.buf is None:
+            return
+        self.buf = None
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (OSError, BufferError):
+            pass
+
+
+# ============================================================================
+# LECTOR (proceso externo)
+# ============================================================================
+
+
+class FrameRingReader:
+    """Lee frames del anillo que publica FrameExporter"""
+
+    def __init__(self, name=DEFAULT_NAME):
+        """
+        Args:
+            name: Nombre del segmento de memoria compartida
+        Raises:
+            FileNotFoundError si el juego no está exportando
+            ValueError si el segmento no tiene el formato esperado
+        """
+        self.shm = shared_memory.SharedMemory(name=name)
+        _unregister_tracker(self.shm)
+        self.buf = self.shm.buf
+
+        (
+            magic,
+            version,
+            self.slots,
+            self.width,
+            self.height,
+            self.pitch,
+            self.slot_size,
+            fmt,
+            _,
+        ) = struct.unpack_from(HEADER_FORMAT, self.buf, 0)
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError("El segmento no es un anillo de frames de MetalWar")
+
+        self.format = fmt.decode("ascii").strip()
+        self.frame_bytes = self.pitch * self.height
+        self.last_frame = self.latest()  # Empezar por el frame actual
+        self.dropped = 0  # Frames que el escritor sobrescribió antes de leerlos
+        self.torn = 0  # Lecturas descartadas por coincidir con una escritura
+
+    def latest(self):
+        """Número del último frame completo publicado"""
+        return struct.unpack_from("<Q", self.buf, LATEST_OFFSET)[0]
+
+    def _read_slot(self, index):
+        """Copia un frame concreto; None si ya se sobrescribió o se rompió"""
+        base = _align(HEADER_SIZE) + (index % self.slots) * self.slot_size
+        data = base + _align(SLOT_HEADER_SIZE)
+
+        before, frame, stamp, _, _ = struct.unpack_from(
+            SLOT_HEADER_FORMAT, self.buf, base
+        )
+        if before & 1 or frame != index:
+            return None
+
+        pixels = bytes(self.buf[data : data + self.frame_bytes])
+
+        after = struct.unpack_from("<Q", self.buf, base)[0]
+        if after != before:
+            self.torn += 1
+            return None
+        return frame, stamp, pixels
+
+    def read_next(self):
+        """
+        Siguiente frame sin leer (el más antiguo que siga en el anillo)
+
+        Returns:
+            (nº de frame, hora, bytes) o None si no hay frame nuevo
+        """
+        latest = self.latest()
+        if latest <= self.last_frame:
+            return None
+
+        # Los más antiguos que el anillo ya no existen
+        oldest = max(self.last_frame + 1, latest - self.slots + 2)
+        for index in range(oldest, latest + 1):
+            result = self._read_slot(index)
+            if result is not None:
+                self.dropped += index - self.last_frame - 1
+                self.last_frame = index
+                return result
+        return None
+
+    def close(self):
+        """Se desconecta del segmento (sin borrarlo)"""
+        if self.buf is None:
+            return
+        self.buf = None
+        try:
+            self.shm.close()
+        except (OSError, BufferError):
+            pass
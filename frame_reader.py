@@ -0,0 +1,143 @@
+# frame_reader.py
+# Lector del anillo de frames que exporta MetalWar (--export-frames)
+# Guarda los frames como PNG o los envía en crudo por stdout (ej. a ffmpeg)
+#
+# Uso:
+#   python frame_reader.py --out capturas/        PNG numerados
+#   python frame_reader.py --pipe | ffmpeg -f rawvideo -pix_fmt bgr0 \
+#       -s 1024x768 -r 60 -i - captura.mp4        (formato y tamaño: ver stderr)
+#
+# Opciones:
+#   --name NOMBRE     Segmento de memoria compartida (por defecto metalwar_frames)
+#   --frames N        Parar tras N frames
+#   --timeout SEG     Parar si no llegan frames en SEG segundos (por defecto 5)
+
+import os
+import sys
+import time
+
+from frame_export import DEFAULT_NAME, FrameRingReader
+
+# Formato de píxel del anillo -> pix_fmt de ffmpeg
+FFMPEG_FORMATS = {
+    "BGRX": "bgr0",
+    "BGRA": "bgra",
+    "RGBX": "rgb0",
+    "RGBA": "rgba",
+    "XRGB": "0rgb",
+    "ARGB": "argb",
+    "RGB": "rgb24",
+    "BGR": "bgr24",
+}
+
+
+def parse_args(argv):
+    """Argumentos de línea de comandos (sin dependencias)"""
+    options = {
+        "name": DEFAULT_NAME,
+        "out": None,
+        "pipe": False,
+        "frames": 0,
+        "timeout": 5.0,
+    }
+
+    args = iter(argv)
+    for arg in args:
+        if arg == "--pipe":
+            options["pipe"] = True
+        elif arg == "--out":
+            options["out"] = next(args, None)
+        elif arg == "--name":
+            options["name"] = next(args, DEFAULT_NAME)
+        elif arg == "--frames":
+            options["frames"] = int(next(args, "0"))
+        elif arg == "--timeout":
+            options["timeout"] = float(next(args, "5"))
+        else:
+            raise SystemExit(f"Opción desconocida: {arg}")
+
+    if not options["pipe"] and not options["out"]:
+        raise SystemExit("Indica --out CARPETA o --pipe")
+    return options
+
+
+def save_png(reader, pixels, path):
+    """Guarda un frame como PNG (necesita pygame)"""
+    import pygame
+
+    width, height, fmt = reader.width, reader.height, reader.format
+    bpp = len(fmt)
+
+    # Quitar el relleno de fila si el pitch no coincide con el ancho
+    row = width * bpp
+    if reader.pitch != row:
+        pixels = b"".join(
+            pixels[y * reader.pitch : y * reader.pitch + row] for y in range(height)
+        )
+
+    # Byte X sin usar -> alpha opaco (si no, el PNG saldría transparente)
+    if "X" in fmt:
+        data = bytearray(pixels)
+        x = fmt.index("X")
+        data[x::bpp] = b"\xff" * (len(data) // bpp)
+        pixels = bytes(data)
+        fmt = fmt.replace("X", "A")
+
+    surface = pygame.image.frombuffer(pixels, (width, height), fmt)
+    pygame.image.save(surface, path)
+
+
+def main(argv):
+    options = parse_args(argv)
+
+    try:
+        reader = FrameRingReader(options["name"])
+    except FileNotFoundError:
+        print(f"[LECTOR] No hay anillo '{options['name']}' (¿--export-frames?)")
+        return 1
+
+    print(
+        f"[LECTOR] {reader.width}x{reader.height} {reader.format} "
+        f"(ffmpeg: -pix_fmt {FFMPEG_FORMATS.get(reader.format, '?')} "
+        f"-s {reader.width}x{reader.height})",
+        file=sys.stderr,
+    )
+
+    if options["out"]:
+        os.makedirs(options["out"], exist_ok=True)
+
+    written = 0
+    last_frame_time = time.monotonic()
+    try:
+        while not options["frames"] or written < options["frames"]:
+            result = reader.read_next()
+            if result is None:
+                if time.monotonic() - last_frame_time > options["timeout"]:
+                    break
+                time.sleep(0.002)
+                continue
+
+            frame, _, pixels = result
+            last_frame_time = time.monotonic()
+
+            if options["pipe"]:
+                sys.stdout.buffer.write(pixels)
+            else:
+                path = os.path.join(options["out"], f"frame_{frame:06d}.png")
+                save_png(reader, pixels, path)
+            written += 1
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        reader.close()
+
+    print(
+        f"[LECTOR] Frames: {written} | Perdidos: {reader.dropped} | "
+        f"Descartados: {reader.torn}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,362 @@
+# golden_frames.py
+# Regresión visual por "golden frames" para los efectos de MetalWar
+# Renderiza frames deterministas sin ventana y los compara con PNGs de referencia
+#
+# Uso:
+#   python golden_frames.py             Compara con golden/*.png
+#   python golden_frames.py --update    Regenera las referencias
+#   python golden_frames.py starfield   Solo los casos indicados
+#
+# Cada caso se renderiza por el camino NumPy y por el escalar (NUMPY_AVAILABLE
+# a False). Si ambos caminos deben dar la misma imagen, el caso se marca como
+# emparejado y además se comparan entre sí. Los efectos con azar reciben un
+# EffectRandom con semilla fija (effect_rng) para que los dos caminos consuman
+# los mismos números.
+
+import os
+import sys
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    print("[GOLDEN] Se necesita numpy para comparar imágenes")
+    sys.exit(2)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+DIFF_DIR = os.path.join(os.environ.get("METALWAR_TEMP_DIR", "temp"), "golden_diff")
+
+WIDTH, HEIGHT = 640, 480
+SEED = 1234
+BASE_TIME = 1000.0  # Reloj fijo de los FrameContext sintéticos
+FRAME_DT = 1.0 / 60.0
+
+# Tolerancias: diferencia por canal, fracción de píxeles fuera y SSIM mínimo
+PIXEL_TOLERANCE = 8
+MAX_BAD_PIXELS = 0.005
+MIN_SSIM = 0.97
+
+
+# ============================================================================
+# UTILIDADES DE RENDER
+# ============================================================================
+
+
+def set_numpy_path(enabled):
+    """Activa o desactiva el camino NumPy en los módulos de efectos"""
+    import utils
+    import effects
+    import postfx
+    import drawcmd
+    import particles
+    import visualizers
+
+    utils.NUMPY_AVAILABLE = enabled
+    effects.NUMPY_AVAILABLE = enabled
+    postfx.NUMPY_AVAILABLE = enabled
+    drawcmd.NUMPY_AVAILABLE = enabled
+    particles.NUMPY_AVAILABLE = enabled
+    visualizers.NUMPY_AVAILABLE = enabled
+
+
+def seed_all():
+    """Semillas fijas para random y numpy"""
+    random.seed(SEED)
+    np.random.seed(SEED)
+
+
+def effect_rng():
+    """
+    EffectRandom con la semilla fija: inyectado en un efecto, sus dos
+    caminos consumen los mismos números y el caso se puede emparejar
+    """
+    from utils import EffectRandom
+
+    return EffectRandom(SEED)
+
+
+def frame_context(index, **fields):
+    """FrameContext sintético para el frame 'index' con pulso de beat cada 30 frames"""
+    from utils import FrameContext
+
+    beat = index // 30
+    phase = (index % 30) / 30.0
+    defaults = {
+        "time": BASE_TIME + index * FRAME_DT,
+        "dt": FRAME_DT,
+        "beat": beat,
+        "phase": phase,
+        "pulse": max(0.0, 1.0 - phase * 3.0),
+        "intensity": 0.6 + 0.3 * ((index % 7) / 7.0),
+        "kick": 0.9 if index % 15 == 0 else 0.2,
+        "strong_beat": beat % 4 == 0,
+        "medium_beat": beat % 2 == 0 and beat % 4 != 0,
+        "new_beat": index % 30 == 0,
+    }
+    defaults.update(fields)
+    return FrameContext(**defaults)
+
+
+def new_canvas():
+    """Lienzo en formato de pantalla con el fondo del juego"""
+    canvas = pygame.Surface((WIDTH, HEIGHT)).convert()
+    canvas.fill((10, 10, 18))
+    return canvas
+
+
+# ============================================================================
+# CASOS
+# ============================================================================
+
+
+def render_starfield(frames=40):
+    from effects import Starfield
+
+    stars = Starfield(WIDTH, HEIGHT, rng=effect_rng())
+    canvas = new_canvas()
+    for i in range(frames):
+        canvas.fill((10, 10, 18))
+        ctx = frame_context(i)
+        stars.draw(
+            canvas,
+            ctx.intensity * 0.8,
+            {"beat_pulse": ctx.pulse, "strong_beat": ctx.strong_beat},
+        )
+    return canvas
+
+
+def render_geometry(fmt, frames=40, morphing=False, **fields):
+    from effects import GeometricTransformer3D
+
+    geometry = GeometricTransformer3D(WIDTH, HEIGHT, rng=effect_rng())
+    geometry.lt = BASE_TIME
+    if morphing:
+        # A mitad de la transición hacia la forma siguiente
+        geometry.it = True
+        geometry.lt = BASE_TIME - 0.5
+
+    # Intensidad baja: el formato decide entre plasma y mapa de calor
+    fields = {"fmt": fmt, "intensity": 0.55, "bpm_enabled": True, **fields}
+    canvas = new_canvas()
+    for i in range(frames):
+        canvas.fill((10, 10, 18))
+        geometry.draw(canvas, frame_context(i, **fields))
+    return canvas
+
+
+def render_geometry_still():
+    """
+    Geometría sin azar: sin beat fuerte ni intensidad alta no hay jitter,
+    chispas ni fantasmas; solo mezcla de formas, rotación y proyección
+    """
+    return render_geometry(
+        "mp3", morphing=True, intensity=0.3, pulse=0.0, strong_beat=False
+    )
+
+
+def render_glitch():
+    from utils import apply_glitch
+    from postfx import PostProcessor
+
+    # Varios hilos: el reparto en bandas no debe notarse en la imagen
+    post = PostProcessor(4)
+    canvas = new_canvas()
+    for x in range(0, WIDTH, 32):
+        color = ((x * 3) % 256, 120, 255 - x % 256)
+        pygame.draw.rect(canvas, color, (x, 0, 16, HEIGHT))
+    pygame.draw.circle(canvas, (255, 255, 255), (WIDTH // 2, HEIGHT // 2), 120, 6)
+    for intensity in (0.3, 0.6, 0.9):
+        canvas = apply_glitch(canvas, intensity, WIDTH, HEIGHT, post)
+    post.close()
+    return canvas
+
+
+def render_spectrum(fmt, frames=40):
+    from effects import SpectrumAnalyzer
+
+    analyzer = SpectrumAnalyzer(WIDTH, HEIGHT, rng=effect_rng())
+    analyzer.last_update = BASE_TIME
+    analyzer.last_beat_time = BASE_TIME
+    canvas = new_canvas()
+    for i in range(frames):
+        canvas.fill((10, 10, 18))
+        analyzer.draw(canvas, frame_context(i, fmt=fmt))
+    return canvas
+
+
+# nombre -> (función de render, caminos a renderizar, caminos emparejados)
+# "paired" indica que el camino escalar y el NumPy deben dar la misma imagen
+CASES = {
+    "starfield": (render_starfield, ("numpy", "scalar"), True),
+    "geometry_mp3": (lambda: render_geometry("mp3"), ("numpy", "scalar"), True),
+    "geometry_mod": (lambda: render_geometry("mod"), ("numpy", "scalar"), True),
+    "geometry_still": (render_geometry_still, ("numpy", "scalar"), True),
+    "glitch": (render_glitch, ("numpy", "scalar"), True),
+    "spectrum_mp3": (lambda: render_spectrum("mp3"), ("numpy", "scalar"), True),
+    "spectrum_mod": (lambda: render_spectrum("mod"), ("numpy", "scalar"), True),
+    "spectrum_ogg": (lambda: render_spectrum("ogg"), ("numpy", "scalar"), True),
+    "spectrum_xm": (lambda: render_spectrum("xm"), ("numpy", "scalar"), True),
+    "spectrum_it": (lambda: render_spectrum("it"), ("numpy", "scalar"), True),
+}
+
+
+def render_case(name, path):
+    """Renderiza un caso por el camino indicado ("numpy" o "scalar")"""
+    render_fn = CASES[name][0]
+    set_numpy_path(path == "numpy")
+    seed_all()
+    try:
+        return render_fn()
+    finally:
+        set_numpy_path(True)
+
+
+# ============================================================================
+# COMPARACIÓN
+# ============================================================================
+
+
+def _luma(rgb):
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def ssim(a, b, block=8):
+    """
+    SSIM medio por bloques de 8x8 sobre la luminancia
+    (versión simplificada: ventanas sin solapar y sin gaussiana)
+    """
+    la, lb = _luma(a), _luma(b)
+    w = la.shape[0] // block * block
+    h = la.shape[1] // block * block
+    la = la[:w, :h].reshape(w // block, block, h // block, block)
+    lb = lb[:w, :h].reshape(w // block, block, h // block, block)
+
+    mu_a = la.mean(axis=(1, 3))
+    mu_b = lb.mean(axis=(1, 3))
+    var_a = la.var(axis=(1, 3))
+    var_b = lb.var(axis=(1, 3))
+    cov = (la * lb).mean(axis=(1, 3)) - mu_a * mu_b
+
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    score = ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / (
+        (mu_a**2 + mu_b**2 + c1) * (var_a + var_b + c2)
+    )
+    return float(score.mean())
+
+
+def compare(reference, output):
+    """
+    Compara dos superficies
+
+    Returns:
+        (ok, métricas, array de diferencias)
+    """
+    a = pygame.surfarray.array3d(reference).astype(np.int16)
+    b = pygame.surfarray.array3d(output).astype(np.int16)
+
+    if a.shape != b.shape:
+        return False, {"error": f"tamaño {a.shape} != {b.shape}"}, None
+
+    diff = np.abs(a - b)
+    bad = float((diff.max(axis=2) > PIXEL_TOLERANCE).mean())
+    score = ssim(a.astype(np.float64), b.astype(np.float64))
+    metrics = {"max_diff": int(diff.max()), "bad": bad, "ssim": score}
+    ok = bad <= MAX_BAD_PIXELS and score >= MIN_SSIM
+    return ok, metrics, diff
+
+
+def save_diff(name, diff):
+    """Guarda la diferencia amplificada x4 para inspección"""
+    os.makedirs(DIFF_DIR, exist_ok=True)
+    image = np.clip(diff * 4, 0, 255).astype(np.uint8)
+    path = os.path.join(DIFF_DIR, f"{name}.png")
+    pygame.image.save(pygame.surfarray.make_surface(image), path)
+    return path
+
+
+def reference_path(name, path):
+    suffix = "" if path == "numpy" else f".{path}"
+    return os.path.join(GOLDEN_DIR, f"{name}{suffix}.png")
+
+
+def format_metrics(metrics):
+    if "error" in metrics:
+        return metrics["error"]
+    return (
+        f"max={metrics['max_diff']:3d} fuera={metrics['bad'] * 100:5.2f}% "
+        f"ssim={metrics['ssim']:.4f}"
+    )
+
+
+# ============================================================================
+# PROGRAMA PRINCIPAL
+# ============================================================================
+
+
+def main(argv):
+    update = "--update" in argv
+    selected = [arg for arg in argv if not arg.startswith("--")] or list(CASES)
+
+    unknown = [name for name in selected if name not in CASES]
+    if unknown:
+        print(f"[GOLDEN] Casos desconocidos: {', '.join(unknown)}")
+        return 2
+
+    pygame.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+
+    failures = 0
+    for name in selected:
+        _, paths, paired = CASES[name]
+        rendered = {path: render_case(name, path) for path in paths}
+
+        for path, output in rendered.items():
+            ref_file = reference_path(name, path)
+            label = f"{name} [{path}]"
+
+            if update or not os.path.exists(ref_file):
+                pygame.image.save(output, ref_file)
+                print(f"[GOLDEN] {label:28s} referencia guardada")
+                continue
+
+            ok, metrics, diff = compare(pygame.image.load(ref_file), output)
+            status = "OK  " if ok else "FAIL"
+            print(f"[GOLDEN] {label:28s} {status} {format_metrics(metrics)}")
+            if not ok:
+                failures += 1
+                if diff is not None:
+                    print(f"         diff: {save_diff(f'{name}.{path}', diff)}")
+
+        # Camino escalar contra camino NumPy
+        if paired:
+            ok, metrics, diff = compare(rendered["numpy"], rendered["scalar"])
+            status = "OK  " if ok else "FAIL"
+            label = f"{name} [numpy~scalar]"
+            print(f"[GOLDEN] {label:28s} {status} {format_metrics(metrics)}")
+            if not ok:
+                failures += 1
+                if diff is not None:
+                    print(f"         diff: {save_diff(f'{name}.paired', diff)}")
+
+    pygame.quit()
+
+    if failures:
+        print(f"[GOLDEN] {failures} comparación(es) fuera de tolerancia")
+        return 1
+
+    print("[GOLDEN] Todo dentro de tolerancia")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
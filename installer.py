@@ -17,6 +17,7 @@ import random
 
 from config import GAME_CONFIG
 from utils import resource_path
+import logger
 from audio import AudioManager
 
 # ============================================================================
@@ -158,6 +159,7 @@ class Installer:
         self.state = "WAIT"           # Estados: WAIT, WORK, ARMING, TARGETING, FIRED
         self.real_progress = 0.0      # Progreso real de extracción (0.0-1.0)
         self.visual_progress = 0.0    # Progreso visual (suavizado para animación)
+        self.bytes_extracted = 0      # Bytes descomprimidos (monitor de rendimiento)
         
         # Detección de ruta
         self.detected_path = None     # Ruta detectada del juego
@@ -326,7 +328,7 @@ class Installer:
         
         # Cambiar a estado de trabajo y comenzar en hilo separado
         self.state = "WORK"
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         
         # Ejecutar extracción en hilo separado para no bloquear interfaz
         threading.Thread(target=self._run_extract, daemon=True).start()
@@ -390,6 +392,7 @@ class Installer:
                         
                         # Actualizar progreso
                         self.real_progress = (i + 1) / total_files
+                        self.bytes_extracted += file_info.file_size
                         
                         # Pequeña pausa para archivos pequeños (mejor UX)
                         if total_files < 20:
@@ -407,6 +410,7 @@ class Installer:
                         for i, file_info in enumerate(file_list):
                             rar_file.extract(file_info, dest_folder)
                             self.real_progress = (i + 1) / total_files
+                            self.bytes_extracted += file_info.file_size
                             
                 except Exception as rar_error:
                     self.state = "WAIT"
@@ -438,8 +442,8 @@ class Installer:
                     target_full_path = found_paths[0]
                     
                     # Debug: mostrar resultados
-                    print(f"[PARCHE] Encontrados {len(found_paths)} archivos {target_file_name}")
-                    print(f"[PARCHE] Usando: {target_full_path}")
+                    logger.info("PARCHE", "Encontrados %d archivos %s", len(found_paths), target_file_name)
+                    logger.info("PARCHE", "Usando: %s", target_full_path)
                 
                 # 2. APLICAR PARCHE SI SE ENCONTRÓ ARCHIVO
                 if target_full_path:
@@ -457,7 +461,7 @@ class Installer:
                             startup_info.wShowWindow = subprocess.SW_HIDE
                         
                         # Ejecutar parcheador
-                        print(f"[PARCHE] Ejecutando: {patcher_exe} {patch_argument} \"{target_full_path}\"")
+                        logger.info("PARCHE", "Ejecutando: %s %s \"%s\"", patcher_exe, patch_argument, target_full_path)
                         
                         result = subprocess.run(
                             [patcher_exe, patch_argument, target_full_path],
@@ -473,14 +477,14 @@ class Installer:
                             if self.avatar:
                                 self.avatar.set_immediate_bark("🎉 ¡Parche aplicado!")
                                 
-                            print(f"[PARCHE] Parche aplicado exitosamente")
+                            logger.info("PARCHE", "Parche aplicado exitosamente")
                         else:
                             self.status_text = "ERROR EN PARCHE"
                             
                             if self.avatar:
                                 self.avatar.set_immediate_bark("⚠️ Error al aplicar parche")
                                 
-                            print(f"[PARCHE] Error: {result.stderr}")
+                            logger.error("PARCHE", "Error: %s", result.stderr)
                         
                         time.sleep(2.0)  # Pausa para leer mensaje
                         
@@ -490,7 +494,7 @@ class Installer:
                         if self.avatar:
                             self.avatar.set_immediate_bark("⚠️ No encuentro el .exe del parcheador.")
                             
-                        print(f"[PARCHE] No se encontró: {patcher_exe}")
+                        logger.error("PARCHE", "No se encontró: %s", patcher_exe)
                         
                 else:
                     self.status_text = "ARCHIVO NO ENCONTRADO"
@@ -499,13 +503,13 @@ class Installer:
                     if self.avatar:
                         self.avatar.set_immediate_bark(error_msg)
                         
-                    print(f"[PARCHE] {error_msg}")
+                    logger.error("PARCHE", "%s", error_msg)
                     
                     # Debug: listar contenido para diagnóstico
                     try:
-                        print(f"[PARCHE] Contenido de {dest_folder}:")
+                        logger.debug("PARCHE", "Contenido de %s:", dest_folder)
                         for item in os.listdir(dest_folder)[:10]:  # Primeros 10 elementos
-                            print(f"  - {item}")
+                            logger.debug("PARCHE", "  - %s", item)
                     except Exception:
                         pass
                     
@@ -547,7 +551,7 @@ class Installer:
         # ESTADO: TRABAJANDO (extracción en progreso)
         # ====================================================================
         if self.state == "WORK":
-            elapsed = time.time() - self.start_time
+            elapsed = time.monotonic() - self.start_time
             
             # Progreso falso para animación (más rápido que el real)
             fake_target = min(1.0, elapsed / 4.0)
@@ -568,7 +572,7 @@ class Installer:
             # Transición a siguiente estado cuando termina
             if self.visual_progress >= 0.99:
                 self.state = "ARMING"
-                self.armed_time = time.time()
+                self.armed_time = time.monotonic()
                 self.status_text = "⚠ SYSTEMS ARMED ⚠"
         
         # ====================================================================
@@ -585,16 +589,16 @@ class Installer:
                 )
             
             # Esperar 2 segundos antes de targeting
-            if time.time() - self.armed_time > 2.0:
+            if time.monotonic() - self.armed_time > 2.0:
                 self.state = "TARGETING"
-                self.targeting_time = time.time()
+                self.targeting_time = time.monotonic()
                 self.status_text = "ACQUIRING TARGET..."
         
         # ====================================================================
         # ESTADO: TARGETING (adquiriendo objetivo - efectos visuales)
         # ====================================================================
         elif self.state == "TARGETING":
-            elapsed = time.time() - self.targeting_time
+            elapsed = time.monotonic() - self.targeting_time
             
             # Voz "Target Locked" después de 2.4 segundos
             if elapsed > 2.4 and not self.locked_voice_played:
@@ -0,0 +1,325 @@
+# logger.py
+# Registro no bloqueante para MetalWar
+# El hilo de render solo añade a un buffer; un hilo aparte escribe a disco y consola
+
+import os
+import sys
+import time
+import atexit
+import threading
+from collections import deque
+
+# ============================================================================
+# NIVELES
+# ============================================================================
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+LEVELS_BY_NAME = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+
+# Archivo de log y rotación
+LOG_FILE_NAME = "metalwar.log"
+MAX_LOG_BYTES = 512 * 1024  # Rotar a partir de 512 KB
+LOG_BACKUPS = 3  # metalwar.log.1 ... metalwar.log.3
+MAX_PENDING = 4096  # Registros sin escribir; los más viejos se pierden
+
+# ============================================================================
+# CLASE RINGLOGGER
+# ============================================================================
+
+
+class RingLogger:
+    """
+    Logger con buffer en memoria y escritor en segundo plano
+
+    Cada registro es una tupla que se añade con deque.append (atómico en
+    CPython, sin locks). El formateo, la escritura a archivo y el eco en
+    consola ocurren en el hilo escritor, que sondea el buffer cada 250 ms:
+    el hilo de render nunca despierta a nadie. Si el escritor se queda
+    atrás, el buffer pisa los registros más viejos y los cuenta como
+    perdidos. Se guardan además los últimos registros en un anillo para
+    poder volcarlos tras un crash.
+    """
+
+    def __init__(self, log_dir=None, history=2000, echo=True, max_pending=MAX_PENDING):
+        """
+        Args:
+            log_dir: Carpeta del archivo de log (por defecto METALWAR_TEMP_DIR)
+            history: Registros recientes que se conservan en memoria
+            echo: Repetir cada línea en stdout (si existe)
+            max_pending: Registros sin escribir antes de pisar los más viejos
+        """
+        if log_dir is None:
+            log_dir = os.environ.get("METALWAR_TEMP_DIR", os.path.join(".", "temp"))
+
+        self.log_path = os.path.join(log_dir, LOG_FILE_NAME)
+        self.echo = echo
+        self.default_level = INFO
+        self.levels = {}  # Nivel por categoría ("BPM", "PARCHE"...)
+
+        self.pending = deque(maxlen=max_pending)  # Pendientes de escribir
+        self.history = deque(maxlen=history)  # Anillo de registros recientes
+        self.dropped = 0  # No escritos por error de disco (hilo escritor)
+        self.overwritten = 0  # Pisados con el buffer lleno (hilo de render)
+        self._reported = 0  # overwritten ya avisado en el log
+
+        self._file = None
+        self._write_lock = threading.Lock()  # Solo entre escritor y flush()
+        self._wake = threading.Event()
+        self._closed = False
+
+        try:
+            os.makedirs(log_dir, exist_ok=True)
+        except OSError:
+            self.log_path = None
+
+        self._thread = threading.Thread(
+            target=self._writer_loop, name="LogWriter", daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------------
+    # API (hilo de render / hilos de trabajo)
+    # ------------------------------------------------------------------------
+
+    def set_level(self, category, level):
+        """Fija el nivel mínimo de una categoría (o el global con category=None)"""
+        if isinstance(level, str):
+            level = LEVELS_BY_NAME.get(level.upper(), INFO)
+        if category is None:
+            self.default_level = level
+        else:
+            self.levels[category] = level
+
+    def enabled(self, category, level):
+        """Indica si un registro de esa categoría y nivel se guardaría"""
+        return level >= self.levels.get(category, self.default_level)
+
+    def log(self, level, category, message, *args):
+        """
+        Añade un registro; el formateo con args (estilo %) se hace en el escritor
+
+        Args:
+            level: DEBUG, INFO, WARNING o ERROR
+            category: Categoría (etiqueta entre corchetes en la salida)
+            message: Texto o plantilla con %s
+            args: Argumentos de la plantilla
+        """
+        if level < self.levels.get(category, self.default_level):
+            return
+
+        record = (time.time(), level, category, message, args)
+        pending = self.pending
+        if len(pending) == pending.maxlen:
+            self.overwritten += 1
+        pending.append(record)
+        self.history.append(record)
+
+    def lost(self):
+        """Registros perdidos: pisados en el buffer o no escritos"""
+        return self.overwritten + self.dropped
+
+    def recent(self, count=50):
+        """Últimas líneas ya formateadas (para volcados o depuración)"""
+        records = list(self.history)[-count:]
+        return [self._format(record) for record in records]
+
+    def flush(self):
+        """Escribe todo lo pendiente de forma síncrona (salida o crash)"""
+        with self._write_lock:
+            self._drain()
+            if self._file:
+                try:
+                    self._file.flush()
+                except OSError:
+                    pass
+
+    def close(self):
+        """Vacía el buffer, detiene el escritor y cierra el archivo"""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self.flush()
+        with self._write_lock:
+            if self._file:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+
+    # ------------------------------------------------------------------------
+    # ESCRITOR (hilo propio)
+    # ------------------------------------------------------------------------
+
+    def _writer_loop(self):
+        """Vacía el buffer cada 250 ms (o al cerrar)"""
+        while not self._closed:
+            self._wake.wait(0.25)
+            self._wake.clear()
+            with self._write_lock:
+                self._drain()
+
+    def _format(self, record):
+        """Convierte un registro en una línea de texto"""
+        stamp, level, category, message, args = record
+        if args:
+            try:
+                message = message % args
+            except Exception:
+                message = f"{message} {args}"
+
+        clock = time.strftime("%H:%M:%S", time.localtime(stamp))
+        millis = int((stamp % 1) * 1000)
+        level_name = LEVEL_NAMES.get(level, level)
+        return f"{clock}.{millis:03d} {level_name} [{category}] {message}"
+
+    def _drain(self):
+        """Escribe los registros pendientes (con el lock de escritura tomado)"""
+        overwritten = self.overwritten
+        if not self.pending and overwritten == self._reported:
+            return
+
+        lines = []
+        if overwritten > self._reported:
+            # Aviso delante de lo que sobrevivió al desbordamiento
+            lines.append(
+                self._format(
+                    (
+                        time.time(),
+                        WARNING,
+                        "LOG",
+                        "%d registros perdidos (buffer lleno, %d en total)",
+                        (overwritten - self._reported, overwritten),
+                    )
+                )
+            )
+            self._reported = overwritten
+        while self.pending:
+            try:
+                lines.append(self._format(self.pending.popleft()))
+            except IndexError:
+                break
+
+        text = "\n".join(lines) + "\n"
+
+        if self.echo and sys.stdout is not None:
+            try:
+                sys.stdout.write(text)
+            except Exception:
+                pass
+
+        if self.log_path is None:
+            return
+
+        try:
+            if self._file is None:
+                self._file = open(self.log_path, "a", encoding="utf-8")
+            self._file.write(text)
+            self._file.flush()
+            if self._file.tell() > MAX_LOG_BYTES:
+                self._rotate()
+        except OSError:
+            self.dropped += len(lines)
+
+    def _rotate(self):
+        """Rota metalwar.log -> metalwar.log.1 -> ... -> metalwar.log.N"""
+        self._file.close()
+        self._file = None
+
+        for index in range(LOG_BACKUPS - 1, 0, -1):
+            src = f"{self.log_path}.{index}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.log_path}.{index + 1}")
+        os.replace(self.log_path, f"{self.log_path}.1")
+
+
+# ============================================================================
+# INSTANCIA GLOBAL Y ATAJOS
+# ============================================================================
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def get_logger():
+    """Devuelve el logger global (se crea la primera vez)"""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                _logger = RingLogger()
+                _install_crash_hooks(_logger)
+    return _logger
+
+
+def _install_crash_hooks(target):
+    """Vuelca el buffer al salir y ante excepciones no capturadas"""
+    previous_hook = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def excepthook(exc_type, exc, tb):
+        target.log(ERROR, "CRASH", "%s: %s", exc_type.__name__, exc)
+        target.flush()
+        previous_hook(exc_type, exc, tb)
+
+    def thread_excepthook(hook_args):
+        target.log(
+            ERROR,
+            "CRASH",
+            "Hilo %s: %s: %s",
+            getattr(hook_args.thread, "name", "?"),
+            hook_args.exc_type.__name__,
+            hook_args.exc_value,
+        )
+        target.flush()
+        previous_thread_hook(hook_args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
+    atexit.register(target.close)
+
+
+def configure(levels=None, default_level=None):
+    """
+    Aplica niveles desde configuración
+
+    Args:
+        levels: Diccionario {categoría: "DEBUG"/"INFO"/...}
+        default_level: Nivel para categorías no listadas
+    """
+    target = get_logger()
+    if default_level is not None:
+        target.set_level(None, default_level)
+    for category, level in (levels or {}).items():
+        target.set_level(category, level)
+
+
+def debug(category, message, *args):
+    get_logger().log(DEBUG, category, message, *args)
+
+
+def info(category, message, *args):
+    get_logger().log(INFO, category, message, *args)
+
+
+def warning(category, message, *args):
+    get_logger().log(WARNING, category, message, *args)
+
+
+def error(category, message, *args):
+    get_logger().log(ERROR, category, message, *args)
+
+
+def flush():
+    """Fuerza la escritura de lo pendiente"""
+    if _logger is not None:
+        _logger.flush()
+
+
+def lost():
+    """Registros perdidos hasta ahora (0 si el logger no se ha creado)"""
+    return _logger.lost() if _logger is not None else 0
@@ -12,7 +12,6 @@ import time
 import math
 import random
 import threading
-import colorsys
 
 # ============================================================================
 # FIX CRÍTICO PARA PYINSTALLER - DEBE IR ANTES DE CUALQUIER OTRA IMPORTACIÓN
@@ -35,26 +34,28 @@ def setup_pyinstaller_fixes():
     # 2. Redirigir rutas temporales
     os.environ["METALWAR_TEMP_DIR"] = temp_base
 
-    # 3. Debug info
-    print(f"[PYINSTALLER] Temp dir: {temp_base}")
-    print(f"[PYINSTALLER] MEIPASS: {getattr(sys, '_MEIPASS', 'NO (dev mode)')}")
-
     return temp_base
 
 
 # Ejecutar inmediatamente
 TEMP_DIR = setup_pyinstaller_fixes()
 
+# Registro no bloqueante (escribe en METALWAR_TEMP_DIR, ya configurado arriba)
+import logger
+
+logger.info("PYINSTALLER", "Temp dir: %s", TEMP_DIR)
+logger.info("PYINSTALLER", "MEIPASS: %s", getattr(sys, "_MEIPASS", "NO (dev mode)"))
+
 # ============================================================================
 # IMPORTAR CONFIG DESPUÉS DE LOS FIXES
 # ============================================================================
 try:
     from config import GAME_CONFIG
 
-    print("[CONFIG] Configuración cargada correctamente")
+    logger.info("CONFIG", "Configuración cargada correctamente")
 except ImportError as e:
-    print(f"[ERROR] No se pudo cargar config: {e}")
-    print("[ERROR] Creando configuración de emergencia...")
+    logger.error("CONFIG", "No se pudo cargar config: %s", e)
+    logger.warning("CONFIG", "Creando configuración de emergencia...")
 
     # Configuración de emergencia
     GAME_CONFIG = {
@@ -98,6 +99,48 @@ BPM = GAME_CONFIG["AUDIO"]["BPM"]  # Pulsos por minuto
 BEAT_LENGTH = 60.0 / BPM  # Duración de un beat en segundos
 MUSIC_OFFSET = GAME_CONFIG["AUDIO"]["MUSIC_OFFSET"]  # Offset de sincronización
 
+# Modo de baja latencia: la cola de eventos se lee justo antes de dibujar
+# y el cursor se pinta con la posición más reciente del ratón
+LOW_LATENCY_INPUT = (
+    GAME_CONFIG.get("LOW_LATENCY_INPUT", False) or "--low-latency" in sys.argv
+)
+
+# Exportación de frames a memoria compartida: --export-frames[=nombre]
+# (o clave FRAME_EXPORT); se lee con frame_reader.py
+FRAME_EXPORT_NAME = GAME_CONFIG.get("FRAME_EXPORT") or None
+for _arg in sys.argv[1:]:
+    if _arg == "--export-frames" or _arg.startswith("--export-frames="):
+        FRAME_EXPORT_NAME = _arg.partition("=")[2] or "metalwar_frames"
+if FRAME_EXPORT_NAME is True:
+    FRAME_EXPORT_NAME = "metalwar_frames"
+
+# Backend de presentación: "surface" (blit + flip en CPU) o "renderer"
+# (Renderer/Texture de SDL2; --renderer). Si SDL2 falla se vuelve a "surface"
+RENDER_BACKEND = GAME_CONFIG.get("RENDER_BACKEND", "surface")
+if "--renderer" in sys.argv:
+    RENDER_BACKEND = "renderer"
+
+# Hilos del post-procesado por bandas (0 = uno por núcleo, 1 = sin hilos)
+POSTFX_WORKERS = GAME_CONFIG.get("POSTFX_WORKERS", 0)
+
+# Preset de calidad: QUALITY = AUTO (calibración al arrancar, guardada por
+# máquina) o LOW/MEDIUM/HIGH fijo; --recalibrate vuelve a medir
+QUALITY_SETTING = GAME_CONFIG.get("QUALITY", "AUTO")
+RECALIBRATE = "--recalibrate" in sys.argv
+
+# Estrellas del Starfield (None = las del preset de calidad). Con NumPy
+# admite decenas de miles para el efecto warp
+STARFIELD_STARS = GAME_CONFIG.get("STARFIELD_STARS")
+
+# Perfilado de asignaciones por efecto: --profile-alloc[=ruta.json]
+# Informe por defecto junto al log (METALWAR_TEMP_DIR/alloc_profile.json)
+PROFILE_ALLOC_PATH = None
+for _arg in sys.argv[1:]:
+    if _arg == "--profile-alloc" or _arg.startswith("--profile-alloc="):
+        PROFILE_ALLOC_PATH = _arg.partition("=")[2] or os.path.join(
+            TEMP_DIR, "alloc_profile.json"
+        )
+
 # =====================================================================================
 # Títulos irónicos para el FPS Counter (removido por redundancia con barra de ventana)
 # =====================================================================================
@@ -152,13 +195,14 @@ spectrum_analyzer = None
 starfield = None
 praxis_event = None
 crt_boot = None
+frame_scheduler = None  # Planificador de trabajos por frame (se crea en main())
+preload_job = None  # Trabajo de precarga lanzado por CRTBoot
 # ... otras variables globales ...
 # VARIABLES PARA EFECTOS RAVE
 demo_cache_initialized = False
 vignette_surf = None
 scanline_surf = None
-flare_surf = None
-chroma_temp = None
+flare_mips = None  # Lens flare pre-escalado (sprites.MipChain)
 rave_shake_x = 0
 rave_shake_y = 0
 
@@ -166,34 +210,53 @@ rave_shake_y = 0
 # ============================================================================
 # FUNCIÓN DE PRECARGA (def ANTES de main())
 # ============================================================================
+def preload_steps():
+    """
+    Trabajo de precarga: crea un objeto pesado por paso para que
+    el planificador lo reparta entre frames del CRTBoot
+    """
+    global geometric_transformer, spectrum_analyzer, starfield, praxis_event
+
+    # Importar dentro de la función para evitar inicialización temprana
+    from effects import (
+        GeometricTransformer3D,
+        SpectrumAnalyzer,
+        Starfield,
+        PraxisEvent,
+    )
+
+    # Cargar objetos pesados aquí
+    geometric_transformer = GeometricTransformer3D(SCREEN_WIDTH, SCREEN_HEIGHT)
+    yield
+    spectrum_analyzer = SpectrumAnalyzer(SCREEN_WIDTH, SCREEN_HEIGHT)
+    yield
+    starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT)
+    yield
+    praxis_event = PraxisEvent(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    logger.info("SISTEMA", "Precarga completada")
+
+
 def preload_game_resources():
     """
     Esta función se ejecuta AUTOMÁTICAMENTE durante el CRTBoot
+    CRTBoot la llama en cada frame hasta que devuelve True
     """
-    print("[SISTEMA] Precargando recursos...")
+    global preload_job
 
-    global geometric_transformer, spectrum_analyzer, starfield, praxis_event
+    from scheduler import PRIORITY_HIGH
 
-    try:
-        # Importar dentro de la función para evitar inicialización temprana
-        from effects import (
-            GeometricTransformer3D,
-            SpectrumAnalyzer,
-            Starfield,
-            PraxisEvent,
+    if preload_job is None:
+        logger.info("SISTEMA", "Precargando recursos...")
+        preload_job = frame_scheduler.submit(
+            preload_steps(), "preload", PRIORITY_HIGH
         )
+        return False
 
-        # Cargar objetos pesados aquí
-        geometric_transformer = GeometricTransformer3D(SCREEN_WIDTH, SCREEN_HEIGHT)
-        spectrum_analyzer = SpectrumAnalyzer(SCREEN_WIDTH, SCREEN_HEIGHT)
-        starfield = Starfield(SCREEN_WIDTH, SCREEN_HEIGHT)
-        praxis_event = PraxisEvent(SCREEN_WIDTH, SCREEN_HEIGHT)
+    if preload_job.error is not None:
+        logger.error("SISTEMA", "Precarga fallida: %s", preload_job.error)
 
-        print("[SISTEMA] Precarga completada")
-        return True
-    except Exception as e:
-        print(f"[ERROR] {e}")
-        return False
+    return preload_job.done
 
 
 # ============================================================================
@@ -226,16 +289,19 @@ class MusicClock:
 
     def start(self):
         """Inicia el reloj cuando empieza la música"""
-        self.beat_start_time = time.time()
+        self.beat_start_time = time.monotonic()
         self.is_playing = True
         self.last_beat = -1
         self.total_beats = 0
-        print(f"[BPM] Reloj iniciado a {self.current_bpm} BPM")
+        logger.info("BPM", "Reloj iniciado a %s BPM", self.current_bpm)
 
-    def update(self):
+    def update(self, now=None):
         """
         Obtiene el estado actual del beat
 
+        Args:
+            now: Reloj monotónico del frame (time.monotonic() si se omite)
+
         Returns:
             Tupla: (beat, phase, new_beat, section, new_section, total_beats)
         """
@@ -257,8 +323,11 @@ class MusicClock:
         if not self.is_playing:
             return 0, 0.0, False, 0, False, 0
 
+        if now is None:
+            now = time.monotonic()
+
         # Calcular tiempo desde inicio (con offset)
-        current_time = max(0.0, (time.time() - self.beat_start_time) - self.offset)
+        current_time = max(0.0, (now - self.beat_start_time) - self.offset)
 
         # Calcular beat actual y fase (0.0-1.0 dentro del beat)
         current_beat = int(current_time / BEAT_LENGTH)
@@ -272,7 +341,7 @@ class MusicClock:
         # Actualizar estado
         if new_beat:
             self.total_beats += 1
-            self.beat_history.append(time.time())
+            self.beat_history.append(now)
 
             # Limitar historial para evitar crecimiento infinito
             if len(self.beat_history) > 100:
@@ -364,7 +433,7 @@ class BPMSynchronizer:
         # Estado del efecto BPM (será sobrescrito por configuración)
         self.bpm_enabled = True
 
-    def on_beat(self, beat, phase, strength=1.0):
+    def on_beat(self, beat, phase, strength=1.0, now=None):
         """
         Llamado en cada beat para activar efectos
 
@@ -372,8 +441,9 @@ class BPMSynchronizer:
             beat: Número de beat actual
             phase: Fase dentro del beat (0.0-1.0)
             strength: Fuerza del beat (0.0-1.0)
+            now: Reloj monotónico del frame (time.monotonic() si se omite)
         """
-        current_time = time.time()
+        current_time = time.monotonic() if now is None else now
         self.beat_counter = beat
         self.beat_pulse = strength
 
@@ -443,7 +513,7 @@ class BPMSynchronizer:
         Args:
             section: Número de sección nueva
         """
-        print(f"[BPM] Cambiando a sección {section}")
+        logger.info("BPM", "Cambiando a sección %d", section)
         # Sección 0: Intro, 1: Build-up, 2: Drop, 3: Breakdown, etc.
 
     def update(self, phase, intensity):
@@ -490,35 +560,57 @@ class BPMSynchronizer:
         if self.strobe_active:
             import pygame
 
-            strobe_surf = pygame.Surface((self.width, self.height))
-            strobe_surf.fill((255, 255, 255))
-            strobe_surf.set_alpha(50)
-            surface.blit(strobe_surf, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+            # Blanco al ~20% premultiplicado (set_alpha no afecta a BLEND_ADD)
+            surface.fill((50, 50, 50), special_flags=pygame.BLEND_RGB_ADD)
 
     def toggle_bpm_effect(self):
         """Alterna el efecto BPM en las formas geométricas"""
         self.bpm_enabled = not self.bpm_enabled
-        print(
-            f"[BPM] Efecto BPM en formas: {'ACTIVADO' if self.bpm_enabled else 'DESACTIVADO'}"
+        logger.info(
+            "BPM",
+            "Efecto BPM en formas: %s",
+            "ACTIVADO" if self.bpm_enabled else "DESACTIVADO",
         )
 
-    def get_bpm_state(self):
+    def frame_context(
+        self, now, dt, beat, phase, intensity, kick, fmt, quality, new_beat
+    ):
         """
-        Obtiene el estado actual del efecto BPM
+        Crea el FrameContext del frame con el estado BPM actual
+
+        Args:
+            now, dt: Reloj monotónico del frame y tiempo desde el anterior
+            beat, phase: Beat actual y fase dentro del beat
+            intensity: Intensidad ya modulada por update()
+            kick: Golpe de bombo
+            fmt: Formato de la música actual
+            quality: Nivel de calidad de render
+            new_beat: True si el beat acaba de empezar
 
         Returns:
-            Diccionario con estado BPM
+            FrameContext inmutable
         """
+        from utils import FrameContext
+
         # Determinar tipo de beat actual
         is_strong_beat = self.beat_counter % 4 == 0
         is_medium_beat = self.beat_counter % 2 == 0 and not is_strong_beat
 
-        return {
-            "enabled": self.bpm_enabled,
-            "beat_pulse": self.beat_pulse,
-            "strong_beat": is_strong_beat,
-            "medium_beat": is_medium_beat,
-        }
+        return FrameContext(
+            time=now,
+            dt=dt,
+            beat=beat,
+            phase=phase,
+            pulse=self.beat_pulse,
+            intensity=intensity,
+            kick=kick,
+            fmt=fmt,
+            quality=quality,
+            bpm_enabled=self.bpm_enabled,
+            strong_beat=is_strong_beat,
+            medium_beat=is_medium_beat,
+            new_beat=new_beat,
+        )
 
 
 # ============================================================================
@@ -530,10 +622,15 @@ def main():
     """Función principal - Punto de entrada del programa"""
     # AÑADIDO: Variables globales para FPS counter
     global last_fps_update, last_title_update, fps_value, fps_display, fps_title_mode, title_fps_display
-    global demo_cache_initialized, vignette_surf, scanline_surf, flare_surf, chroma_temp, rave_shake_x, rave_shake_y
+    global demo_cache_initialized, vignette_surf, scanline_surf, flare_mips, rave_shake_x, rave_shake_y
+
+    logger.info(
+        "SISTEMA",
+        "MetalWar Final (Modular V1.0) - CON TODAS LAS FUNCIONES + BPM SYNC...",
+    )
 
-    print("MetalWar Final (Modular V1.0) - CON TODAS LAS FUNCIONES + BPM SYNC...")
-    print(f"[PYINSTALLER] Temp directory: {TEMP_DIR}")
+    # Niveles de log por categoría (claves opcionales LOG_LEVEL y LOG_LEVELS)
+    logger.configure(GAME_CONFIG.get("LOG_LEVELS"), GAME_CONFIG.get("LOG_LEVEL"))
 
     # Centrar ventana en pantalla
     os.environ["SDL_VIDEO_CENTERED"] = "1"
@@ -586,7 +683,13 @@ def main():
     # ========================================================================
     # AHORA SÍ IMPORTAR LOS MÓDULOS QUE USAN PYGAME
     # ========================================================================
-    from utils import resource_path, clean_temp_files, apply_glitch, safe_color
+    from utils import (
+        resource_path,
+        clean_temp_files,
+        apply_glitch,
+        safe_color,
+        FrameContext,
+    )
     from audio import AudioManager, MusicPlayer
     from ui import (
         LogoMetalWAR,
@@ -608,16 +711,41 @@ def main():
         PraxisEvent,
     )
     from installer import Installer, KeyboardFX
+    from sprites import prepare_surface, prepare_sprite, audit_blit, MipChain, mip_sizes
+    from perf import InputLatencyTracker, AllocationProfiler, PerfMonitor
+    from scheduler import FrameScheduler
+    from compositor import create_compositor, BLEND_ADD, BLEND_PREMULTIPLIED
+    from postfx import PostProcessor
+    from drawcmd import CommandBuffer
+    from calibration import choose_preset
+    from colorlut import color_lut
 
     # ========================================================================
     # CONFIGURACIÓN DE VENTANA
     # ========================================================================
     WIDTH, HEIGHT = GAME_CONFIG["WINDOW_SIZE"]
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
 
     # Título inicial de ventana (sin FPS aún)
     base_title = GAME_CONFIG.get("WINDOW_CAPTION", "MetalWar Installer")
-    pygame.display.set_caption(base_title)
+
+    # Post-procesado de pantalla completa repartido en bandas entre hilos
+    postfx = PostProcessor(POSTFX_WORKERS)
+    rave_tints = color_lut()  # Tinte de la aberración cromática por tono
+
+    compositor = create_compositor(
+        RENDER_BACKEND,
+        (WIDTH, HEIGHT),
+        base_title,
+        dirty_threshold=GAME_CONFIG.get("DIRTY_RECT_THRESHOLD", 0.35),
+        postfx=postfx,
+    )
+    screen = compositor.screen
+    logger.info(
+        "VIDEO",
+        "Backend de presentación: %s (post-procesado: %d hilos)",
+        compositor.name,
+        postfx.workers,
+    )
 
     pygame.mouse.set_visible(False)  # Usaremos cursor personalizado
 
@@ -641,13 +769,13 @@ def main():
             if os.path.exists(icon_path):
                 try:
                     icon_image = pygame.image.load(icon_path)
-                    pygame.display.set_icon(icon_image)
-                    print(f"[ICONO] Cargado: {icon_file}")
+                    compositor.set_icon(icon_image)
+                    logger.info("ICONO", "Cargado: %s", icon_file)
                     break
                 except Exception as e:
-                    print(f"[ICONO] Error cargando {icon_file}: {e}")
+                    logger.warning("ICONO", "Error cargando %s: %s", icon_file, e)
         except Exception as e:
-            print(f"[ICONO] Error buscando {icon_file}: {e}")
+            logger.warning("ICONO", "Error buscando %s: %s", icon_file, e)
             continue
 
     # ========================================================================
@@ -655,19 +783,35 @@ def main():
     # ========================================================================
     clock = pygame.time.Clock()
 
+    # Planificador de trabajos troceados (presupuesto de frame configurable)
+    global frame_scheduler
+    frame_scheduler = FrameScheduler(GAME_CONFIG.get("FRAME_BUDGET_MS", 14.0))
+
     # CREAR CRTBoot DESPUÉS de inicializar pygame
     global crt_boot
     crt_boot = CRTBoot(WIDTH, HEIGHT)
     crt_boot.set_preload_callback(preload_game_resources)
 
+    # Calibración de la máquina (antes de crear los efectos que dependen
+    # del preset: estrellas, malla, partículas, bloom)
+    quality_name, quality_preset, quality_source, estimated_ms = choose_preset(
+        (WIDTH, HEIGHT), TEMP_DIR, QUALITY_SETTING, RECALIBRATE, FPS
+    )
+    quality_level = quality_preset["quality"]
+    estimate = f", frame estimado {estimated_ms:.1f} ms" if estimated_ms else ""
+    logger.info("CALIDAD", "Preset %s (%s%s)", quality_name, quality_source, estimate)
+
     # Inicializar otros sistemas
-    stars = Starfield(WIDTH, HEIGHT)
-    geometry = GeometricTransformer3D(WIDTH, HEIGHT)
+    stars = Starfield(WIDTH, HEIGHT, STARFIELD_STARS or quality_preset["stars"])
+    geometry = GeometricTransformer3D(WIDTH, HEIGHT, quality_preset["mesh"])
+    geometry.cull_backfaces = quality_preset["backface_cull"]
+    geometry.lod_min_edge_px = quality_preset["lod_edge_px"]
     logo = LogoMetalWAR(WIDTH, HEIGHT)
     scroller = C64Scroller(WIDTH)
     spain_text = SpainText(
         GAME_CONFIG["GAME_NAME_DISPLAY"], GAME_CONFIG["SUBTITLE_DISPLAY"], WIDTH, HEIGHT
     )
+    spain_text.set_particle_limit(quality_preset["particles"])
 
     # Audio y música
     player = MusicPlayer()  # ¡REPRODUCTOR ORIGINAL FUNCIONAL!
@@ -702,9 +846,53 @@ def main():
     # Efectos especiales
     praxis_event = PraxisEvent(WIDTH, HEIGHT)
     analyzer = SpectrumAnalyzer(WIDTH, HEIGHT)
+    analyzer.scheduler = frame_scheduler  # Visualizadores preparados entre frames
+    analyzer.set_particle_limit(quality_preset["particles"])
     tactical_hud = TacticalHUD(WIDTH, HEIGHT)
     cyber_cursor = CyberCursor()
 
+    # Medición de latencia input -> pantalla
+    latency_tracker = InputLatencyTracker()
+    if LOW_LATENCY_INPUT:
+        logger.info("INPUT", "Modo de baja latencia activado")
+
+    # Exportación de frames para OBS / grabación de QA (opcional)
+    frame_exporter = None
+    if FRAME_EXPORT_NAME:
+        try:
+            from frame_export import FrameExporter
+
+            frame_exporter = FrameExporter(
+                screen, FRAME_EXPORT_NAME, GAME_CONFIG.get("FRAME_EXPORT_SLOTS", 4)
+            )
+            logger.info(
+                "EXPORT",
+                "Frames en memoria compartida '%s' (%dx%d %s, %d slots)",
+                frame_exporter.name,
+                frame_exporter.width,
+                frame_exporter.height,
+                frame_exporter.format,
+                frame_exporter.slots,
+            )
+        except Exception as e:
+            logger.error("EXPORT", "No se pudo crear el anillo de frames: %s", e)
+
+    # Datos reales del monitor F1 (tiempos de frame, CPU, RSS, GC, subsistemas)
+    perf_monitor = PerfMonitor()
+
+    # Buffer de comandos de los efectos que graban en vez de dibujar
+    draw_commands = CommandBuffer()
+
+    # Perfilado de asignaciones (solo con --profile-alloc)
+    alloc_profiler = AllocationProfiler(
+        enabled=PROFILE_ALLOC_PATH is not None,
+        every=GAME_CONFIG.get("PROFILE_ALLOC_EVERY", 5),
+    )
+    if alloc_profiler.enabled:
+        logger.info(
+            "ALLOC", "Perfilado activo (1 de cada %d frames)", alloc_profiler.every
+        )
+
     # Sincronización BPM (NUEVO)
     bpm_sync = BPMSynchronizer(WIDTH, HEIGHT)
 
@@ -713,8 +901,11 @@ def main():
     music_clock = MusicClock(player)
 
     # Log inicial de configuración BPM
-    print(
-        f"[BPM CONFIG] Normal: {'ON' if GAME_CONFIG['BPM_EFFECT']['IN_NORMAL_MODE'] else 'OFF'}, Rave: {'ON' if GAME_CONFIG['BPM_EFFECT']['IN_RAVE_MODE'] else 'OFF'}"
+    logger.info(
+        "BPM CONFIG",
+        "Normal: %s, Rave: %s",
+        "ON" if GAME_CONFIG["BPM_EFFECT"]["IN_NORMAL_MODE"] else "OFF",
+        "ON" if GAME_CONFIG["BPM_EFFECT"]["IN_RAVE_MODE"] else "OFF",
     )
 
     # ========================================================================
@@ -722,7 +913,7 @@ def main():
     # ========================================================================
     # Usar TEMP_DIR en lugar de ruta relativa
     temp_intro_path = os.path.join(TEMP_DIR, "temp_intro.wav")
-    print(f"[VOZ] Ruta temporal: {temp_intro_path}")
+    logger.info("VOZ", "Ruta temporal: %s", temp_intro_path)
 
     intro_voice = AudioManager.generate_voice(
         "System... initialized... Welcome... to My War.",
@@ -742,14 +933,19 @@ def main():
     music_started = False  # Música iniciada
 
     run = True  # Bucle principal activo
-    main_canvas = pygame.Surface((WIDTH, HEIGHT))  # Superficie de dibujo principal
-    last_input_time = time.time()  # Última interacción (para timeout)
+    main_canvas = prepare_surface(
+        pygame.Surface((WIDTH, HEIGHT))
+    )  # Superficie de dibujo principal (formato de pantalla)
+    last_input_time = time.monotonic()  # Última interacción (para timeout)
+    last_frame_time = time.monotonic()  # Para el dt del FrameContext
 
     # NO iniciar playlist automáticamente - lo hará el boot sequence
 
     # ========================================================================
     # INFORMACIÓN DE CONTROLES (consola) - VERSIÓN COMPLETA RESTAURADA
     # ========================================================================
+    # El banner va directo a consola: antes, lo pendiente del log
+    logger.flush()
     print("\n" + "=" * 60)
     print("CONTROLES DISPONIBLES:")
     print("=" * 60)
@@ -771,17 +967,24 @@ def main():
     # ========================================================================
     # EJECUTAR SECUENCIA DE BOOT
     # ========================================================================
-    print("[SISTEMA] Iniciando secuencia de arranque...")
+    logger.info("SISTEMA", "Iniciando secuencia de arranque...")
 
+    # El arranque solo cambia la línea en escritura y el barrido: se presentan
+    # únicamente esas zonas (flip completo si cambia más del umbral)
     while not crt_boot.pause_completed and run:
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
                 run = False
             elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 run = False
-
-        crt_boot.draw(screen)
-        pygame.display.flip()
+        latency_tracker.on_pump()
+
+        frame_scheduler.begin_frame()
+        now = time.monotonic()
+        crt_boot.draw(screen, FrameContext(time=now, dt=now - last_frame_time))
+        last_frame_time = now
+        compositor.present_dirty(screen, crt_boot.dirty_rects)
+        frame_scheduler.run()
         clock.tick(60)
 
     # NUEVO: FADE DEL SONIDO
@@ -791,13 +994,28 @@ def main():
         pygame.quit()
         return
 
-    print("[SISTEMA] Arranque completado")
+    boot_stats = compositor.dirty_stats()
+    if boot_stats is None:
+        logger.info("SISTEMA", "Arranque completado")
+    else:
+        logger.info(
+            "SISTEMA",
+            "Arranque completado (%d frames parciales, %d completos, "
+            "%.1f%% de pantalla por frame)",
+            boot_stats["partial"],
+            boot_stats["full"],
+            boot_stats["pixels_per_frame"] / (WIDTH * HEIGHT) * 100,
+        )
 
     # ========================================================================
     # BUCLE PRINCIPAL (continuación del código original)
     # ========================================================================
+    late_events = []  # Sacados a mitad del frame anterior (baja latencia)
     while run:
-        current_time = time.time()
+        frame_scheduler.begin_frame()
+        current_time = time.monotonic()
+        frame_dt = current_time - last_frame_time
+        last_frame_time = current_time
 
         # ====================================================================
         # ACTUALIZACIÓN DE FPS COUNTER CYBERPUNK (AÑADIDO)
@@ -837,14 +1055,14 @@ def main():
 
             # Actualizar título de ventana
             full_title = f"{base_title} | {title_fps_display}"
-            pygame.display.set_caption(full_title)
+            compositor.set_caption(full_title)
 
         # ====================================================================
         # 1. SINCRO BPM (solo si la música está sonando) - SISTEMA COMPLETO
         # ====================================================================
         if pygame.mixer.music.get_busy() or music_started:
             beat, beat_phase, new_beat, section, new_section, total_beats = (
-                music_clock.update()
+                music_clock.update(current_time)
             )
 
             # Eventos en cada beat NUEVO - SINCRONIZACIÓN PRECISA
@@ -853,13 +1071,17 @@ def main():
                 beat_strength = (
                     1.0 if beat % 4 == 0 else (0.7 if beat % 2 == 0 else 0.4)
                 )
-                bpm_sync.on_beat(beat, beat_phase, beat_strength)
+                bpm_sync.on_beat(beat, beat_phase, beat_strength, current_time)
 
                 # Mostrar info debug ocasionalmente
                 if beat % 16 == 0 and bpm_debug:
                     estimated_bpm = music_clock.estimate_bpm()
-                    print(
-                        f"[BPM] Beat: {beat} | Sección: {section} | BPM: {estimated_bpm:.1f}"
+                    logger.info(
+                        "BPM",
+                        "Beat: %d | Sección: %d | BPM: %.1f",
+                        beat,
+                        section,
+                        estimated_bpm,
                     )
         else:
             # Si no hay música, usar valores por defecto
@@ -904,7 +1126,7 @@ def main():
                 player.start_playlist()
                 music_started = True
                 music_clock.start()
-                print("[MÚSICA] Playlist iniciada")
+                logger.info("MÚSICA", "Playlist iniciada")
 
         main_time = current_time - main_start_time
 
@@ -934,6 +1156,14 @@ def main():
         # ====================================================================
         # 6. MANEJO DE INPUT Y CURSOR
         # ====================================================================
+        # En baja latencia se vacía la cola ANTES de muestrear el ratón:
+        # get_pos() solo refleja lo que ha llegado hasta el último pump
+        if LOW_LATENCY_INPUT:
+            frame_events = pygame.event.get()
+            latency_tracker.on_events(frame_events)
+            frame_events = late_events + frame_events
+            late_events = []
+
         mouse_x, mouse_y = pygame.mouse.get_pos()
         is_clickable = False
 
@@ -973,10 +1203,14 @@ def main():
         # ====================================================================
         # 7. MANEJO DE EVENTOS (TODOS LOS ORIGINALES + NUEVOS)
         # ====================================================================
-        for event in pygame.event.get():
+        if not LOW_LATENCY_INPUT:
+            frame_events = pygame.event.get()
+            latency_tracker.on_events(frame_events)
+
+        for event in frame_events:
             last_input_time = current_time  # Resetear timeout
 
-            if event.type == pygame.QUIT:
+            if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
                 run = False
 
             if event.type == pygame.KEYDOWN:
@@ -1006,28 +1240,30 @@ def main():
                     bpm_debug = not bpm_debug
 
                     if bpm_debug:
-                        print("[BPM] Info activada")
+                        logger.info("BPM", "Info activada")
                     else:
-                        print("[BPM] Info desactivada")
+                        logger.info("BPM", "Info desactivada")
 
                 elif event.key == pygame.K_n:  # NUEVA TECLA para alternar BPM en formas
                     bpm_sync.toggle_bpm_effect()
                     current_state = bpm_sync.bpm_enabled
-                    print(
-                        f"[BPM] Efecto en formas: {'ACTIVADO' if current_state else 'DESACTIVADO'}"
+                    logger.info(
+                        "BPM",
+                        "Efecto en formas: %s",
+                        "ACTIVADO" if current_state else "DESACTIVADO",
                     )
 
                 elif event.key == pygame.K_p:  # Pausa/continuar música
                     if pygame.mixer.music.get_busy():
                         pygame.mixer.music.pause()
-                        print("[MÚSICA] Pausada")
+                        logger.info("MÚSICA", "Pausada")
                     else:
                         pygame.mixer.music.unpause()
-                        print("[MÚSICA] Reanudada")
+                        logger.info("MÚSICA", "Reanudada")
 
                 elif event.key == pygame.K_r:  # Reiniciar timeline
                     music_clock.reset()
-                    print("[BPM] Timeline reiniciada")
+                    logger.info("BPM", "Timeline reiniciada")
 
             # Eventos del transformador 3D (rotación manual)
             geometry.handle_input(event)
@@ -1100,41 +1336,76 @@ def main():
                             message = f"😅 Volviendo a modo normal.{status_info}"
 
                         controls_avatar.set_immediate_bark(message)
-                        print(
-                            f"[MODO] {'RAVE activado' if rave_mode else 'Modo normal'}"
+                        logger.info(
+                            "MODO", "RAVE activado" if rave_mode else "Modo normal"
                         )
-                        print(
-                            f"[BPM] Efecto en formas: {current_state} (config recomienda: {config_recommendation})"
+                        logger.info(
+                            "BPM",
+                            "Efecto en formas: %s (config recomienda: %s)",
+                            current_state,
+                            config_recommendation,
                         )
 
         # ====================================================================
         # 8. DIBUJADO PRINCIPAL (TODOS LOS EFECTOS ORIGINALES)
         # ====================================================================
+        # Contexto único del frame (reloj, beat, intensidad, formato, calidad)
+        frame_ctx = bpm_sync.frame_context(
+            current_time,
+            frame_dt,
+            beat,
+            beat_phase,
+            modulated_intensity,
+            kick,
+            player.current_fmt,
+            quality_level,
+            new_beat,
+        )
+
+        # Cada draw va dentro de measure(): tiempo por subsistema para el
+        # monitor F1, o asignaciones de memoria con --profile-alloc
+        measure = (
+            alloc_profiler.measure if alloc_profiler.enabled else perf_monitor.measure
+        )
+
         if not praxis_event.wiped:
-            # Efectos de fondo
-            stars.draw(main_canvas, modulated_intensity * 0.8)
-            grid.draw(main_canvas, current_time, kick)
+            # Efectos de fondo: graban sus primitivas y se dibujan juntas
+            with measure("Starfield"), draw_commands.scope("Starfield"):
+                stars.draw(main_canvas, modulated_intensity * 0.8, None, draw_commands)
+            with measure("RetroGrid"), draw_commands.scope("RetroGrid"):
+                grid.draw(main_canvas, current_time, kick, draw_commands)
+            # Una etiqueta por vaciado: el perfilador cuenta una muestra por
+            # etiqueta y frame
+            with measure("DrawCommands.background"):
+                draw_commands.execute(end_frame=False)
 
             # Analizador de espectro (usa el formato actual de música)
-            analyzer.draw(main_canvas, modulated_intensity, kick, player.current_fmt)
+            with measure("SpectrumAnalyzer"):
+                analyzer.draw(main_canvas, frame_ctx)
+            perf_monitor.set_counter("PARTICULAS", *analyzer.particle_usage())
 
             # Geometría 3D principal con control BPM
-            bpm_state = bpm_sync.get_bpm_state()
-            geometry.draw(
-                main_canvas,
-                modulated_intensity,
-                main_time,
-                player.current_fmt,
-                bpm_state,
+            with measure("GeometricTransformer3D"), draw_commands.scope(
+                "GeometricTransformer3D"
+            ):
+                geometry.draw(main_canvas, frame_ctx, draw_commands)
+            with measure("DrawCommands.geometry"):
+                draw_commands.execute()
+            perf_monitor.set_counter(
+                "ARISTAS", geometry.edges_drawn, geometry.edges_submitted
             )
 
             # Logo y texto
-            logo.draw(main_canvas, modulated_intensity)
-            spain_text.draw(main_canvas, main_time, modulated_intensity, kick)
+            with measure("LogoMetalWAR"):
+                logo.draw(main_canvas, frame_ctx)
+            with measure("SpainText"):
+                spain_text.draw(main_canvas, main_time, modulated_intensity, kick)
 
             # Scroller y HUD de música
-            scroller.draw(main_canvas)
-            player.draw_hud(main_canvas)
+            with measure("C64Scroller"):
+                scroller.draw(main_canvas, frame_ctx)
+            with measure("MusicHUD"):
+                player.draw_hud(main_canvas, frame_ctx)
 
             # Modo RAVE overlay
             if rave_mode:
@@ -1164,30 +1435,39 @@ def main():
                 else:
                     avatar_x, avatar_y, avatar_width = 280, 450, 300
 
-                avatar_sys.draw(main_canvas, avatar_x, avatar_y, max_width=avatar_width)
+                with measure("AvatarSystem"):
+                    avatar_sys.draw(
+                        main_canvas, avatar_x, avatar_y, max_width=avatar_width
+                    )
 
             # Hex loader durante instalación
             if is_installing:
-                hex_loader.draw(main_canvas, installer.visual_progress, True)
+                with measure("HexDumpLoader"):
+                    hex_loader.draw(main_canvas, installer.visual_progress, True)
 
             # Monitor del sistema
             if show_monitor:
-                sys_monitor.draw(main_canvas, clock.get_fps())
+                with measure("SystemMonitor"):
+                    sys_monitor.draw(
+                        main_canvas,
+                        clock.get_fps(),
+                        latency_tracker.stats(),
+                        perf_monitor,
+                    )
 
             # Info BPM debug
             if bpm_debug:
                 debug_font = pygame.font.SysFont("Consolas", 14)
                 estimated_bpm = music_clock.estimate_bpm()
-                bpm_state_info = bpm_sync.get_bpm_state()
 
                 bpm_info = [
                     f"BPM: {estimated_bpm:.1f}",
                     f"Beat: {beat} (Phase: {beat_phase:.2f})",
                     f"Section: {section}",
                     f"Total Beats: {total_beats}",
-                    f"BPM en formas: {'ON' if bpm_state_info['enabled'] else 'OFF'}",
-                    f"Beat Pulse: {bpm_state_info['beat_pulse']:.2f}",
-                    f"Strong Beat: {bpm_state_info['strong_beat']}",
+                    f"BPM en formas: {'ON' if frame_ctx.bpm_enabled else 'OFF'}",
+                    f"Beat Pulse: {frame_ctx.pulse:.2f}",
+                    f"Strong Beat: {frame_ctx.strong_beat}",
                     f"Intensity: {modulated_intensity:.2f}",
                     f"Kick: {kick:.2f}",
                     f"Mode: {'RAVE' if rave_mode else 'NORMAL'}",
@@ -1230,7 +1510,8 @@ def main():
                 targeting_progress = min(
                     1.0, (current_time - installer.targeting_time) / 4.0
                 )
-                tactical_hud.draw(main_canvas, targeting_progress)
+                with measure("TacticalHUD"):
+                    tactical_hud.draw(main_canvas, targeting_progress)
 
             # Botón de instalación (estados diferentes)
             if installer.state == "ARMING":
@@ -1287,12 +1568,18 @@ def main():
                 main_canvas, border_color, (10, 10, WIDTH - 20, HEIGHT - 20), 1
             )
 
-            # Cursor personalizado
-            cyber_cursor.draw(main_canvas)
+            # Cursor personalizado (en baja latencia, con la posición recién
+            # bombeada; los eventos nuevos se procesan en el siguiente frame)
+            if LOW_LATENCY_INPUT:
+                late_events = pygame.event.get()
+                latency_tracker.on_events(late_events, deferred=True)
+            with measure("CyberCursor"):
+                cyber_cursor.draw(main_canvas)
 
             # UI de controles
             if show_controls:
-                controls_ui.draw(main_canvas, controls_avatar)
+                with measure("CyberControlsUI"):
+                    controls_ui.draw(main_canvas, controls_avatar)
 
         # ====================================================================
         # 9. EVENTO PRAXIS (explosión final)
@@ -1300,7 +1587,8 @@ def main():
         if installer.state == "FIRED":
             praxis_event.trigger()
 
-        praxis_event.draw(main_canvas, player)
+        with measure("PraxisEvent"):
+            praxis_event.draw(main_canvas, player)
 
         # Knight Rider effect al final (solo una vez)
         if praxis_event.wiped and not kitt_triggered:
@@ -1318,19 +1606,22 @@ def main():
         shake_x, shake_y = 0, 0
         final_frame = main_canvas.copy()
 
+        # Capas sobre el frame (bloom, scanlines, flare, viñeta): las compone
+        # el backend de presentación, en CPU o con el Renderer de SDL2
+        post_layers = []
+
         # Shake y glitch para explosión final
         if praxis_event.active and not praxis_event.wiped:
             shake_x, shake_y = praxis_event.get_shake()
-            final_frame = apply_glitch(main_canvas, kick, WIDTH, HEIGHT)
+            final_frame = apply_glitch(main_canvas, kick, WIDTH, HEIGHT, postfx)
 
         # Efectos especiales para modo RAVE - CON BPM SYNC
         elif rave_mode:
             # ================================================================
             # OBTENER DATOS BPM (asegurarse que existen)
             # ================================================================
-            bpm_state = bpm_sync.get_bpm_state()
-            beat_val = bpm_state.get("beat_pulse", 0.0)
-            is_strong = bpm_state.get("strong_beat", False)
+            beat_val = frame_ctx.pulse
+            is_strong = frame_ctx.strong_beat
 
             # ================================================================
             # INICIALIZACIÓN DE CACHÉ (Solo ocurre la primera vez)
@@ -1345,6 +1636,7 @@ def main():
                         pygame.draw.circle(
                             vignette_surf, (0, 0, 0, 5), (WIDTH // 2, HEIGHT // 2), r
                         )
+                vignette_surf = prepare_sprite(vignette_surf, premultiplied=True)
 
                 # 2. Caché para Scanlines (Textura repetible)
                 scanline_surf = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
@@ -1353,17 +1645,22 @@ def main():
                     pygame.draw.line(
                         scanline_surf, (0, 0, 0, alpha), (0, y), (WIDTH, y), 1
                     )
+                scanline_surf = prepare_sprite(scanline_surf, premultiplied=True)
 
-                # 3. Caché para Lens Flare (Sprite pre-renderizado)
+                # 3. Caché para Lens Flare (Sprite premultiplicado, aditivo)
                 flare_surf = pygame.Surface((300, 300), pygame.SRCALPHA)
                 for r in range(150, 0, -2):
                     alpha = int(100 * (1 - (r / 150) ** 0.5))
                     pygame.draw.circle(
                         flare_surf, (255, 255, 220, alpha), (150, 150), r
                     )
-
-                # 4. Surface temporal para efectos
-                chroma_temp = pygame.Surface((WIDTH, HEIGHT))
+                flare_surf = prepare_sprite(flare_surf, premultiplied=True)
+                # Tamaños del flare (escala 0.8-1.6) en pasos del 6%: se
+                # escalan en los huecos de los frames siguientes, uno por paso
+                flare_mips = MipChain(
+                    flare_surf, mip_sizes(240, 480, ratio=1.06), deferred=True
+                )
+                frame_scheduler.submit(flare_mips.build_steps(), "flare_mips")
 
                 demo_cache_initialized = True
                 rave_shake_x = 0
@@ -1402,30 +1699,25 @@ def main():
             split_amount = int(beat_val * 15)
 
             if split_amount > 1:
-                chroma_temp.blit(main_canvas, (0, 0))
-                final_frame.fill((0, 0, 0))
-                final_frame.blit(
-                    chroma_temp,
-                    (shake_x - split_amount, shake_y),
-                    special_flags=pygame.BLEND_RGBA_ADD,
-                )
-                final_frame.blit(
-                    chroma_temp,
-                    (shake_x + split_amount, shake_y),
-                    special_flags=pygame.BLEND_RGBA_ADD,
-                )
-
                 hue_shift = (beat / 16.0) % 1.0
-                r, g, b = colorsys.hsv_to_rgb(hue_shift, 0.7, 1.0)
-                tint_color = (int(r * 255), int(g * 255), int(b * 255))
-                final_frame.fill(tint_color, special_flags=pygame.BLEND_MULT)
+                tint_color = rave_tints.tint(hue_shift)
+
+                # Suma de las dos copias desplazadas + tinte, por bandas
+                audit_blit(final_frame, main_canvas, "chroma")
+                postfx.chroma_split(
+                    final_frame,
+                    main_canvas,
+                    (shake_x, shake_y),
+                    split_amount,
+                    tint_color,
+                )
             else:
                 final_frame.blit(main_canvas, (shake_x, shake_y))
 
             # ================================================================
             # 3. BLOOM "DOWNSAMPLE" - INTENSIDAD BPM
             # ================================================================
-            if beat_val > 0.2:
+            if beat_val > 0.2 and quality_preset["bloom"]:
                 scale_factor = 8 - int(beat_val * 5)
                 scale_factor = max(3, min(8, scale_factor))
 
@@ -1433,19 +1725,43 @@ def main():
                 mini_surf = pygame.transform.smoothscale(
                     main_canvas, (small_w, small_h)
                 )
-                bloom_layer = pygame.transform.smoothscale(mini_surf, (WIDTH, HEIGHT))
 
-                bloom_alpha = int(beat_val * 200)
-                bloom_layer.set_alpha(bloom_alpha)
-                final_frame.blit(bloom_layer, (0, 0), special_flags=pygame.BLEND_ADD)
+                # El reescalado a pantalla completa lo hace el compositor
+                post_layers.append(
+                    (
+                        "layer",
+                        {
+                            "key": "bloom",
+                            "surface": mini_surf,
+                            "size": (WIDTH, HEIGHT),
+                            "alpha": int(beat_val * 200),
+                            "blend": BLEND_ADD,
+                            "dynamic": True,
+                            "smooth": True,
+                        },
+                    )
+                )
 
             # ================================================================
             # 4. SCANLINES & NOISE - VELOCIDAD BPM
             # ================================================================
             scan_speed = 50 * (BPM / 120.0)
             scan_offset = int(main_time * scan_speed) % 4
-            final_frame.blit(scanline_surf, (0, scan_offset - 2))
+            audit_blit(final_frame, scanline_surf, "scanlines")
+            post_layers.append(
+                (
+                    "layer",
+                    {
+                        "key": "scanlines",
+                        "surface": scanline_surf,
+                        "dest": (0, scan_offset - 2),
+                        "blend": BLEND_PREMULTIPLIED,
+                    },
+                )
+            )
 
+            # El corte de glitch desplaza píxeles del frame: va en CPU, antes
+            # de las capas
             glitch_chance = 0.05 + (beat_val * 0.25)
             if random.random() < glitch_chance:
                 h_strip = random.randint(10, 30 + int(beat_val * 40))
@@ -1464,21 +1780,26 @@ def main():
                 flare_x = (WIDTH // 2) + math.cos(angle) * orbit_radius
                 flare_y = (HEIGHT // 2) + math.sin(angle) * orbit_radius
                 scale = 0.8 + (beat_val * 0.8)
-                w_f = int(300 * scale)
-                h_f = int(300 * scale)
-                flare_instance = pygame.transform.scale(flare_surf, (w_f, h_f))
-                dest_rect = flare_instance.get_rect(center=(int(flare_x), int(flare_y)))
-                flare_alpha = int(255 * beat_val)
-                flare_instance.set_alpha(flare_alpha)
-                final_frame.blit(
-                    flare_instance, dest_rect, special_flags=pygame.BLEND_ADD
+                flare_surf = flare_mips.get(int(300 * scale))
+                dest_rect = flare_surf.get_rect(center=(int(flare_x), int(flare_y)))
+                post_layers.append(
+                    (
+                        "layer",
+                        {
+                            "key": "flare",
+                            "surface": flare_surf,
+                            "dest": dest_rect.topleft,
+                            "alpha": int(255 * beat_val),
+                            "blend": BLEND_ADD,
+                        },
+                    )
                 )
                 if beat_val > 0.8:
+                    # Flash blanco premultiplicado: sumar directamente el gris
                     flash_alpha = int(beat_val * 60)
-                    flash_surf = pygame.Surface((WIDTH, HEIGHT))
-                    flash_surf.fill((255, 255, 255))
-                    flash_surf.set_alpha(flash_alpha)
-                    final_frame.blit(flash_surf, (0, 0), special_flags=pygame.BLEND_ADD)
+                    post_layers.append(
+                        ("fill", {"color": (flash_alpha, flash_alpha, flash_alpha)})
+                    )
 
             # ================================================================
             # 6. VIGNETTE PULSANTE - RESPIRACIÓN RÍTMICA
@@ -1486,21 +1807,45 @@ def main():
             pulse_speed = 4.0 * (BPM / 120.0)
             vignette_pulse = 20 + int(math.sin(main_time * pulse_speed) * 20)
             base_alpha = 120 + int(beat_val * 50)
-            vignette_surf.set_alpha(base_alpha + vignette_pulse)
-            final_frame.blit(vignette_surf, (0, 0))
+            audit_blit(final_frame, vignette_surf, "vignette")
+            post_layers.append(
+                (
+                    "layer",
+                    {
+                        "key": "vignette",
+                        "surface": vignette_surf,
+                        "alpha": base_alpha + vignette_pulse,
+                        "blend": BLEND_PREMULTIPLIED,
+                    },
+                )
+            )
         # Efectos normales con glitch leve en beats fuertes
         else:
             if kick > 0.7:
                 glitch_amount = 0.05 + (kick - 0.7) * 0.2
-                final_frame = apply_glitch(main_canvas, glitch_amount, WIDTH, HEIGHT)
+                final_frame = apply_glitch(
+                    main_canvas, glitch_amount, WIDTH, HEIGHT, postfx
+                )
 
         # ====================================================================
         # 12. RENDER FINAL A PANTALLA (SIN FPS COUNTER)
         # ====================================================================
-        screen.blit(final_frame, (int(shake_x), int(shake_y)))
+        audit_blit(screen, final_frame, "final_frame")
+        with measure("Composición"):
+            compositor.begin(final_frame, (shake_x, shake_y))
+            for operation, args in post_layers:
+                getattr(compositor, operation)(**args)
 
         # Actualizar pantalla
-        pygame.display.flip()
+        compositor.present()
+        latency_tracker.mark_presented()
+        alloc_profiler.end_frame()
+        perf_monitor.end_frame(frame_dt, installer.bytes_extracted)
+        if frame_exporter:
+            frame_exporter.publish(compositor.export_surface)
+
+        # Trabajos troceados con el presupuesto que le quede al frame
+        frame_scheduler.run()
 
         # Mantener FPS objetivo
         clock.tick(FPS)
@@ -1508,10 +1853,69 @@ def main():
     # ========================================================================
     # 13. LIMPIEZA Y SALIDA (fin del programa)
     # ========================================================================
-    print("\nFinalizando MetalWar...")
+    logger.info("SISTEMA", "Finalizando MetalWar...")
+
+    # Resumen de latencia input -> pantalla
+    for line in latency_tracker.summary():
+        logger.info("LATENCIA", "%s", line)
+
+    # Cerrar el anillo de frames exportados
+    if frame_exporter:
+        logger.info("EXPORT", "Frames exportados: %d", frame_exporter.frame)
+        frame_exporter.close()
+
+    postfx.close()
+
+    # Comandos de dibujo grabados por los efectos de fondo
+    for line in draw_commands.summary():
+        logger.info("DRAW", "%s", line)
+
+    # Cachés de sprites de partícula (LRU)
+    for name, sprite_cache in (
+        ("GeometricTransformer3D", geometry.trail_sprites),
+        ("SpainText", spain_text.particle_sprites),
+        ("CyberCursor", cyber_cursor.trail_sprites),
+    ):
+        cache_stats = sprite_cache.stats()
+        logger.info(
+            "SPRITES",
+            "%s: %d variantes | %d aciertos | %d fallos | %d descartes",
+            name,
+            cache_stats["sprites"],
+            cache_stats["hits"],
+            cache_stats["misses"],
+            cache_stats["evictions"],
+        )
+
+    # Registros que el log no pudo guardar (buffer lleno o error de disco)
+    if logger.lost():
+        logger.warning("LOG", "Registros perdidos: %d", logger.lost())
+
+    # Informe de asignaciones por efecto
+    if alloc_profiler.enabled:
+        for line in alloc_profiler.summary():
+            logger.info("ALLOC", "%s", line)
+        written = alloc_profiler.write_json(PROFILE_ALLOC_PATH)
+        if written:
+            logger.info("ALLOC", "Informe guardado en %s", written)
+        else:
+            logger.error("ALLOC", "No se pudo escribir %s", PROFILE_ALLOC_PATH)
+
+    # Resumen del planificador de trabajos
+    sched_stats = frame_scheduler.stats()
+    logger.info(
+        "SCHEDULER",
+        "Completados: %d | Fallidos: %d | Pendientes: %d | "
+        "Frames sin hueco: %d | Espera máx: %d frames",
+        sched_stats["completed"],
+        sched_stats["failed"],
+        sched_stats["pending"],
+        sched_stats["starved_frames"],
+        sched_stats["max_wait_frames"],
+    )
 
     # Restaurar título original de ventana al salir
-    pygame.display.set_caption(base_title)
+    compositor.set_caption(base_title)
 
     # Detener música gradualmente
     if pygame.mixer.music.get_busy():
@@ -1526,7 +1930,7 @@ def main():
         # Pasar el directorio temporal específico
         clean_temp_files(TEMP_DIR)
     except Exception as e:
-        print(f"[LIMPEZA] Error limpiando archivos: {e}")
+        logger.warning("LIMPIEZA", "Error limpiando archivos: %s", e)
 
     # Salir de pygame y sistema
     pygame.quit()
@@ -0,0 +1,421 @@
+# particles.py
+# Motor de partículas común: pools de capacidad fija por emisor
+# Columnas NumPy, borrado por intercambio, integración vectorizada y dibujo por lotes
+
+import pygame
+from sprites import SpriteCache, prepare_sprite, quantize, quantize_array
+
+# Con NumPy cada campo es un array; sin él, una lista (mismo interfaz)
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+COLOR_STEP = 32  # Cuantización del color de los sprites de partícula
+ALPHA_STEP = 16  # Cuantización de la opacidad
+MAX_SPRITES = 2048  # Variantes en caché; con más se descarta la menos usada
+MAX_RADIUS = 255  # Radio máximo de un sprite (8 bits de la clave)
+
+# Ejes que integra ParticlePool.update(): posición y su velocidad
+AXES = (("x", "vx"), ("y", "vy"), ("z", "vz"))
+
+
+# ============================================================================
+# POOL DE PARTÍCULAS
+# ============================================================================
+
+
+class ParticlePool:
+    """
+    Partículas de un emisor en un pool de capacidad fija
+
+    Cada campo es una columna (array de 'capacity' elementos con NumPy, lista
+    sin él) y las partículas vivas ocupan las primeras 'count' posiciones.
+    Al morir una partícula, su hueco lo ocupa una de las del final (borrado
+    por intercambio: no se desplaza el resto). Los pools ordenados (estelas
+    que se dibujan como polilínea) compactan conservando el orden.
+
+    Con el pool lleno, cada partícula nueva sustituye a una existente en
+    rotación (en los ordenados, a la más antigua): ni la memoria ni el coste
+    del frame crecen con una ráfaga de beats.
+    """
+
+    def __init__(self, capacity, fields, ordered=False):
+        """
+        Args:
+            capacity: Máximo de partículas vivas (tope duro)
+            fields: Nombres de los campos; "life" es obligatorio
+            ordered: Conservar el orden de creación al borrar
+        """
+        if "life" not in fields:
+            raise ValueError("El pool necesita un campo 'life'")
+
+        self.capacity = max(1, int(capacity))
+        self.limit = self.capacity  # Tope activo (preset de calidad)
+        self.fields = tuple(fields)
+        self.ordered = ordered
+        self.vectorized = NUMPY_AVAILABLE
+
+        self.count = 0
+        self.spawned = 0  # Partículas creadas
+        self.recycled = 0  # Creadas sobre otra por estar el pool lleno
+        self._victim = 0  # Siguiente hueco a reciclar con el pool lleno
+
+        # Ejes presentes: (columna de posición, columna de velocidad)
+        self.axes = [(p, v) for p, v in AXES if p in self.fields and v in self.fields]
+
+        if self.vectorized:
+            self.columns = {name: np.zeros(self.capacity) for name in self.fields}
+        else:
+            self.columns = {name: [] for name in self.fields}
+
+    def __len__(self):
+        return self.count
+
+    def column(self, name):
+        """Valores de un campo para las partículas vivas (vista modificable)"""
+        if self.vectorized:
+            return self.columns[name][: self.count]
+        return self.columns[name]
+
+    def set_limit(self, limit):
+        """
+        Tope activo de partículas (None = la capacidad del pool)
+        Si hay más vivas que el tope, se descartan (en los ordenados, las
+        más antiguas)
+        """
+        limit = self.capacity if limit is None else max(1, min(self.capacity, limit))
+        self.limit = limit
+        excess = self.count - limit
+        if excess > 0:
+            if self.ordered:
+                self._shift(excess)
+            else:
+                self._truncate(limit)
+
+    def clear(self):
+        """Elimina todas las partículas"""
+        self._truncate(0)
+
+    def _truncate(self, count):
+        if not self.vectorized:
+            for column in self.columns.values():
+                del column[count:]
+        self.count = count
+
+    def _shift(self, n):
+        """Descarta las n partículas más antiguas conservando el orden"""
+        keep = self.count - n
+        for column in self.columns.values():
+            if self.vectorized:
+                column[:keep] = column[n : self.count]
+            else:
+                del column[:n]
+        self.count = keep
+
+    # ------------------------------------------------------------------
+    # Creación
+    # ------------------------------------------------------------------
+
+    def spawn(self, **values):
+        """
+        Crea una partícula; los campos no indicados valen 0
+
+        Returns:
+            False si ha tenido que reciclar el hueco de otra partícula
+        """
+        fresh = True
+        if self.count >= self.limit:
+            fresh = False
+            self.recycled += 1
+            if self.ordered:
+                self._shift(self.count - self.limit + 1)
+                slot = self.count
+            else:
+                slot = self._victim % self.limit
+                self._victim += 1
+        else:
+            slot = self.count
+
+        if slot == self.count:
+            self.count += 1
+        self.spawned += 1
+
+        for name in self.fields:
+            value = values.pop(name, 0.0)
+            column = self.columns[name]
+            if self.vectorized or slot < len(column):
+                column[slot] = value
+            else:
+                column.append(value)
+        if values:
+            raise KeyError(f"Campos desconocidos en el pool: {', '.join(values)}")
+        return fresh
+
+    # ------------------------------------------------------------------
+    # Integración
+    # ------------------------------------------------------------------
+
+    def update(self, decay, drag=1.0, gravity=0.0, shrink=1.0):
+        """
+        Avanza un paso y retira las partículas muertas (life <= 0)
+
+        Args:
+            decay: Vida que se pierde por paso
+            drag: Factor de la velocidad tras moverse (1.0 = sin rozamiento)
+            gravity: Aceleración sumada a vy
+            shrink: Factor del campo "size" (1.0 = sin cambio)
+        """
+        n = self.count
+        if not n:
+            return
+
+        columns = self.columns
+        if self.vectorized:
+            for pos, vel in self.axes:
+                columns[pos][:n] += columns[vel][:n]
+                if drag != 1.0:
+                    columns[vel][:n] *= drag
+            if gravity:
+                columns["vy"][:n] += gravity
+            if shrink != 1.0:
+                columns["size"][:n] *= shrink
+            columns["life"][:n] -= decay
+        else:
+            for pos, vel in self.axes:
+                p, v = columns[pos], columns[vel]
+                for i in range(n):
+                    p[i] += v[i]
+                if drag != 1.0:
+                    columns[vel][:] = [value * drag for value in v]
+            if gravity:
+                columns["vy"][:] = [value + gravity for value in columns["vy"]]
+            if shrink != 1.0:
+                columns["size"][:] = [value * shrink for value in columns["size"]]
+            columns["life"][:] = [value - decay for value in columns["life"]]
+
+        self._sweep()
+
+    def _sweep(self):
+        """Retira las partículas con life <= 0"""
+        n = self.count
+        columns = self.columns
+        life = columns["life"]
+
+        if self.vectorized:
+            alive = life[:n] > 0
+            keep = int(np.count_nonzero(alive))
+            if keep == n:
+                return
+            if self.ordered:
+                for column in columns.values():
+                    column[:keep] = column[:n][alive]
+            else:
+                # Huecos por delante de 'keep' <- vivas por detrás
+                holes = np.flatnonzero(~alive[:keep])
+                if holes.size:
+                    movers = keep + np.flatnonzero(alive[keep:])
+                    for column in columns.values():
+                        column[holes] = column[movers]
+            self.count = keep
+            return
+
+        if self.ordered:
+            alive = [i for i in range(n) if life[i] > 0]
+            if len(alive) < n:
+                for column in columns.values():
+                    column[:] = [column[i] for i in alive]
+        else:
+            i = 0
+            while i < len(life):
+                if life[i] > 0:
+                    i += 1
+                    continue
+                for column in columns.values():
+                    last = column.pop()
+                    if i < len(column):
+                        column[i] = last
+        self.count = len(life)
+
+    def stats(self):
+        """Vivas, tope y contadores de creación"""
+        return {
+            "count": self.count,
+            "limit": self.limit,
+            "capacity": self.capacity,
+            "spawned": self.spawned,
+            "recycled": self.recycled,
+        }
+
+
+# ============================================================================
+# DIBUJO POR LOTES
+# ============================================================================
+
+
+def _per_particle(values, n):
+    """Secuencia de n valores a partir de una secuencia o de un valor fijo"""
+    if isinstance(values, (int, float)):
+        return [values] * n
+    return values
+
+
+def draw_circles(target, xs, ys, radii, colors, alphas=255):
+    """
+    Círculos sólidos con pygame.draw.circle: el color RGBA sustituye a los
+    píxeles del destino, sin mezcla (como dibujar cada partícula a mano)
+
+    Para los emisores de color libre y miles de partículas: una caché de
+    variantes apenas se reutilizaría y draw.circle es más rápido que un
+    blit por partícula. Mismos argumentos que ParticleSprites.draw().
+
+    Returns:
+        Número de círculos dibujados
+    """
+    n = len(xs)
+    if not n:
+        return 0
+
+    if NUMPY_AVAILABLE and isinstance(xs, np.ndarray):
+        radii = np.asarray(radii).astype(np.int64)
+        visible = radii >= 1
+        columns = [
+            np.asarray(xs).astype(np.int64)[visible],
+            np.asarray(ys).astype(np.int64)[visible],
+            radii[visible],
+        ]
+        for channel in (*colors, alphas):
+            channel = np.clip(channel, 0, 255).astype(np.int64)
+            columns.append(np.broadcast_to(channel, (n,))[visible])
+        rows = zip(*(column.tolist() for column in columns))
+    else:
+        channels = [_per_particle(channel, n) for channel in (*colors, alphas)]
+        rows = (
+            (int(xs[i]), int(ys[i]), int(radii[i]))
+            + tuple(max(0, min(255, int(channel[i]))) for channel in channels)
+            for i in range(n)
+            if radii[i] >= 1
+        )
+
+    circle = pygame.draw.circle
+    drawn = 0
+    for x, y, radius, r, g, b, a in rows:
+        circle(target, (r, g, b, a), (x, y), radius)
+        drawn += 1
+    return drawn
+
+
+class ParticleSprites:
+    """
+    Círculos de partícula pre-renderizados y dibujados en lote
+
+    Cada variante (color, radio y opacidad cuantizados) se dibuja una sola
+    vez y se guarda en una caché LRU de como mucho max_sprites sprites:
+    al llenarse se descarta la variante usada hace más tiempo (memoria
+    acotada sin tirar las que siguen en uso). Después cada partícula es una
+    entrada de una sola llamada a Surface.blits().
+    """
+
+    def __init__(
+        self, color_step=COLOR_STEP, alpha_step=ALPHA_STEP, max_sprites=MAX_SPRITES
+    ):
+        self.color_step = color_step
+        self.alpha_step = alpha_step
+        self.cache = SpriteCache(max_sprites=max(1, max_sprites))
+
+    def _sprite(self, key):
+        """Sprite del círculo para una clave (r, g, b, alpha, radio) empaquetada"""
+        sprite = self.cache.get(key)
+        if sprite is None:
+            radius = key & 0xFF
+            color = ((key >> 32) & 0xFF, (key >> 24) & 0xFF, (key >> 16) & 0xFF)
+            dot = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(
+                dot, (*color, (key >> 8) & 0xFF), (radius, radius), radius
+            )
+            sprite = self.cache.add(key, prepare_sprite(dot))
+        return sprite
+
+    def _quantize_array(self, values, step):
+        values = np.clip(values, 0, 255)
+        if step > 1:
+            values = quantize_array(values, step)
+        return np.minimum(values.astype(np.int64), 255)
+
+    def _keys_array(self, xs, ys, radii, colors, alphas):
+        """Claves y esquinas de los sprites visibles (camino NumPy)"""
+        radii = np.minimum(np.asarray(radii).astype(np.int64), MAX_RADIUS)
+        alphas = self._quantize_array(alphas, self.alpha_step)
+        visible = (radii >= 1) & (alphas > 0)
+
+        key = np.zeros(len(radii), dtype=np.int64)
+        for channel in colors:
+            key = (key << 8) | self._quantize_array(channel, self.color_step)
+        key = (((key << 8) | alphas) << 8) | radii
+
+        lefts = np.asarray(xs).astype(np.int64) - radii
+        tops = np.asarray(ys).astype(np.int64) - radii
+        return zip(
+            key[visible].tolist(), lefts[visible].tolist(), tops[visible].tolist()
+        )
+
+    def _keys_list(self, xs, ys, radii, colors, alphas):
+        """Claves y esquinas de los sprites visibles (sin NumPy)"""
+        n = len(xs)
+        reds, greens, blues = (_per_particle(channel, n) for channel in colors)
+        alphas = _per_particle(alphas, n)
+        color_step, alpha_step = self.color_step, self.alpha_step
+
+        for i in range(n):
+            radius = min(int(radii[i]), MAX_RADIUS)
+            alpha = min(255, quantize(max(0, min(255, alphas[i])), alpha_step))
+            if radius < 1 or alpha <= 0:
+                continue
+            key = 0
+            for channel in (reds[i], greens[i], blues[i]):
+                key = (key << 8) | min(
+                    255, quantize(max(0, min(255, channel)), color_step)
+                )
+            key = (((key << 8) | alpha) << 8) | radius
+            yield key, int(xs[i]) - radius, int(ys[i]) - radius
+
+    def draw(self, target, xs, ys, radii, colors, alphas, special_flags=0):
+        """
+        Dibuja círculos centrados en (xs, ys) con una sola llamada a blits()
+
+        Args:
+            target: Superficie destino
+            xs, ys: Centros (columnas del pool)
+            radii: Radios en píxeles (< 1 no se dibuja)
+            colors: (r, g, b); cada canal es una columna o un valor fijo
+            alphas: Opacidad 0-255 (columna o valor fijo; 0 no se dibuja)
+            special_flags: Modo de mezcla de todos los sprites
+        Returns:
+            Número de sprites dibujados
+        """
+        if not len(xs):
+            return 0
+
+        if NUMPY_AVAILABLE and isinstance(xs, np.ndarray):
+            sprites = self._keys_array(xs, ys, radii, colors, alphas)
+        else:
+            sprites = self._keys_list(xs, ys, radii, colors, alphas)
+
+        sprite_for = self._sprite
+        if special_flags:
+            queue = [
+                (sprite_for(key), (x, y), None, special_flags) for key, x, y in sprites
+            ]
+        else:
+            queue = [(sprite_for(key), (x, y)) for key, x, y in sprites]
+        target.blits(queue, doreturn=False)
+        return len(queue)
+
+    def stats(self):
+        """Variantes en caché, aciertos, fallos y descartes"""
+        return self.cache.stats()
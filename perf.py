@@ -0,0 +1,721 @@
+# perf.py
+# Instrumentación de rendimiento para MetalWar
+# Mide latencias, tiempos y asignaciones del bucle principal sin depender de pygame
+
+import os
+import gc
+import sys
+import json
+import time
+from collections import deque
+
+# Numpy para el anillo de tiempos de frame (opcional)
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# LATENCIA INPUT -> PANTALLA
+# ============================================================================
+
+
+class InputLatencyTracker:
+    """
+    Mide cuánto tarda cada evento de entrada en verse en pantalla
+
+    pygame no marca los eventos con hora de llegada, así que cada evento se
+    fecha al sacarlo de la cola (cota inferior). La cota superior suma el
+    tiempo desde el pump anterior, que es lo máximo que pudo esperar en cola.
+    La medida se cierra cuando se presenta el frame que ya refleja el evento.
+    Cada pump o get() de la cola debe pasar por on_events() u on_pump(): si
+    no, la cota superior incluye la espera de un pump que no se registró.
+    """
+
+    # Tipos de evento que cuentan como entrada del usuario
+    MOTION = "motion"
+    CLICK = "click"
+    KEY = "key"
+
+    def __init__(self, max_samples=600):
+        """
+        Args:
+            max_samples: Número de muestras recientes por tipo de evento
+        """
+        self.samples = {
+            self.MOTION: deque(maxlen=max_samples),
+            self.CLICK: deque(maxlen=max_samples),
+            self.KEY: deque(maxlen=max_samples),
+        }
+        self.pending = []  # (tipo, t_cola, espera_máx) aún sin presentar
+        self.deferred = []  # Igual, pero se reflejan en el frame siguiente
+        self.last_pump = time.perf_counter()
+        self._event_kinds = None
+
+    def _kind_of(self, event_type):
+        """Clasifica un tipo de evento pygame (None si no es entrada)"""
+        if self._event_kinds is None:
+            import pygame
+
+            self._event_kinds = {
+                pygame.MOUSEMOTION: self.MOTION,
+                pygame.MOUSEBUTTONDOWN: self.CLICK,
+                pygame.MOUSEBUTTONUP: self.CLICK,
+                pygame.KEYDOWN: self.KEY,
+                pygame.KEYUP: self.KEY,
+            }
+        return self._event_kinds.get(event_type)
+
+    def on_pump(self):
+        """
+        Registra un pump cuyos eventos no se miden (p. ej. el get() del
+        arranque, que solo mira QUIT y ESC)
+        """
+        self.last_pump = time.perf_counter()
+
+    def on_events(self, events, deferred=False):
+        """
+        Registra los eventos recién sacados de la cola
+
+        Args:
+            events: Lista devuelta por pygame.event.get()
+            deferred: True si se sacan a mitad de frame y se procesan en el
+                      siguiente; solo el movimiento se ve ya (en el cursor)
+        """
+        now = time.perf_counter()
+        queue_wait = now - self.last_pump
+        self.last_pump = now
+
+        for event in events:
+            kind = self._kind_of(event.type)
+            if kind is None:
+                continue
+            if deferred and kind != self.MOTION:
+                self.deferred.append((kind, now, queue_wait))
+            else:
+                self.pending.append((kind, now, queue_wait))
+
+    def mark_presented(self):
+        """Cierra las medidas pendientes (llamar justo después del flip)"""
+        if self.pending:
+            now = time.perf_counter()
+            for kind, t_dequeued, queue_wait in self.pending:
+                low = now - t_dequeued
+                self.samples[kind].append((low, low + queue_wait))
+
+        # Los aplazados se cierran con el flip del frame que los procesa
+        self.pending = self.deferred
+        self.deferred = []
+
+    def stats(self, kind=None):
+        """
+        Estadísticas de latencia en milisegundos
+
+        Args:
+            kind: MOTION, CLICK, KEY o None para todos juntos
+        Returns:
+            Diccionario {count, mean, p95, max, mean_upper} o None sin muestras
+        """
+        if kind is None:
+            data = [s for queue in self.samples.values() for s in queue]
+        else:
+            data = list(self.samples[kind])
+
+        if not data:
+            return None
+
+        lows = sorted(s[0] for s in data)
+        uppers = [s[1] for s in data]
+        p95_index = min(len(lows) - 1, int(len(lows) * 0.95))
+
+        return {
+            "count": len(lows),
+            "mean": sum(lows) / len(lows) * 1000.0,
+            "p95": lows[p95_index] * 1000.0,
+            "max": lows[-1] * 1000.0,
+            "mean_upper": sum(uppers) / len(uppers) * 1000.0,
+        }
+
+    def summary(self):
+        """Texto de resumen por tipo de evento (para consola al salir)"""
+        lines = []
+        for kind in (self.MOTION, self.CLICK, self.KEY):
+            data = self.stats(kind)
+            if data is None:
+                continue
+            lines.append(
+                f"{kind:>6}: n={data['count']} media={data['mean']:.1f}ms "
+                f"(<= {data['mean_upper']:.1f}ms) p95={data['p95']:.1f}ms "
+                f"max={data['max']:.1f}ms"
+            )
+        return lines
+
+
+# ============================================================================
+# PERFILADO DE ASIGNACIONES POR EFECTO (--profile-alloc)
+# ============================================================================
+
+
+class _NullMeasure:
+    """Contexto vacío (perfilado desactivado o frame sin muestrear)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_MEASURE = _NullMeasure()
+
+
+class _AllocMeasure:
+    """Contexto que toma snapshots de tracemalloc antes y después de un draw()"""
+
+    __slots__ = ("profiler", "name", "before")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.before = None
+
+    def __enter__(self):
+        tracemalloc = self.profiler.tracemalloc
+        self.before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tracemalloc = self.profiler.tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        self.profiler._record(self.name, self.before, after, peak - current)
+        self.before = None
+        return False
+
+
+class AllocationProfiler:
+    """
+    Atribuye las asignaciones de memoria de cada frame a cada efecto
+
+    Alrededor de cada draw() se toma un snapshot de tracemalloc; la diferencia
+    da los bytes y objetos que el efecto dejó vivos, y el pico de memoria
+    dentro del draw da los temporales que creó y soltó (Surfaces, listas...).
+    Los snapshots son caros, así que solo se muestrea uno de cada N frames.
+
+    Uso:
+        with profiler.measure("SpectrumAnalyzer"):
+            analyzer.draw(canvas, ctx)
+        ...
+        profiler.end_frame()
+    """
+
+    def __init__(self, enabled=False, every=5, top_sites=10, stack_depth=1):
+        """
+        Args:
+            enabled: Activa el perfilado (arranca tracemalloc)
+            every: Muestrear uno de cada N frames
+            top_sites: Líneas de código que se guardan por efecto
+            stack_depth: Marcos de pila que guarda tracemalloc por asignación
+        """
+        self.enabled = enabled
+        self.every = max(1, int(every))
+        self.top_sites = top_sites
+        self.frame = 0
+        self.sampled_frames = 0
+        self.effects = {}  # nombre -> acumulados
+        self.tracemalloc = None
+
+        if enabled:
+            import tracemalloc
+
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(stack_depth)
+            self._filters = (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+
+    def measure(self, name):
+        """
+        Contexto para medir un draw()
+
+        Args:
+            name: Nombre del efecto (clave del informe)
+        """
+        if not self.enabled or self.frame % self.every:
+            return _NULL_MEASURE
+        return _AllocMeasure(self, name)
+
+    def end_frame(self):
+        """Cierra el frame (llamar una vez por frame, tras el flip)"""
+        if self.enabled:
+            if self.frame % self.every == 0:
+                self.sampled_frames += 1
+            self.frame += 1
+
+    def _record(self, name, before, after, transient):
+        """Acumula la diferencia entre dos snapshots para un efecto"""
+        before = before.filter_traces(self._filters)
+        after = after.filter_traces(self._filters)
+
+        entry = self.effects.get(name)
+        if entry is None:
+            entry = {
+                "samples": 0,
+                "bytes": 0,
+                "objects": 0,
+                "max_bytes": 0,
+                "transient": 0,
+                "max_transient": 0,
+                "sites": {},
+            }
+            self.effects[name] = entry
+
+        frame_bytes = 0
+        frame_objects = 0
+        sites = entry["sites"]
+        for stat in after.compare_to(before, "lineno"):
+            if stat.size_diff <= 0:
+                continue
+            frame_bytes += stat.size_diff
+            frame_objects += max(0, stat.count_diff)
+
+            frame = stat.traceback[0]
+            key = f"{os.path.basename(frame.filename)}:{frame.lineno}"
+            site = sites.get(key)
+            if site is None:
+                sites[key] = [stat.size_diff, max(0, stat.count_diff)]
+            else:
+                site[0] += stat.size_diff
+                site[1] += max(0, stat.count_diff)
+
+        transient = max(0, transient)
+        entry["samples"] += 1
+        entry["bytes"] += frame_bytes
+        entry["objects"] += frame_objects
+        entry["max_bytes"] = max(entry["max_bytes"], frame_bytes)
+        entry["transient"] += transient
+        entry["max_transient"] = max(entry["max_transient"], transient)
+
+    def report(self):
+        """
+        Informe agregado, ordenado de peor a mejor efecto
+
+        Returns:
+            Diccionario serializable a JSON (bytes y objetos por frame muestreado)
+        """
+        effects = []
+        for name, entry in self.effects.items():
+            samples = entry["samples"] or 1
+            top = sorted(
+                entry["sites"].items(), key=lambda item: item[1][0], reverse=True
+            )[: self.top_sites]
+            effects.append(
+                {
+                    "effect": name,
+                    "samples": entry["samples"],
+                    "bytes_per_frame": entry["bytes"] / samples,
+                    "objects_per_frame": entry["objects"] / samples,
+                    "max_bytes_frame": entry["max_bytes"],
+                    "transient_peak_per_frame": entry["transient"] / samples,
+                    "max_transient_peak": entry["max_transient"],
+                    "top_sites": [
+                        {
+                            "site": site,
+                            "bytes_per_frame": size / samples,
+                            "objects_per_frame": count / samples,
+                        }
+                        for site, (size, count) in top
+                    ],
+                }
+            )
+
+        effects.sort(
+            key=lambda e: e["bytes_per_frame"] + e["transient_peak_per_frame"],
+            reverse=True,
+        )
+        return {
+            "frames": self.frame,
+            "sampled_frames": self.sampled_frames,
+            "sample_every": self.every,
+            "effects": effects,
+        }
+
+    def write_json(self, path):
+        """
+        Guarda el informe en JSON
+
+        Returns:
+            Ruta escrita o None si falló
+        """
+        try:
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.report(), f, indent=2)
+            return path
+        except OSError:
+            return None
+
+    def summary(self, count=5):
+        """Líneas de resumen con los peores efectos (para consola al salir)"""
+        lines = []
+        for effect in self.report()["effects"][:count]:
+            lines.append(
+                f"{effect['effect']:>20}: "
+                f"{effect['bytes_per_frame'] / 1024:.1f} KB/frame "
+                f"({effect['objects_per_frame']:.0f} obj) "
+                f"pico temporal {effect['transient_peak_per_frame'] / 1024:.1f} KB"
+            )
+        return lines
+
+
+# ============================================================================
+# MONITOR DE RENDIMIENTO (F1): DATOS REALES DEL PROCESO Y DEL FRAME
+# ============================================================================
+
+
+class FrameTimeRing:
+    """
+    Anillo de tamaño fijo con los últimos tiempos de frame (en segundos)
+    Con numpy usa un array float32 preasignado; sin numpy, una lista
+    """
+
+    # Bordes del histograma en milisegundos (el último recoge todo lo mayor)
+    HISTOGRAM_EDGES_MS = (0, 4, 8, 12, 16, 17, 20, 25, 33, 50, 100, 1e9)
+
+    def __init__(self, size=600):
+        """
+        Args:
+            size: Frames que se conservan (600 = 10 s a 60 FPS)
+        """
+        self.size = size
+        self.count = 0
+        self.index = 0
+        if NUMPY_AVAILABLE:
+            self.data = np.zeros(size, dtype=np.float32)
+            edges = np.array(self.HISTOGRAM_EDGES_MS, dtype=np.float64)
+            self._edges = edges / 1000.0
+        else:
+            self.data = [0.0] * size
+
+    def add(self, dt):
+        """Añade el tiempo de un frame"""
+        self.data[self.index] = dt
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def values(self):
+        """Tiempos guardados (sin orden temporal)"""
+        return self.data[: self.count]
+
+    def percentile(self, q):
+        """Percentil q (0-100) en milisegundos, o 0.0 sin datos"""
+        if not self.count:
+            return 0.0
+        if NUMPY_AVAILABLE:
+            return float(np.percentile(self.values(), q)) * 1000.0
+        ordered = sorted(self.values())
+        return ordered[min(self.count - 1, int(self.count * q / 100.0))] * 1000.0
+
+    def histogram(self):
+        """Frames por intervalo de HISTOGRAM_EDGES_MS"""
+        if NUMPY_AVAILABLE:
+            return np.histogram(self.values(), self._edges)[0].tolist()
+
+        counts = [0] * (len(self.HISTOGRAM_EDGES_MS) - 1)
+        for dt in self.values():
+            ms = dt * 1000.0
+            for i in range(len(counts)):
+                if ms < self.HISTOGRAM_EDGES_MS[i + 1]:
+                    counts[i] += 1
+                    break
+        return counts
+
+
+class ProcessSampler:
+    """
+    CPU y memoria residente del propio proceso, sin dependencias externas
+
+    CPU: tiempo de CPU del proceso (time.process_time, todos los hilos)
+    entre muestras, en % de un núcleo. RSS: /proc en Linux,
+    GetProcessMemoryInfo en Windows y ru_maxrss (pico) en otros sistemas.
+    """
+
+    def __init__(self, interval=0.5):
+        """
+        Args:
+            interval: Segundos mínimos entre muestras
+        """
+        self.interval = interval
+        self.cpu_percent = 0.0
+        self.rss = 0  # bytes
+        self.rss_is_peak = False
+        self._last_wall = time.perf_counter()
+        self._last_cpu = time.process_time()
+        self._read_rss = self._pick_rss_reader()
+
+    def _pick_rss_reader(self):
+        """Elige la forma de leer la RSS en esta plataforma"""
+        if os.path.exists("/proc/self/statm"):
+            page = os.sysconf("SC_PAGE_SIZE")
+
+            def read_proc():
+                with open("/proc/self/statm") as f:
+                    return int(f.read().split()[1]) * page
+
+            return read_proc
+
+        if os.name == "nt":
+            try:
+                import ctypes
+                from ctypes import wintypes
+
+                class Counters(ctypes.Structure):
+                    _fields_ = [
+                        ("cb", wintypes.DWORD),
+                        ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t),
+                        ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t),
+                        ("PeakPagefileUsage", ctypes.c_size_t),
+                    ]
+
+                counters = Counters()
+                counters.cb = ctypes.sizeof(Counters)
+                process = ctypes.windll.kernel32.GetCurrentProcess()
+                get_info = ctypes.windll.psapi.GetProcessMemoryInfo
+
+                def read_windows():
+                    get_info(process, ctypes.byref(counters), counters.cb)
+                    return counters.WorkingSetSize
+
+                return read_windows
+            except Exception:
+                return None
+
+        try:
+            import resource
+
+            self.rss_is_peak = True
+            scale = 1 if sys.platform == "darwin" else 1024  # bytes vs KB
+
+            def read_rusage():
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+            return read_rusage
+        except ImportError:
+            return None
+
+    def sample(self):
+        """Actualiza CPU y RSS si ya pasó el intervalo"""
+        now = time.perf_counter()
+        elapsed = now - self._last_wall
+        if elapsed < self.interval:
+            return
+
+        cpu = time.process_time()
+        self.cpu_percent = (cpu - self._last_cpu) / elapsed * 100.0
+        self._last_wall, self._last_cpu = now, cpu
+
+        if self._read_rss is not None:
+            try:
+                self.rss = self._read_rss()
+            except Exception:
+                self._read_rss = None
+
+
+class GCMonitor:
+    """Cuenta recolecciones del recolector de basura y mide sus pausas"""
+
+    def __init__(self):
+        self.collections = [0, 0, 0]  # Por generación
+        self.pauses = deque(maxlen=256)  # (hora de fin, duración en s)
+        self.max_pause = 0.0
+        self._start = 0.0
+        self.installed = False
+
+    def install(self):
+        """Registra el callback en gc.callbacks"""
+        if not self.installed:
+            gc.callbacks.append(self._callback)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            gc.callbacks.remove(self._callback)
+            self.installed = False
+
+    def _callback(self, phase, info):
+        if phase == "start":
+            self._start = time.perf_counter()
+            return
+
+        end = time.perf_counter()
+        pause = end - self._start
+        generation = info.get("generation", 0)
+        if 0 <= generation < 3:
+            self.collections[generation] += 1
+        self.pauses.append((end, pause))
+        if pause > self.max_pause:
+            self.max_pause = pause
+
+    def recent_max_pause(self, window=1.0):
+        """Mayor pausa (s) en los últimos 'window' segundos"""
+        limit = time.perf_counter() - window
+        return max((p for t, p in self.pauses if t >= limit), default=0.0)
+
+
+class _SectionTimer:
+    """Contexto reutilizable que suma el tiempo de una sección"""
+
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        totals = self.timer.current
+        totals[self.name] = totals.get(self.name, 0.0) + (
+            time.perf_counter() - self.start
+        )
+        return False
+
+
+class SubsystemTimer:
+    """
+    Tiempo acumulado por subsistema en ventanas de un segundo
+
+    Uso:
+        with timer.measure("SpectrumAnalyzer"):
+            analyzer.draw(canvas, ctx)
+    """
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.current = {}  # Segundo en curso
+        self.last = {}  # Último segundo completo
+        self._sections = {}
+        self._window_start = time.perf_counter()
+
+    def measure(self, name):
+        """Contexto de medida (uno por nombre, reutilizado cada frame)"""
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _SectionTimer(self, name)
+        return section
+
+    def tick(self):
+        """Cierra la ventana si ya pasó un segundo (llamar una vez por frame)"""
+        now = time.perf_counter()
+        if now - self._window_start >= self.window:
+            self.last = self.current
+            self.current = {}
+            self._window_start = now
+
+    def top(self, count=5):
+        """Los 'count' subsistemas más caros del último segundo: [(nombre, ms)]"""
+        ranked = sorted(self.last.items(), key=lambda item: item[1], reverse=True)
+        return [(name, seconds * 1000.0) for name, seconds in ranked[:count]]
+
+
+class PerfMonitor:
+    """
+    Agrega los datos que muestra el SystemMonitor (F1)
+
+    Se alimenta siempre (coste de unos microsegundos por frame), aunque
+    el panel esté oculto, para que al abrirlo ya tenga historia.
+    """
+
+    def __init__(self, frames=600):
+        self.frame_times = FrameTimeRing(frames)
+        self.process = ProcessSampler()
+        self.gc = GCMonitor()
+        self.gc.install()
+        self.subsystems = SubsystemTimer()
+
+        # Contadores por frame que publican los efectos: nombre -> (valor, total)
+        self.counters = {}
+
+        # Rendimiento de extracción del instalador
+        self.extract_rate = 0.0  # bytes/s
+        self._extract_bytes = 0
+        self._extract_time = time.perf_counter()
+
+    def measure(self, name):
+        """Atajo a SubsystemTimer.measure"""
+        return self.subsystems.measure(name)
+
+    def set_counter(self, name, value, total):
+        """
+        Publica un contador del frame (p. ej. aristas dibujadas / enviadas)
+
+        Args:
+            name: Etiqueta en el panel
+            value: Elementos procesados
+            total: Elementos recibidos
+        """
+        self.counters[name] = (value, total)
+
+    def end_frame(self, dt, extracted_bytes=None):
+        """
+        Registra el frame terminado
+
+        Args:
+            dt: Duración del frame en segundos
+            extracted_bytes: Bytes extraídos hasta ahora por el instalador
+        """
+        self.frame_times.add(dt)
+        self.subsystems.tick()
+        self.process.sample()
+
+        if extracted_bytes is not None:
+            now = time.perf_counter()
+            elapsed = now - self._extract_time
+            if elapsed >= 0.5:
+                delta = extracted_bytes - self._extract_bytes
+                self.extract_rate = max(0, delta) / elapsed
+                self._extract_bytes = extracted_bytes
+                self._extract_time = now
+
+    def snapshot(self):
+        """
+        Valores actuales para el panel
+
+        Returns:
+            Diccionario con p50/p99 (ms), histograma, CPU, RSS, GC,
+            extracción y top de subsistemas
+        """
+        return {
+            "p50": self.frame_times.percentile(50),
+            "p99": self.frame_times.percentile(99),
+            "histogram": self.frame_times.histogram(),
+            "cpu": self.process.cpu_percent,
+            "rss": self.process.rss,
+            "rss_is_peak": self.process.rss_is_peak,
+            "gc": tuple(self.gc.collections),
+            "gc_pause": self.gc.recent_max_pause() * 1000.0,
+            "extract_rate": self.extract_rate,
+            "top": self.subsystems.top(5),
+            "counters": dict(self.counters),
+        }
@@ -0,0 +1,485 @@
+# postfx.py
+# Post-procesado de pantalla completa repartido en bandas horizontales
+# Cada banda de filas se procesa en un hilo con kernels NumPy (sueltan el GIL)
+#
+# Benchmark:
+#   python postfx.py                       1, 2, 4... hilos hasta los núcleos
+#   python postfx.py --size 1920x1080 --workers 1,2,4,8
+
+import os
+import sys
+import time
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+from sprites import byte_order, fade_additive, pixel_rows
+
+# ============================================================================
+# IMPORTS OPCIONALES
+# ============================================================================
+
+# Sin NumPy todas las operaciones caen a los blits de pygame (un solo núcleo)
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Filas mínimas por banda: por debajo, repartir cuesta más que calcular
+MIN_BAND_ROWS = 32
+
+
+# ============================================================================
+# REPARTO EN BANDAS
+# ============================================================================
+
+
+class BandPool:
+    """
+    Reparte un trabajo por filas entre un pool de hilos
+
+    El hilo que llama procesa la primera banda; el resto va al pool. Con un
+    solo hilo (o pocas filas) todo se ejecuta en línea, sin pool.
+    """
+
+    def __init__(self, workers=0, min_rows=MIN_BAND_ROWS):
+        """
+        Args:
+            workers: Hilos a usar (0 = uno por núcleo)
+            min_rows: Filas mínimas por banda
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.min_rows = max(1, int(min_rows))
+        self.executor = None
+        if self.workers > 1:
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers - 1, thread_name_prefix="postfx"
+            )
+
+    def bands(self, rows):
+        """Lista de (fila inicial, fila final) que cubre 'rows' filas"""
+        count = max(1, min(self.workers, rows // self.min_rows))
+        step = -(-rows // count)
+        return [(y, min(rows, y + step)) for y in range(0, rows, step)]
+
+    def run(self, kernel, rows, *args):
+        """
+        Ejecuta kernel(y0, y1, *args) sobre todas las bandas y espera
+
+        Args:
+            kernel: Función que procesa las filas [y0, y1)
+            rows: Número total de filas
+        """
+        bands = self.bands(rows)
+        if self.executor is None or len(bands) == 1:
+            for y0, y1 in bands:
+                kernel(y0, y1, *args)
+            return
+
+        futures = [
+            self.executor.submit(kernel, y0, y1, *args) for y0, y1 in bands[1:]
+        ]
+        kernel(bands[0][0], bands[0][1], *args)
+        for future in futures:
+            future.result()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+# ============================================================================
+# KERNELS POR BANDA
+# ============================================================================
+#
+# Los arrays son vistas (filas, bytes) del buffer de la superficie: cada
+# banda es un bloque contiguo de memoria. Las fórmulas reproducen las de
+# los blits de pygame (mismo redondeo), así que los dos caminos dan la
+# misma imagen. El byte sin usar (X) de las superficies sin alpha se
+# calcula como uno más; su valor da igual.
+
+
+def _add_kernel(y0, y1, dest, src, alpha):
+    """dest = min(dest + src * alpha, 255) (como fade_additive + BLEND_RGB_ADD)"""
+    band = dest[y0:y1]
+    tmp = src[y0:y1].astype(np.uint16)
+    if alpha < 255:
+        tmp *= alpha
+        tmp += 255
+        tmp >>= 8
+    tmp += band
+    np.minimum(tmp, 255, out=tmp)
+    band[...] = tmp
+
+
+def _premultiplied_kernel(y0, y1, dest, src, alpha_index, opacity):
+    """
+    dest = src + dest * (1 - alpha) (como fade_additive + BLEND_PREMULTIPLIED)
+    """
+    band = dest[y0:y1]
+    s = src[y0:y1].astype(np.uint16)
+    if opacity < 255:
+        s *= opacity
+        s += 255
+        s >>= 8
+    d = band.astype(np.uint16)
+    tmp = d + 1
+    tmp *= s[..., alpha_index : alpha_index + 1]
+    tmp >>= 8
+    d += s
+    d -= tmp
+    band[...] = d
+
+
+def _multiply_kernel(y0, y1, dest, factors):
+    """dest = dest * factor por byte (como fill con BLEND_RGB_MULT)"""
+    band = dest[y0:y1]
+    tmp = band.astype(np.uint16)
+    tmp *= factors
+    tmp += 255
+    tmp >>= 8
+    band[...] = tmp
+
+
+def _blend_kernel(y0, y1, dest, src, alpha_index, opacity):
+    """Mezcla alpha por píxel con opacidad global (como un blit SRCALPHA)"""
+    band = dest[y0:y1]
+    s = src[y0:y1].astype(np.int32)
+    alpha = s[..., alpha_index : alpha_index + 1].copy()
+    if opacity < 255:
+        alpha *= opacity
+        alpha //= 255
+    d = band.astype(np.int32)
+    tmp = s - d
+    tmp *= alpha
+    tmp += s
+    tmp >>= 8
+    d += tmp
+    band[...] = d
+
+
+def _channel_shift_kernel(y0, y1, pixels, offset, red, blue):
+    """Suma el rojo desplazado a la izquierda y el azul a la derecha"""
+    band = pixels[y0:y1]
+    shifted_red = band[:, :-offset, red].astype(np.uint16)
+    shifted_red += band[:, offset:, red]
+    np.minimum(shifted_red, 255, out=shifted_red)
+    shifted_blue = band[:, offset:, blue].astype(np.uint16)
+    shifted_blue += band[:, :-offset, blue]
+    np.minimum(shifted_blue, 255, out=shifted_blue)
+    band[:, :-offset, red] = shifted_red
+    band[:, offset:, blue] = shifted_blue
+
+
+# ============================================================================
+# OPERACIONES SOBRE SUPERFICIES
+# ============================================================================
+
+
+def _overlap(dest, src, pos):
+    """
+    Zona común de un blit de src en dest en la posición pos
+
+    Returns:
+        (slices de dest, slices de src) en orden [y, x], o None si no se solapan
+    """
+    x, y = int(pos[0]), int(pos[1])
+    dw, dh = dest.get_size()
+    sw, sh = src.get_size()
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(dw, x + sw), min(dh, y + sh)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (
+        (slice(y0, y1), slice(x0, x1)),
+        (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x)),
+    )
+
+
+class PostProcessor:
+    """
+    Operaciones de post-procesado de pantalla completa en paralelo
+
+    Con NumPy, cada operación sobre frames de 24/32 bits sin alpha se
+    trocea en bandas horizontales que procesa un BandPool; si no, se hace
+    con el blit equivalente de pygame. Ambos caminos dan el mismo resultado.
+    """
+
+    def __init__(self, workers=0):
+        """
+        Args:
+            workers: Hilos del pool (0 = uno por núcleo, 1 = sin hilos)
+        """
+        self.pool = BandPool(workers)
+
+    @property
+    def workers(self):
+        return self.pool.workers
+
+    @staticmethod
+    def _vectorizable(dest, layer=None):
+        """
+        Camino NumPy: frame destino de 24/32 bits sin alpha por píxel y capa
+        con los canales RGB en los mismos bytes
+        """
+        if not NUMPY_AVAILABLE or dest.get_bytesize() not in (3, 4):
+            return False
+        if dest.get_flags() & pygame.SRCALPHA:
+            return False
+        if layer is None:
+            return True
+        if layer is dest or layer.get_bytesize() != dest.get_bytesize():
+            return False
+        dest_order, layer_order = byte_order(dest), byte_order(layer)
+        return all(dest_order.get(c) == layer_order.get(c) for c in "RGB")
+
+    def add(self, dest, layer, pos=(0, 0), alpha=255):
+        """
+        Suma una capa (premultiplicada u opaca) atenuada por alpha
+
+        Args:
+            dest: Superficie destino (se modifica)
+            layer: Capa a sumar (no se modifica)
+            pos: Posición de la capa en dest
+            alpha: Opacidad 0-255
+        """
+        alpha = max(0, min(255, int(alpha)))
+        if alpha == 0:
+            return
+        if not self._vectorizable(dest, layer):
+            if alpha < 255:
+                layer = fade_additive(layer.copy(), alpha)
+            dest.blit(layer, pos, special_flags=pygame.BLEND_RGB_ADD)
+            return
+
+        area = _overlap(dest, layer, pos)
+        if area is None:
+            return
+        dest_rows = pixel_rows(dest)[area[0]]
+        layer_rows = pixel_rows(layer)[area[1]]
+        self.pool.run(_add_kernel, dest_rows.shape[0], dest_rows, layer_rows, alpha)
+
+    def blend(self, dest, layer, pos=(0, 0), alpha=255):
+        """
+        Mezcla una capa con alpha por píxel y opacidad global
+
+        Args:
+            dest: Superficie destino (se modifica)
+            layer: Capa SRCALPHA (no se modifica)
+            pos: Posición de la capa en dest
+            alpha: Opacidad global 0-255
+        """
+        alpha = max(0, min(255, int(alpha)))
+        alpha_index = byte_order(layer)["A"]
+        if alpha_index is None or not self._vectorizable(dest, layer):
+            # Opacidad solo durante el blit: la capa del llamador no cambia
+            previous = layer.get_alpha()
+            layer.set_alpha(alpha)
+            try:
+                dest.blit(layer, pos)
+            finally:
+                layer.set_alpha(previous)
+            return
+
+        area = _overlap(dest, layer, pos)
+        if area is None or alpha == 0:
+            return
+        dest_rows = pixel_rows(dest)[area[0]]
+        layer_rows = pixel_rows(layer)[area[1]]
+        self.pool.run(
+            _blend_kernel,
+            dest_rows.shape[0],
+            dest_rows,
+            layer_rows,
+            alpha_index,
+            alpha,
+        )
+
+    def premultiplied(self, dest, layer, pos=(0, 0), alpha=255):
+        """
+        Mezcla una capa premultiplicada con opacidad global
+
+        Args:
+            dest: Superficie destino (se modifica)
+            layer: Capa SRCALPHA premultiplicada (no se modifica)
+            pos: Posición de la capa en dest
+            alpha: Opacidad 0-255
+        """
+        alpha = max(0, min(255, int(alpha)))
+        if alpha == 0:
+            return
+        alpha_index = byte_order(layer)["A"]
+        if alpha_index is None or not self._vectorizable(dest, layer):
+            # BLEND_PREMULTIPLIED no usa set_alpha(): la opacidad va en el sprite
+            if alpha < 255:
+                layer = fade_additive(layer.copy(), alpha)
+            dest.blit(layer, pos, special_flags=pygame.BLEND_PREMULTIPLIED)
+            return
+
+        area = _overlap(dest, layer, pos)
+        if area is None:
+            return
+        dest_rows = pixel_rows(dest)[area[0]]
+        layer_rows = pixel_rows(layer)[area[1]]
+        self.pool.run(
+            _premultiplied_kernel,
+            dest_rows.shape[0],
+            dest_rows,
+            layer_rows,
+            alpha_index,
+            alpha,
+        )
+
+    def multiply(self, dest, color):
+        """Multiplica toda la superficie por un color (tinte)"""
+        if not self._vectorizable(dest):
+            dest.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+            return
+
+        order = byte_order(dest)
+        factors = np.full(dest.get_bytesize(), 255, dtype=np.uint16)
+        for name, value in zip("RGB", color[:3]):
+            factors[order[name]] = value
+        rows = pixel_rows(dest)
+        self.pool.run(_multiply_kernel, rows.shape[0], rows, factors)
+
+    def chroma_split(self, dest, source, pos, split, tint=None):
+        """
+        Aberración cromática: dos copias de source desplazadas +-split en X,
+        sumadas sobre dest en negro y (opcionalmente) tintadas
+
+        Args:
+            dest: Superficie destino (se sobrescribe)
+            source: Frame original (distinto de dest)
+            pos: Posición (x, y) del frame (shake)
+            split: Separación horizontal en píxeles
+            tint: Color con el que multiplicar el resultado
+        """
+        x, y = int(pos[0]), int(pos[1])
+        dest.fill((0, 0, 0))
+        self.add(dest, source, (x - split, y))
+        self.add(dest, source, (x + split, y))
+        if tint is not None:
+            self.multiply(dest, tint)
+
+    def channel_shift(self, surface, offset):
+        """
+        Separación de canales del glitch (in-place): rojo sumado desde
+        'offset' píxeles a la derecha y azul desde 'offset' a la izquierda
+        """
+        if offset <= 0 or offset >= surface.get_width():
+            return
+        if not self._vectorizable(surface):
+            red = surface.copy()
+            red.fill((0, 255, 255), special_flags=pygame.BLEND_RGB_SUB)
+            blue = surface.copy()
+            blue.fill((255, 255, 0), special_flags=pygame.BLEND_RGB_SUB)
+            surface.blit(red, (-offset, 0), special_flags=pygame.BLEND_RGB_ADD)
+            surface.blit(blue, (offset, 0), special_flags=pygame.BLEND_RGB_ADD)
+            return
+
+        order = byte_order(surface)
+        rows = pixel_rows(surface)
+        self.pool.run(
+            _channel_shift_kernel,
+            rows.shape[0],
+            rows,
+            offset,
+            order["R"],
+            order["B"],
+        )
+
+    def close(self):
+        self.pool.close()
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+
+def benchmark(size=(1280, 720), workers=None, repeats=30):
+    """
+    Mide cada operación con distintos números de hilos
+
+    Returns:
+        {hilos: {operación: ms por llamada}}
+    """
+    if workers is None:
+        cores = os.cpu_count() or 1
+        workers = [1]
+        while workers[-1] * 2 <= cores:
+            workers.append(workers[-1] * 2)
+        if workers[-1] != cores:
+            workers.append(cores)
+
+    frame = pygame.Surface(size).convert()
+    source = pygame.Surface(size).convert()
+    layer = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+    if NUMPY_AVAILABLE:
+        rng = np.random.default_rng(0)
+        pygame.surfarray.pixels3d(source)[...] = rng.integers(0, 256, (*size, 3))
+        pygame.surfarray.pixels3d(layer)[...] = rng.integers(0, 256, (*size, 3))
+        pygame.surfarray.pixels_alpha(layer)[...] = rng.integers(0, 256, size)
+
+    results = {}
+    for count in workers:
+        post = PostProcessor(count)
+        operations = {
+            "chroma_split": lambda: post.chroma_split(
+                frame, source, (0, 0), 8, (200, 150, 255)
+            ),
+            "add": lambda: post.add(frame, source, (0, 0), 120),
+            "blend": lambda: post.blend(frame, layer, (0, 0), 160),
+            "channel_shift": lambda: post.channel_shift(frame, 9),
+        }
+        timings = {}
+        for name, operation in operations.items():
+            operation()  # Calentamiento (arranque de los hilos)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                operation()
+            timings[name] = (time.perf_counter() - start) * 1000.0 / repeats
+        post.close()
+        results[count] = timings
+    return results
+
+
+def main(argv):
+    size = (1280, 720)
+    workers = None
+    args = iter(argv)
+    for arg in args:
+        if arg == "--size":
+            w, _, h = next(args, "1280x720").partition("x")
+            size = (int(w), int(h))
+        elif arg == "--workers":
+            workers = [int(n) for n in next(args, "1").split(",")]
+        else:
+            raise SystemExit(f"Opción desconocida: {arg}")
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+    if not NUMPY_AVAILABLE:
+        print("[POSTFX] Sin NumPy: todas las operaciones van por pygame")
+
+    results = benchmark(size, workers)
+    base = results[min(results)]
+    print(f"[POSTFX] {size[0]}x{size[1]}, ms por llamada (aceleración)")
+    for count, timings in results.items():
+        cells = "  ".join(
+            f"{name} {ms:6.2f} (x{base[name] / ms:4.2f})"
+            for name, ms in timings.items()
+        )
+        print(f"[POSTFX] {count:2d} hilos: {cells}")
+
+    pygame.quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
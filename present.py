@@ -0,0 +1,108 @@
+# present.py
+# Presentación por rectángulos sucios para pantallas con poco movimiento
+# Solo se envían al monitor las zonas que cambiaron; si cambia mucho, flip completo
+
+import pygame
+
+# Fracción de la pantalla a partir de la cual sale más barato un flip completo
+DEFAULT_FULL_THRESHOLD = 0.35
+
+
+class DirtyRectPresenter:
+    """
+    Sustituye a pygame.display.flip() en escenas que informan qué tocaron
+
+    Uso:
+        presenter.present(scene.dirty_rects)   # en vez de flip()
+        presenter.invalidate()                 # tras pintar toda la pantalla
+
+    Los rectángulos solapados se fusionan antes de llamar a
+    display.update(); si el área resultante supera el umbral (o se pidió
+    un frame completo) se hace flip().
+    """
+
+    def __init__(self, size, threshold=DEFAULT_FULL_THRESHOLD):
+        """
+        Args:
+            size: (ancho, alto) de la pantalla
+            threshold: Fracción del área de pantalla que fuerza flip completo
+        """
+        self.screen_rect = pygame.Rect((0, 0), size)
+        self.threshold = threshold
+        self.full_pending = True  # El primer frame siempre completo
+
+        # Estadísticas
+        self.frames = 0
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.skipped_frames = 0  # Frames sin cambios (ni update ni flip)
+        self.pixels_sent = 0
+
+    def invalidate(self):
+        """Fuerza un flip completo en el siguiente present()"""
+        self.full_pending = True
+
+    @staticmethod
+    def merge(rects):
+        """
+        Fusiona rectángulos que se solapan o se tocan
+
+        Returns:
+            Lista de pygame.Rect sin solapes
+        """
+        merged = []
+        for rect in rects:
+            rect = pygame.Rect(rect)
+            if rect.w <= 0 or rect.h <= 0:
+                continue
+
+            # Absorber los ya fusionados que toque (puede encadenar varios)
+            index = rect.inflate(2, 2).collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.inflate(2, 2).collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def present(self, rects=None):
+        """
+        Presenta el frame
+
+        Args:
+            rects: Rectángulos sucios del frame (None = frame completo)
+        Returns:
+            "full", "partial" o "none"
+        """
+        self.frames += 1
+        screen_area = self.screen_rect.w * self.screen_rect.h
+
+        if rects is not None and not self.full_pending:
+            dirty = [r.clip(self.screen_rect) for r in self.merge(rects)]
+            dirty = [r for r in dirty if r.w > 0 and r.h > 0]
+            area = sum(r.w * r.h for r in dirty)
+
+            if not dirty:
+                self.skipped_frames += 1
+                return "none"
+
+            if area <= screen_area * self.threshold:
+                pygame.display.update(dirty)
+                self.partial_frames += 1
+                self.pixels_sent += area
+                return "partial"
+
+        pygame.display.flip()
+        self.full_pending = False
+        self.full_frames += 1
+        self.pixels_sent += screen_area
+        return "full"
+
+    def stats(self):
+        """Frames completos, parciales y sin cambios, y píxeles medios enviados"""
+        return {
+            "frames": self.frames,
+            "full": self.full_frames,
+            "partial": self.partial_frames,
+            "skipped": self.skipped_frames,
+            "pixels_per_frame": self.pixels_sent / max(1, self.frames),
+        }
@@ -0,0 +1,302 @@
+# scheduler.py
+# Planificador cooperativo de trabajos con presupuesto por frame
+# Reparte tareas pesadas pero divisibles entre frames sin bajar los FPS
+
+import time
+import inspect
+import logger
+from concurrent import futures
+
+# ============================================================================
+# PRIORIDADES
+# ============================================================================
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+# Frames de espera que adelantan un trabajo un nivel de prioridad (envejecimiento)
+AGING_FRAMES = 30
+
+
+class _NextSlice:
+    """Awaitable que cede el control hasta el siguiente hueco de presupuesto"""
+
+    __slots__ = ()
+
+    def __await__(self):
+        yield self
+
+
+_NEXT_SLICE = _NextSlice()
+
+
+def next_slice():
+    """
+    Punto de cesión para trabajos escritos como corrutinas:
+        async def job():
+            ...
+            await next_slice()
+    """
+    return _NEXT_SLICE
+
+
+class _WaitFor:
+    """Awaitable que espera a un concurrent.futures.Future (ver wait_for)"""
+
+    __slots__ = ("future",)
+
+    def __init__(self, future):
+        self.future = future
+
+    def __await__(self):
+        if not self.future.done():
+            yield self.future
+        return self.future.result()
+
+
+def wait_for(future):
+    """
+    Espera a un concurrent.futures.Future (trabajo en un hilo) sin bloquear
+    el frame; devuelve su resultado o lanza su excepción:
+        data = await wait_for(executor.submit(load, path))
+    """
+    return _WaitFor(future)
+
+
+def _is_future(value):
+    """Objeto con done()/result(): concurrent.futures.Future o asyncio.Future"""
+    return callable(getattr(value, "done", None)) and callable(
+        getattr(value, "result", None)
+    )
+
+
+# ============================================================================
+# CLASE JOB: Trabajo en curso
+# ============================================================================
+
+
+class Job:
+    """
+    Trabajo cooperativo: un generador o corrutina que avanza un paso
+    cada vez que el planificador lo reanuda
+
+    Cada paso termina en una cesión: 'yield' / 'await next_slice()' (seguir
+    en el próximo hueco) o un future ('yield future', 'await wait_for(f)' o
+    un asyncio.Future ya creado), que aparca el trabajo hasta que el future
+    acabe. No hay bucle de asyncio: los awaitables que lo necesitan
+    (asyncio.sleep con retardo, streams...) fallan y el trabajo termina
+    con error.
+    """
+
+    __slots__ = (
+        "name",
+        "priority",
+        "step_fn",
+        "submitted_frame",
+        "last_run_frame",
+        "max_wait_frames",
+        "resumes",
+        "busy_time",
+        "done",
+        "result",
+        "error",
+        "waiting",
+    )
+
+    def __init__(self, name, priority, step_fn, frame):
+        self.name = name
+        self.priority = priority
+        self.step_fn = step_fn
+        self.submitted_frame = frame
+        self.last_run_frame = frame
+        self.max_wait_frames = 0
+        self.resumes = 0
+        self.busy_time = 0.0
+        self.done = False
+        self.result = None
+        self.error = None
+        self.waiting = None  # Future por el que está aparcado
+
+    def ready(self):
+        """Indica si se puede reanudar (no espera a ningún future pendiente)"""
+        return self.waiting is None or self.waiting.done()
+
+    def effective_priority(self, frame):
+        """Prioridad con envejecimiento: cuanto más espera, antes se atiende"""
+        waited = frame - self.last_run_frame
+        return self.priority - waited // AGING_FRAMES
+
+
+# ============================================================================
+# CLASE FRAMESCHEDULER
+# ============================================================================
+
+
+class FrameScheduler:
+    """
+    Reanuda trabajos solo mientras el frame actual esté por debajo del presupuesto
+
+    Uso en el bucle principal:
+        scheduler.begin_frame()   # al empezar el frame
+        ...                       # actualizar y dibujar
+        scheduler.run()           # antes de esperar al siguiente frame
+    """
+
+    def __init__(self, budget_ms=14.0):
+        """
+        Args:
+            budget_ms: Milisegundos de frame a partir de los cuales no se
+                reanuda ningún trabajo más
+        """
+        self.budget = budget_ms / 1000.0
+        self.jobs = []
+        self.frame = 0
+        self.frame_start = time.perf_counter()
+
+        # Estadísticas
+        self.completed = 0
+        self.failed = 0
+        self.starved_frames = 0  # Frames con trabajo pendiente y sin hueco
+        self.max_wait_frames = 0  # Mayor espera de un trabajo entre reanudaciones
+
+    def submit(self, job, name=None, priority=PRIORITY_NORMAL):
+        """
+        Añade un trabajo
+
+        Args:
+            job: Generador (cede con 'yield') o corrutina (cede con
+                'await next_slice()'); ver Job para esperar a futures
+            name: Nombre para estadísticas y errores
+            priority: PRIORITY_HIGH, PRIORITY_NORMAL o PRIORITY_LOW
+        Returns:
+            Job (consultar .done, .result y .error)
+        """
+        if not (inspect.isgenerator(job) or inspect.iscoroutine(job)):
+            raise TypeError("El trabajo debe ser un generador o una corrutina")
+
+        if name is None:
+            name = getattr(job, "__name__", "job")
+
+        entry = Job(name, priority, job.send, self.frame)
+        self.jobs.append(entry)
+        return entry
+
+    def begin_frame(self):
+        """Marca el inicio del frame (referencia para el presupuesto)"""
+        self.frame += 1
+        self.frame_start = time.perf_counter()
+
+    def _resume(self, job):
+        """Avanza un paso del trabajo y registra su final o su error"""
+        job.waiting = None
+        try:
+            yielded = job.step_fn(None)
+            if _is_future(yielded):
+                job.waiting = yielded
+            elif yielded is not None and yielded is not _NEXT_SLICE:
+                raise TypeError(
+                    f"Cesión no admitida: {type(yielded).__name__} "
+                    "(usar yield, next_slice() o wait_for())"
+                )
+        except StopIteration as stop:
+            job.done = True
+            job.result = stop.value
+            self.completed += 1
+        except Exception as e:
+            job.done = True
+            job.error = e
+            self.failed += 1
+            logger.error("SCHEDULER", "Error en trabajo '%s': %s", job.name, e)
+        job.resumes += 1
+
+    def remaining(self):
+        """Segundos de presupuesto que le quedan al frame actual"""
+        return self.budget - (time.perf_counter() - self.frame_start)
+
+    def run(self):
+        """
+        Reanuda trabajos por orden de prioridad hasta agotar el presupuesto
+
+        Returns:
+            Número de pasos ejecutados en este frame
+        """
+        ready = []
+        for job in self.jobs:
+            if job.ready():
+                ready.append(job)
+            else:
+                # Aparcado: esperar al future no cuenta como falta de hueco
+                job.last_run_frame = self.frame
+        if not ready:
+            return 0
+
+        deadline = self.frame_start + self.budget
+        steps = 0
+        now = time.perf_counter()
+
+        while ready and now < deadline:
+            frame = self.frame
+            job = min(ready, key=lambda j: j.effective_priority(frame))
+
+            waited = frame - job.last_run_frame
+            if waited > job.max_wait_frames:
+                job.max_wait_frames = waited
+                if waited > self.max_wait_frames:
+                    self.max_wait_frames = waited
+
+            self._resume(job)
+
+            after = time.perf_counter()
+            job.busy_time += after - now
+            job.last_run_frame = frame
+            now = after
+            steps += 1
+
+            if job.done:
+                self.jobs.remove(job)
+            if not job.ready() or job.done:
+                ready.remove(job)
+
+        if steps == 0:
+            self.starved_frames += 1
+
+        return steps
+
+    def run_to_completion(self, job):
+        """
+        Ejecuta un trabajo entero de golpe (sin presupuesto)
+        Útil en arranque o cuando su resultado se necesita ya
+        """
+        while not job.done:
+            waiting = job.waiting
+            if waiting is not None and not waiting.done():
+                # Aquí sí se bloquea: el resultado se necesita ya
+                if not isinstance(waiting, futures.Future):
+                    raise RuntimeError(
+                        f"El trabajo '{job.name}' espera a un future que solo "
+                        "puede completar un bucle de asyncio"
+                    )
+                futures.wait((waiting,))
+            self._resume(job)
+
+        if job in self.jobs:
+            self.jobs.remove(job)
+        return job.result
+
+    def stats(self):
+        """
+        Estadísticas del planificador
+
+        Returns:
+            Diccionario con pendientes, completados, fallidos y hambruna
+        """
+        return {
+            "pending": len(self.jobs),
+            "completed": self.completed,
+            "failed": self.failed,
+            "starved_frames": self.starved_frames,
+            "max_wait_frames": self.max_wait_frames,
+            "waiting": {
+                job.name: self.frame - job.last_run_frame for job in self.jobs
+            },
+        }
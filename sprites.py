@@ -0,0 +1,582 @@
+# sprites.py
+# Preparación de sprites para blit rápido
+# Premultiplica alpha, convierte al formato de pantalla y vigila conversiones por frame
+
+import os
+import sys
+import bisect
+import pygame
+import logger
+from collections import OrderedDict
+
+# Numpy solo como respaldo para premultiplicar en pygame antiguos
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# ============================================================================
+# CONFIGURACIÓN DE DEPURACIÓN
+# ============================================================================
+
+# En desarrollo se auditan los blits por defecto; en el .exe solo si se pide
+# explícitamente con METALWAR_DEBUG=1
+_DEFAULT_DEBUG = "0" if hasattr(sys, "_MEIPASS") else "1"
+DEBUG_BLITS = os.environ.get("METALWAR_DEBUG", _DEFAULT_DEBUG) == "1"
+
+# Etiquetas ya avisadas (un aviso por sitio de blit, no uno por frame)
+_warned_tags = set()
+
+
+# ============================================================================
+# PREPARACIÓN DE SUPERFICIES
+# ============================================================================
+
+
+def display_ready():
+    """Indica si hay modo de vídeo activo (necesario para convert/convert_alpha)"""
+    return pygame.display.get_init() and pygame.display.get_surface() is not None
+
+
+def prepare_surface(surface):
+    """
+    Convierte una superficie opaca al formato de la pantalla
+    Args:
+        surface: Superficie sin canal alpha por píxel
+    Returns:
+        Superficie en formato de pantalla (o la original si no hay pantalla)
+    """
+    if not display_ready():
+        return surface
+    return surface.convert()
+
+
+def premultiply(surface):
+    """
+    Devuelve una copia con el color multiplicado por su alpha
+    Args:
+        surface: Superficie SRCALPHA
+    Returns:
+        Superficie premultiplicada
+    """
+    if hasattr(surface, "premul_alpha"):
+        return surface.premul_alpha()
+
+    # Respaldo para pygame < 2.1.4
+    result = surface.copy()
+    if NUMPY_AVAILABLE:
+        rgb = pygame.surfarray.pixels3d(result)
+        alpha = pygame.surfarray.pixels_alpha(result)
+        rgb[...] = (rgb.astype(np.uint16) * alpha[..., None] // 255).astype(np.uint8)
+        del rgb, alpha
+    return result
+
+
+def prepare_sprite(surface, premultiplied=False):
+    """
+    Prepara un sprite con alpha para el bucle de render
+    Args:
+        surface: Superficie SRCALPHA
+        premultiplied: True para sprites que se mezclan de forma aditiva
+            (BLEND_RGB_ADD) o con BLEND_PREMULTIPLIED
+    Returns:
+        Sprite en formato de pantalla, premultiplicado si se pidió
+    """
+    if display_ready():
+        surface = surface.convert_alpha()
+    if premultiplied:
+        surface = premultiply(surface)
+    return surface
+
+
+def fade_additive(surface, alpha):
+    """
+    Atenúa un sprite premultiplicado escalando su color (in-place)
+    Los blits con BLEND_ADD ignoran set_alpha(), así que el fundido
+    de un sprite aditivo tiene que ir en el propio color
+    Args:
+        surface: Superficie premultiplicada (normalmente una copia temporal)
+        alpha: Opacidad 0-255
+    Returns:
+        La misma superficie
+    """
+    alpha = max(0, min(255, int(alpha)))
+    if alpha < 255:
+        surface.fill((alpha, alpha, alpha, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+    return surface
+
+
+# ============================================================================
+# ACCESO A PÍXELES (requiere NumPy)
+# ============================================================================
+
+
+def pixel_rows(surface):
+    """
+    Píxeles de la superficie como array (alto, ancho, bytes por píxel)
+    sobre su propio buffer (mientras exista, la superficie queda bloqueada)
+    """
+    width, height = surface.get_size()
+    bpp = surface.get_bytesize()
+    rows = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+    rows = rows.reshape(height, surface.get_pitch())[:, : width * bpp]
+    return rows.reshape(height, width, bpp)
+
+
+def byte_order(surface):
+    """
+    Posición de cada canal dentro del píxel
+
+    Returns:
+        {"R": i, "G": i, "B": i, "A": i o None}
+    """
+    bpp = surface.get_bytesize()
+    little = sys.byteorder == "little"
+    order = {"A": None}
+    for name, mask in zip("RGBA", surface.get_masks()):
+        for byte in range(bpp):
+            shift = 8 * byte if little else 8 * (bpp - 1 - byte)
+            if mask == 0xFF << shift:
+                order[name] = byte
+    return order
+
+
+# ============================================================================
+# AUDITORÍA DE BLITS (solo depuración)
+# ============================================================================
+
+
+def same_format(dest, src):
+    """Comprueba si un blit de src sobre dest puede ir sin conversión de formato"""
+    return (
+        src.get_bitsize() == dest.get_bitsize()
+        and src.get_masks()[:3] == dest.get_masks()[:3]
+    )
+
+
+def audit_blit(dest, src, tag):
+    """
+    Avisa (una vez por etiqueta) si un blit del bucle principal
+    obliga a SDL a convertir el formato de píxel en cada frame
+    Args:
+        dest: Superficie destino
+        src: Superficie origen
+        tag: Nombre del sitio de blit para el aviso
+    """
+    if not DEBUG_BLITS or tag in _warned_tags:
+        return
+    if not same_format(dest, src):
+        _warned_tags.add(tag)
+        logger.warning(
+            "SPRITES",
+            "Blit con conversión de formato en '%s': %sbpp %s -> %sbpp %s",
+            tag,
+            src.get_bitsize(),
+            src.get_masks(),
+            dest.get_bitsize(),
+            dest.get_masks(),
+        )
+
+
+# ============================================================================
+# ATLAS DE SPRITES
+# ============================================================================
+
+
+class SpriteAtlas:
+    """
+    Empaqueta sprites pequeños en pocas superficies grandes (páginas)
+
+    Empaquetado por estanterías: cada sprite se coloca a la derecha del
+    anterior y, si no cabe, se abre una fila nueva debajo; si la página
+    está llena, se crea otra. Los sprites se añaden bajo demanda con
+    get_or_add(), así que las variantes (color, alpha, tamaño) solo se
+    renderizan la primera vez que se usan.
+
+    Como todos los sprites de una página comparten superficie, set_alpha()
+    no sirve por sprite: la opacidad de cada variante va horneada en sus
+    píxeles (ver bake_alpha).
+    """
+
+    def __init__(self, page_size=(1024, 1024), padding=1):
+        """
+        Args:
+            page_size: Tamaño de cada página del atlas
+            padding: Píxeles libres entre sprites (evita sangrado al escalar)
+        """
+        self.page_w, self.page_h = page_size
+        self.padding = padding
+        self.pages = []
+        self.regions = {}  # clave -> (página, Rect)
+
+        # Estantería abierta en la última página
+        self._shelf_x = 0
+        self._shelf_y = 0
+        self._shelf_h = 0
+
+    def __contains__(self, key):
+        return key in self.regions
+
+    def __len__(self):
+        return len(self.regions)
+
+    def _new_page(self):
+        page = pygame.Surface((self.page_w, self.page_h), pygame.SRCALPHA)
+        page = prepare_sprite(page)
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self._shelf_x = self._shelf_y = self._shelf_h = 0
+        return page
+
+    def _place(self, w, h):
+        """Busca hueco para un sprite de w x h; devuelve (página, x, y)"""
+        pad = self.padding
+        if w + pad > self.page_w or h + pad > self.page_h:
+            raise ValueError(f"Sprite de {w}x{h} no cabe en una página del atlas")
+
+        if not self.pages:
+            self._new_page()
+
+        # Nueva estantería si no cabe a lo ancho
+        if self._shelf_x + w + pad > self.page_w:
+            self._shelf_y += self._shelf_h
+            self._shelf_x = 0
+            self._shelf_h = 0
+
+        # Nueva página si no cabe a lo alto
+        if self._shelf_y + h + pad > self.page_h:
+            self._new_page()
+
+        x, y = self._shelf_x, self._shelf_y
+        self._shelf_x += w + pad
+        self._shelf_h = max(self._shelf_h, h + pad)
+        return self.pages[-1], x, y
+
+    def add(self, key, surface):
+        """
+        Copia un sprite al atlas
+
+        Args:
+            key: Clave hashable del sprite
+            surface: Sprite (con o sin alpha; se copia tal cual)
+        Returns:
+            (página, Rect) de la región ocupada
+        """
+        region = self.regions.get(key)
+        if region is not None:
+            return region
+
+        w, h = surface.get_size()
+        page, x, y = self._place(w, h)
+
+        # Colorkey o superficie opaca -> alpha por píxel antes de copiar
+        if not surface.get_flags() & pygame.SRCALPHA and display_ready():
+            surface = surface.convert_alpha()
+
+        # MAX sobre una zona a cero copia color y alpha exactos (sin mezclar)
+        page.blit(surface, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+
+        region = (page, pygame.Rect(x, y, w, h))
+        self.regions[key] = region
+        return region
+
+    def get(self, key):
+        """Región (página, Rect) de un sprite o None si no está"""
+        return self.regions.get(key)
+
+    def get_or_add(self, key, factory):
+        """
+        Región de un sprite, creándolo con factory() si aún no existe
+
+        Args:
+            key: Clave del sprite
+            factory: Función sin argumentos que devuelve la superficie
+        """
+        region = self.regions.get(key)
+        if region is None:
+            region = self.add(key, factory())
+        return region
+
+    def stats(self):
+        """Páginas y sprites empaquetados"""
+        return {"pages": len(self.pages), "sprites": len(self.regions)}
+
+
+def bake_alpha(surface, alpha):
+    """
+    Copia de un sprite con la opacidad multiplicada en sus píxeles
+    (equivale a set_alpha(alpha), pero sirve dentro de un atlas)
+
+    Args:
+        surface: Sprite SRCALPHA
+        alpha: Opacidad 0-255
+    """
+    result = surface.convert_alpha() if display_ready() else surface.copy()
+    alpha = max(0, min(255, int(alpha)))
+    if alpha < 255:
+        result.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
+    return result
+
+
+def quantize(value, step):
+    """Redondea value al múltiplo de step más cercano (claves de variantes)"""
+    return int(value / step + 0.5) * step
+
+
+def quantize_array(values, step):
+    """quantize() para un array de NumPy de valores no negativos"""
+    return (values / step + 0.5).astype(np.int64) * step
+
+
+# ============================================================================
+# LOTES DE BLITS
+# ============================================================================
+
+
+class SpriteBatch:
+    """
+    Acumula blits de un atlas y los envía con Surface.blits()
+
+    Los sprites se agrupan en tramos consecutivos de la misma página: cada
+    tramo es una llamada a blits() y el orden de dibujado es el de envío
+    (una sombra encolada antes que su glifo queda debajo aunque estén en
+    páginas distintas).
+
+    Uso:
+        batch.draw(page, rect, (x, y))   # tantas veces como sprites
+        batch.flush(surface)             # una llamada a blits() por tramo
+    """
+
+    def __init__(self):
+        self.runs = []  # Tramos [página, lista de (página, destino, área[, flags])]
+        self.submitted = 0  # Sprites enviados en el último flush
+        self.calls = 0  # Llamadas a blits() en el último flush
+
+    def draw(self, page, rect, dest, special_flags=0):
+        """
+        Encola un sprite
+
+        Args:
+            page: Página del atlas (devuelta por SpriteAtlas.get/add)
+            rect: Región del sprite dentro de la página
+            dest: Posición (x, y) en el destino
+            special_flags: Modo de mezcla (BLEND_*) de este sprite
+        """
+        runs = self.runs
+        if not runs or runs[-1][0] is not page:
+            runs.append((page, []))
+        if special_flags:
+            runs[-1][1].append((page, dest, rect, special_flags))
+        else:
+            runs[-1][1].append((page, dest, rect))
+
+    def draw_region(self, region, dest, special_flags=0):
+        """Encola un sprite a partir de la tupla (página, Rect) del atlas"""
+        self.draw(region[0], region[1], dest, special_flags)
+
+    def flush(self, target):
+        """
+        Dibuja todo lo encolado sobre target y vacía el lote
+
+        Returns:
+            Número de sprites dibujados
+        """
+        self.submitted = 0
+        self.calls = len(self.runs)
+        for _, queue in self.runs:
+            target.blits(queue, doreturn=False)
+            self.submitted += len(queue)
+        # Sin referencias a las páginas: un atlas descartado se libera
+        self.runs.clear()
+        return self.submitted
+
+
+# ============================================================================
+# CACHÉ DE SPRITES
+# ============================================================================
+
+
+class SpriteCache:
+    """
+    Variantes de sprites generadas bajo demanda, con tope de memoria
+
+    Caché LRU acotada en número de sprites, en píxeles o en ambos: al añadir
+    una variante que no cabe se descartan las usadas hace más tiempo, así que
+    las que siguen en uso se quedan. Cuenta aciertos, fallos y descartes.
+
+    Uso:
+        sprite = cache.get(key)
+        if sprite is None:
+            sprite = cache.add(key, render(key))
+    """
+
+    def __init__(self, max_sprites=None, max_pixels=None):
+        """
+        Args:
+            max_sprites: Máximo de variantes guardadas (None = sin tope)
+            max_pixels: Máximo de píxeles entre todas (None = sin tope)
+        """
+        self.max_sprites = max_sprites
+        self.max_pixels = max_pixels
+        self.sprites = OrderedDict()  # clave -> sprite, de menos a más reciente
+        self.pixels = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, key):
+        """Sprite de una clave (lo marca como recién usado) o None si no está"""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            self.misses += 1
+            return None
+        self.sprites.move_to_end(key)
+        self.hits += 1
+        return sprite
+
+    def add(self, key, sprite):
+        """Guarda un sprite, descartando los menos usados si no cabe; lo devuelve"""
+        area = sprite.get_width() * sprite.get_height()
+        sprites = self.sprites
+        while sprites and (
+            (self.max_sprites is not None and len(sprites) >= self.max_sprites)
+            or (self.max_pixels is not None and self.pixels + area > self.max_pixels)
+        ):
+            _, old = sprites.popitem(last=False)
+            self.pixels -= old.get_width() * old.get_height()
+            self.evictions += 1
+        sprites[key] = sprite
+        self.pixels += area
+        return sprite
+
+    def clear(self):
+        """Descarta todas las variantes (los contadores se conservan)"""
+        self.sprites.clear()
+        self.pixels = 0
+
+    def stats(self):
+        """Variantes, píxeles, aciertos, fallos y descartes"""
+        return {
+            "sprites": len(self.sprites),
+            "pixels": self.pixels,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+# ============================================================================
+# CADENAS DE TAMAÑOS (MIP)
+# ============================================================================
+
+
+def mip_sizes(smallest, largest, step=None, ratio=None):
+    """
+    Anchos de una cadena de tamaños entre smallest y largest (incluidos)
+
+    Args:
+        step: Incremento fijo en píxeles
+        ratio: Incremento geométrico (p. ej. 1.06 = cada nivel un 6% mayor)
+    """
+    sizes = [int(smallest)]
+    while sizes[-1] < largest:
+        if step is not None:
+            following = sizes[-1] + step
+        else:
+            following = max(sizes[-1] + 1, int(sizes[-1] * ratio + 0.5))
+        sizes.append(min(int(largest), following))
+    return sizes
+
+
+class MipChain:
+    """
+    Un sprite pre-escalado a una lista de anchos (alto proporcional)
+
+    Los niveles se generan una sola vez; get() devuelve el de ancho más
+    cercano al pedido, así que dibujar el sprite a cualquier tamaño es un
+    blit sin reescalar en el frame.
+
+    Con deferred=True los niveles no se generan al crear la cadena sino
+    paso a paso con build_steps() (un trabajo de FrameScheduler); mientras
+    tanto get() devuelve el nivel ya generado más cercano.
+    """
+
+    def __init__(self, surface, sizes, smooth=False, deferred=False):
+        """
+        Args:
+            surface: Sprite original (ya preparado: formato, premultiplicado)
+            sizes: Anchos de los niveles
+            smooth: smoothscale en lugar de vecino más próximo
+            deferred: No generar los niveles hasta recorrer build_steps()
+        """
+        self.surface = surface
+        self.smooth = smooth
+        self.sizes = sorted({int(size) for size in sizes if size >= 1})
+        self.levels = [None] * len(self.sizes)
+        self.built = []  # Índices de los niveles generados (ordenados)
+        if not deferred:
+            for _ in self.build_steps():
+                pass
+
+    def _build(self, index):
+        """Genera el nivel index"""
+        surface = self.surface
+        src_w, src_h = surface.get_size()
+        width = self.sizes[index]
+        height = max(1, int(width * src_h / src_w + 0.5))
+        if (width, height) != (src_w, src_h):
+            scale = (
+                pygame.transform.smoothscale if self.smooth else pygame.transform.scale
+            )
+            surface = scale(surface, (width, height))
+        self.levels[index] = surface
+        bisect.insort(self.built, index)
+        return surface
+
+    def build_steps(self):
+        """Generador que crea un nivel por paso (para FrameScheduler.submit)"""
+        for index in range(len(self.sizes)):
+            if self.levels[index] is None:
+                self._build(index)
+                yield
+
+    def index(self, width):
+        """Índice del nivel de ancho más cercano a width"""
+        i = bisect.bisect_left(self.sizes, width)
+        if i == len(self.sizes):
+            return i - 1
+        if i > 0 and width - self.sizes[i - 1] <= self.sizes[i] - width:
+            return i - 1
+        return i
+
+    def get(self, width):
+        """Nivel de ancho más cercano a width (entre los ya generados)"""
+        index = self.index(width)
+        level = self.levels[index]
+        if level is not None:
+            return level
+
+        built = self.built
+        if not built:
+            # Nada generado todavía: solo este nivel, ahora
+            return self._build(index)
+        i = bisect.bisect_left(built, index)
+        if i == len(built):
+            return self.levels[built[-1]]
+        if i > 0 and index - built[i - 1] <= built[i] - index:
+            return self.levels[built[i - 1]]
+        return self.levels[built[i]]
+
+    def stats(self):
+        """Niveles y píxeles guardados"""
+        return {
+            "levels": len(self.built),
+            "pixels": sum(
+                w * h for w, h in (self.levels[i].get_size() for i in self.built)
+            ),
+        }
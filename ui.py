@@ -10,7 +10,22 @@ import os
 import threading
 import config
 from config import GAME_CONFIG
-from utils import resource_path, draw_circle_alpha, clamp_val, safe_color
+from utils import resource_path, clamp_val, safe_color
+from sprites import (
+    prepare_sprite,
+    premultiply,
+    fade_additive,
+    SpriteAtlas,
+    SpriteBatch,
+    bake_alpha,
+)
+from perf import FrameTimeRing
+from particles import ParticlePool, ParticleSprites
+
+# Pasos de cuantización de las variantes de sprites guardadas en atlas
+C64_HUE_STEPS = 32  # Tonos del arcoíris del scroller por vuelta completa
+TRAIL_ALPHA_STEP = 8  # Opacidad de los puntos de la estela del cursor
+SPAIN_PARTICLES = 1024  # Capacidad del pool de partículas de SpainText
 
 # ============================================================================
 # CLASE LOGOMETALWAR: Logo animado con efectos especiales
@@ -169,6 +184,7 @@ class LogoMetalWAR:
 
         # Aplicar logo texturizado sobre el glow
         self.final_surface.blit(textured_logo, (padding, padding))
+        self.final_surface = prepare_sprite(self.final_surface)
 
         # Dimensiones finales
         self.final_width, self.final_height = self.final_surface.get_size()
@@ -179,21 +195,22 @@ class LogoMetalWAR:
 
     def start_animation(self):
         """Inicia la animación del logo"""
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.animation_started = True
 
-    def draw(self, surface, intensity):
+    def draw(self, surface, ctx):
         """
         Dibuja el logo con animación
 
         Args:
             surface: Superficie donde dibujar
-            intensity: Intensidad del efecto (para animación en esquina)
+            ctx: FrameContext del frame actual (reloj e intensidad para la esquina)
         """
         if not self.animation_started or self.start_time is None:
             return
 
-        current_time = time.time() - self.start_time
+        intensity = ctx.intensity
+        current_time = ctx.time - self.start_time
 
         # ====================================================================
         # TIEMPOS DE SINCRONIZACIÓN (Ajustados a la voz de intro)
@@ -282,17 +299,17 @@ class LogoMetalWAR:
             )
 
             # Efecto de brillo pasando (shine effect)
-            shine_x = ((time.time() * 2.0) % 3.0 * render_width * 2) - render_width
+            shine_x = ((ctx.time * 2.0) % 3.0 * render_width * 2) - render_width
 
             if shine_x < render_width + 50 and current_time > 1.0:
                 shine_surf = pygame.Surface(
                     (render_width, render_height), pygame.SRCALPHA
                 )
 
-                # Línea diagonal brillante
+                # Línea diagonal brillante (color premultiplicado: blanco al 16%)
                 pygame.draw.line(
                     shine_surf,
-                    (255, 255, 255, 40),
+                    (40, 40, 40, 40),
                     (int(shine_x), 0),
                     (int(shine_x + render_width * 0.4), render_height),
                     int(render_width * 0.2),
@@ -327,6 +344,8 @@ class AvatarSystem:
         # Superficie base del avatar
         self.avatar_base = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
         self.load_avatar_base()
+        # Premultiplicado: el recuadro se compone y mezcla con BLEND_PREMULTIPLIED
+        self.avatar_base = prepare_sprite(self.avatar_base, premultiplied=True)
 
         # Estado de visualización
         self.visible = False
@@ -442,6 +461,7 @@ class AvatarSystem:
         # SISTEMA DE CACHÉ PARA OPTIMIZACIÓN
         # ====================================================================
         self.cached_text_surf = None  # Superficie renderizada en caché
+        self.name_label = None  # Nombre con contorno (premultiplicado)
         self.last_rendered_text = None  # Último texto renderizado
         self.last_rendered_history_len = 0  # Última longitud de historial
 
@@ -663,6 +683,22 @@ class AvatarSystem:
         pygame.draw.line(self.avatar_base, (255, 255, 255), (48, 28), (46, 24), 2)
         pygame.draw.line(self.avatar_base, (255, 255, 255), (64, 28), (66, 24), 2)
 
+    def _render_name_label(self):
+        """Nombre del avatar con contorno negro, premultiplicado"""
+        name_font = pygame.font.SysFont("arial", 12, bold=True)
+        name_text = "GERMIN-IA"
+        name_main = name_font.render(name_text, True, (255, 0, 200))
+        name_shadow = name_font.render(name_text, True, (0, 0, 0))
+
+        # Margen de 1 px para el contorno
+        label = pygame.Surface(
+            (name_main.get_width() + 2, name_main.get_height() + 2), pygame.SRCALPHA
+        )
+        for offset_x, offset_y in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            label.blit(name_shadow, (1 + offset_x, 1 + offset_y))
+        label.blit(name_main, (1, 1))
+        return prepare_sprite(label, premultiplied=True)
+
     def _render_text_block(self, max_width):
         """
         Método interno para generar la imagen del texto con caché
@@ -800,36 +836,31 @@ class AvatarSystem:
         avatar_x = 10
         avatar_y = (total_height - self.size) // 2
 
+        # Todo lo que lleva alpha por píxel entra premultiplicado y con
+        # BLEND_PREMULTIPLIED; las primitivas opacas valen tal cual
+
         # ====================================================================
         # NOMBRE DEL AVATAR CON OUTLINE
         # ====================================================================
-        name_font = pygame.font.SysFont("arial", 12, bold=True)
-        name_text = "GERMIN-IA"
-        name_pos = (avatar_x + (self.size // 2), avatar_y - 16)
-
-        # Outline del nombre
-        outline_offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-        for offset_x, offset_y in outline_offsets:
-            name_shadow = name_font.render(name_text, True, (0, 0, 0))
-            box_surface.blit(
-                name_shadow,
-                (
-                    name_pos[0] - name_shadow.get_width() // 2 + offset_x,
-                    name_pos[1] + offset_y,
-                ),
-            )
-
-        # Nombre principal
-        name_main = name_font.render(name_text, True, (255, 0, 200))
+        if self.name_label is None:
+            self.name_label = self._render_name_label()
         box_surface.blit(
-            name_main, (name_pos[0] - name_main.get_width() // 2, name_pos[1])
+            self.name_label,
+            (
+                avatar_x + (self.size // 2) - self.name_label.get_width() // 2,
+                avatar_y - 17,
+            ),
+            special_flags=pygame.BLEND_PREMULTIPLIED,
         )
 
         # ====================================================================
         # DIBUJAR AVATAR
         # ====================================================================
-        box_surface.blit(self.avatar_base, (avatar_x, avatar_y))
+        box_surface.blit(
+            self.avatar_base,
+            (avatar_x, avatar_y),
+            special_flags=pygame.BLEND_PREMULTIPLIED,
+        )
 
         # ====================================================================
         # BARRAS DE VOZ ANIMADAS
@@ -879,9 +910,13 @@ class AvatarSystem:
 
         # Generar o usar caché
         if self.cached_text_surf is None:
-            self.cached_text_surf = self._render_text_block(max_width)
+            self.cached_text_surf = premultiply(self._render_text_block(max_width))
 
-        box_surface.blit(self.cached_text_surf, (text_start_x, text_start_y))
+        box_surface.blit(
+            self.cached_text_surf,
+            (text_start_x, text_start_y),
+            special_flags=pygame.BLEND_PREMULTIPLIED,
+        )
 
         # ====================================================================
         # LÍNEA CONECTORA (avatar -> texto)
@@ -904,8 +939,11 @@ class AvatarSystem:
         # ====================================================================
         # APLICAR FADE Y DIBUJAR
         # ====================================================================
-        box_surface.set_alpha(self.fade_alpha)
-        surface.blit(box_surface, (x - 10, y - 10))
+        # set_alpha no afecta a BLEND_PREMULTIPLIED: fundido en el color
+        fade_additive(box_surface, self.fade_alpha)
+        surface.blit(
+            box_surface, (x - 10, y - 10), special_flags=pygame.BLEND_PREMULTIPLIED
+        )
 
 
 # ============================================================================
@@ -945,7 +983,7 @@ class C64Scroller:
         # Estado de animación
         self.x_pos = float(width)  # Posición X inicial (fuera de pantalla derecha)
         self.visible = False  # Control de visibilidad
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
 
         # Efecto de scanlines
         self.scanlines = pygame.Surface((width, 100), pygame.SRCALPHA)
@@ -958,15 +996,53 @@ class C64Scroller:
         # Progreso de animación de entrada
         self.anim_progress = 0.0
 
-    def draw(self, surface):
+        # Caracteres (sombra, tono del arcoíris y reflejo) en atlas, dibujados
+        # en lote; cada variante se renderiza la primera vez que aparece
+        self.atlas = SpriteAtlas()
+        self.batch = SpriteBatch()
+
+    def _glyph(self, char, hue_index):
+        """Regiones del atlas (carácter, reflejo) para un tono del arcoíris"""
+        key = (char, hue_index)
+        region = self.atlas.get(key)
+        if region is None:
+            phase = hue_index * (2 * math.pi / C64_HUE_STEPS)
+            color = (
+                clamp_val(150 + 105 * math.sin(phase)),
+                clamp_val(150 + 105 * math.sin(phase + 2)),
+                clamp_val(150 + 105 * math.sin(phase + 4)),
+            )
+            char_surface = self.font.render(char, False, color)
+            region = self.atlas.add(key, char_surface)
+
+            # Reflexión (debajo, escalada verticalmente)
+            reflection = pygame.transform.flip(char_surface, False, True)
+            reflection = pygame.transform.scale(
+                reflection,
+                (char_surface.get_width(), int(char_surface.get_height() * 0.6)),
+            )
+            self.atlas.add(key + ("reflection",), bake_alpha(reflection, 90))
+
+        return region, self.atlas.get(key + ("reflection",))
+
+    def _shadow(self, char):
+        """Región del atlas con la sombra negra de un carácter"""
+        key = (char, "shadow")
+        region = self.atlas.get(key)
+        if region is None:
+            region = self.atlas.add(key, self.font.render(char, False, (0, 0, 0)))
+        return region
+
+    def draw(self, surface, ctx):
         """
         Dibuja el scroller
 
         Args:
             surface: Superficie donde dibujar
+            ctx: FrameContext del frame actual
         """
         # Activar después de 10 segundos
-        if not self.visible and time.time() - self.start_time > 10:
+        if not self.visible and ctx.time - self.start_time > 10:
             self.visible = True
 
         if not self.visible:
@@ -1004,50 +1080,35 @@ class C64Scroller:
             if self.x_pos < -sum(self.char_widths):
                 self.x_pos = float(self.w)
 
-            current_time = time.time()
+            current_time = ctx.time
             current_x = self.x_pos
+            hue_scale = C64_HUE_STEPS / (2 * math.pi)
+            batch = self.batch
 
             # Dibujar cada carácter
             for i, char in enumerate(self.message):
                 # Solo dibujar si está en o cerca de la pantalla
                 if -50 < current_x < self.w + 50:
-                    # Color arcoíris animado
-                    color = (
-                        clamp_val(150 + 105 * math.sin(current_time * 3 + i * 0.2)),
-                        clamp_val(150 + 105 * math.sin(current_time * 3 + i * 0.2 + 2)),
-                        clamp_val(150 + 105 * math.sin(current_time * 3 + i * 0.2 + 4)),
+                    # Color arcoíris animado (tono cuantizado para el atlas)
+                    hue_index = (
+                        int((current_time * 3 + i * 0.2) * hue_scale + 0.5)
+                        % C64_HUE_STEPS
                     )
+                    glyph, reflection = self._glyph(char, hue_index)
 
                     # Efecto de onda vertical
                     y_pos = 55 + math.sin(current_time * 4 + i * 0.15) * 12
 
-                    # Renderizar carácter
-                    char_surface = self.font.render(char, False, color)
-
-                    # Sombra
-                    surface.blit(
-                        self.font.render(char, False, (0, 0, 0)),
-                        (current_x + 2, y_pos + 2),
-                    )
-
-                    # Carácter principal
-                    surface.blit(char_surface, (current_x, y_pos))
-
-                    # Reflexión (debajo, escalada verticalmente)
-                    reflection = pygame.transform.flip(char_surface, False, True)
-                    reflection = pygame.transform.scale(
-                        reflection,
-                        (
-                            char_surface.get_width(),
-                            int(char_surface.get_height() * 0.6),
-                        ),
-                    )
-                    reflection.set_alpha(90)
-                    surface.blit(reflection, (current_x, y_pos + 35))
+                    # Sombra, carácter principal y reflexión
+                    batch.draw_region(self._shadow(char), (current_x + 2, y_pos + 2))
+                    batch.draw_region(glyph, (current_x, y_pos))
+                    batch.draw_region(reflection, (current_x, y_pos + 35))
 
                 # Avanzar posición X
                 current_x += self.char_widths[i]
 
+            batch.flush(surface)
+
         # Aplicar scanlines
         surface.blit(self.scanlines, (0, 30))
 
@@ -1075,8 +1136,11 @@ class SpainText:
         """
         self.w, self.h = width, height
 
-        # Sistema de partículas
-        self.particles = []
+        # Sistema de partículas (pool de capacidad fija; ver set_particle_limit)
+        self.particles = ParticlePool(
+            SPAIN_PARTICLES, ("x", "y", "vx", "vy", "size", "life", "r", "g", "b")
+        )
+        self.particle_sprites = ParticleSprites(color_step=1)
 
         # ====================================================================
         # CARGAR CONFIGURACIONES DESDE CONFIG.PY
@@ -1272,28 +1336,24 @@ class SpainText:
             # Seleccionar color aleatorio de la lista del config
             color = random.choice(particle_colors)
 
-            self.particles.append(
-                {
-                    "x": center_x + particle_x,
-                    "y": top_y + particle_y,
-                    "vx": random.uniform(-1, 1),  # Velocidad X
-                    "vy": random.uniform(-2, -5)
-                    - (kick * 2),  # Velocidad Y (hacia arriba)
-                    "size": random.uniform(3, 8),  # Tamaño inicial
-                    "life": 1.0,  # Vida (1.0-0.0)
-                    "color": color,
-                }
+            self.particles.spawn(
+                x=center_x + particle_x,
+                y=top_y + particle_y,
+                vx=random.uniform(-1, 1),  # Velocidad X
+                vy=random.uniform(-2, -5) - (kick * 2),  # Velocidad Y (hacia arriba)
+                size=random.uniform(3, 8),  # Tamaño inicial
+                life=1.0,  # Vida (1.0-0.0)
+                r=color[0],
+                g=color[1],
+                b=color[2],
             )
 
-        # Actualizar partículas existentes
-        for particle in self.particles:
-            particle["x"] += particle["vx"]
-            particle["y"] += particle["vy"]
-            particle["size"] *= 0.94  # Reducir tamaño
-            particle["life"] -= 0.025  # Reducir vida
+        # Mover, reducir tamaño y vida, y eliminar las partículas muertas
+        self.particles.update(0.025, shrink=0.94)
 
-        # Eliminar partículas muertas
-        self.particles = [p for p in self.particles if p["life"] > 0]
+    def set_particle_limit(self, limit):
+        """Tope de partículas (preset de calidad; None = capacidad del pool)"""
+        self.particles.set_limit(limit)
 
     def draw(self, surface, time_val, intensity, kick):
         """
@@ -1403,14 +1463,22 @@ class SpainText:
         if alpha > 200:
             self._update_particles(intensity, kick, center_x, center_y, scale_main_x)
 
-            for particle in self.particles:
-                particle_color = particle["color"] + (int(particle["life"] * 255),)
-                draw_circle_alpha(
-                    surface,
-                    particle_color,
-                    (particle["x"], particle["y"]),
-                    particle["size"],
-                )
+            particles = self.particles
+            life = particles.column("life")
+            if particles.vectorized:
+                alphas = (life * 255).astype(int)
+            else:
+                alphas = [int(v * 255) for v in life]
+
+            self.particle_sprites.draw(
+                surface,
+                particles.column("x"),
+                particles.column("y"),
+                particles.column("size"),
+                (particles.column("r"), particles.column("g"), particles.column("b")),
+                alphas,
+                pygame.BLEND_ALPHA_SDL2,
+            )
 
 
 # ============================================================================
@@ -1426,12 +1494,16 @@ class CyberCursor:
 
     def __init__(self):
         """Inicializa el cursor personalizado"""
-        self.trail = []  # Estela de posiciones anteriores
         self.max_trail = 16  # Máximo de puntos en la estela
+        # Estela de posiciones anteriores (en orden: se dibuja como polilínea)
+        self.trail = ParticlePool(self.max_trail, ("x", "y", "life"), ordered=True)
         self.size = 50  # Tamaño del cursor
         self.angle = 0  # Ángulo para rotación
         self.hovering = False  # Estado de hover sobre elemento clickeable
 
+        # Puntos de la estela pre-renderizados (color, radio, opacidad)
+        self.trail_sprites = ParticleSprites(color_step=1, alpha_step=TRAIL_ALPHA_STEP)
+
     def update(self, mouse_x, mouse_y, is_hovering):
         """
         Actualiza estado del cursor
@@ -1446,19 +1518,11 @@ class CyberCursor:
         rotation_speed = 10 if self.hovering else 2
         self.angle = (self.angle + rotation_speed) % 360
 
-        # Añadir posición actual a la estela
-        self.trail.append({"pos": (mouse_x, mouse_y), "life": 1.0})
+        # Añadir posición actual a la estela (llena: sale la más antigua)
+        self.trail.spawn(x=mouse_x, y=mouse_y, life=1.0)
 
-        # Limitar longitud de estela
-        if len(self.trail) > self.max_trail:
-            self.trail.pop(0)
-
-        # Reducir vida de puntos de la estela
-        for point in self.trail:
-            point["life"] -= 0.06
-
-        # Eliminar puntos muertos
-        self.trail = [p for p in self.trail if p["life"] > 0]
+        # Reducir vida de puntos de la estela y eliminar los muertos
+        self.trail.update(0.06)
 
     def draw(self, surface):
         """
@@ -1482,32 +1546,21 @@ class CyberCursor:
         # ====================================================================
         if len(self.trail) > 1:
             # Línea que conecta todos los puntos de la estela
-            trail_points = [point["pos"] for point in self.trail]
-            pygame.draw.lines(surface, trail_color, False, trail_points, 3)
-
-            # Puntos individuales de la estela
-            for point in self.trail:
-                trail_radius = int(12 * point["life"])
-
-                if trail_radius > 1:
-                    trail_surf = pygame.Surface(
-                        (trail_radius * 2, trail_radius * 2), pygame.SRCALPHA
-                    )
-
-                    pygame.draw.circle(
-                        trail_surf,
-                        (*trail_color, int(100 * point["life"])),
-                        (trail_radius, trail_radius),
-                        trail_radius,
-                    )
+            xs, ys = self.trail.column("x"), self.trail.column("y")
+            pygame.draw.lines(surface, trail_color, False, list(zip(xs, ys)), 3)
+
+            # Puntos individuales de la estela (variantes en atlas, en lote)
+            life = self.trail.column("life")
+            if self.trail.vectorized:
+                radii = (12 * life).astype(int)
+                radii[radii <= 1] = 0
+                alphas = 100 * life
+            else:
+                radii = [int(12 * v) for v in life]
+                radii = [r if r > 1 else 0 for r in radii]
+                alphas = [100 * v for v in life]
 
-                    surface.blit(
-                        trail_surf,
-                        (
-                            point["pos"][0] - trail_radius,
-                            point["pos"][1] - trail_radius,
-                        ),
-                    )
+            self.trail_sprites.draw(surface, xs, ys, radii, trail_color, alphas)
 
         # ====================================================================
         # CURSOR PRINCIPAL (forma diferente según estado)
@@ -1949,76 +2002,153 @@ class HexDumpLoader:
 
 class SystemMonitor:
     """
-    Monitor de sistema simple que muestra FPS y estadísticas
+    Monitor de rendimiento con datos reales del proceso y del frame
     Se activa con F1
+
+    El panel se redibuja 4 veces por segundo y entre medias se reutiliza,
+    así que puede quedarse abierto en las máquinas de QA.
     """
 
+    REFRESH = 0.25  # Segundos entre redibujados del panel
+    WIDTH = 200
+
     def __init__(self):
         """Inicializa el monitor de sistema"""
         self.font = pygame.font.SysFont("consolas", 10)
-        self.history = []  # Historial de FPS para gráfico
+        self.panel = None
+        self.last_refresh = 0.0
 
-    def draw(self, surface, fps):
+    def draw(self, surface, fps, latency=None, perf=None):
         """
         Dibuja el monitor de sistema
 
         Args:
             surface: Superficie donde dibujar
             fps: FPS actuales a mostrar
+            latency: Estadísticas de InputLatencyTracker.stats() (opcional)
+            perf: PerfMonitor con CPU, memoria, GC y tiempos (opcional)
         """
-        width, height = 160, 70
-        x_pos = surface.get_width() - width - 10
-        y_pos = 10
-
-        # Crear superficie del monitor
-        monitor_surf = pygame.Surface((width, height), pygame.SRCALPHA)
-        monitor_surf.fill((0, 0, 0, 150))  # Fondo semitransparente
-
-        # Borde gris
-        pygame.draw.rect(monitor_surf, (100, 100, 100), (0, 0, width, height), 1)
-
-        # ====================================================================
-        # GRÁFICO DE FPS
-        # ====================================================================
-        self.history.append(fps)
+        now = time.monotonic()
+        if self.panel is None or now - self.last_refresh >= self.REFRESH:
+            self.panel = self._render_panel(fps, latency, perf)
+            self.last_refresh = now
+
+        x_pos = surface.get_width() - self.WIDTH - 10
+        surface.blit(self.panel, (x_pos, 10))
+
+    def _render_panel(self, fps, latency, perf):
+        """Compone el panel con los valores actuales"""
+        stats = perf.snapshot() if perf else None
+
+        # Líneas de texto: (texto, color)
+        lines = []
+        if stats:
+            lines.append(
+                (
+                    f"FPS: {int(fps)}  p50 {stats['p50']:.1f}ms  "
+                    f"p99 {stats['p99']:.1f}ms",
+                    (0, 255, 0),
+                )
+            )
+            rss_label = "RSS máx" if stats["rss_is_peak"] else "RSS"
+            lines.append(
+                (
+                    f"CPU: {stats['cpu']:.0f}%  {rss_label}: "
+                    f"{stats['rss'] / (1024 * 1024):.0f}MB  "
+                    f"HILOS: {threading.active_count()}",
+                    (0, 255, 255),
+                )
+            )
+            gen0, gen1, gen2 = stats["gc"]
+            lines.append(
+                (
+                    f"GC: {gen0}/{gen1}/{gen2}  pausa {stats['gc_pause']:.1f}ms",
+                    (255, 100, 100),
+                )
+            )
+        else:
+            lines.append((f"FPS: {int(fps)}", (0, 255, 0)))
+            lines.append((f"HILOS: {threading.active_count()}", (255, 100, 100)))
 
-        # Limitar historial al ancho disponible
-        if len(self.history) > width - 10:
-            self.history.pop(0)
+        # Latencia input -> pantalla
+        if latency:
+            lines.append(
+                (
+                    f"INPUT: {latency['mean']:.0f}ms p95 {latency['p95']:.0f}ms",
+                    (255, 255, 0),
+                )
+            )
 
-        # Dibujar línea de gráfico si hay suficientes datos
-        if len(self.history) > 2:
-            points = []
+        # Contadores de los efectos (dibujado / enviado)
+        if stats:
+            for name, (value, total) in stats["counters"].items():
+                share = value * 100.0 / total if total else 0.0
+                lines.append(
+                    (f"{name}: {value}/{total} ({share:.0f}%)", (180, 255, 180))
+                )
 
-            for i, fps_value in enumerate(self.history):
-                # Escalar FPS a altura del gráfico (max 150 FPS = altura completa)
-                scaled_y = 30 - min(30, int(fps_value * 0.4)) + 35
-                points.append((i + 5, scaled_y))
+        # Rendimiento de extracción (solo mientras se instala)
+        if stats and stats["extract_rate"] > 0:
+            lines.append(
+                (
+                    f"EXTRACCIÓN: {stats['extract_rate'] / (1024 * 1024):.1f} MB/s",
+                    (255, 200, 0),
+                )
+            )
 
-            # Línea verde para el gráfico
-            pygame.draw.lines(monitor_surf, (0, 255, 0), False, points, 1)
+        top = stats["top"] if stats else []
+        histogram = stats["histogram"] if stats else []
+
+        line_h = 10
+        graph_h = 30 if histogram else 0
+        height = 8 + len(lines) * line_h + (graph_h + 6 if graph_h else 0)
+        height += (len(top) + 1) * line_h if top else 0
+
+        panel = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 150))  # Fondo semitransparente
+        pygame.draw.rect(panel, (100, 100, 100), (0, 0, self.WIDTH, height), 1)
+
+        y = 5
+        for text, color in lines:
+            panel.blit(self.font.render(text, True, color), (5, y))
+            y += line_h
+
+        # ====================================================================
+        # HISTOGRAMA DE TIEMPOS DE FRAME
+        # ====================================================================
+        if histogram:
+            y += 3
+            bins = len(histogram)
+            bar_w = (self.WIDTH - 10) // bins
+            peak = max(histogram) or 1
+            edges = FrameTimeRing.HISTOGRAM_EDGES_MS
+            for i, count in enumerate(histogram):
+                bar_h = int(graph_h * count / peak)
+                # Verde hasta 16.7 ms, amarillo hasta 33 ms, rojo después
+                if edges[i] < 16.7:
+                    color = (0, 255, 0)
+                elif edges[i] < 33:
+                    color = (255, 255, 0)
+                else:
+                    color = (255, 60, 60)
+                if bar_h:
+                    panel.fill(
+                        color, (5 + i * bar_w, y + graph_h - bar_h, bar_w - 1, bar_h)
+                    )
+            y += graph_h + 3
 
         # ====================================================================
-        # ESTADÍSTICAS DE TEXTO
+        # SUBSISTEMAS MÁS CAROS DEL ÚLTIMO SEGUNDO
         # ====================================================================
-        # FPS actual
-        fps_text = self.font.render(f"FPS: {int(fps)}", True, (0, 255, 0))
-        monitor_surf.blit(fps_text, (5, 5))
-
-        # VRAM simulado
-        vram_text = self.font.render(
-            f"VRAM: {random.randint(1024, 4096)}MB", True, (0, 255, 255)
-        )
-        monitor_surf.blit(vram_text, (5, 15))
-
-        # Threads activos
-        threads_text = self.font.render(
-            f"T-THREAD: {threading.active_count()}", True, (255, 100, 100)
-        )
-        monitor_surf.blit(threads_text, (5, 25))
+        if top:
+            panel.blit(self.font.render("TOP (ms/s):", True, (180, 180, 180)), (5, y))
+            y += line_h
+            for name, ms in top:
+                text = f"{name[:22]:<22} {ms:6.1f}"
+                panel.blit(self.font.render(text, True, (200, 200, 255)), (5, y))
+                y += line_h
 
-        # Dibujar monitor en superficie principal
-        surface.blit(monitor_surf, (x_pos, y_pos))
+        return panel
 
 
 # ============================================================================
@@ -42,6 +42,113 @@ class Point3D:
     z: float
 
 
+# Niveles de calidad de render (de menos a más coste)
+QUALITY_LOW = 0
+QUALITY_MEDIUM = 1
+QUALITY_HIGH = 2
+QUALITY_LEVELS = {"LOW": QUALITY_LOW, "MEDIUM": QUALITY_MEDIUM, "HIGH": QUALITY_HIGH}
+
+
+class FrameContext:
+    """
+    Estado compartido de un frame, creado una sola vez por el bucle principal
+    Sustituye las llamadas sueltas a time.time() y los diccionarios de estado BPM
+    Inmutable: los efectos lo leen, nunca lo modifican
+
+    Atributos:
+        time: Reloj monotónico del frame (time.monotonic())
+        dt: Segundos desde el frame anterior
+        beat, phase: Beat musical actual y fase dentro del beat (0.0-1.0)
+        pulse: Pulso del beat (0.0-1.0, decae entre beats)
+        intensity, kick: Intensidad modulada por BPM y golpe de bombo
+        fmt: Formato de la música actual ("mp3", "mod", "xm"...)
+        quality: Nivel de calidad (QUALITY_LOW/MEDIUM/HIGH)
+        bpm_enabled: Efecto BPM activo en las formas geométricas
+        strong_beat, medium_beat, new_beat: Tipo de beat y si acaba de empezar
+    """
+
+    __slots__ = (
+        "time",
+        "dt",
+        "beat",
+        "phase",
+        "pulse",
+        "intensity",
+        "kick",
+        "fmt",
+        "quality",
+        "bpm_enabled",
+        "strong_beat",
+        "medium_beat",
+        "new_beat",
+    )
+
+    def __init__(
+        self,
+        time=0.0,
+        dt=0.0,
+        beat=0,
+        phase=0.0,
+        pulse=0.0,
+        intensity=0.0,
+        kick=0.0,
+        fmt=None,
+        quality=QUALITY_HIGH,
+        bpm_enabled=True,
+        strong_beat=False,
+        medium_beat=False,
+        new_beat=False,
+    ):
+        init = object.__setattr__
+        init(self, "time", time)
+        init(self, "dt", dt)
+        init(self, "beat", beat)
+        init(self, "phase", phase)
+        init(self, "pulse", pulse)
+        init(self, "intensity", intensity)
+        init(self, "kick", kick)
+        init(self, "fmt", fmt)
+        init(self, "quality", quality)
+        init(self, "bpm_enabled", bpm_enabled)
+        init(self, "strong_beat", strong_beat)
+        init(self, "medium_beat", medium_beat)
+        init(self, "new_beat", new_beat)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrameContext es inmutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("FrameContext es inmutable")
+
+
+class EffectRandom(random.Random):
+    """
+    Fuente de azar de un efecto, con el mismo flujo en los dos caminos
+
+    Los métodos *_array sacan un random() por elemento y en orden, así que
+    el camino NumPy consume exactamente los mismos números que el bucle
+    escalar equivalente. Con una semilla fija (golden_frames) ambos caminos
+    dan la misma imagen y se pueden comparar entre sí.
+    """
+
+    def random_array(self, n):
+        """n valores de random() en un array"""
+        draw = self.random
+        return np.array([draw() for _ in range(n)], dtype=np.float64)
+
+    def uniform_array(self, low, high, n):
+        """uniform(low, high) para n elementos (misma fórmula que uniform)"""
+        return low + (high - low) * self.random_array(n)
+
+    def index(self, size):
+        """Índice al azar de 0 a size - 1 (a partir de un solo random())"""
+        return int(self.random() * size)
+
+    def index_array(self, size, n):
+        """index(size) para n elementos"""
+        return (self.random_array(n) * size).astype(np.int64)
+
+
 # ============================================================================
 # FUNCIONES DE UTILIDAD
 # ============================================================================
@@ -132,45 +239,14 @@ def clean_temp_files():
                 pass
 
 
-def draw_circle_alpha(surface, color, center, radius):
-    """
-    Dibuja un círculo con transparencia (alpha)
-    Args:
-        surface: Superficie de Pygame donde dibujar
-        color: Tupla (R, G, B, A) con transparencia
-        center: Tupla (x, y) del centro del círculo
-        radius: Radio del círculo
-    """
-    if radius < 1:
-        return
-
-    try:
-        # Extraer componentes de color con transparencia
-        r, g, b = clamp_val(color[0]), clamp_val(color[1]), clamp_val(color[2])
-        a = clamp_val(color[3] if len(color) > 3 else 255)
-
-        # Crear superficie temporal con alpha channel
-        surf = pygame.Surface((int(radius * 2), int(radius * 2)), pygame.SRCALPHA)
-        pygame.draw.circle(surf, (r, g, b, a), (radius, radius), radius)
-
-        # Dibujar con blending alpha
-        surface.blit(
-            surf,
-            (center[0] - radius, center[1] - radius),
-            special_flags=pygame.BLEND_ALPHA_SDL2,
-        )
-    except Exception:
-        # Fallback silencioso en caso de error
-        pass
-
-
-def apply_glitch(surface, intensity, width, height):
+def apply_glitch(surface, intensity, width, height, postfx=None):
     """
     Aplica efecto glitch cromático y desplazamiento aleatorio
     Args:
         surface: Superficie a modificar
         intensity: Intensidad del efecto (0.0 a 1.0)
         width, height: Dimensiones de la superficie
+        postfx: PostProcessor para separar los canales por bandas (opcional)
     Returns:
         Superficie con efecto glitch aplicado
     """
@@ -179,18 +255,21 @@ def apply_glitch(surface, intensity, width, height):
 
     # Desplazamiento cromático (efecto de canales separados)
     offset = int(intensity * 15)
-    copy_surf = surface.copy()
+    if postfx is not None:
+        postfx.channel_shift(surface, offset)
+    else:
+        copy_surf = surface.copy()
 
-    # Crear versiones de canales desplazados
-    red_channel = copy_surf.copy()
-    red_channel.fill((0, 255, 255), special_flags=pygame.BLEND_RGB_SUB)
+        # Crear versiones de canales desplazados
+        red_channel = copy_surf.copy()
+        red_channel.fill((0, 255, 255), special_flags=pygame.BLEND_RGB_SUB)
 
-    blue_channel = copy_surf.copy()
-    blue_channel.fill((255, 255, 0), special_flags=pygame.BLEND_RGB_SUB)
+        blue_channel = copy_surf.copy()
+        blue_channel.fill((255, 255, 0), special_flags=pygame.BLEND_RGB_SUB)
 
-    # Aplicar desplazamiento cromático
-    surface.blit(red_channel, (-offset, 0), special_flags=pygame.BLEND_RGB_ADD)
-    surface.blit(blue_channel, (offset, 0), special_flags=pygame.BLEND_RGB_ADD)
+        # Aplicar desplazamiento cromático
+        surface.blit(red_channel, (-offset, 0), special_flags=pygame.BLEND_RGB_ADD)
+        surface.blit(blue_channel, (offset, 0), special_flags=pygame.BLEND_RGB_ADD)
 
     # Efecto de desplazamiento aleatorio de líneas (scanline glitch)
     if random.random() < 0.4:
@@ -0,0 +1,1053 @@
+# visualizers.py
+# Visualizadores por formato del SpectrumAnalyzer (MP3, MOD/S3M, OGG, XM, IT)
+# Cada uno se crea la primera vez que suena su formato y se libera si deja de usarse
+
+import pygame
+import math
+from utils import clamp_val, NUMPY_AVAILABLE
+from sprites import (
+    prepare_surface,
+    prepare_sprite,
+    fade_additive,
+    audit_blit,
+    SpriteCache,
+    quantize,
+    quantize_array,
+    MipChain,
+    mip_sizes,
+)
+from particles import ParticlePool, ParticleSprites, draw_circles
+
+# Import condicional de numpy (mejora rendimiento si disponible)
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+SIN = math.sin
+COS = math.cos
+PI = math.pi
+
+# Segundos sin dibujarse tras los que un visualizador libera sus recursos
+IDLE_RELEASE_TIME = 30.0
+
+# Pasos de cuantización de las variantes de burbuja en caché
+BUBBLE_SIZE_STEP = 2  # Tamaño de las burbujas del visualizador MP3
+BUBBLE_ALPHA_STEP = 64  # Opacidad de las burbujas (4 niveles: 64 ... 255)
+BUBBLE_MAX_SIZE = 160  # Tamaño máximo de una burbuja (64 x 2 x sqrt(1.5))
+BUBBLE_CACHE_PIXELS = 1 << 20  # Tope de la caché de variantes (4 MB a 32 bpp)
+
+# Capacidad (tope duro) de los pools de partículas de cada visualizador
+SPARK_PARTICLES = 512  # Burbujas del magma (MP3)
+OGG_PARTICLES = 4096  # Chispas de los picos (OGG)
+XM_PARTICLES = 512  # Partículas flotantes (XM)
+IT_PARTICLES = 256  # Partículas 3D (IT)
+
+# Columnas LED pre-renderizadas del visualizador OGG
+LED_SEGMENT = 4  # Alto de cada segmento
+LED_MAX_HEIGHT = 180  # Altura máxima de una barra (45 segmentos)
+LED_PULSE_LEVELS = 16  # Niveles del pulso BPM con textura propia
+
+
+# ============================================================================
+# BASE
+# ============================================================================
+
+
+class Visualizer:
+    """
+    Efecto de un formato de música sobre los datos del SpectrumAnalyzer
+
+    El analizador calcula barras, picos y pulso BPM; el visualizador solo
+    dibuja. Los recursos ligeros (pools, cachés) se crean en __init__ y los
+    pesados (texturas, sprites pre-escalados) en prepare_steps(), que el
+    analizador recorre como trabajo de FrameScheduler antes del primer draw().
+    """
+
+    # El analizador pega la tira de trabajo bajo el efecto
+    uses_work_surface = True
+
+    def __init__(self, spectrum):
+        """
+        Args:
+            spectrum: SpectrumAnalyzer que lo usa (geometría, colores, BPM)
+        """
+        self.spectrum = spectrum
+        self.pools = ()  # Pools de partículas (tope de calidad y contador)
+        self.last_used = 0.0  # Reloj del último frame dibujado
+        self.ready = False  # prepare_steps() ya terminado
+
+    def prepare_steps(self):
+        """Generador que crea los recursos pesados, un trozo por paso"""
+        return
+        yield
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        """
+        Dibuja un frame
+
+        Args:
+            surface: Superficie final (pantalla)
+            work_surface: Tira de 350 px que el analizador pega abajo
+            ctx: FrameContext del frame actual
+            values: Altura de cada barra (0-1)
+            peaks: Pico de cada barra (0-1)
+        """
+        raise NotImplementedError
+
+
+# ============================================================================
+# MP3: MAGMA
+# ============================================================================
+
+
+class MagmaVisualizer(Visualizer):
+    """Magma líquido con textura en scroll y burbujas de calor (MP3)"""
+
+    def __init__(self, spectrum):
+        super().__init__(spectrum)
+        self.magma_height = 400
+        self.magma_y_scroll = 0
+        self.bubble_size = 64
+
+        # Variantes (tamaño, opacidad) de la burbuja, en caché LRU acotada
+        self.bubble_variants = SpriteCache(max_pixels=BUBBLE_CACHE_PIXELS)
+
+        self.sparks = ParticlePool(  # Burbujas de calor
+            SPARK_PARTICLES, ("x", "y", "vx", "vy", "size", "life")
+        )
+        self.pools = (self.sparks,)
+
+    def prepare_steps(self):
+        width = self.spectrum.w
+
+        # Textura de magma
+        self.magma_texture = prepare_surface(
+            self._generate_magma_texture(width, self.magma_height)
+        )
+        yield
+
+        # Textura duplicada para scrolling infinito (en formato de pantalla)
+        self.magma_long = prepare_surface(
+            pygame.Surface((width, self.magma_height * 2))
+        )
+        self.magma_long.blit(self.magma_texture, (0, 0))
+        self.magma_long.blit(self.magma_texture, (0, self.magma_height))
+
+        # Máscara con la silueta del magma
+        self.mask_surf = prepare_sprite(pygame.Surface((width, 350), pygame.SRCALPHA))
+        yield
+
+        # Sprite de burbuja (premultiplicado: se suma en aditivo)
+        self.bubble_surf = pygame.Surface(
+            (self.bubble_size, self.bubble_size), pygame.SRCALPHA
+        )
+        self._generate_bubble_sprite()
+        self.bubble_surf = prepare_sprite(self.bubble_surf, premultiplied=True)
+        yield
+
+        # Burbuja pre-escalada a todos los tamaños que puede pedir una chispa
+        # (un nivel por paso)
+        self.bubble_mips = MipChain(
+            self.bubble_surf,
+            mip_sizes(BUBBLE_SIZE_STEP, BUBBLE_MAX_SIZE, step=BUBBLE_SIZE_STEP),
+            deferred=True,
+        )
+        yield from self.bubble_mips.build_steps()
+
+    def _generate_magma_texture(self, width, height):
+        """Genera textura de efecto magma (gradiente de calor)"""
+        if NUMPY_AVAILABLE:
+            return self._generate_magma_texture_array(width, height)
+
+        surface = pygame.Surface((width, height))
+
+        for y in range(0, height, 2):
+            for x in range(0, width, 4):
+                v1 = SIN(x * 0.02)
+                v2 = SIN(y * 0.03)
+                v3 = SIN((x + y) * 0.015)
+                value = (v1 + v2 + v3 + 3) / 6
+
+                if value < 0.2:
+                    color = (int(120 + value * 100), 0, 0)
+                elif value < 0.5:
+                    color = (255, int(100 * (value - 0.2) * 3.3), 0)
+                elif value < 0.8:
+                    color = (
+                        255,
+                        int(100 + 155 * (value - 0.5) * 3.3),
+                        0,
+                    )
+                else:
+                    color = (
+                        255,
+                        255,
+                        int(255 * (value - 0.8) * 5.0),
+                    )
+
+                pygame.draw.rect(surface, color, (x, y, 4, 2))
+
+        return pygame.transform.smoothscale(surface, (width, height))
+
+    def _generate_magma_texture_array(self, width, height):
+        """
+        _generate_magma_texture() vectorizado sobre toda la rejilla de bloques
+
+        Se evalúa el valor en la esquina de cada bloque de 4x2 y se repite
+        sobre el bloque (como los rects del camino escalar). El smoothscale
+        final del camino escalar es al mismo tamaño y no cambia la imagen.
+        """
+        xs = np.arange(0, width, 4, dtype=np.float64)[:, None]
+        ys = np.arange(0, height, 2, dtype=np.float64)[None, :]
+        value = (
+            np.sin(xs * 0.02) + np.sin(ys * 0.03) + np.sin((xs + ys) * 0.015) + 3
+        ) / 6
+
+        zero = np.zeros_like(value)
+        full = np.full_like(value, 255.0)
+        low, mid, high = value < 0.2, value < 0.5, value < 0.8
+        red = np.select([low], [120 + value * 100], full)
+        green = np.select(
+            [low, mid, high],
+            [zero, 100 * (value - 0.2) * 3.3, 100 + 155 * (value - 0.5) * 3.3],
+            full,
+        )
+        blue = np.select([high], [zero], 255 * (value - 0.8) * 5.0)
+
+        blocks = np.stack((red, green, blue), axis=-1).astype(np.uint8)
+        pixels = blocks.repeat(4, axis=0).repeat(2, axis=1)[:width, :height]
+
+        surface = pygame.Surface((width, height))
+        pygame.surfarray.blit_array(surface, pixels)
+        return surface
+
+    def _generate_bubble_sprite(self):
+        """Genera sprite de burbuja con gradiente radial"""
+        center = self.bubble_size // 2
+
+        for radius in range(center, 0, -2):
+            alpha = int(255 * (1 - (radius / center)))
+            color = (255, 220 - int(radius * 2), 100, clamp_val(alpha * 0.6))
+            pygame.draw.circle(self.bubble_surf, color, (center, center), radius)
+
+    def _bubble_variant(self, size, alpha):
+        """Burbuja escalada a 'size' y fundida a 'alpha'"""
+        key = (size, alpha)
+        bubble = self.bubble_variants.get(key)
+        if bubble is None:
+            bubble = self.bubble_mips.get(size)
+            if alpha < 255:
+                # set_alpha no afecta a BLEND_RGBA_ADD: fundido en el color
+                bubble = fade_additive(bubble.copy(), alpha)
+            bubble = self.bubble_variants.add(key, bubble)
+        return bubble
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        spectrum = self.spectrum
+        rng = spectrum.rng
+        intensity, kick, current_time = ctx.intensity, ctx.kick, ctx.time
+        bpm_pulse, is_beat = spectrum.bpm_pulse, spectrum.is_beat
+
+        points = []
+        ghost_points = []
+        prev_height = 0
+
+        # Generar puntos (SIN RUIDO ALEATORIO SUCIO)
+        for i in range(len(values)):
+            raw_height = values[i]
+
+            # Altura aumentada en beats (Reactividad)
+            bpm_height_boost = 1.0 + bpm_pulse * 0.5
+            base_height = int(raw_height * 200 * (1 + kick) * bpm_height_boost)
+
+            # Suavizado entre puntos vecinos (filtro paso bajo espacial)
+            height = (base_height + prev_height) / 2
+            prev_height = height
+
+            x_pos = spectrum.horizontal_margin + i * spectrum.bar_width
+
+            # CORRECCIÓN 1: Quitamos 'noise_y'. Ahora la linea es pura.
+            # Si quieres variación, usa una onda seno suave, no random.randint
+            points.append((x_pos, 350 - height))
+
+            # Línea fantasma (sombra flotante)
+            ghost_points.append((x_pos + 5, 350 - height - 5))
+
+        # CORRECCIÓN 2: Cierre del polígono exacto para evitar diagonales en los márgenes
+        if points:
+            first_x = points[0][0]
+            last_x = points[-1][0]
+            # Cerramos bajando recto desde el último punto y volviendo recto al primero
+            poly_points = points + [(last_x, 350), (first_x, 350)]
+        else:
+            poly_points = []
+
+        # Dibujar línea fantasma
+        if len(ghost_points) > 1:
+            ghost_alpha = 100 + int(bpm_pulse * 155)
+            # Usamos blend para que se vea más integrada
+            pygame.draw.lines(
+                work_surface, (150, 80, 0, ghost_alpha), False, ghost_points, 2
+            )
+
+        # Crear máscara para efecto de magma
+        self.mask_surf.fill((0, 0, 0, 0))
+        if len(poly_points) > 2:
+            pygame.draw.polygon(self.mask_surf, (255, 255, 255), poly_points)
+
+        # Scrolling de textura
+        scroll_speed = 1 + int(kick * 5) + int(bpm_pulse * 3)
+        self.magma_y_scroll = (self.magma_y_scroll + scroll_speed) % 400
+
+        src_rect = pygame.Rect(0, 400 - self.magma_y_scroll, spectrum.w, 350)
+        magma_slice = self.magma_long.subsurface(src_rect)
+
+        audit_blit(self.mask_surf, magma_slice, "magma_slice")
+        self.mask_surf.blit(magma_slice, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        work_surface.blit(self.mask_surf, (0, 0))
+
+        # CORRECCIÓN 3: HE ELIMINADO EL BLOQUE DE "RECTÁNGULOS GLITCH"
+        # Ese era el causante principal de los "artefactos extraños".
+        # Si quieres mantenerlo pero más suave, descomenta esto y baja la probabilidad:
+        """
+        if bpm_pulse > 0.9 and random.random() < 0.2: # Solo muy raramente en beats fuertes
+             # ... código de glitch ...
+        """
+
+        # Línea principal (Borde superior del magma)
+        if len(points) > 1:
+            line_color = (255, 220, 150)  # Color lava caliente
+            if is_beat:
+                line_color = (255, 255, 255)  # Blanco en el golpe
+
+            # Grosor variable: más grueso en el beat
+            line_width = 2 if not is_beat else 3
+            pygame.draw.lines(work_surface, line_color, False, points, line_width)
+
+        # Generar partículas/burbujas (Esto sí mola, lo dejamos)
+        spark_chance = 0.05 + (intensity * 0.1) + (bpm_pulse * 0.15)
+        if rng.random() < spark_chance:
+            num_sparks = 1 + int(bpm_pulse * 3)
+            for _ in range(num_sparks):
+                # Nacer desde la altura del magma, no desde abajo del todo siempre
+                spawn_x_idx = rng.randint(0, len(values) - 1)
+                spawn_x = spectrum.horizontal_margin + spawn_x_idx * spectrum.bar_width
+                # Altura aproximada en ese punto
+                spawn_y = 350 - (values[spawn_x_idx] * 200 * (1 + kick))
+
+                self.sparks.spawn(
+                    x=spawn_x + rng.randint(-10, 10),
+                    # Un poco por debajo de la superficie
+                    y=min(340, spawn_y + rng.randint(0, 50)),
+                    vx=rng.uniform(-0.5 - bpm_pulse, 0.5 + bpm_pulse),
+                    vy=rng.uniform(-1.0, -3.0 - bpm_pulse * 2),
+                    size=rng.uniform(0.5, 1.0) * (1 + bpm_pulse),
+                    life=1.0 + bpm_pulse * 0.5,
+                )
+
+        # Actualizar y dibujar partículas (Burbujas de calor)
+        sparks = self.sparks
+        sparks.update(0.015)
+
+        pulse_factor = 0.8 + 0.2 * SIN(current_time * 10)
+        life = sparks.column("life")
+        if sparks.vectorized:
+            sizes = (
+                self.bubble_size * sparks.column("size") * pulse_factor * np.sqrt(life)
+            ).astype(int)
+            sizes = quantize_array(sizes, BUBBLE_SIZE_STEP).tolist()
+            alphas = np.minimum(
+                quantize_array(255 * np.minimum(1.0, life), BUBBLE_ALPHA_STEP), 255
+            ).tolist()
+        else:
+            sizes = [
+                quantize(
+                    int(self.bubble_size * size * pulse_factor * math.sqrt(v)),
+                    BUBBLE_SIZE_STEP,
+                )
+                for size, v in zip(sparks.column("size"), life)
+            ]
+            alphas = [
+                min(255, quantize(255 * min(1.0, v), BUBBLE_ALPHA_STEP)) for v in life
+            ]
+
+        variant = self._bubble_variant
+        work_surface.blits(
+            [
+                (
+                    variant(size, alpha),
+                    (int(x) - size // 2, int(y) - size // 2),
+                    None,
+                    pygame.BLEND_RGBA_ADD,
+                )
+                for x, y, size, alpha in zip(
+                    sparks.column("x"), sparks.column("y"), sizes, alphas
+                )
+                if size > 0 and alpha > 0
+            ],
+            doreturn=False,
+        )
+
+
+# ============================================================================
+# MOD / S3M: BARRAS LED
+# ============================================================================
+
+
+class TrackerBarsVisualizer(Visualizer):
+    """Barras con brillo, scanline y picos blancos (MOD, S3M)"""
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        spectrum = self.spectrum
+        bpm_pulse, bpm_phase = spectrum.bpm_pulse, spectrum.bpm_phase
+        is_measure_start = spectrum.is_measure_start
+
+        if NUMPY_AVAILABLE:
+            heights = (values * 140).astype(int)
+            peak_heights = (peaks * 140).astype(int)
+        else:
+            heights = [int(v * 140) for v in values]
+            peak_heights = [int(p * 140) for p in peaks]
+
+        for i in range(spectrum.bars):
+            # --- BARRA PRINCIPAL ---
+            base_height = min(heights[i], 250)
+            # La barra SÍ puede latir con el BPM (queda bien)
+            height = int(base_height * (1.0 + bpm_pulse * 0.3))
+            x_pos = spectrum.horizontal_margin + i * spectrum.bar_width
+
+            if height > 0:
+                color = spectrum._get_safe_color(i, values[i], bpm_pulse)
+
+                # Barra base
+                pygame.draw.rect(
+                    work_surface,
+                    color,
+                    (x_pos + 1, 250 - height, spectrum.bar_width - 2, height),
+                )
+
+                # Highlight (Brillo superior barra)
+                highlight_boost = 40 + int(bpm_pulse * 60)
+                highlight_color = (
+                    min(255, color[0] + highlight_boost),
+                    min(255, color[1] + highlight_boost),
+                    min(255, color[2] + highlight_boost),
+                    color[3],
+                )
+                highlight_height = 3 + int(bpm_pulse * 2)
+                pygame.draw.rect(
+                    work_surface,
+                    highlight_color,
+                    (x_pos + 1, 250 - height, spectrum.bar_width - 2, highlight_height),
+                )
+
+                # Efecto Scanline
+                if bpm_phase < 0.3:
+                    scan_y = 250 - height + int(bpm_phase * 333 * height / 100)
+                    pygame.draw.rect(
+                        work_surface,
+                        (255, 255, 255, 150),
+                        (x_pos + 1, scan_y, spectrum.bar_width - 2, 2),
+                    )
+
+            # --- PICO (RAYA BLANCA) ---
+            if peak_heights[i] > 0:
+                # 1. POSICIÓN: Sólida como una roca (sin efectos de BPM)
+                peak_pixel_y = min(peak_heights[i], 250)
+
+                # 2. COLOR: Aquí es donde aplicamos el ritmo (Alpha)
+                # La raya no se mueve, pero brilla con el beat
+                peak_alpha = 180 + int(bpm_pulse * 75)
+
+                # Dibujamos justo encima
+                draw_y = 250 - peak_pixel_y - 2
+
+                pygame.draw.rect(
+                    work_surface,
+                    (255, 255, 255, peak_alpha),
+                    (x_pos + 2, draw_y, spectrum.bar_width - 4, 2),
+                )
+
+        # Efecto especial en inicio de compás (Flash de fondo)
+        if is_measure_start:
+            flash_surf = pygame.Surface((spectrum.bar_width * 4, 50), pygame.SRCALPHA)
+            flash_surf.fill((255, 255, 255, 80))
+            work_surface.blit(
+                flash_surf,
+                (spectrum.horizontal_margin + spectrum.bar_width * 15, 200),
+                special_flags=pygame.BLEND_RGBA_ADD,
+            )
+
+        # Efecto especial en inicio de compás (Flash de fondo)
+        if is_measure_start:
+            flash_surf = pygame.Surface((spectrum.bar_width * 4, 50), pygame.SRCALPHA)
+            flash_surf.fill((255, 255, 255, 80))
+            work_surface.blit(
+                flash_surf,
+                (spectrum.horizontal_margin + spectrum.bar_width * 15, 200),
+                special_flags=pygame.BLEND_RGBA_ADD,
+            )
+
+        # Efecto especial en inicio de compás (Se mantiene igual)
+        if is_measure_start:
+            flash_surf = pygame.Surface((spectrum.bar_width * 4, 50), pygame.SRCALPHA)
+            flash_surf.fill((255, 255, 255, 80))
+            work_surface.blit(
+                flash_surf,
+                (spectrum.horizontal_margin + spectrum.bar_width * 15, 200),
+                special_flags=pygame.BLEND_RGBA_ADD,
+            )
+
+
+# ============================================================================
+# OGG: BARRAS SIMÉTRICAS
+# ============================================================================
+
+
+class MirrorBarsVisualizer(Visualizer):
+    """Barras simétricas desde el centro con chispas en los picos (OGG)"""
+
+    def __init__(self, spectrum):
+        super().__init__(spectrum)
+        self.particles_ogg = ParticlePool(  # Chispas de los picos
+            OGG_PARTICLES,
+            ("x", "y", "vx", "vy", "life", "max_life", "r", "g", "b", "size"),
+        )
+        self.pools = (self.particles_ogg,)
+
+        # Una tira por nivel de pulso con la columna LED de cada banda de
+        # color: dibujar una barra es recortar su altura de la tira. Las
+        # tiras se generan en prepare_steps(), una por paso (~3 ms cada una)
+        self.bar_width = max(1, int(spectrum.bar_width * 0.4))
+        self.led_strips = [None] * LED_PULSE_LEVELS
+
+    def prepare_steps(self):
+        for level in range(LED_PULSE_LEVELS):
+            if self.led_strips[level] is None:
+                self.led_strips[level] = self._render_led_strip(
+                    level / (LED_PULSE_LEVELS - 1)
+                )
+                yield
+
+    def _led_strip(self, bpm_pulse):
+        """Tira LED del nivel de pulso más cercano a bpm_pulse"""
+        level = int(bpm_pulse * (LED_PULSE_LEVELS - 1) + 0.5)
+        strip = self.led_strips[level]
+        if strip is None:
+            strip = self._render_led_strip(level / (LED_PULSE_LEVELS - 1))
+            self.led_strips[level] = strip
+        return strip
+
+    def _render_led_strip(self, bpm_pulse):
+        """
+        Columnas LED de altura completa de todas las bandas para un pulso
+
+        El segmento a y_offset píxeles del suelo se oscurece con el factor
+        0.3-1.0 según su altura y se aviva en el beat; el alpha late con el
+        pulso (como el color de las barras en draw()).
+        """
+        spectrum = self.spectrum
+        bands = spectrum.bars // 2
+        strip = pygame.Surface(
+            (bands * self.bar_width, LED_MAX_HEIGHT), pygame.SRCALPHA
+        )
+
+        alpha = 200 + int(bpm_pulse * 55)  # Alpha pulsante
+        pulse_factor = 1.0 + bpm_pulse * 0.2 if bpm_pulse > 0.8 else 1.0
+        for band in range(bands):
+            energy_color = spectrum._get_safe_color(band, 1.0, bpm_pulse)
+            x = band * self.bar_width
+            for y_offset in range(0, LED_MAX_HEIGHT, LED_SEGMENT):
+                factor = (0.3 + 0.7 * y_offset / LED_MAX_HEIGHT) * pulse_factor
+                color = [min(255, int(c * factor)) for c in energy_color[:3]]
+                strip.fill(
+                    (*color, alpha),
+                    (
+                        x,
+                        LED_MAX_HEIGHT - LED_SEGMENT - y_offset,
+                        self.bar_width,
+                        LED_SEGMENT,
+                    ),
+                )
+        return prepare_sprite(strip)
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        spectrum = self.spectrum
+        rng = spectrum.rng
+        kick = ctx.kick
+        bpm_pulse, is_beat = spectrum.bpm_pulse, spectrum.is_beat
+
+        center_x = spectrum.w // 2
+        limit = spectrum.bars // 2
+        width_step = (spectrum.w // 2) / limit
+        bar_width = self.bar_width
+
+        strip = self._led_strip(bpm_pulse)
+        bars = []
+
+        for i in range(limit):
+            # Altura con efecto BPM
+            val_base = values[i] * (1.3 + kick * 1.5)
+            bpm_boost = bpm_pulse * 0.3  # Boost en el beat
+            val = val_base * (1.0 + bpm_boost)
+            height = min(int(val * 180), 180)
+            x_offset = i * width_step
+
+            # Barra LED: los segmentos que llegan a 'height', recortados de
+            # la columna de la banda (el suelo del segmento inferior es 254)
+            bar_height = -(-height // LED_SEGMENT) * LED_SEGMENT
+            if bar_height > 0:
+                area = pygame.Rect(
+                    i * bar_width, LED_MAX_HEIGHT - bar_height, bar_width, bar_height
+                )
+                top = 250 + LED_SEGMENT - bar_height
+
+                # Separación sutil en beat
+                bar_spacing = 0
+                if is_beat:
+                    bar_spacing = rng.uniform(-1, 1) * bpm_pulse * 2
+
+                # BLEND_RGBA_MAX sobre la tira recién limpiada copia el color
+                # y el alpha tal cual (como draw.rect)
+                left = int(center_x - x_offset - bar_width // 2 + bar_spacing)
+                right = int(center_x + x_offset - bar_width // 2 - bar_spacing)
+                bars.append((strip, (left, top), area, pygame.BLEND_RGBA_MAX))
+                bars.append((strip, (right, top), area, pygame.BLEND_RGBA_MAX))
+
+            # Generar partículas en picos altos (más en beats)
+            particle_chance = val * 0.8 + bpm_pulse * 0.2
+            if val > 0.3 and rng.random() < particle_chance:
+                spark_y = 250 - height
+                if spark_y >= 0:
+                    speed = rng.uniform(1.5, 5.0) * (0.5 + val + bpm_pulse * 0.5)
+                    particle_color = (
+                        rng.randint(150, 255),
+                        rng.randint(50, 200),
+                        int(bpm_pulse * 100),  # Azul en beat
+                    )
+
+                    life = 1.5 + bpm_pulse * 0.5  # Más vida en beat
+                    r, g, b = particle_color
+                    self.particles_ogg.spawn(
+                        x=center_x - x_offset,
+                        y=spark_y,
+                        vx=COS(2.5) * speed,
+                        vy=SIN(2.5) * speed,
+                        life=life,
+                        max_life=life,
+                        r=r,
+                        g=g,
+                        b=b,
+                        size=rng.uniform(2, 6),
+                    )
+                    self.particles_ogg.spawn(
+                        x=center_x + x_offset,
+                        y=spark_y,
+                        vx=COS(0.6) * speed,
+                        vy=SIN(0.6) * speed,
+                        life=life,
+                        max_life=life,
+                        r=r,
+                        g=g,
+                        b=b,
+                        size=rng.uniform(2, 6),
+                    )
+
+        work_surface.blits(bars, doreturn=False)
+
+        # Actualizar y dibujar partículas OGG (más brillantes en beat)
+        pool = self.particles_ogg
+        pool.update(0.02)
+
+        beat_boost = 50 if is_beat else 0
+        ys = pool.column("y")
+        if pool.vectorized:
+            fade = pool.column("life") / pool.column("max_life")
+            alphas = np.minimum(255, (255 * fade).astype(int) + beat_boost)
+            radii = (pool.column("size") * fade).astype(int)
+            radii[(ys < 0) | (ys > 350)] = 0
+        else:
+            fade = [
+                life / max_life
+                for life, max_life in zip(pool.column("life"), pool.column("max_life"))
+            ]
+            alphas = [min(255, int(255 * f) + beat_boost) for f in fade]
+            radii = [
+                int(size * f) if 0 <= y <= 350 else 0
+                for size, f, y in zip(pool.column("size"), fade, ys)
+            ]
+
+        draw_circles(
+            work_surface,
+            pool.column("x"),
+            ys,
+            radii,
+            (pool.column("r"), pool.column("g"), pool.column("b")),
+            alphas,
+        )
+
+
+# ============================================================================
+# XM: BARRAS POR COMPÁS
+# ============================================================================
+
+
+class MeasureBarsVisualizer(Visualizer):
+    """Barras con color por compás, reflejo y partículas flotantes (XM)"""
+
+    def __init__(self, spectrum):
+        super().__init__(spectrum)
+        self.particles_xm = ParticlePool(  # Partículas flotantes
+            XM_PARTICLES, ("x", "y", "vx", "vy", "life", "r", "g", "b", "size")
+        )
+        self.particle_sprites = ParticleSprites()  # Círculos con alpha
+        self.pools = (self.particles_xm,)
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        spectrum = self.spectrum
+        rng = spectrum.rng
+        bpm_pulse, bpm_phase = spectrum.bpm_pulse, spectrum.bpm_phase
+        is_beat = spectrum.is_beat
+
+        if NUMPY_AVAILABLE:
+            heights = (values * 140).astype(int)
+            peak_heights = (peaks * 140).astype(int)
+        else:
+            heights = [int(v * 140) for v in values]
+            peak_heights = [int(p * 140) for p in peaks]
+
+        for i in range(spectrum.bars):
+            base_height = min(heights[i], 250)
+            # Altura con variación rítmica
+            rhythm_variation = SIN(bpm_phase * 2 * PI + i * 0.2) * 0.1
+            height = int(base_height * (1.0 + bpm_pulse * 0.4 + rhythm_variation))
+            x_pos = spectrum.horizontal_margin + i * spectrum.bar_width
+
+            if height > 0:
+                base_color = spectrum._get_safe_color(i, values[i], bpm_pulse)
+
+                # Color que cambia con el compás
+                if spectrum.measure_counter % 2 == 0:
+                    # Compás par: tonos fríos
+                    color = (
+                        clamp_val(int(base_color[0] // 2)),
+                        clamp_val(int(base_color[1])),
+                        clamp_val(
+                            int(min(255, base_color[2] + 50 + int(bpm_pulse * 50)))
+                        ),
+                        clamp_val(int(base_color[3])),
+                    )
+                else:
+                    # Compás impar: tonos cálidos
+                    color = (
+                        clamp_val(
+                            int(min(255, base_color[0] + 30 + int(bpm_pulse * 30)))
+                        ),
+                        clamp_val(int(base_color[1] // 2)),
+                        clamp_val(int(base_color[2])),
+                        clamp_val(int(base_color[3])),
+                    )
+
+                pygame.draw.rect(
+                    work_surface,
+                    color,
+                    (x_pos + 1, 250 - height, spectrum.bar_width - 2, height),
+                )
+
+                # Highlight que parpadea en el beat
+                highlight_alpha = 180 if not is_beat else 255
+                pygame.draw.rect(
+                    work_surface,
+                    (255, 255, 255, highlight_alpha),
+                    (
+                        x_pos + 1,
+                        250 - height,
+                        spectrum.bar_width - 2,
+                        max(1, int(3 * (0.5 + bpm_pulse * 0.5))),
+                    ),
+                )
+
+                # Línea de pico con efecto de caída en beat
+                if peak_heights[i] > 0:
+                    peak_height = min(peak_heights[i], 250)
+                    peak_drop = int(bpm_pulse * 20)  # "Cae" en el beat
+                    pygame.draw.rect(
+                        work_surface,
+                        (
+                            200 - int(bpm_pulse * 50),
+                            200 - int(bpm_pulse * 50),
+                            255,
+                            220,
+                        ),
+                        (
+                            x_pos + 2,
+                            250 - min(peak_height, 250) - peak_drop,
+                            spectrum.bar_width - 4,
+                            1,
+                        ),
+                    )
+
+                # Reflejo/eco que se mueve con el BPM
+                reflection_height = int(height * 0.4)
+                reflection_offset = int(bpm_phase * 10)
+                pygame.draw.rect(
+                    work_surface,
+                    (*color[:3], 30),
+                    (
+                        x_pos + 1,
+                        252 + reflection_offset,
+                        spectrum.bar_width - 2,
+                        reflection_height,
+                    ),
+                )
+
+        # Partículas XM especiales
+        if rng.random() < 0.03 + (bpm_pulse * 0.1):
+            for _ in range(int(1 + bpm_pulse * 3)):
+                self.particles_xm.spawn(
+                    x=rng.randint(0, spectrum.w),
+                    y=rng.randint(100, 250),
+                    vx=rng.uniform(-1, 1) * (1 + bpm_pulse),
+                    vy=rng.uniform(-2, -0.5) * (1 + bpm_pulse),
+                    life=rng.uniform(1, 2),
+                    r=rng.randint(100, 200),
+                    g=rng.randint(100, 255),
+                    b=rng.randint(200, 255),
+                    size=rng.uniform(1, 3) * (1 + bpm_pulse),
+                )
+
+        # Actualizar y dibujar partículas XM (solo dentro de la tira)
+        pool = self.particles_xm
+        pool.update(0.03)
+
+        xs, ys, life = pool.column("x"), pool.column("y"), pool.column("life")
+        if pool.vectorized:
+            alphas = (255 * life).astype(int)
+            radii = (pool.column("size") * life).astype(int)
+            radii[(xs < 0) | (xs >= spectrum.w) | (ys < 0) | (ys >= 350)] = 0
+        else:
+            alphas = [int(255 * v) for v in life]
+            radii = [
+                int(size * v) if 0 <= x < spectrum.w and 0 <= y < 350 else 0
+                for size, v, x, y in zip(pool.column("size"), life, xs, ys)
+            ]
+
+        self.particle_sprites.draw(
+            work_surface,
+            xs,
+            ys,
+            radii,
+            (pool.column("r"), pool.column("g"), pool.column("b")),
+            alphas,
+            pygame.BLEND_ALPHA_SDL2,
+        )
+
+
+# ============================================================================
+# IT: NEON 3D
+# ============================================================================
+
+
+class Neon3DVisualizer(Visualizer):
+    """Anillo de barras neón en 3D con partículas hacia la cámara (IT)"""
+
+    # El resultado va directo a la pantalla: la tira no se pega
+    uses_work_surface = False
+
+    def __init__(self, spectrum):
+        super().__init__(spectrum)
+        self.particles_3d = ParticlePool(  # Partículas 3D
+            IT_PARTICLES, ("x", "y", "z", "vx", "vy", "vz", "life", "r", "g", "b")
+        )
+        self.pools = (self.particles_3d,)
+
+    def draw(self, surface, work_surface, ctx, values, peaks):
+        spectrum = self.spectrum
+        rng = spectrum.rng
+        kick, current_time = ctx.kick, ctx.time
+        bpm_pulse = spectrum.bpm_pulse
+
+        # POSICIÓN: BAJAMOS A LA ZONA INFERIOR
+        center_x = spectrum.w // 2
+
+        # Antes era spectrum.h * 0.45 (arriba). Ahora lo bajamos al 75%
+        # Esto lo pone en el cuarto inferior de la pantalla.
+        center_y = int(spectrum.h * 0.75)
+
+        # CONFIGURACIÓN
+        FOV = 400.0
+        CAMERA_Z = 500.0
+        RADIUS = 300.0  # Tamaño generoso
+
+        rotation = current_time * 0.4 + (kick * 0.1)
+
+        draw_list = []
+
+        for i in range(spectrum.bars):
+            val = values[i]
+            if val < 0.01:
+                continue
+
+            angle_step = (2 * PI) / spectrum.bars
+            bar_angle = i * angle_step + rotation
+
+            x_world = RADIUS * math.cos(bar_angle)
+            z_world = RADIUS * math.sin(bar_angle)
+            z_depth = z_world + CAMERA_Z
+
+            if z_depth < 50:
+                continue
+
+            scale = FOV / z_depth
+            screen_x = center_x + (x_world * scale)
+
+            rot_visual_width = abs(math.cos(bar_angle + PI / 2))
+            bar_w = max(3, int(32 * scale * rot_visual_width))
+
+            height_pixels = val * 280.0 * scale * (1.0 + kick * 0.5)
+
+            raw_color = spectrum._get_safe_color(i, val, bpm_pulse)
+            depth_alpha = max(0.3, min(1.0, 1.0 - (z_depth / 2000.0)))
+
+            draw_list.append(
+                {
+                    "z": z_depth,
+                    "x": screen_x,
+                    "y": center_y,
+                    "w": bar_w,
+                    "h": height_pixels,
+                    "color": raw_color,
+                    "alpha": depth_alpha,
+                }
+            )
+
+        draw_list.sort(key=lambda p: p["z"], reverse=True)
+
+        # Capa de brillo aditivo
+        glow_surface = pygame.Surface((spectrum.w, spectrum.h), pygame.SRCALPHA)
+        glow_surface.fill((0, 0, 0, 0))
+
+        for item in draw_list:
+            rx = item["x"] - item["w"] / 2
+            ry_horizon = item["y"]
+            rw = item["w"]
+            rh = item["h"]
+            r, g, b = item["color"][:3]
+            alpha_factor = item["alpha"]
+
+            if rw > 1 and rh > 1:
+                # 1. REFLEJO (ESPEJO - HACIA ARRIBA)
+                # OJO: Si hay algo negro arriba, el reflejo se verá tapado.
+                # Pero la barra principal (hacia abajo) se verá perfecta.
+                mirror_alpha = int(80 * alpha_factor)
+                if mirror_alpha > 0:
+                    pygame.draw.rect(
+                        work_surface,
+                        (r, g, b, mirror_alpha),
+                        (rx, ry_horizon - rh, rw, rh),
+                    )
+
+                # 2. BARRA PRINCIPAL (HACIA ABAJO)
+                body_alpha = int(255 * alpha_factor)
+                pygame.draw.rect(
+                    work_surface, (r, g, b, body_alpha), (rx, ry_horizon, rw, rh)
+                )
+
+                # 3. LUCES GLOW (ADITIVO)
+                halo_alpha = int(80 * alpha_factor)
+                # Glow abajo
+                pygame.draw.rect(
+                    glow_surface,
+                    (r, g, b, halo_alpha),
+                    (rx - 5, ry_horizon, rw + 10, rh),
+                )
+
+                # Núcleo brillante
+                core_w = max(1, rw // 2)
+                core_x = rx + (rw - core_w) // 2
+                core_alpha = int(150 * alpha_factor)
+                core_color = (
+                    min(255, r + 100),
+                    min(255, g + 100),
+                    min(255, b + 100),
+                    core_alpha,
+                )
+
+                pygame.draw.rect(
+                    glow_surface, core_color, (core_x, ry_horizon, core_w, rh)
+                )
+
+        # Fusión
+        work_surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_RGBA_ADD)
+
+        # --- FUSIÓN FINAL ---
+        # Sumamos la luz de glow_surface a la pantalla principal
+        surface.blit(glow_surface, (0, 0), special_flags=pygame.BLEND_ADD)
+
+        # --- Partículas 3D (CORREGIDO) ---
+        # Flotando alrededor con movimiento y VIDA
+        if bpm_pulse > 0.5 and rng.random() < 0.2:
+            r, g, b, _ = spectrum._get_safe_color(rng.randint(0, 63), 1.0, 1.0)
+            self.particles_3d.spawn(
+                x=center_x + rng.uniform(-300, 300),
+                y=center_y + rng.uniform(-100, 100),
+                z=rng.uniform(200, 600),
+                vx=rng.uniform(-1, 1),  # Velocidad X
+                vy=rng.uniform(-1, 1),  # Velocidad Y
+                vz=rng.uniform(-5, -15),  # Velocidad Z (hacia la cámara)
+                life=1.0,
+                r=r,
+                g=g,
+                b=b,
+            )
+
+        # --- Actualizar y dibujar las partículas 3D ---
+        # (mueve las partículas, reduce su vida y retira las muertas)
+        pool = self.particles_3d
+        pool.update(0.02)
+
+        # Proyección
+        zs = pool.column("z")
+        if pool.vectorized:
+            scale_p = FOV / np.maximum(zs, 10.0)
+            sx = (center_x + (pool.column("x") - center_x) * scale_p).astype(int)
+            sy = (center_y + (pool.column("y") - center_y) * scale_p).astype(int)
+            radii = np.maximum(1, (2 * scale_p).astype(int))
+            radii[
+                (zs <= 10)
+                | (sx < 0)
+                | (sx >= spectrum.w)
+                | (sy < 0)
+                | (sy >= spectrum.h)
+            ] = 0
+            alphas = (255 * pool.column("life")).astype(int)
+        else:
+            sx, sy, radii = [], [], []
+            for x, y, z in zip(pool.column("x"), pool.column("y"), zs):
+                scale_p = FOV / max(z, 10.0)
+                px = int(center_x + (x - center_x) * scale_p)
+                py = int(center_y + (y - center_y) * scale_p)
+                visible = z > 10 and 0 <= px < spectrum.w and 0 <= py < spectrum.h
+                sx.append(px)
+                sy.append(py)
+                radii.append(max(1, int(2 * scale_p)) if visible else 0)
+            alphas = [int(255 * v) for v in pool.column("life")]
+
+        draw_circles(
+            surface,
+            sx,
+            sy,
+            radii,
+            (pool.column("r"), pool.column("g"), pool.column("b")),
+            alphas,
+        )
+
+
+# Formato -> visualizador (MOD y S3M comparten instancia)
+VISUALIZERS = {
+    "mp3": MagmaVisualizer,
+    "mod": TrackerBarsVisualizer,
+    "s3m": TrackerBarsVisualizer,
+    "ogg": MirrorBarsVisualizer,
+    "xm": MeasureBarsVisualizer,
+    "it": Neon3DVisualizer,
+}